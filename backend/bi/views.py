@@ -62,26 +62,19 @@ class SalesStatisticsView(APIView):
                 if entry['period']:
                     entry['period'] = entry['period'].strftime('%Y-%m') if group_by == 'month' else entry['period'].strftime('%Y')
         else:
-            # Berechne Umsatz über Positionen
+            # Umsatz aus den gespeicherten Auftragssummen (netto inkl. Lieferkosten)
             data = []
-            periods = orders.values('period').distinct().order_by('period')
+            periods = orders.values('period').annotate(
+                revenue=Sum('total_net')
+            ).order_by('period')
             
             for period_entry in periods:
                 period = period_entry['period']
                 if not period:
                     continue
-                period_orders = orders.filter(period=period)
-                total_revenue = Decimal('0')
-                
-                for order in period_orders:
-                    items_total = order.items.aggregate(
-                        total=Sum(F('quantity') * F('final_price'))
-                    )['total'] or Decimal('0')
-                    total_revenue += items_total + (order.delivery_cost or Decimal('0'))
-                
                 data.append({
                     'period': period.strftime('%Y-%m') if group_by == 'month' else period.strftime('%Y'),
-                    'value': float(total_revenue)
+                    'value': float(period_entry['revenue'] or Decimal('0'))
                 })
 
         # Zusammenfassung
@@ -92,16 +85,11 @@ class SalesStatisticsView(APIView):
         }
 
         # Berechne Gesamtumsatz
-        total_revenue = Decimal('0')
-        for order in CustomerOrder.objects.filter(
+        total_revenue = CustomerOrder.objects.filter(
             order_date__gte=start_date,
             order_date__lte=end_date,
             status__in=['berechnet', 'bezahlt', 'abgeschlossen']
-        ):
-            items_total = order.items.aggregate(
-                total=Sum(F('quantity') * F('final_price'))
-            )['total'] or Decimal('0')
-            total_revenue += items_total + (order.delivery_cost or Decimal('0'))
+        ).aggregate(total=Sum('total_net'))['total'] or Decimal('0')
         summary['total_revenue'] = float(total_revenue)
 
         return Response({
@@ -613,18 +601,12 @@ class SalesByCustomerView(APIView):
             'customer__last_name',
             'customer__customer_number'
         ).annotate(
-            order_count=Count('id')
+            order_count=Count('id'),
+            revenue=Sum('total_net')
         )
 
         for entry in customer_orders:
-            cust_orders = orders.filter(customer_id=entry['customer_id'])
-            total_revenue = Decimal('0')
-            
-            for order in cust_orders:
-                items_total = order.items.aggregate(
-                    total=Sum(F('quantity') * F('final_price'))
-                )['total'] or Decimal('0')
-                total_revenue += items_total + (order.delivery_cost or Decimal('0'))
+            total_revenue = entry['revenue'] or Decimal('0')
             
             # Kundenname zusammensetzen
             customer_name = f"{entry['customer__first_name'] or ''} {entry['customer__last_name'] or ''}".strip()
@@ -748,22 +730,8 @@ class QuotationForecastView(APIView):
         total_value = Decimal('0')
 
         for quote in quotations.select_related('customer'):
-            # Calculate total value correctly using subtotal logic
-            quote_value = Decimal('0')
-            for item in quote.items.all():
-                if item.uses_system_price and quote.system_price:
-                    # Item uses system price
-                    quote_value += quote.system_price
-                elif item.is_group_header and item.sale_price:
-                    # Group header with manual sale price
-                    quote_value += item.sale_price
-                else:
-                    # Normal item: quantity * unit_price * (1 - discount_percent/100)
-                    price_after_discount = item.unit_price * (Decimal('1') - item.discount_percent / Decimal('100'))
-                    quote_value += item.quantity * price_after_discount
-            
-            # Add delivery cost
-            quote_value += (quote.delivery_cost or Decimal('0'))
+            # Gespeicherte Nettosumme (inkl. Systempreis und Lieferkosten, siehe core.pricing)
+            quote_value = quote.total_net
             total_value += quote_value
 
             customer_name = None
@@ -783,7 +751,8 @@ class QuotationForecastView(APIView):
         quotations_annotated = quotations.annotate(period=TruncMonth('valid_until'))
         
         monthly_data = quotations_annotated.values('period').annotate(
-            count=Count('id')
+            count=Count('id'),
+            value=Sum('total_net')
         ).order_by('period')
 
         result = []
@@ -791,14 +760,9 @@ class QuotationForecastView(APIView):
             period = entry['period']
             if not period:
                 continue
-            period_str = period.strftime('%Y-%m')
-            period_quotes = [q for q in quotation_data 
-                           if q['valid_until'] and q['valid_until'].startswith(period_str)]
-            period_value = sum(q['value'] for q in period_quotes)
-            
             result.append({
-                'period': period_str,
-                'value': period_value,
+                'period': period.strftime('%Y-%m'),
+                'value': float(entry['value'] or Decimal('0')),
                 'count': entry['count']
             })
 
@@ -853,30 +817,12 @@ class CombinedForecastView(APIView):
         )
 
         quotation_by_month = {}
-        for quote in quotations:
-            period = quote.valid_until.strftime('%Y-%m') if quote.valid_until else None
-            if period:
-                # Calculate total value correctly using subtotal logic
-                quote_value = Decimal('0')
-                for item in quote.items.all():
-                    if item.uses_system_price and quote.system_price:
-                        # Item uses system price
-                        quote_value += quote.system_price
-                    elif item.is_group_header and item.sale_price:
-                        # Group header with manual sale price
-                        quote_value += item.sale_price
-                    else:
-                        # Normal item: quantity * unit_price * (1 - discount_percent/100)
-                        price_after_discount = item.unit_price * (Decimal('1') - item.discount_percent / Decimal('100'))
-                        quote_value += item.quantity * price_after_discount
-                
-                # Add delivery cost
-                quote_value += (quote.delivery_cost or Decimal('0'))
-                quote_value = float(quote_value)
-                
-                if period not in quotation_by_month:
-                    quotation_by_month[period] = 0
-                quotation_by_month[period] += quote_value
+        monthly_quotations = quotations.annotate(
+            period=TruncMonth('valid_until')
+        ).values('period').annotate(value=Sum('total_net'))
+        for entry in monthly_quotations:
+            if entry['period']:
+                quotation_by_month[entry['period'].strftime('%Y-%m')] = float(entry['value'] or Decimal('0'))
 
         result = []
         for month in months:
@@ -928,10 +874,7 @@ class ExpectedPaymentsView(APIView):
                 payment_terms_days = 30
                 expected_date = invoice_date + timedelta(days=payment_terms_days)
                 
-                items_total = order.items.aggregate(
-                    total=Sum(F('quantity') * F('final_price'))
-                )['total'] or Decimal('0')
-                order_value = items_total + (order.delivery_cost or Decimal('0'))
+                order_value = order.total_net
                 
                 customer_name = None
                 if order.customer:
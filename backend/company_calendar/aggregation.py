@@ -0,0 +1,137 @@
+"""
+Zusammenführung der Kalenderdaten für ein Zeitfenster.
+
+Neben den Kalenderterminen (Serien aufgelöst, siehe recurrence.py) kommen
+genehmigte Urlaube sowie Liefertermine von Bestellungen und Kundenaufträgen
+dazu - je Quelle eine Abfrage mit select_related.
+
+calendar_version() fasst den Stand aller beteiligten Tabellen (größtes
+updated_at und Anzahl, damit auch Löschungen auffallen) zusammen; daraus
+entstehen die ETags des aggregierten Endpunkts und des iCalendar-Feeds.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from .models import CalendarEvent
+from .recurrence import expand
+
+# Größter Zeitraum für eine Abfrage
+MAX_WINDOW_DAYS = 400
+
+
+def _user_name(user):
+    return (user.get_full_name() or user.username) if user else None
+
+
+def _sources():
+    from customer_orders.models import CustomerOrder
+    from orders.models import Order
+    from users.models import VacationRequest
+    return [CalendarEvent, VacationRequest, Order, CustomerOrder]
+
+
+def calendar_version():
+    """
+    Stand aller Tabellen, aus denen der Kalender zusammengesetzt wird.
+
+    Returns:
+        (version, last_changed) - Versions-String und jüngstes updated_at (oder None)
+    """
+    parts, last_changed = [], None
+    for model in _sources():
+        state = model.objects.aggregate(changed=Max('updated_at'), count=Count('pk'))
+        changed = state['changed']
+        parts.append(f"{model._meta.label}:{state['count']}:{changed.isoformat() if changed else '-'}")
+        if changed and (last_changed is None or changed > last_changed):
+            last_changed = changed
+    return '|'.join(parts), last_changed
+
+
+def calendar_etag(version, *args):
+    """Starker ETag aus Tabellenstand und den Parametern der Anfrage"""
+    digest = hashlib.sha256('|'.join([version, *[str(arg) for arg in args]]).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _system_event(key, title, event_type, start_date, end_date, created_by=None, assigned_to=None):
+    return {
+        'id': key,
+        'title': title,
+        'event_type': event_type,
+        'event_type_display': dict(CalendarEvent.EVENT_TYPE_CHOICES)[event_type],
+        'color': CalendarEvent.EVENT_TYPE_COLORS[event_type],
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'start_time': None,
+        'end_time': None,
+        'is_all_day': True,
+        'created_by': created_by.id if created_by else None,
+        'created_by_name': _user_name(created_by),
+        'assigned_to': assigned_to.id if assigned_to else None,
+        'assigned_to_name': _user_name(assigned_to),
+        'is_system_generated': True
+    }
+
+
+def aggregate_events(queryset, start_date, end_date, event_types=None, user_id=None):
+    """
+    Alle Termine im Zeitfenster als Liste von Dicts (Format des
+    CalendarEventListSerializer).
+
+    Args:
+        queryset: Kalendertermine (bereits auf das Zeitfenster gefiltert)
+        event_types: nur diese Termintypen (None = alle)
+        user_id: nur Termine, die der Benutzer erstellt hat oder die ihm zugewiesen sind
+    """
+    from customer_orders.models import CustomerOrder
+    from orders.models import Order
+    from users.models import VacationRequest
+    from .serializers import CalendarEventListSerializer
+
+    events = list(CalendarEventListSerializer(expand(queryset, start_date, end_date), many=True).data)
+
+    # Urlaubstage
+    if not event_types or 'vacation' in event_types:
+        vacations = VacationRequest.objects.filter(
+            status='approved',
+            start_date__lte=end_date,
+            end_date__gte=start_date
+        ).select_related('user')
+        for vac in vacations:
+            events.append(_system_event(
+                f'vacation_{vac.id}', f'Urlaub: {_user_name(vac.user)}', 'vacation',
+                vac.start_date, vac.end_date, created_by=vac.user, assigned_to=vac.user
+            ))
+
+    # Liefertermine von Bestellungen
+    if not event_types or 'order_delivery' in event_types:
+        orders = Order.objects.filter(
+            expected_delivery_date__gte=start_date,
+            expected_delivery_date__lte=end_date
+        ).exclude(status__in=['cancelled', 'delivered']).select_related('supplier', 'created_by')
+        for order in orders:
+            events.append(_system_event(
+                f'order_{order.id}',
+                f'Lieferung: {order.order_number} ({order.supplier.company_name if order.supplier else "?"})',
+                'order_delivery', order.expected_delivery_date, order.expected_delivery_date,
+                created_by=order.created_by
+            ))
+
+    # Liefertermine von Kundenaufträgen
+    if not event_types or 'customer_order_delivery' in event_types:
+        customer_orders = CustomerOrder.objects.filter(
+            delivery_date__gte=start_date,
+            delivery_date__lte=end_date
+        ).exclude(status__in=['cancelled', 'delivered']).select_related('customer', 'created_by')
+        for co in customer_orders:
+            events.append(_system_event(
+                f'customer_order_{co.id}',
+                f'Kundenlieferung: {co.order_number} ({co.customer if co.customer else "?"})',
+                'customer_order_delivery', co.delivery_date, co.delivery_date,
+                created_by=co.created_by
+            ))
+
+    if user_id:
+        events = [e for e in events if e.get('created_by') == user_id or e.get('assigned_to') == user_id]
+    return events
@@ -0,0 +1,110 @@
+"""
+iCalendar-Export (RFC 5545) für Kalender-Abonnements.
+
+Externe Kalenderprogramme abonnieren den Firmenkalender über eine
+persönliche Feed-URL (feed_token). Der Token enthält die Benutzer-ID und
+eine Prüfsumme über das Passwort-Hash des Benutzers - eine Passwortänderung
+macht bestehende Feed-URLs damit ungültig.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+FEED_SALT = 'company_calendar.ics.feed'
+PRODID = '-//VERP//Firmenkalender//DE'
+
+
+def feed_token(user):
+    digest = salted_hmac(FEED_SALT, f'{user.pk}:{user.password}').hexdigest()[:32]
+    return f'{user.pk}-{digest}'
+
+
+def user_for_token(token):
+    """Aktiver Benutzer zum Feed-Token oder None"""
+    user_id, _, digest = (token or '').partition('-')
+    if not user_id.isdigit() or not digest:
+        return None
+    user = get_user_model().objects.filter(pk=int(user_id), is_active=True).first()
+    if user is None or not constant_time_compare(feed_token(user), token):
+        return None
+    return user
+
+
+def _escape(value):
+    return (str(value or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    """Zeilen nach 75 Oktetts umbrechen (Fortsetzung mit Leerzeichen)"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, current = [], b''
+    for char in line:
+        data = char.encode('utf-8')
+        if len(current) + len(data) > (75 if not parts else 74):
+            parts.append(current.decode('utf-8'))
+            current = b''
+        current += data
+    parts.append(current.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _local(day, moment):
+    return timezone.make_aware(datetime.combine(day, moment))
+
+
+def _event_lines(event, stamp):
+    start = date.fromisoformat(str(event['start_date']))
+    end = date.fromisoformat(str(event['end_date'] or event['start_date']))
+    occurrence = event.get('occurrence_date')
+    uid = f"{event['id']}-{occurrence}" if occurrence else str(event['id'])
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}@verp-calendar',
+        f'DTSTAMP:{stamp}',
+        f"SUMMARY:{_escape(event['title'])}",
+        f"CATEGORIES:{_escape(event.get('event_type_display') or event['event_type'])}",
+    ]
+    if event.get('is_all_day') or not event.get('start_time'):
+        lines.append(f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}")
+        lines.append(f"DTEND;VALUE=DATE:{(end + timedelta(days=1)).strftime('%Y%m%d')}")
+    else:
+        start_time = time.fromisoformat(str(event['start_time']))
+        end_time = time.fromisoformat(str(event['end_time'])) if event.get('end_time') else start_time
+        lines.append(f'DTSTART:{_utc(_local(start, start_time))}')
+        lines.append(f'DTEND:{_utc(_local(end, end_time))}')
+    if event.get('created_by_name'):
+        lines.append(f"DESCRIPTION:{_escape('Erstellt von ' + event['created_by_name'])}")
+    lines.append('END:VEVENT')
+    return lines
+
+
+def build_calendar(events, stamp, name='Firmenkalender'):
+    """
+    iCalendar-Text für Termine im Format von aggregation.aggregate_events().
+
+    Args:
+        stamp: Zeitpunkt für DTSTAMP (Stand der Daten, damit gleiche Daten
+            byte-gleiche Feeds ergeben)
+    """
+    stamp = _utc(stamp)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for event in events:
+        lines.extend(_event_lines(event, stamp))
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
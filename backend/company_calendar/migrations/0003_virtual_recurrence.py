@@ -0,0 +1,91 @@
+# Generated by Django 5.0 on 2026-10-19 01:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+COMPARED_FIELDS = ['title', 'description', 'event_type', 'start_time', 'end_time', 'is_all_day', 'assigned_to_id', 'is_active']
+
+
+def collapse_series(apps, schema_editor):
+    """
+    Bisher wurden Serien als einzelne Zeilen angelegt. Unveränderte Termine
+    entfallen (sie werden jetzt berechnet), geänderte bleiben als Ausnahme
+    mit original_date, gelöschte werden als ausgelassene Termine vermerkt.
+    """
+    from company_calendar.recurrence import occurrence_dates
+    CalendarEvent = apps.get_model('company_calendar', 'CalendarEvent')
+
+    series = CalendarEvent.objects.filter(parent_event__isnull=True).exclude(recurrence_type='none')
+    # Serien ohne Enddatum wurden bisher nie vervielfältigt
+    series.filter(recurrence_end_date__isnull=True).update(recurrence_type='none')
+
+    for parent in series.filter(recurrence_end_date__isnull=False).iterator():
+        expected = occurrence_dates(parent, parent.start_date, parent.recurrence_end_date)
+        duration = parent.end_date - parent.start_date if parent.end_date else None
+        unchanged, moved, covered = [], [], {parent.start_date}
+        for child in CalendarEvent.objects.filter(parent_event=parent):
+            if child.start_date not in expected:
+                moved.append(child)
+                continue
+            covered.add(child.start_date)
+            same = all(getattr(child, field) == getattr(parent, field) for field in COMPARED_FIELDS)
+            if same and (child.end_date - child.start_date if child.end_date else None) == duration:
+                unchanged.append(child.pk)
+            else:
+                child.original_date = child.start_date
+                child.save(update_fields=['original_date'])
+
+        # Verschobene Termine ersetzen den nächstgelegenen nicht belegten Termin
+        missing = sorted(set(expected) - covered)
+        for child in moved:
+            if missing:
+                original = min(missing, key=lambda value: abs((value - child.start_date).days))
+                missing.remove(original)
+                child.original_date = original
+            child.recurrence_type = 'none'
+            child.save(update_fields=['original_date', 'recurrence_type'])
+
+        CalendarEvent.objects.filter(pk__in=unchanged).delete()
+        if missing:
+            parent.recurrence_exceptions = [value.isoformat() for value in missing]
+            parent.save(update_fields=['recurrence_exceptions'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_calendar', '0002_calendarevent_parent_event_and_more'),
+        ('customer_orders', '0016_search_text'),
+        ('orders', '0015_order_offer_document'),
+        ('users', '0042_user_can_read_sales_sql_angebote_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarevent',
+            name='original_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Ersetzter Serientermin'),
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='recurrence_exceptions',
+            field=models.JSONField(blank=True, default=list, verbose_name='Ausgelassene Termine'),
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='recurrence_rule',
+            field=models.CharField(blank=True, default='', max_length=500, verbose_name='Wiederholungsregel (RRULE)'),
+        ),
+        migrations.AlterField(
+            model_name='calendarevent',
+            name='recurrence_type',
+            field=models.CharField(choices=[('none', 'Keine Wiederholung'), ('daily', 'Täglich'), ('weekly', 'Wöchentlich'), ('monthly', 'Monatlich'), ('yearly', 'Jährlich'), ('custom', 'Benutzerdefiniert')], default='none', max_length=20, verbose_name='Wiederholung'),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['parent_event', 'original_date'], name='company_cal_parent__7e21d0_idx'),
+        ),
+        migrations.RunPython(collapse_series, migrations.RunPython.noop),
+    ]
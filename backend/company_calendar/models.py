@@ -67,6 +67,7 @@ class CalendarEvent(models.Model):
         ('weekly', 'Wöchentlich'),
         ('monthly', 'Monatlich'),
         ('yearly', 'Jährlich'),
+        ('custom', 'Benutzerdefiniert'),
     ]
     recurrence_type = models.CharField(
         max_length=20,
@@ -79,6 +80,20 @@ class CalendarEvent(models.Model):
         null=True,
         verbose_name='Wiederholen bis'
     )
+    # Serien werden nicht als einzelne Zeilen gespeichert, sondern beim Abfragen
+    # berechnet (siehe recurrence.py)
+    recurrence_rule = models.CharField(
+        max_length=500,
+        blank=True,
+        default='',
+        verbose_name='Wiederholungsregel (RRULE)'
+    )
+    recurrence_exceptions = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Ausgelassene Termine'
+    )
+    # Einzeln geänderter Termin einer Serie: parent_event + ersetztes Datum
     parent_event = models.ForeignKey(
         'self',
         on_delete=models.CASCADE,
@@ -87,6 +102,11 @@ class CalendarEvent(models.Model):
         related_name='recurring_instances',
         verbose_name='Ursprünglicher Termin'
     )
+    original_date = models.DateField(
+        blank=True,
+        null=True,
+        verbose_name='Ersetzter Serientermin'
+    )
     
     # Zuordnung
     created_by = models.ForeignKey(
@@ -144,6 +164,9 @@ class CalendarEvent(models.Model):
         verbose_name = 'Kalendereintrag'
         verbose_name_plural = 'Kalendereinträge'
         ordering = ['start_date', 'start_time']
+        indexes = [
+            models.Index(fields=['parent_event', 'original_date']),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_event_type_display()}) - {self.start_date}"
@@ -158,76 +181,18 @@ class CalendarEvent(models.Model):
         if not self.end_date:
             self.end_date = self.start_date
         
-        # Speichere zuerst das Event selbst
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        # Eine eigene RRULE ohne gewählten Typ ist eine benutzerdefinierte Serie
+        if self.recurrence_rule and self.recurrence_type == 'none':
+            self.recurrence_type = 'custom'
         
-        # Erstelle wiederkehrende Termine nur beim ersten Speichern
-        if is_new and self.recurrence_type != 'none' and not self.parent_event and self.recurrence_end_date:
-            self._create_recurring_events()
+        super().save(*args, **kwargs)
     
-    def _create_recurring_events(self):
-        """Erstellt wiederkehrende Termine basierend auf recurrence_type."""
-        from datetime import timedelta
-        from django.db import transaction
-        
-        if self.recurrence_type == 'none' or not self.recurrence_end_date:
-            return
-        
-        current_date = self.start_date
-        end_date = self.recurrence_end_date
-        
-        # Lösche bestehende wiederkehrende Termine
-        self.recurring_instances.all().delete()
-        
-        events_to_create = []
-        
-        while current_date <= end_date:
-            if current_date != self.start_date:  # Überspringe das ursprüngliche Datum
-                # Berechne das Enddatum für diesen Termin
-                if self.end_date and self.end_date != self.start_date:
-                    # Multi-Day Event
-                    duration = (self.end_date - self.start_date).days
-                    event_end_date = current_date + timedelta(days=duration)
-                else:
-                    event_end_date = current_date
-                
-                # Berechne Zeiten falls nötig
-                event_start_time = self.start_time
-                event_end_time = self.end_time
-                
-                events_to_create.append(CalendarEvent(
-                    title=self.title,
-                    description=self.description,
-                    event_type=self.event_type,
-                    start_date=current_date,
-                    end_date=event_end_date,
-                    start_time=event_start_time,
-                    end_time=event_end_time,
-                    is_all_day=self.is_all_day,
-                    created_by=self.created_by,
-                    assigned_to=self.assigned_to,
-                    parent_event=self,
-                    is_system_generated=False
-                ))
-            
-            # Berechne nächstes Datum basierend auf recurrence_type
-            if self.recurrence_type == 'daily':
-                current_date += timedelta(days=1)
-            elif self.recurrence_type == 'weekly':
-                current_date += timedelta(weeks=1)
-            elif self.recurrence_type == 'monthly':
-                # Füge einen Monat hinzu
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
-            elif self.recurrence_type == 'yearly':
-                current_date = current_date.replace(year=current_date.year + 1)
-        
-        # Bulk create für bessere Performance
-        if events_to_create:
-            CalendarEvent.objects.bulk_create(events_to_create)
+    def add_recurrence_exception(self, occurrence_date):
+        """Lässt einen Termin der Serie aus (eine Zeile, keine Einzeltermine)"""
+        value = occurrence_date.isoformat()
+        if value not in self.recurrence_exceptions:
+            self.recurrence_exceptions = sorted(self.recurrence_exceptions + [value])
+            self.save(update_fields=['recurrence_exceptions', 'updated_at'])
 
 
 class EventReminder(models.Model):
@@ -0,0 +1,163 @@
+"""
+Wiederholungsregeln für Serientermine.
+
+Eine Serie wird nur einmal gespeichert (der Serientermin selbst) - die
+einzelnen Termine werden erst beim Abfragen für das angefragte Zeitfenster
+berechnet (RRULE nach RFC 5545, über python-dateutil):
+
+    recurrence_rule        - RRULE ohne DTSTART, z.B. 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH';
+                             leer = einfache Regel aus recurrence_type
+    recurrence_end_date    - letztes mögliches Datum (UNTIL), leer = unbegrenzt
+    recurrence_exceptions  - ausgelassene Termine (Liste von ISO-Daten)
+
+Einzeln geänderte Termine einer Serie sind eigene Zeilen mit parent_event
+(Serie) und original_date (ersetzter Termin); die Serie lässt diese Termine
+bei der Berechnung aus.
+"""
+import copy
+from datetime import date, datetime, time
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rrulestr
+from django.db.models import Q
+
+FREQUENCIES = {
+    'daily': DAILY,
+    'weekly': WEEKLY,
+    'monthly': MONTHLY,
+    'yearly': YEARLY,
+}
+
+# Sicherung gegen unbegrenzte Serien in sehr großen Zeitfenstern
+MAX_OCCURRENCES = 5000
+
+
+class RecurrenceError(ValueError):
+    """Ungültige Wiederholungsregel"""
+
+
+def is_series(event):
+    """Serientermin (nicht eine einzeln geänderte Ausnahme daraus)"""
+    return event.recurrence_type != 'none' and event.parent_event_id is None
+
+
+def window_filter(queryset, start_date=None, end_date=None):
+    """
+    Filtert Termine auf Beginn im Zeitraum; Serien, die vorher begonnen haben
+    und noch laufen, bleiben enthalten (ihre Termine berechnet expand()).
+    """
+    if start_date:
+        series = Q(parent_event__isnull=True) & ~Q(recurrence_type='none')
+        queryset = queryset.filter(
+            Q(start_date__gte=start_date)
+            | series & (Q(recurrence_end_date__isnull=True) | Q(recurrence_end_date__gte=start_date))
+        )
+    if end_date:
+        queryset = queryset.filter(start_date__lte=end_date)
+    return queryset
+
+
+def _as_datetime(value):
+    return datetime.combine(value, time.min)
+
+
+def build_rule(event):
+    """dateutil-rrule für einen Serientermin"""
+    dtstart = _as_datetime(event.start_date)
+    until = _as_datetime(event.recurrence_end_date) if event.recurrence_end_date else None
+    if event.recurrence_rule:
+        try:
+            rule = rrulestr(event.recurrence_rule, dtstart=dtstart)
+        except (ValueError, TypeError) as e:
+            raise RecurrenceError(f'Ungültige Wiederholungsregel: {e}') from e
+        if not isinstance(rule, rrule):
+            raise RecurrenceError('Nur eine einzelne RRULE wird unterstützt')
+        rule_parts = event.recurrence_rule.upper()
+        if until and 'UNTIL=' not in rule_parts and 'COUNT=' not in rule_parts:
+            rule = rule.replace(until=until)
+        return rule
+    try:
+        frequency = FREQUENCIES[event.recurrence_type]
+    except KeyError:
+        raise RecurrenceError(f'Unbekannte Wiederholung: {event.recurrence_type}')
+    return rrule(frequency, dtstart=dtstart, until=until)
+
+
+def validate_rule(value, start_date=None):
+    """Prüft eine RRULE (für Serializer); gibt die normalisierte Regel zurück"""
+    value = (value or '').strip()
+    if value.upper().startswith('RRULE:'):
+        value = value[6:]
+    if not value:
+        return ''
+    try:
+        rule = rrulestr(value, dtstart=_as_datetime(start_date or date.today()))
+    except (ValueError, TypeError) as e:
+        raise RecurrenceError(f'Ungültige Wiederholungsregel: {e}') from e
+    if not isinstance(rule, rrule):
+        raise RecurrenceError('Nur eine einzelne RRULE wird unterstützt')
+    return value.upper()
+
+
+def exception_dates(event):
+    return {date.fromisoformat(value) for value in event.recurrence_exceptions or []}
+
+
+def occurrence_dates(event, window_start, window_end, skip=()):
+    """
+    Startdaten der Termine einer Serie im Zeitfenster (jeweils inklusive),
+    ohne ausgelassene Termine und ohne die Daten in `skip` (ersetzte Termine).
+    """
+    if window_end < event.start_date:
+        return []
+    if event.recurrence_end_date and window_start > event.recurrence_end_date:
+        return []
+    excluded = exception_dates(event) | set(skip)
+    dates = []
+    for value in build_rule(event).xafter(_as_datetime(max(window_start, event.start_date)), inc=True):
+        value = value.date()
+        if value > window_end or len(dates) >= MAX_OCCURRENCES:
+            break
+        if value not in excluded:
+            dates.append(value)
+    return dates
+
+
+def occurrence(event, start_date):
+    """Kopie des Serientermins für einen einzelnen Termin (nicht gespeichert)"""
+    instance = copy.copy(event)
+    duration = (event.end_date or event.start_date) - event.start_date
+    instance.start_date = start_date
+    instance.end_date = start_date + duration
+    instance.occurrence_date = start_date
+    return instance
+
+
+def expand(events, window_start, window_end):
+    """
+    Ersetzt die Serientermine in `events` durch ihre Termine im Zeitfenster.
+
+    Einzeltermine und geänderte Ausnahmen bleiben unverändert; die von
+    Ausnahmen ersetzten Daten werden bei der Serie ausgelassen (eine
+    Abfrage für alle Serien). Das Ergebnis ist nach Startdatum und -zeit
+    sortiert.
+    """
+    from .models import CalendarEvent
+
+    events = list(events)
+    series_ids = [event.pk for event in events if is_series(event)]
+    replaced = {}
+    if series_ids:
+        for parent_id, original_date in CalendarEvent.objects.filter(
+            parent_event_id__in=series_ids, original_date__isnull=False
+        ).values_list('parent_event_id', 'original_date'):
+            replaced.setdefault(parent_id, set()).add(original_date)
+
+    result = []
+    for event in events:
+        if is_series(event):
+            skip = replaced.get(event.pk, ())
+            result.extend(occurrence(event, value) for value in occurrence_dates(event, window_start, window_end, skip))
+        else:
+            result.append(event)
+    result.sort(key=lambda e: (e.start_date, e.start_time or time.min, e.pk or 0))
+    return result
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import CalendarEvent, EventReminder
+from .recurrence import RecurrenceError, is_series, validate_rule
 
 User = get_user_model()
 
@@ -33,7 +34,25 @@ class EventReminderSerializer(serializers.ModelSerializer):
         }
 
 
-class CalendarEventSerializer(serializers.ModelSerializer):
+class OccurrenceFieldsMixin(serializers.Serializer):
+    """
+    Felder für berechnete Termine einer Serie: occurrence_date ist das Datum
+    des einzelnen Termins, series_id die ID des Serientermins.
+    """
+    occurrence_date = serializers.SerializerMethodField()
+    series_id = serializers.SerializerMethodField()
+    
+    def get_occurrence_date(self, obj):
+        value = getattr(obj, 'occurrence_date', None)
+        return value.isoformat() if value else None
+    
+    def get_series_id(self, obj):
+        if obj.parent_event_id:
+            return obj.parent_event_id
+        return obj.pk if is_series(obj) else None
+
+
+class CalendarEventSerializer(OccurrenceFieldsMixin, serializers.ModelSerializer):
     created_by_details = UserMinimalSerializer(source='created_by', read_only=True)
     assigned_to_details = UserMinimalSerializer(source='assigned_to', read_only=True)
     event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
@@ -49,7 +68,9 @@ class CalendarEventSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'event_type', 'event_type_display', 'color',
             'start_date', 'end_date', 'start_time', 'end_time', 'is_all_day',
             'recurrence_type', 'recurrence_type_display', 'recurrence_end_date',
-            'parent_event', 'parent_event_details', 'is_recurring',
+            'recurrence_rule', 'recurrence_exceptions',
+            'parent_event', 'parent_event_details', 'original_date', 'is_recurring',
+            'occurrence_date', 'series_id',
             'created_by', 'created_by_details', 'assigned_to', 'assigned_to_details',
             'vacation_request', 'order', 'customer_order',
             'is_system_generated', 'is_active',
@@ -66,7 +87,8 @@ class CalendarEventSerializer(serializers.ModelSerializer):
                 'id': obj.parent_event.id,
                 'title': obj.parent_event.title,
                 'recurrence_type': obj.parent_event.recurrence_type,
-                'recurrence_end_date': obj.parent_event.recurrence_end_date
+                'recurrence_end_date': obj.parent_event.recurrence_end_date,
+                'recurrence_rule': obj.parent_event.recurrence_rule
             }
         return None
 
@@ -84,10 +106,23 @@ class CalendarEventCreateSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'event_type',
             'start_date', 'end_date', 'start_time', 'end_time', 'is_all_day',
-            'recurrence_type', 'recurrence_end_date',
+            'recurrence_type', 'recurrence_end_date', 'recurrence_rule',
             'assigned_to', 'reminders'
         ]
     
+    def validate(self, attrs):
+        start_date = attrs.get('start_date') or getattr(self.instance, 'start_date', None)
+        if 'recurrence_rule' in attrs:
+            try:
+                attrs['recurrence_rule'] = validate_rule(attrs['recurrence_rule'], start_date)
+            except RecurrenceError as e:
+                raise serializers.ValidationError({'recurrence_rule': str(e)})
+        recurrence_type = attrs.get('recurrence_type', getattr(self.instance, 'recurrence_type', 'none'))
+        recurrence_rule = attrs.get('recurrence_rule', getattr(self.instance, 'recurrence_rule', ''))
+        if recurrence_type == 'custom' and not recurrence_rule:
+            raise serializers.ValidationError({'recurrence_rule': 'Für eine benutzerdefinierte Wiederholung ist eine Regel erforderlich.'})
+        return attrs
+    
     def create(self, validated_data):
         reminders_data = validated_data.pop('reminders', [])
         validated_data['created_by'] = self.context['request'].user
@@ -115,7 +150,7 @@ class CalendarEventCreateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class CalendarEventListSerializer(serializers.ModelSerializer):
+class CalendarEventListSerializer(OccurrenceFieldsMixin, serializers.ModelSerializer):
     """Minimaler Serializer für Kalenderübersicht."""
     event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
     color = serializers.CharField(read_only=True)
@@ -128,7 +163,7 @@ class CalendarEventListSerializer(serializers.ModelSerializer):
             'id', 'title', 'event_type', 'event_type_display', 'color',
             'start_date', 'end_date', 'start_time', 'end_time', 'is_all_day',
             'created_by', 'created_by_name', 'assigned_to', 'assigned_to_name',
-            'is_system_generated'
+            'is_system_generated', 'recurrence_type', 'parent_event', 'occurrence_date', 'series_id'
         ]
     
     def get_created_by_name(self, obj):
@@ -1,3 +1,131 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import CalendarEvent
+
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('kalender', email='kalender@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/calendar/events/', {
+            'title': 'VS-Meeting', 'event_type': 'vs_meeting', 'start_date': '2026-01-05',
+            'recurrence_type': 'weekly', 'recurrence_end_date': '2026-12-31',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.series = CalendarEvent.objects.get()
+
+    def aggregated(self, start='2026-02-01', end='2026-02-28'):
+        response = self.client.get('/api/calendar/events/aggregated/', {
+            'start_date': start, 'end_date': end, 'event_type': 'vs_meeting'
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_series_is_stored_once_and_expanded_per_window(self):
+        self.assertEqual(CalendarEvent.objects.count(), 1)
+        events = self.aggregated()
+        self.assertEqual([e['start_date'] for e in events], ['2026-02-02', '2026-02-09', '2026-02-16', '2026-02-23'])
+        self.assertEqual({e['series_id'] for e in events}, {self.series.pk})
+
+        response = self.client.get('/api/calendar/events/', {'start_date': '2026-12-20', 'end_date': '2027-01-31'})
+        self.assertEqual([e['occurrence_date'] for e in response.data['results']], ['2026-12-21', '2026-12-28'])
+
+    def test_single_occurrence_edit_and_delete(self):
+        url = f'/api/calendar/events/{self.series.pk}/'
+        response = self.client.put(url + '?occurrence_date=2026-02-09', {
+            'title': 'VS-Meeting (verschoben)', 'event_type': 'vs_meeting', 'start_date': '2026-02-10',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.delete(url + '?occurrence_date=2026-02-16')
+
+        events = self.aggregated()
+        self.assertEqual(
+            [(e['start_date'], e['title']) for e in events],
+            [('2026-02-02', 'VS-Meeting'), ('2026-02-10', 'VS-Meeting (verschoben)'), ('2026-02-23', 'VS-Meeting')]
+        )
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.recurrence_exceptions, ['2026-02-16'])
+
+        response = self.client.put(url + '?occurrence_date=2026-02-11', {'title': 'x', 'start_date': '2026-02-11'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_series_edit_is_a_single_row_update(self):
+        url = f'/api/calendar/events/{self.series.pk}/?update_series=true&occurrence_date=2026-02-09'
+        with self.assertNumQueries(4):
+            # Serie laden, Serie speichern, Ausnahmen übernehmen, Erinnerungen serialisieren
+            response = self.client.put(url, {'title': 'Team-Meeting', 'start_date': '2026-02-10'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.series.refresh_from_db()
+        self.assertEqual((self.series.title, self.series.start_date), ('Team-Meeting', date(2026, 1, 6)))
+        self.assertEqual([e['start_date'] for e in self.aggregated()][:2], ['2026-02-03', '2026-02-10'])
+
+    def test_custom_rule(self):
+        response = self.client.post('/api/calendar/events/', {
+            'title': 'Remote Session', 'event_type': 'vs_meeting', 'start_date': '2026-02-01',
+            'recurrence_rule': 'FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        events = [e for e in self.aggregated() if e['title'] == 'Remote Session']
+        self.assertEqual([e['start_date'] for e in events], ['2026-02-02', '2026-02-05', '2026-02-09', '2026-02-12'])
+
+        response = self.client.post('/api/calendar/events/', {
+            'title': 'Kaputt', 'start_date': '2026-02-01', 'recurrence_rule': 'FREQ=SOMETIMES',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('abo', email='abo@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.series = CalendarEvent.objects.create(
+            title='Jour fixe; Labor', event_type='vs_meeting', start_date=date.today(),
+            recurrence_type='weekly', created_by=self.user,
+        )
+
+    def test_aggregated_etag(self):
+        url = '/api/calendar/events/aggregated/'
+        with self.assertNumQueries(9):
+            # Tabellenstand (4), Termine, Ausnahmen, Urlaube, Bestellungen, Kundenaufträge
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.series.title = 'Jour fixe'
+        self.series.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.get(url, {'start_date': '2026-01-01', 'end_date': '2027-12-31'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ics_feed(self):
+        feed_url = self.client.get('/api/calendar/events/feed_url/').data['url']
+        path = feed_url.split('testserver', 1)[1]
+        client = APIClient()
+
+        response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(r'SUMMARY:Jour fixe\; Labor', body)
+        self.assertGreater(body.count('BEGIN:VEVENT'), 40)
+
+        response = client.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
 
-# Create your tests here.
+        self.user.set_password('neu')
+        self.user.save()
+        self.assertEqual(client.get(path).status_code, 403)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CalendarEventViewSet, EventReminderViewSet
+from .views import CalendarEventViewSet, EventReminderViewSet, calendar_feed
 
 router = DefaultRouter()
 router.register(r'events', CalendarEventViewSet, basename='calendar-event')
 router.register(r'reminders', EventReminderViewSet, basename='event-reminder')
 
 urlpatterns = [
+    path('feed/<str:token>.ics', calendar_feed, name='calendar-feed'),
     path('', include(router.urls)),
 ]
@@ -2,12 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseForbidden
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 from collections import defaultdict
 
 from .models import CalendarEvent, EventReminder
+from .aggregation import MAX_WINDOW_DAYS, aggregate_events, calendar_etag, calendar_version
+from .ics import build_calendar, feed_token, user_for_token
+from .recurrence import expand, is_series, occurrence, occurrence_dates, window_filter
 from .serializers import (
     CalendarEventSerializer, CalendarEventCreateSerializer,
     CalendarEventListSerializer, EventReminderSerializer,
@@ -29,10 +38,8 @@ class CalendarEventViewSet(viewsets.ModelViewSet):
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
         
-        if start_date:
-            queryset = queryset.filter(start_date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(start_date__lte=end_date)
+        # Serien, die vorher begonnen haben, liefern ggf. Termine im Zeitraum
+        queryset = window_filter(queryset, start_date, end_date)
         
         # Filter nach Termintyp (mehrere möglich, kommasepariert)
         event_types = self.request.query_params.get('event_type')
@@ -64,47 +71,124 @@ class CalendarEventViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
+    def _date_range(self, default_current_month=True):
+        """Zeitraum aus ?start_date=&end_date= (Standard: aktueller Monat bzw. None)"""
+        start_date_str = self.request.query_params.get('start_date')
+        end_date_str = self.request.query_params.get('end_date')
+        
+        if not start_date_str or not end_date_str:
+            if not default_current_month:
+                return None, None
+            today = timezone.now().date()
+            start_date = today.replace(day=1)
+            end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        else:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        return start_date, end_date
+    
+    def _occurrence_date(self, series, instance):
+        """
+        Datum des betroffenen Termins einer Serie (?occurrence_date=); ohne
+        Angabe der Serientermin selbst bzw. der von der Ausnahme ersetzte Termin.
+        """
+        value = self.request.query_params.get('occurrence_date')
+        if not value:
+            return instance.original_date if instance.parent_event_id else series.start_date
+        occurrence_date = parse_date(value)
+        if occurrence_date is None or not occurrence_dates(series, occurrence_date, occurrence_date):
+            raise ValidationError({'occurrence_date': 'Kein Termin dieser Serie an diesem Datum.'})
+        return occurrence_date
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Mit ?start_date=&end_date= werden Serien in ihre Termine im Zeitraum
+        aufgelöst, sonst wird jede Serie einmal (als Serientermin) geliefert.
+        """
+        start_date, end_date = self._date_range(default_current_month=False)
+        if start_date is None:
+            return super().list(request, *args, **kwargs)
+        
+        events = expand(self.filter_queryset(self.get_queryset()), start_date, end_date)
+        page = self.paginate_queryset(events)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(events, many=True).data)
+    
     def update(self, request, *args, **kwargs):
-        """Aktualisiert ein Event oder eine gesamte Serie."""
+        """
+        Aktualisiert einen Termin oder eine gesamte Serie.
+        
+        ?update_series=true ändert die Serie (eine Zeile); ohne den Parameter
+        wird für den Termin ?occurrence_date= einer Serie eine Ausnahme angelegt.
+        """
         instance = self.get_object()
         update_series = request.query_params.get('update_series', 'false').lower() == 'true'
+        if instance.parent_event_id:
+            series = instance.parent_event
+        elif is_series(instance):
+            series = instance
+        else:
+            # Normale Aktualisierung eines einzelnen Termins
+            return super().update(request, *args, **kwargs)
         
-        if update_series and (instance.recurrence_type != 'none' or instance.parent_event):
-            # Aktualisiere alle Termine der Serie
-            if instance.parent_event:
-                # Dies ist eine Instanz - aktualisiere das Parent und alle Instanzen
-                parent = instance.parent_event
-                serializer = self.get_serializer(parent, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                
-                # Aktualisiere alle Instanzen
-                for recurring_instance in parent.recurring_instances.all():
-                    # Aktualisiere nur bestimmte Felder, nicht Datum/Zeit
-                    recurring_instance.title = request.data.get('title', recurring_instance.title)
-                    recurring_instance.description = request.data.get('description', recurring_instance.description)
-                    recurring_instance.event_type = request.data.get('event_type', recurring_instance.event_type)
-                    recurring_instance.assigned_to_id = request.data.get('assigned_to', recurring_instance.assigned_to_id)
-                    recurring_instance.is_all_day = request.data.get('is_all_day', recurring_instance.is_all_day)
-                    recurring_instance.save()
-            else:
-                # Dies ist das Parent - aktualisiere alle Instanzen
-                serializer = self.get_serializer(instance, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                
-                for recurring_instance in instance.recurring_instances.all():
-                    recurring_instance.title = request.data.get('title', recurring_instance.title)
-                    recurring_instance.description = request.data.get('description', recurring_instance.description)
-                    recurring_instance.event_type = request.data.get('event_type', recurring_instance.event_type)
-                    recurring_instance.assigned_to_id = request.data.get('assigned_to', recurring_instance.assigned_to_id)
-                    recurring_instance.is_all_day = request.data.get('is_all_day', recurring_instance.is_all_day)
-                    recurring_instance.save()
+        if update_series:
+            data = self._shift_series(series, instance, request.data)
+            serializer = self.get_serializer(series, data=data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
             
+            # Ausnahmen übernehmen geänderte Stammdaten (eine Abfrage)
+            shared = {
+                field: serializer.validated_data[field]
+                for field in ['title', 'description', 'event_type', 'assigned_to', 'is_all_day']
+                if field in serializer.validated_data
+            }
+            if shared:
+                series.recurring_instances.update(**shared, updated_at=timezone.now())
             return Response(serializer.data)
-        else:
-            # Normale Aktualisierung eines einzelnen Termins
+        
+        if instance.parent_event_id:
+            # Die Ausnahme selbst ändern
             return super().update(request, *args, **kwargs)
+        
+        # Einzelnen Termin der Serie ändern: Ausnahme anlegen (bzw. vorhandene ändern)
+        occurrence_date = self._occurrence_date(series, instance)
+        override = series.recurring_instances.filter(original_date=occurrence_date).first()
+        if override is None:
+            override = occurrence(series, occurrence_date)
+            override.pk = None
+            override._state.adding = True
+            override.parent_event = series
+            override.original_date = occurrence_date
+        serializer = self.get_serializer(override, data=request.data, partial=kwargs.get('partial', False))
+        serializer.is_valid(raise_exception=True)
+        serializer.save(recurrence_type='none', recurrence_rule='', recurrence_end_date=None, recurrence_exceptions=[])
+        return Response(serializer.data)
+    
+    def _shift_series(self, series, instance, data):
+        """
+        Verschiebt die Serie um die Datumsänderung des bearbeiteten Termins
+        (Daten im Request beziehen sich auf diesen Termin, nicht auf den Serienbeginn).
+        """
+        data = data.copy()
+        for field in ['recurrence_exceptions', 'original_date']:
+            data.pop(field, None)
+        new_start = parse_date(str(data.get('start_date') or ''))
+        if new_start is None:
+            data.pop('start_date', None)
+            data.pop('end_date', None)
+            return data
+        
+        if instance.parent_event_id:
+            shown_start = instance.start_date
+        else:
+            shown_start = parse_date(self.request.query_params.get('occurrence_date', '')) or series.start_date
+        new_end = parse_date(str(data.get('end_date') or '')) or new_start
+        start_date = series.start_date + (new_start - shown_start)
+        data['start_date'] = start_date.isoformat()
+        data['end_date'] = (start_date + (new_end - new_start)).isoformat()
+        return data
     
     @action(detail=False, methods=['get'])
     def event_types(self, request):
@@ -129,34 +213,27 @@ class CalendarEventViewSet(viewsets.ModelViewSet):
     def statistics(self, request):
         """Gibt Statistiken für gefilterte Termine zurück (inkl. System-Termine)."""
         # Datumsbereich
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
+        start_date, end_date = self._date_range()
         
-        if not start_date_str or not end_date_str:
-            today = timezone.now().date()
-            start_date = today.replace(day=1)
-            end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        else:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        
-        # Manuelle Termine
-        queryset = self.get_queryset()
+        # Manuelle Termine (Serien als einzelne Termine im Zeitraum)
+        events = expand(self.get_queryset(), start_date, end_date)
         events_by_type = {}
         user_counts = {}
         
         # Manuelle Termine zählen
-        by_type = queryset.values('event_type').annotate(count=Count('id'))
-        for item in by_type:
-            type_info = dict(CalendarEvent.EVENT_TYPE_CHOICES).get(item['event_type'], item['event_type'])
-            events_by_type[item['event_type']] = {
-                'count': item['count'],
+        by_type = defaultdict(int)
+        for event in events:
+            by_type[event.event_type] += 1
+        for event_type, count in by_type.items():
+            type_info = dict(CalendarEvent.EVENT_TYPE_CHOICES).get(event_type, event_type)
+            events_by_type[event_type] = {
+                'count': count,
                 'label': type_info,
-                'color': CalendarEvent.EVENT_TYPE_COLORS.get(item['event_type'], '#6B7280')
+                'color': CalendarEvent.EVENT_TYPE_COLORS.get(event_type, '#6B7280')
             }
         
         # Users von manuellen Terminen
-        for event in queryset:
+        for event in events:
             user_id = event.created_by_id
             if user_id:
                 if user_id not in user_counts:
@@ -253,147 +330,71 @@ class CalendarEventViewSet(viewsets.ModelViewSet):
         """
         Gibt alle Termine inkl. aggregierter Daten aus anderen Modulen zurück.
         Dies schließt Urlaubstage, Krankheitstage und Liefertermine ein.
+        
+        Die Antwort trägt einen ETag aus dem Stand der beteiligten Tabellen;
+        mit If-None-Match wird ohne Änderung nur 304 geliefert.
         """
-        # Basis-Queryset für manuelle Termine
-        queryset = self.get_queryset()
-        events = list(CalendarEventListSerializer(queryset, many=True).data)
+        # Datumsbereich für Aggregation (Standard: aktueller Monat)
+        start_date, end_date = self._date_range()
+        if end_date < start_date or (end_date - start_date).days > MAX_WINDOW_DAYS:
+            return Response(
+                {'error': f'Zeitraum muss zwischen 1 und {MAX_WINDOW_DAYS} Tagen liegen'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Datumsbereich für Aggregation
-        start_date_str = request.query_params.get('start_date')
-        end_date_str = request.query_params.get('end_date')
+        version, _ = calendar_version()
+        etag = calendar_etag(version, start_date, end_date, request.get_full_path())
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
         
-        if not start_date_str or not end_date_str:
-            # Standard: aktueller Monat
-            today = timezone.now().date()
-            start_date = today.replace(day=1)
-            end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        else:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        
-        # Typ-Filter
+        # Typ- und User-Filter
         event_types = request.query_params.get('event_type', '').split(',') if request.query_params.get('event_type') else None
-        
-        # Urlaubstage aggregieren (falls VacationRequest existiert)
-        if not event_types or 'vacation' in event_types:
-            try:
-                from users.models import VacationRequest
-                vacations = VacationRequest.objects.filter(
-                    status='approved',
-                    start_date__lte=end_date,
-                    end_date__gte=start_date
-                ).select_related('user')
-                
-                for vac in vacations:
-                    events.append({
-                        'id': f'vacation_{vac.id}',
-                        'title': f'Urlaub: {vac.user.get_full_name() or vac.user.username}',
-                        'event_type': 'vacation',
-                        'event_type_display': 'Urlaub',
-                        'color': CalendarEvent.EVENT_TYPE_COLORS['vacation'],
-                        'start_date': vac.start_date.isoformat(),
-                        'end_date': vac.end_date.isoformat(),
-                        'start_time': None,
-                        'end_time': None,
-                        'is_all_day': True,
-                        'created_by': vac.user.id,
-                        'created_by_name': vac.user.get_full_name() or vac.user.username,
-                        'assigned_to': vac.user.id,
-                        'assigned_to_name': vac.user.get_full_name() or vac.user.username,
-                        'is_system_generated': True
-                    })
-            except Exception:
-                pass
-        
-        # Liefertermine von Bestellungen
-        if not event_types or 'order_delivery' in event_types:
-            try:
-                from orders.models import Order
-                orders = Order.objects.filter(
-                    expected_delivery_date__gte=start_date,
-                    expected_delivery_date__lte=end_date
-                ).exclude(status__in=['cancelled', 'delivered']).select_related('supplier')
-                
-                for order in orders:
-                    events.append({
-                        'id': f'order_{order.id}',
-                        'title': f'Lieferung: {order.order_number} ({order.supplier.company_name if order.supplier else "?"})',
-                        'event_type': 'order_delivery',
-                        'event_type_display': 'Liefertermin Bestellung',
-                        'color': CalendarEvent.EVENT_TYPE_COLORS['order_delivery'],
-                        'start_date': order.expected_delivery_date.isoformat(),
-                        'end_date': order.expected_delivery_date.isoformat(),
-                        'start_time': None,
-                        'end_time': None,
-                        'is_all_day': True,
-                        'created_by': order.created_by.id if order.created_by else None,
-                        'created_by_name': order.created_by.get_full_name() if order.created_by else None,
-                        'assigned_to': None,
-                        'assigned_to_name': None,
-                        'is_system_generated': True
-                    })
-            except Exception:
-                pass
-        
-        # Liefertermine von Kundenaufträgen
-        if not event_types or 'customer_order_delivery' in event_types:
-            try:
-                from customer_orders.models import CustomerOrder
-                customer_orders = CustomerOrder.objects.filter(
-                    delivery_date__gte=start_date,
-                    delivery_date__lte=end_date
-                ).exclude(status__in=['cancelled', 'delivered']).select_related('customer')
-                
-                for co in customer_orders:
-                    events.append({
-                        'id': f'customer_order_{co.id}',
-                        'title': f'Kundenlieferung: {co.order_number} ({co.customer.name if co.customer else "?"})',
-                        'event_type': 'customer_order_delivery',
-                        'event_type_display': 'Liefertermin Kundenauftrag',
-                        'color': CalendarEvent.EVENT_TYPE_COLORS['customer_order_delivery'],
-                        'start_date': co.delivery_date.isoformat(),
-                        'end_date': co.delivery_date.isoformat(),
-                        'start_time': None,
-                        'end_time': None,
-                        'is_all_day': True,
-                        'created_by': co.created_by.id if co.created_by else None,
-                        'created_by_name': co.created_by.get_full_name() if co.created_by else None,
-                        'assigned_to': None,
-                        'assigned_to_name': None,
-                        'is_system_generated': True
-                    })
-            except Exception:
-                pass
-        
-        # User-Filter anwenden
         user_id = request.query_params.get('user_id')
-        if user_id:
-            user_id = int(user_id)
-            events = [e for e in events if e.get('created_by') == user_id or e.get('assigned_to') == user_id]
         
-        return Response(events)
+        events = aggregate_events(
+            window_filter(self.get_queryset(), start_date, end_date), start_date, end_date,
+            event_types=event_types, user_id=int(user_id) if user_id else None
+        )
+        response = Response(events)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def feed_url(self, request):
+        """Persönliche iCalendar-Abo-URL des Benutzers (für Outlook, Thunderbird, ...)"""
+        url = request.build_absolute_uri(reverse('calendar-feed', args=[feed_token(request.user)]))
+        return Response({'url': url, 'mine_url': f'{url}?mine=true'})
 
     def destroy(self, request, *args, **kwargs):
-        """Löscht einen Termin oder eine Serie von Terminen."""
-        instance = self.get_object()
+        """
+        Löscht einen Termin oder eine Serie von Terminen.
         
-        # Prüfe ob es sich um einen Serientermin handelt
+        ?delete_series=true löscht die Serie samt Ausnahmen; ohne den Parameter
+        wird der Termin ?occurrence_date= in der Serie ausgelassen.
+        """
+        instance = self.get_object()
         delete_series = request.query_params.get('delete_series', 'false').lower() == 'true'
-        
-        if delete_series and (instance.recurrence_type != 'none' or instance.parent_event):
-            # Lösche die gesamte Serie
-            if instance.parent_event:
-                # Dies ist eine Instanz - lösche das Parent-Event und alle Instanzen
-                parent = instance.parent_event
-                parent.recurring_instances.all().delete()
-                parent.delete()
-            else:
-                # Dies ist das Parent-Event - lösche alle Instanzen und das Parent
-                instance.recurring_instances.all().delete()
-                instance.delete()
+        if instance.parent_event_id:
+            series = instance.parent_event
+        elif is_series(instance):
+            series = instance
         else:
+            series = None
+        
+        if series is None:
             # Lösche nur diesen einzelnen Termin
             instance.delete()
+        elif delete_series:
+            # Ausnahmen werden per CASCADE mitgelöscht
+            series.delete()
+        else:
+            occurrence_date = self._occurrence_date(series, instance)
+            if occurrence_date:
+                series.add_recurrence_exception(occurrence_date)
+            if instance.parent_event_id:
+                instance.delete()
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -408,6 +409,7 @@ class CalendarEventViewSet(viewsets.ModelViewSet):
             {'value': 'weekly', 'label': 'Wöchentlich'},
             {'value': 'monthly', 'label': 'Monatlich'},
             {'value': 'yearly', 'label': 'Jährlich'},
+            {'value': 'custom', 'label': 'Benutzerdefiniert (RRULE)'},
         ]
         
         serializer = RecurrenceChoicesSerializer(choices, many=True)
@@ -462,3 +464,44 @@ class EventReminderViewSet(viewsets.ModelViewSet):
         reminder.sent_at = timezone.now()
         reminder.save()
         return Response({'status': 'marked as sent'})
+
+
+# Zeitraum des iCalendar-Feeds relativ zu heute
+FEED_PAST_DAYS = 90
+FEED_FUTURE_DAYS = 300
+
+
+@require_GET
+def calendar_feed(request, token):
+    """
+    iCalendar-Feed (.ics) für Kalender-Abonnements, authentifiziert über den
+    Token in der URL. ?mine=true liefert nur eigene bzw. zugewiesene Termine.
+    Unveränderte Daten werden per ETag mit 304 beantwortet.
+    """
+    user = user_for_token(token)
+    if user is None or not getattr(user, 'can_read_company_calendar', True):
+        return HttpResponseForbidden('Ungültiger Kalender-Feed')
+    
+    today = timezone.localdate()
+    start_date = today - timedelta(days=FEED_PAST_DAYS)
+    end_date = today + timedelta(days=FEED_FUTURE_DAYS)
+    mine = request.GET.get('mine', '').lower() == 'true'
+    
+    version, last_changed = calendar_version()
+    etag = calendar_etag(version, 'ics', user.pk, mine, today)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    queryset = CalendarEvent.objects.filter(is_active=True).select_related('created_by', 'assigned_to')
+    events = aggregate_events(
+        window_filter(queryset, start_date, end_date), start_date, end_date, user_id=user.pk if mine else None
+    )
+    response = HttpResponse(
+        build_calendar(events, last_changed or timezone.now()),
+        content_type='text/calendar; charset=utf-8'
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = 'inline; filename="firmenkalender.ics"'
+    return response
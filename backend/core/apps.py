@@ -5,3 +5,11 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Core'
+
+    def ready(self):
+        # Medienkatalog für alle Models mit FileFields pflegen
+        from .media_catalog import connect_signals
+        connect_signals()
+        # Schreibversionen der Tabellen für den Statistik-Cache
+        from .stats import connect_signals as connect_stats_signals
+        connect_stats_signals()
@@ -0,0 +1,181 @@
+"""
+Laufzeit- und Abfrage-Budgets für die wichtigsten Endpunkte.
+
+Jeder Benchmark ruft einen API-Endpunkt (über den Test-Client, also mit
+Middleware, Berechtigungen und Serialisierung) oder eine Funktion direkt
+auf und vergleicht Anzahl der SQL-Abfragen und Median der Laufzeit mit
+seinem Budget. Die Budgets gelten für den Datenbestand aus
+core.synthetic (Faktor 1.0) auf PostgreSQL; die Abfragezahl darf von der
+Datenmenge nicht abhängen (N+1-Muster fallen so auch mit wenigen Daten auf).
+
+Benchmarks mit known_issue beschreiben bekannte Engpässe: ihr Budget ist das
+Ziel, eine Überschreitung wird gemeldet, lässt den Lauf aber nur mit
+--strict fehlschlagen. Ist der Engpass behoben, wird known_issue entfernt.
+
+Ausführung: manage.py run_benchmarks (siehe dort), die Abfrage-Budgets
+prüft außerdem core.tests.BenchmarkBudgetTests.
+"""
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.db import connection
+from rest_framework.test import APIClient
+
+
+@dataclass
+class Benchmark:
+    name: str
+    max_queries: int
+    max_ms: float
+    path: str = ''                       # API-Pfad, Platzhalter aus dem Kontext, z.B. {quotation}
+    method: str = 'get'
+    params: dict = field(default_factory=dict)
+    payload: Optional[Callable] = None   # (client, path, context) -> Request-Daten (nicht gemessen)
+    call: Optional[Callable] = None      # (context) -> direkter Funktionsaufruf statt API
+    known_issue: str = ''                # bekannter Engpass (Budget ist das Ziel)
+
+
+def _quotation_update_payload(client, path, context):
+    """Angebot so zurückschreiben, wie es die Oberfläche nach dem Laden tut (mit allen Positionen)"""
+    detail = client.get(path).data
+    items = [
+        {key: item.get(key) for key in (
+            'id', 'position', 'item_article_number', 'custom_description', 'quantity',
+            'unit_price', 'purchase_price', 'sale_price', 'discount_percent', 'tax_rate',
+        )}
+        for item in detail['items']
+    ]
+    return {
+        'customer': detail['customer'], 'valid_until': detail['valid_until'],
+        'reference': 'Benchmark', 'delivery_cost': '25.00', 'items': items,
+    }
+
+
+def _next_customer_number(context):
+    from customers.models import Customer
+    return Customer._generate_customer_number()
+
+
+def _next_quotation_number(context):
+    from sales.models import Quotation
+    return Quotation._generate_quotation_number()
+
+
+def _next_system_number(context):
+    from systems.models import System
+    return System._generate_system_number()
+
+
+def _next_ticket_number(context):
+    from service.models import ServiceTicket
+    return ServiceTicket._generate_ticket_number()
+
+
+BENCHMARKS = [
+    Benchmark('customers.list', 6, 300, '/api/customers/customers/'),
+    Benchmark('customers.search', 6, 300, '/api/customers/customers/', params={'search': 'schneider'}),
+    Benchmark('systems.list', 6, 500, '/api/systems/systems/',
+              known_issue='nicht paginiert - Laufzeit wächst mit der Anzahl der Systeme'),
+    Benchmark('quotations.list', 4, 500, '/api/sales/quotations/',
+              known_issue='nicht paginiert - Laufzeit wächst mit der Anzahl der Angebote'),
+    Benchmark('quotations.detail', 8, 200, '/api/sales/quotations/{quotation}/'),
+    Benchmark('quotations.update', 20, 400, '/api/sales/quotations/{quotation}/', method='put',
+              payload=_quotation_update_payload),
+    Benchmark('customer_orders.list', 6, 300, '/api/customer-orders/customer-orders/'),
+    Benchmark('service_tickets.list', 6, 300, '/api/service/tickets/'),
+    Benchmark('time_entries.list', 4, 200, '/api/users/time-entries/', params={'user': '{user}'}),
+    Benchmark('core.dashboard', 8, 200, '/api/core/dashboard/'),
+    Benchmark('bi.sales_statistics', 4, 500, '/api/bi/statistics/sales/'),
+    Benchmark('bi.sales_by_customer', 4, 500, '/api/bi/statistics/sales/by-customer/'),
+    Benchmark('bi.quotation_forecast', 4, 500, '/api/bi/forecast/quotations/'),
+    Benchmark('bi.expected_payments', 6, 500, '/api/bi/payments/expected/'),
+    Benchmark('numbers.customer', 1, 50, call=_next_customer_number),
+    Benchmark('numbers.quotation', 1, 50, call=_next_quotation_number),
+    Benchmark('numbers.system', 1, 50, call=_next_system_number),
+    Benchmark('numbers.ticket', 1, 50, call=_next_ticket_number),
+]
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _format(value, context):
+    return value.format(**context) if isinstance(value, str) else value
+
+
+def _request(client, benchmark, path, params, payload):
+    if payload is not None:
+        return getattr(client, benchmark.method)(path, payload, format='json')
+    return getattr(client, benchmark.method)(path, params)
+
+
+def run_benchmark(benchmark, client, context, repeat=5):
+    """
+    Führt einen Benchmark aus (ein Aufwärmlauf, dann `repeat` Messläufe).
+
+    Returns:
+        dict mit name, queries (Maximum der Messläufe), median_ms, max_ms,
+        den Budgets, known_issue, error (Fehlermeldung oder None) sowie
+        queries_ok / latency_ok
+    """
+    path = _format(benchmark.path, context)
+    params = {key: _format(value, context) for key, value in benchmark.params.items()}
+    payload = benchmark.payload(client, path, context) if benchmark.payload else None
+
+    timings, queries, error = [], 0, None
+    for run in range(repeat + 1):
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            if benchmark.call:
+                benchmark.call(context)
+            else:
+                response = _request(client, benchmark, path, params, payload)
+                if response.status_code >= 400:
+                    error = f'HTTP {response.status_code}'
+            elapsed = (time.perf_counter() - started) * 1000
+        if error:
+            break
+        if run:
+            timings.append(elapsed)
+            queries = max(queries, counter.count)
+
+    median_ms = round(statistics.median(timings), 1) if timings else None
+    return {
+        'name': benchmark.name,
+        'queries': queries,
+        'max_queries': benchmark.max_queries,
+        'median_ms': median_ms,
+        'max_ms': round(max(timings), 1) if timings else None,
+        'budget_ms': benchmark.max_ms,
+        'known_issue': benchmark.known_issue,
+        'error': error,
+        'queries_ok': error is None and queries <= benchmark.max_queries,
+        'latency_ok': error is None and median_ms <= benchmark.max_ms,
+    }
+
+
+def run_benchmarks(user, context, repeat=5, names=None, benchmarks=BENCHMARKS):
+    """
+    Führt die Benchmarks als `user` aus.
+
+    Args:
+        context: Platzhalter für Pfade (z.B. quotation, user - siehe core.synthetic.generate)
+        names: nur Benchmarks, deren Name mit einem dieser Präfixe beginnt
+    """
+    client = APIClient()
+    client.force_authenticate(user)
+    results = []
+    for benchmark in benchmarks:
+        if names and not any(benchmark.name.startswith(name) for name in names):
+            continue
+        results.append(run_benchmark(benchmark, client, context, repeat=repeat))
+    return results
@@ -0,0 +1,145 @@
+"""
+Bedingte GET-Anfragen (ETag/Last-Modified, 304) für lesende API-Endpunkte.
+
+Mit API_CACHE_MODE = 'validate' liefern ViewSets mit ConditionalGetMixin bei
+list/retrieve einen ETag und Last-Modified. Beide leiten sich aus der
+Schreibversion (core.stats) aller Tabellen ab, die der Endpunkt liest. Schickt
+der Client den ETag mit If-None-Match zurück (bzw. If-Modified-Since) und hat
+sich keine Tabelle geändert, antwortet der Endpunkt mit 304 - ohne Abfrage
+und ohne Serialisierung.
+
+Welche Tabellen ein Endpunkt liest (inkl. Serializer-Abfragen), wird beim
+ersten vollständigen Durchlauf aus dem ausgeführten SQL ermittelt und im
+Cache vermerkt; bis dahin gibt es keine Validatoren. Der ETag enthält
+außerdem die vollständige URL, den Benutzer, den Accept-Header und das
+Tagesdatum (Serializer rechnen teils mit "heute") sowie ein Zeitfenster von
+API_ETAG_SECONDS: Schreibzugriffe ohne Signale (QuerySet.update, bulk_create)
+und - ohne gemeinsamen Cache - anderer Server-Prozesse fallen spätestens
+danach auf.
+
+    class SalesPriceListViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+        ...
+"""
+import hashlib
+import re
+import time
+from datetime import date
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.stats import table_modified, table_versions
+
+TABLES_PREFIX = 'conditional:tables:'
+CONDITIONAL_ACTIONS = ('list', 'retrieve')
+
+_QUOTED_NAME = re.compile(r'"([^"]+)"')
+_known_tables = None
+
+
+def enabled():
+    """Validatoren nur im Modus 'validate' (Standard 'no-store': immer vollständig)"""
+    return getattr(settings, 'API_CACHE_MODE', 'no-store') == 'validate'
+
+
+def _window():
+    seconds = getattr(settings, 'API_ETAG_SECONDS', 300)
+    return int(time.time() // seconds) if seconds > 0 else 0
+
+
+def known_tables():
+    """Tabellennamen aller Models (inkl. m2m-Zwischentabellen)"""
+    global _known_tables
+    if _known_tables is None:
+        _known_tables = frozenset(
+            model._meta.db_table for model in apps.get_models(include_auto_created=True)
+        )
+    return _known_tables
+
+
+class TableRecorder:
+    """execute_wrapper: sammelt die Tabellen aller ausgeführten Abfragen"""
+
+    def __init__(self):
+        self.tables = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.tables.update(known_tables().intersection(_QUOTED_NAME.findall(sql)))
+        return execute(sql, params, many, context)
+
+
+def _opaque(tag):
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+class ConditionalGetMixin:
+    """ViewSet-Mixin: ETag/Last-Modified und 304 für list/retrieve (siehe Modul-Doku)"""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Objekt-Berechtigung vor einem 304 prüfen
+        self.get_object()
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_key(self, request):
+        """Schlüssel der gelesenen Tabellen (je View und Aktion)"""
+        return f'{TABLES_PREFIX}{type(self).__module__}.{type(self).__name__}.{self.action}'
+
+    def conditional_validators(self, request, tables):
+        """(ETag, Last-Modified) für den aktuellen Stand der Tabellen"""
+        tables = sorted(tables)
+        state = (
+            self.conditional_key(request), request.build_absolute_uri(), request.user.pk,
+            request.META.get('HTTP_ACCEPT', ''), date.today().isoformat(), _window(),
+            tables, table_versions(tables),
+        )
+        etag = '"%s"' % hashlib.sha256(repr(state).encode('utf-8')).hexdigest()[:32]
+        seconds = getattr(settings, 'API_ETAG_SECONDS', 300)
+        window_start = _window() * seconds if seconds > 0 else 0
+        return etag, int(max(table_modified(tables), window_start))
+
+    def not_modified(self, request, etag, last_modified):
+        """Hat der Client diesen Stand schon? (If-None-Match vor If-Modified-Since)"""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            return '*' in tags or _opaque(etag) in {_opaque(tag) for tag in tags}
+        since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return since is not None and last_modified <= since
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        if not enabled() or request.method not in ('GET', 'HEAD') or self.action not in CONDITIONAL_ACTIONS:
+            return handler(request, *args, **kwargs)
+
+        key = self.conditional_key(request)
+        tables = cache.get(key)
+        validators = None
+        if tables is not None:
+            validators = self.conditional_validators(request, tables)
+            if self.not_modified(request, *validators):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                return self._stamp(response, *validators)
+
+        recorder = TableRecorder()
+        with connection.execute_wrapper(recorder):
+            response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if validators is None or not recorder.tables.issubset(tables):
+            # neue Tabellen: der vorab berechnete Stand deckt die Antwort nicht ab
+            cache.set(key, frozenset(recorder.tables | set(tables or ())), None)
+            return response
+        return self._stamp(response, *validators)
+
+    @staticmethod
+    def _stamp(response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,349 @@
+"""
+Löschdienst des Admin-Löschmoduls: Auswirkung vorab, große Kaskaden im Hintergrund.
+
+impact_graph() ermittelt, was das Löschen eines Objekts auslöst - über alle
+Ebenen der Kaskade, je Model eine Menge (als Unterabfrage, ohne Zeilen zu
+laden): gelöschte Zeilen (CASCADE), geänderte Zeilen (SET_NULL/SET_DEFAULT/
+SET) und blockierende Zeilen (PROTECT/RESTRICT). Gezählt wird alles mit
+einer einzigen Abfrage (count_impact), unabhängig von der Zahl der
+Relationen und Zeilen.
+
+Gelöscht wird über einen Löschauftrag (DeletionJob). Das Objekt selbst
+wird wie bisher mit instance.delete() gelöscht (überschriebene delete()-
+Methode, Signale mit origin=instance); nur Models mit mehr als
+DELETION_BATCH_SIZE betroffenen Zeilen werden vorher von der tiefsten Ebene
+an in Blöcken mit eigener Transaktion gelöscht - mit derselben origin, damit
+die Kaskaden-Abkürzungen der Signal-Handler greifen. Für die Zeilen der
+Kaskade gilt wie bei Django: ihre delete()-Methoden werden nicht
+aufgerufen. Nach jedem Block wird der Fortschritt gespeichert; Dateien der
+gelöschten Zeilen wandern gesammelt in den Papierkorb (move_files_to_trash).
+Bricht ein Auftrag ab (Fehler, Neustart), setzt ihn `manage.py
+resume_deletion_jobs` fort - die Auswirkung wird dann für den verbliebenen
+Rest neu berechnet. Ein Auftrag wird vor dem Löschen atomar übernommen
+(run_job), läuft also nie doppelt.
+
+Kleine Löschungen (bis DELETION_SYNC_LIMIT Zeilen) laufen direkt in der
+Anfrage, größere nach dem Commit in einem Hintergrund-Thread
+(DELETION_ASYNC, wie core.thumbnails).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models.deletion import Collector, get_candidate_relations_to_delete
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Schutz gegen selbstreferenzierende Kaskaden (z.B. Ordner in Ordnern)
+MAX_DEPTH = 8
+
+BLOCKING = (models.PROTECT, models.RESTRICT)
+
+_executor = None
+
+
+@dataclass
+class Impact:
+    """Auswirkung einer Löschung (Querysets, noch nicht gezählt)"""
+    root: models.Model
+    deletes: dict = field(default_factory=dict)    # Model -> Q
+    depth: dict = field(default_factory=dict)      # Model -> größte Ebene
+    updates: dict = field(default_factory=dict)    # (Model, Feld) -> Q
+    blocked: dict = field(default_factory=dict)    # (Model, Feld) -> Q
+
+    def queryset(self, model, condition=None):
+        return model._base_manager.filter(self.deletes[model] if condition is None else condition)
+
+    def deletion_order(self):
+        """Models von der tiefsten Ebene zur Wurzel (Wurzel zuletzt)"""
+        return sorted(self.deletes, key=lambda model: -self.depth[model])
+
+
+def _or(mapping, key, condition):
+    mapping[key] = mapping[key] | condition if key in mapping else condition
+
+
+def impact_graph(instance):
+    """
+    Alle Zeilen, die das Löschen von `instance` betrifft (siehe Modul-Doku).
+
+    Jede Ebene gibt nur die neu hinzugekommene Bedingung eines Models an
+    seine Kind-Relationen weiter; erreicht die Kaskade ein Model über
+    mehrere Wege, werden die Bedingungen verodert (keine Doppelzählung).
+    """
+    root_model = instance._meta.concrete_model
+    impact = Impact(root=instance)
+    impact.deletes[root_model] = models.Q(pk=instance.pk)
+    impact.depth[root_model] = 0
+    frontier = {root_model: models.Q(pk=instance.pk)}
+
+    for level in range(1, MAX_DEPTH + 1):
+        added = {}
+        for model, condition in frontier.items():
+            parents = model._base_manager.filter(condition)
+            for relation in get_candidate_relations_to_delete(model._meta):
+                child = relation.related_model._meta.concrete_model
+                fk = relation.field
+                lookup = models.Q(**{f'{fk.name}__in': parents.values(fk.target_field.attname)})
+                on_delete = relation.on_delete
+                if on_delete == models.CASCADE:
+                    _or(impact.deletes, child, lookup)
+                    impact.depth[child] = max(impact.depth.get(child, 0), level)
+                    _or(added, child, lookup)
+                elif on_delete in BLOCKING:
+                    _or(impact.blocked, (child, fk.name), lookup)
+                elif on_delete != models.DO_NOTHING:
+                    _or(impact.updates, (child, fk.name), lookup)
+        if not added:
+            break
+        frontier = added
+    return impact
+
+
+def _count_many(querysets, using='default'):
+    """Anzahl der Zeilen mehrerer Querysets mit einer Abfrage"""
+    parts, params, empty = [], [], set()
+    for index, queryset in enumerate(querysets):
+        try:
+            sql, query_params = queryset.order_by().values('pk').query.sql_with_params()
+        except EmptyResultSet:
+            empty.add(index)
+            continue
+        parts.append(f'(SELECT COUNT(*) FROM ({sql}) impact_{index})')
+        params.extend(query_params)
+    counts = []
+    if parts:
+        with connections[using].cursor() as cursor:
+            cursor.execute('SELECT ' + ', '.join(parts), params)
+            counts = list(cursor.fetchone())
+    return [0 if index in empty else counts.pop(0) for index in range(len(querysets))]
+
+
+def count_impact(impact):
+    """
+    Auswirkung als Liste von {model, name, action, count} (nur Einträge > 0),
+    action: 'delete', 'update' oder 'blocked'
+    """
+    entries = [('delete', model, None, impact.queryset(model)) for model in impact.deletion_order()]
+    for action, mapping in (('update', impact.updates), ('blocked', impact.blocked)):
+        for (model, field_name), condition in mapping.items():
+            queryset = impact.queryset(model, condition)
+            if action == 'blocked' and model in impact.deletes:
+                # Zeilen, die selbst mitgelöscht werden, blockieren nicht
+                queryset = queryset.exclude(pk__in=impact.queryset(model).values('pk'))
+            entries.append((action, model, field_name, queryset))
+    counts = _count_many([entry[3] for entry in entries])
+    result = []
+    for (action, model, field_name, _), count in zip(entries, counts):
+        if count:
+            result.append({
+                'model': model._meta.label,
+                'name': str(model._meta.verbose_name_plural),
+                'field': field_name,
+                'action': action,
+                'count': count,
+            })
+    return result
+
+
+def total_rows(counted):
+    return sum(entry['count'] for entry in counted if entry['action'] == 'delete')
+
+
+def blocked_rows(counted):
+    return sum(entry['count'] for entry in counted if entry['action'] == 'blocked')
+
+
+def runs_in_background(counted):
+    """Große Löschungen (mehr als DELETION_SYNC_LIMIT Einträge) laufen als Hintergrund-Auftrag"""
+    return total_rows(counted) > getattr(settings, 'DELETION_SYNC_LIMIT', 200)
+
+
+# ---------------------------------------------------------------------------
+# Löschaufträge
+# ---------------------------------------------------------------------------
+
+def _batch_size():
+    return getattr(settings, 'DELETION_BATCH_SIZE', 500)
+
+
+def create_job(instance, entity_type, description, user, counted):
+    """Legt den Löschauftrag für `instance` an (oder gibt einen offenen zurück)"""
+    from .models import DeletionJob
+
+    content_type = ContentType.objects.get_for_model(instance)
+    open_job = DeletionJob.objects.filter(
+        content_type=content_type, object_id=instance.pk, status__in=['pending', 'running']
+    ).first()
+    if open_job:
+        return open_job
+    return DeletionJob.objects.create(
+        entity_type=entity_type, content_type=content_type, object_id=instance.pk,
+        object_description=description[:500], impact=counted, total_rows=total_rows(counted),
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def stale_before():
+    """Laufende Aufträge ohne Fortschritt seit DELETION_STALE_MINUTES gelten als abgebrochen"""
+    return timezone.now() - timedelta(minutes=getattr(settings, 'DELETION_STALE_MINUTES', 15))
+
+
+def _files(model, queryset):
+    """(Model, Pfad, Objekt-ID) aller Dateien der Zeilen von `queryset`"""
+    fields = [f for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+    if not fields:
+        return []
+    files = []
+    for row in queryset.values_list('pk', *[f.attname for f in fields]):
+        for file_field, name in zip(fields, row[1:]):
+            if name:
+                try:
+                    files.append((model, file_field.storage.path(name), row[0]))
+                except NotImplementedError:
+                    pass
+    return files
+
+
+def _progress(job, deleted, files):
+    """Fortschritt speichern; Dateien der gelöschten Zeilen gesammelt in den Papierkorb"""
+    from .deletion_utils import move_files_to_trash
+
+    moved = move_files_to_trash(
+        [(path, ContentType.objects.get_for_model(model), pk,
+          f'{model._meta.verbose_name} #{pk} ({job.object_description})') for model, path, pk in files],
+        job.created_by, reason=f'Löschauftrag #{job.pk}',
+    ) if files else []
+    job.deleted_rows += deleted
+    job.media_count += len(moved)
+    job.save(update_fields=['deleted_rows', 'media_count', 'updated_at'])
+
+
+def _delete(job, instance):
+    """
+    Löscht `instance` mit seiner Kaskade: große Mengen (> DELETION_BATCH_SIZE
+    je Model) vorab blockweise über Collector(origin=instance), den Rest mit
+    instance.delete() (siehe Modul-Doku).
+    """
+    impact = impact_graph(instance)
+    counts = {
+        entry['model']: entry['count'] for entry in count_impact(impact) if entry['action'] == 'delete'
+    }
+    batch_size = _batch_size()
+    root_model = instance._meta.concrete_model
+    batched = 0
+    for model in impact.deletion_order():
+        if model is root_model or counts.get(model._meta.label, 0) <= batch_size:
+            continue
+        queryset = impact.queryset(model)
+        while True:
+            pks = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            batch = model._base_manager.filter(pk__in=pks)
+            files = _files(model, batch)
+            collector = Collector(using=batch.db, origin=instance)
+            collector.collect(batch)
+            deleted, _ = collector.delete()
+            batched += deleted
+            _progress(job, deleted, files)
+
+    files = [file for model in impact.deletion_order() for file in _files(model, impact.queryset(model))]
+    result = instance.delete()
+    # überschriebene delete()-Methoden geben nicht immer (Anzahl, je Model) zurück
+    deleted = result[0] if isinstance(result, tuple) else sum(counts.values()) - batched
+    _progress(job, deleted, files)
+
+
+def run_job(job_id, statuses=('pending',), stale_before=None):
+    """
+    Führt einen Löschauftrag aus bzw. setzt ihn fort.
+
+    Der Auftrag wird atomar übernommen (Status -> 'running'): nur wenn er einen
+    der `statuses` hat oder - mit `stale_before` - als 'running' seit diesem
+    Zeitpunkt keinen Fortschritt mehr gemeldet hat. So löschen nie zwei
+    Prozesse/Threads denselben Auftrag.
+
+    Returns:
+        DeletionJob ('done'/'failed'; nicht übernommen: unverändert)
+    """
+    from .deletion_utils import log_deletion
+    from .models import DeletionJob, DeletionLog
+
+    claim = models.Q(status__in=statuses)
+    if stale_before is not None:
+        claim |= models.Q(status='running', updated_at__lt=stale_before)
+    claimed = DeletionJob.objects.filter(claim, pk=job_id).update(
+        status='running', error='', updated_at=timezone.now()
+    )
+    job = DeletionJob.objects.select_related('content_type', 'created_by').get(pk=job_id)
+    if not claimed:
+        return job
+    try:
+        model = job.content_type.model_class()
+        instance = model._base_manager.filter(pk=job.object_id).first()
+        if instance is not None:
+            _delete(job, instance)
+        entity_types = {key for key, _ in DeletionLog.ENTITY_CHOICES}
+        log_deletion(
+            job.entity_type if job.entity_type in entity_types else 'other', job.object_id,
+            job.object_description, 'deleted', job.created_by,
+            reason=f'Admin-Löschmodul (Löschauftrag #{job.pk}, {job.deleted_rows} Einträge)',
+            media_count=job.media_count,
+        )
+        job.status = 'done'
+    except Exception as e:
+        logger.exception('Löschauftrag %s fehlgeschlagen', job.pk)
+        job.status, job.error = 'failed', str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def submit(job):
+    """Löschauftrag nach dem Commit im Hintergrund ausführen (DELETION_ASYNC=False: sofort)"""
+    if not getattr(settings, 'DELETION_ASYNC', True):
+        return run_job(job.pk)
+    transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+
+def _submit(job_id):
+    global _executor
+    if _executor is None:
+        # ein Thread: Löschaufträge laufen nacheinander, nicht gegeneinander
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='deletion')
+    _executor.submit(_run_in_thread, job_id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def job_data(job):
+    """Auftrag als Antwort-Dict (Fortschritt für die Oberfläche)"""
+    return {
+        'id': job.pk,
+        'type': job.entity_type,
+        'object_id': job.object_id,
+        'description': job.object_description,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'total_rows': job.total_rows,
+        'deleted_rows': job.deleted_rows,
+        'progress': job.progress,
+        'media_count': job.media_count,
+        'impact': job.impact,
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
@@ -1,12 +1,20 @@
 """
 Utility functions for managing file deletions and media trash
 """
+import logging
 import os
 import shutil
+import uuid
+from datetime import timedelta
 from pathlib import Path
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q, Sum
+from django.utils import timezone
 from core.models import MediaTrash, DeletionLog
+from core import media_catalog
+
+logger = logging.getLogger(__name__)
 
 
 def get_media_trash_path():
@@ -46,22 +54,15 @@ def move_file_to_trash(file_path, related_object, deleted_by, reason=''):
         # File is not in MEDIA_ROOT
         relative_path = file_path.name
     
-    # Create trash destination
+    # Create trash destination: eindeutiger Name ohne Kollisionsprüfung,
+    # nach Löschmonat gruppiert (<Jahr>/<Monat>/<uuid>_<Dateiname>)
     trash_root = get_media_trash_path()
-    trash_file_path = trash_root / relative_path
+    now = timezone.now()
+    trash_file_path = trash_root / f"{now:%Y}" / f"{now:%m}" / f"{uuid.uuid4().hex}_{file_path.name}"
     
     # Ensure parent directory exists
     trash_file_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Handle duplicate filenames in trash
-    counter = 1
-    original_trash_path = trash_file_path
-    while trash_file_path.exists():
-        stem = original_trash_path.stem
-        suffix = original_trash_path.suffix
-        trash_file_path = original_trash_path.parent / f"{stem}_{counter}{suffix}"
-        counter += 1
-    
     # Move file to trash
     try:
         shutil.move(str(file_path), str(trash_file_path))
@@ -69,6 +70,8 @@ def move_file_to_trash(file_path, related_object, deleted_by, reason=''):
         print(f"Error moving file to trash: {e}")
         return None
     
+    media_catalog.remove(file_path)
+    
     # Get file size
     file_size = trash_file_path.stat().st_size if trash_file_path.exists() else 0
     
@@ -81,7 +84,7 @@ def move_file_to_trash(file_path, related_object, deleted_by, reason=''):
     # Create MediaTrash entry
     media_trash = MediaTrash.objects.create(
         original_path=str(relative_path),
-        trash_path=str(trash_file_path.relative_to(trash_root)),
+        trash_path=trash_file_path.relative_to(trash_root).as_posix(),
         filename=file_path.name,
         file_size=file_size,
         content_type=content_type,
@@ -94,6 +97,57 @@ def move_file_to_trash(file_path, related_object, deleted_by, reason=''):
     return media_trash
 
 
+def move_files_to_trash(files, deleted_by, reason=''):
+    """
+    Move many files to the trash at once (one bulk_create, one catalog query)
+    
+    Args:
+        files: iterable of (file_path, content_type, object_id, object_description);
+               content_type/object_id may be None
+        deleted_by: User who deleted the files
+        reason: Optional reason for deletion
+    
+    Returns:
+        List of MediaTrash instances (files that did not exist are skipped)
+    """
+    media_root = Path(settings.MEDIA_ROOT)
+    trash_root = get_media_trash_path()
+    now = timezone.now()
+    month_dir = trash_root / f"{now:%Y}" / f"{now:%m}"
+    month_dir.mkdir(parents=True, exist_ok=True)
+    
+    entries, moved_paths = [], []
+    for file_path, content_type, object_id, object_description in files:
+        file_path = Path(file_path)
+        if not file_path.is_file():
+            continue
+        try:
+            relative_path = file_path.relative_to(media_root)
+        except ValueError:
+            relative_path = file_path.name
+        trash_file_path = month_dir / f"{uuid.uuid4().hex}_{file_path.name}"
+        try:
+            shutil.move(str(file_path), str(trash_file_path))
+        except Exception:
+            logger.exception('Error moving file %s to trash', file_path)
+            continue
+        moved_paths.append(file_path)
+        entries.append(MediaTrash(
+            original_path=str(relative_path),
+            trash_path=trash_file_path.relative_to(trash_root).as_posix(),
+            filename=file_path.name,
+            file_size=trash_file_path.stat().st_size,
+            content_type=content_type,
+            object_id=object_id,
+            object_description=object_description[:500],
+            deleted_by=deleted_by,
+            deletion_reason=reason
+        ))
+    
+    media_catalog.remove_files(moved_paths)
+    return MediaTrash.objects.bulk_create(entries)
+
+
 def move_directory_to_trash(directory_path, related_object, deleted_by, reason=''):
     """
     Move an entire directory to trash
@@ -113,20 +167,20 @@ def move_directory_to_trash(directory_path, related_object, deleted_by, reason='
     if not directory_path.exists() or not directory_path.is_dir():
         return []
     
-    moved_files = []
-    
-    # Iterate over all files in directory recursively
-    for file_path in directory_path.rglob('*'):
-        if file_path.is_file():
-            media_trash = move_file_to_trash(file_path, related_object, deleted_by, reason)
-            if media_trash:
-                moved_files.append(media_trash)
+    content_type = ContentType.objects.get_for_model(related_object)
+    description = str(related_object)
+    moved_files = move_files_to_trash(
+        [(file_path, content_type, related_object.pk, description)
+         for file_path in directory_path.rglob('*') if file_path.is_file()],
+        deleted_by, reason
+    )
     
     # Remove empty directory
     try:
         shutil.rmtree(directory_path)
     except:
         pass
+    media_catalog.remove(directory_path)
     
     return moved_files
 
@@ -162,6 +216,8 @@ def restore_file_from_trash(media_trash_id):
         
         # Move file back
         shutil.move(str(trash_file), str(original_file))
+        owner = (media_trash.content_type_id, media_trash.object_id) if media_trash.content_type_id else None
+        media_catalog.add_files([original_file], owner=owner)
         
         # Delete MediaTrash entry
         media_trash.delete()
@@ -213,21 +269,86 @@ def empty_trash(older_than_days=None):
     Returns:
         int: Number of items deleted
     """
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    queryset = MediaTrash.objects.all()
-    
     if older_than_days:
-        cutoff_date = timezone.now() - timedelta(days=older_than_days)
-        queryset = queryset.filter(deleted_at__lt=cutoff_date)
+        return purge_trash(max_age_days=older_than_days)['items']
+    return purge_trash(purge_all=True)['items']
+
+
+def purge_trash(max_age_days=None, max_total_bytes=None, purge_all=False, batch_size=500,
+                max_batches=None, dry_run=False):
+    """
+    Endgültiges Löschen aus dem Papierkorb in begrenzten Batches (älteste zuerst)
     
-    count = 0
-    for media_trash in queryset:
-        if permanently_delete_trash_item(media_trash.id):
-            count += 1
+    Gelöscht wird alles, was älter als `max_age_days` ist (bzw. alles bei
+    `purge_all`), und danach so lange weiter, bis der Papierkorb höchstens
+    `max_total_bytes` belegt. Jeder Batch wird für sich abgeschlossen; ein
+    abgebrochener Lauf wird beim nächsten Aufruf einfach fortgesetzt.
+    `max_batches` begrenzt die Arbeit pro Lauf (z.B. für zeitgesteuerte Jobs).
     
-    return count
+    Returns:
+        dict: items, bytes (freigegeben), batches, remaining_items,
+              remaining_bytes, complete (False, wenn max_batches erreicht wurde)
+    """
+    trash_root = get_media_trash_path()
+    cutoff = timezone.now() - timedelta(days=max_age_days) if max_age_days else None
+    remaining_bytes = MediaTrash.objects.aggregate(total=Sum('file_size'))['total'] or 0
+    result = {'items': 0, 'bytes': 0, 'batches': 0, 'complete': True}
+    position = None  # Keyset-Position (deleted_at, pk) - nötig, weil dry_run nichts löscht
+    
+    while True:
+        if max_batches is not None and result['batches'] >= max_batches:
+            result['complete'] = False
+            break
+        
+        queryset = MediaTrash.objects.order_by('deleted_at', 'pk')
+        if position is not None:
+            queryset = queryset.filter(
+                Q(deleted_at__gt=position[0]) | Q(deleted_at=position[0], pk__gt=position[1])
+            )
+        rows = list(queryset.values_list('pk', 'deleted_at', 'trash_path', 'file_size')[:batch_size])
+        
+        selected = []
+        for row in rows:
+            expired = purge_all or (cutoff is not None and row[1] < cutoff)
+            over_quota = max_total_bytes is not None and remaining_bytes > max_total_bytes
+            if not (expired or over_quota):
+                break
+            selected.append(row)
+            remaining_bytes -= row[3]
+        if not selected:
+            break
+        
+        if not dry_run:
+            _delete_trash_rows(trash_root, selected)
+        position = (selected[-1][1], selected[-1][0])
+        result['items'] += len(selected)
+        result['bytes'] += sum(row[3] for row in selected)
+        result['batches'] += 1
+        if len(selected) < batch_size:
+            break
+    
+    result['remaining_bytes'] = max(remaining_bytes, 0)
+    result['remaining_items'] = MediaTrash.objects.count() - (result['items'] if dry_run else 0)
+    return result
+
+
+def _delete_trash_rows(trash_root, rows):
+    """Löscht Dateien und Einträge eines Batches (pk, deleted_at, trash_path, file_size)"""
+    folders = set()
+    for _, _, trash_path, _ in rows:
+        trash_file = trash_root / trash_path
+        try:
+            trash_file.unlink()
+        except FileNotFoundError:
+            pass
+        folders.add(trash_file.parent)
+    MediaTrash.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    # Leer gewordene Monatsordner aufräumen
+    for folder in folders:
+        try:
+            folder.rmdir()
+        except OSError:
+            pass
 
 
 def log_deletion(entity_type, entity_id, entity_description, action, deleted_by, 
@@ -0,0 +1,129 @@
+"""
+Gesammeltes Schreiben von Änderungsprotokollen und Benachrichtigungen.
+
+Ticket-, Projekt- und Leihungs-Änderungen erzeugen Protokollzeilen je
+geändertem Feld sowie Nachrichten, Erinnerungen und Benachrichtigungen je
+Empfänger. Statt jede Zeile einzeln anzulegen, sammelt FanOut die Zeilen
+und schreibt sie am Ende mit einem bulk_create je Modell - innerhalb der
+Transaktion der Änderung (fan_out()). Empfänger werden als Benutzer-IDs
+übergeben und mit einer Abfrage ermittelt (z.B. watchers.values_list('pk')),
+so bleibt der Aufwand einer Änderung unabhängig von der Zahl der Beobachter.
+
+    with fan_out(actor=request.user) as fanout:
+        instance = serializer.save()
+        fanout.log_changes(TicketChangeLog, field_changes(old, new, labels), ticket=instance)
+        fanout.message(recipient_ids(instance.watchers, exclude=request.user), title=..., content=...)
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+
+def recipient_ids(*sources, exclude=None):
+    """
+    Benutzer-IDs aus Benutzern, IDs, QuerySets/Managern von Benutzern (eine
+    Abfrage je QuerySet, nur die IDs) - ohne Duplikate, Reihenfolge bleibt erhalten.
+
+    Args:
+        exclude: Benutzer oder ID, die nicht benachrichtigt wird (i.d.R. der Ändernde)
+    """
+    excluded = exclude.pk if isinstance(exclude, models.Model) else exclude
+    ids = []
+    for source in sources:
+        if source is None:
+            continue
+        if isinstance(source, models.Model):
+            values = [source.pk]
+        elif isinstance(source, int):
+            values = [source]
+        elif hasattr(source, 'values_list'):
+            values = source.values_list('pk', flat=True)
+        else:
+            values = [value.pk if isinstance(value, models.Model) else value for value in source]
+        for value in values:
+            if value is not None and value != excluded and value not in ids:
+                ids.append(value)
+    return ids
+
+
+def field_changes(old, new, labels):
+    """
+    Geänderte Felder als Liste von (Bezeichnung, alter Wert, neuer Wert) - Werte
+    als Text wie in den Änderungsprotokollen ('' für leere Werte).
+
+    Args:
+        old, new: {feld: wert}
+        labels: {feld: Bezeichnung}; nur diese Felder werden verglichen
+    """
+    changes = []
+    for field, label in labels.items():
+        if old.get(field) != new.get(field):
+            changes.append((label, str(old.get(field) or ''), str(new.get(field) or '')))
+    return changes
+
+
+class FanOut:
+    """Sammelt Zeilen je Modell und schreibt sie mit flush() gesammelt"""
+
+    def __init__(self, actor=None):
+        self.actor = actor
+        self._rows = {}
+
+    def add(self, obj):
+        self._rows.setdefault(type(obj), []).append(obj)
+        return obj
+
+    def log_changes(self, model, changes, **common):
+        """Eine Protokollzeile (field_name, old_value, new_value, changed_by) je Änderung"""
+        for label, old_value, new_value in changes:
+            self.add(model(field_name=label, old_value=old_value, new_value=new_value,
+                           changed_by=self.actor, **common))
+
+    def message(self, user_ids, **fields):
+        """Inbox-Nachricht je Empfänger (Absender: actor)"""
+        from users.models import Message
+        fields.setdefault('sender', self.actor)
+        for user_id in user_ids:
+            self.add(Message(user_id=user_id, **fields))
+
+    def notify(self, user_ids, **fields):
+        """Benachrichtigung im NotificationCenter je Empfänger"""
+        from users.models import Notification
+        for user_id in user_ids:
+            self.add(Notification(user_id=user_id, **fields))
+
+    def remind(self, user_ids, due_in_days=1, **fields):
+        """Erinnerung je Empfänger (fällig in `due_in_days` Tagen, falls kein due_date)"""
+        from users.models import Reminder
+        fields.setdefault('due_date', timezone.now().date() + timedelta(days=due_in_days))
+        for user_id in user_ids:
+            self.add(Reminder(user_id=user_id, **fields))
+
+    def assign(self, user_id, *, reminder_title, description, notification_title,
+               notification_message, related_object_type, related_object_id, related_url):
+        """Erinnerung (fällig morgen) und Benachrichtigung für einen neu zugewiesenen Benutzer"""
+        if not user_id:
+            return
+        self.remind([user_id], title=reminder_title, description=description,
+                    related_object_type=related_object_type, related_object_id=related_object_id,
+                    related_url=related_url)
+        self.notify([user_id], title=notification_title, message=notification_message,
+                    notification_type='info', related_url=related_url)
+
+    def flush(self):
+        """Schreibt alle gesammelten Zeilen (ein bulk_create je Modell)"""
+        rows, self._rows = self._rows, {}
+        for model, objs in rows.items():
+            model.objects.bulk_create(objs)
+        return sum(len(objs) for objs in rows.values())
+
+
+@contextmanager
+def fan_out(actor=None):
+    """Transaktion, an deren Ende die gesammelten Zeilen geschrieben werden"""
+    with transaction.atomic():
+        fanout = FanOut(actor)
+        yield fanout
+        fanout.flush()
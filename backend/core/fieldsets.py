@@ -0,0 +1,106 @@
+"""
+Sparse Fieldsets für lesende API-Anfragen.
+
+    GET /api/customers/customers/?fields=id,customer_number,full_name
+    GET /api/systems/systems/?omit=last_contact_date,contact_overdue
+
+SparseFieldsMixin (Serializer) gibt nur die angeforderten Felder aus - die
+übrigen, auch teure SerializerMethodFields, werden gar nicht erst berechnet.
+Das gilt nur für den äußersten Serializer (verschachtelte Serializer
+bleiben vollständig) und nur für GET/HEAD/OPTIONS.
+
+SparseQueryMixin (ViewSet) plant die Abfrage passend dazu: query_plan ordnet
+Feldern die Schritte zu, die sie brauchen (select_related, prefetch,
+Annotationen); plan_queryset() führt nur die Schritte der angeforderten
+Felder aus, jeden Schritt einmal. Die Serializer lesen Prefetches und
+Annotationen über prefetched()/annotated() und fragen selbst ab, wenn das
+Objekt nicht aus einer geplanten Abfrage stammt.
+
+    query_plan = {
+        'customer_name': select_customer,
+        'items_count': annotate_items_count,
+    }
+"""
+from django.db.models import F, Func, IntegerField, Subquery
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(request, param):
+    value = request.query_params.get(param) if hasattr(request, 'query_params') else request.GET.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def field_selector(request):
+    """
+    Funktion name -> bool: wird das Feld ausgegeben? (ohne Anfrage und bei
+    schreibenden Anfragen: alle Felder)
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return lambda name: True
+    fields = _names(request, FIELDS_PARAM)
+    omit = _names(request, OMIT_PARAM) or set()
+    return lambda name: (fields is None or name in fields) and name not in omit
+
+
+class SparseFieldsMixin:
+    """Serializer-Mixin: ?fields= / ?omit= (siehe Modul-Doku)"""
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        selected = field_selector(self.context.get('request'))
+        return {name: field for name, field in fields.items() if selected(name)}
+
+
+class SparseQueryMixin:
+    """ViewSet-Mixin: Abfrage-Schritte nur für angeforderte Felder (query_plan)"""
+
+    query_plan = {}
+
+    def plan_queryset(self, queryset):
+        selected = field_selector(self.request)
+        steps = []
+        for name, step in self.query_plan.items():
+            if selected(name) and step not in steps:
+                steps.append(step)
+        for step in steps:
+            queryset = step(queryset)
+        return queryset
+
+
+def prefetched(obj, attr, fallback):
+    """Liste aus einem Prefetch mit to_attr=`attr` - ohne Prefetch: list(fallback())"""
+    return obj.__dict__[attr] if attr in obj.__dict__ else list(fallback())
+
+
+def annotated(obj, attr, fallback):
+    """Wert der Annotation `attr` - ohne Annotation: fallback()"""
+    return obj.__dict__[attr] if attr in obj.__dict__ else fallback()
+
+
+def subquery_count(queryset):
+    """
+    Anzahl der (verschiedenen) Zeilen von `queryset` als Unterabfrage für
+    annotate(); `queryset` bezieht sich über OuterRef auf die äußere Zeile:
+
+        subquery_count(System.objects.filter(customer=OuterRef('pk')))
+
+    Anders als Count() über einen Join vervielfacht sie keine anderen Annotationen.
+    """
+    counts = queryset.order_by().annotate(
+        total=Func(F('pk'), function='COUNT', template='%(function)s(DISTINCT %(expressions)s)')
+    ).values('total')
+    return Subquery(counts, output_field=IntegerField())
@@ -0,0 +1,398 @@
+"""
+Batch-Synchronisation von Dokument-Positionen (Angebote, Aufträge, Warensammlungen).
+
+Statt jede Position einzeln zu speichern bzw. zu löschen, wird die Differenz
+zwischen den vorhandenen Zeilen und den übermittelten (bereits validierten)
+Daten berechnet und mit delete / bulk_update / bulk_create in einer
+Transaktion angewendet.
+
+Für Unterobjekte, die einzeln bearbeitet werden (ToDos, Zeiteinträge,
+Leihpositionen), gibt es dasselbe als explizite Batch-Anfrage:
+
+    {"create": [{...}, ...], "update": [{"id": 3, ...}, ...], "delete": [5, 8]}
+
+validate_item_batch() prüft alle Zeilen, ItemSync.apply_batch() schreibt sie
+in einer Transaktion.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
+from rest_framework import serializers
+
+
+@dataclass
+class ItemSyncResult:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    deleted: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        return bool(self.created or self.updated or self.deleted)
+
+    @property
+    def items(self):
+        """Alle verbleibenden Positionen (neu, geändert, unverändert)"""
+        return self.created + self.updated + self.unchanged
+
+
+@dataclass
+class ItemBatch:
+    """Validierte Batch-Anfrage (siehe validate_item_batch)"""
+    create: list = field(default_factory=list)
+    update: list = field(default_factory=list)
+    delete: list = field(default_factory=list)
+    existing: list = field(default_factory=list)
+
+
+def _raw_value(value):
+    """Vergleichswert für ForeignKeys: Primärschlüssel statt Instanz"""
+    return value.pk if isinstance(value, models.Model) else value
+
+
+class ItemSync:
+    """
+    Berechnet und wendet die Differenz zwischen bestehenden Positionen und neuen Daten an.
+
+    Args:
+        model: Positions-Model (z.B. QuotationItem)
+        parent_field: Name des ForeignKeys zum Dokument (z.B. 'quotation')
+        fields: Felder, die aus den Daten übernommen werden dürfen
+        key: Felder, über die Daten und bestehende Zeilen einander zugeordnet werden.
+             Daten ohne Schlüsselwert werden neu angelegt.
+        prepare: Optionaler Callback prepare(instances), der vor dem Schreiben
+                 einmal mit allen neuen und geänderten Instanzen aufgerufen wird
+                 (z.B. für Nummernvergabe oder berechnete Felder).
+        position_field: Feld, das neue Zeilen ohne Angabe fortlaufend nach der
+                 höchsten vorhandenen Position erhalten (nur apply_batch).
+    """
+
+    def __init__(self, model, parent_field, fields, key=('id',), prepare=None, batch_size=500,
+                 position_field=None):
+        self.model = model
+        self.parent_field = parent_field
+        self.fields = [f for f in fields if f not in ('id', parent_field)]
+        self.key = tuple(key)
+        self.prepare = prepare
+        self.batch_size = batch_size
+        self.position_field = position_field
+        self._meta_fields = {name: model._meta.get_field(name) for name in self.fields}
+
+    def _attname(self, name):
+        if name == 'id':
+            return self.model._meta.pk.attname
+        return self.model._meta.get_field(name).attname
+
+    def _object_key(self, obj):
+        return tuple(getattr(obj, self._attname(name)) for name in self.key)
+
+    def _row_key(self, row):
+        values = tuple(_raw_value(row.get(name)) for name in self.key)
+        if any(v in (None, '') for v in values):
+            return None
+        return values
+
+    def _snapshot(self, obj):
+        return {name: getattr(obj, f.attname) for name, f in self._meta_fields.items()}
+
+    def diff(self, parent, existing, rows):
+        """
+        Ordnet die Daten den bestehenden Zeilen zu.
+
+        Returns:
+            (new_instances, matched [(instance, snapshot)], to_delete)
+        """
+        by_key = defaultdict(list)
+        for obj in existing:
+            by_key[self._object_key(obj)].append(obj)
+
+        new_instances = []
+        matched = []
+        for row in rows:
+            key = self._row_key(row)
+            candidates = by_key.get(key) if key is not None else None
+            values = {name: row[name] for name in self.fields if name in row}
+            if candidates:
+                obj = candidates.pop(0)
+                snapshot = self._snapshot(obj)
+                for name, value in values.items():
+                    setattr(obj, name, value)
+                matched.append((obj, snapshot))
+            else:
+                values[self.parent_field] = parent
+                new_instances.append(self.model(**values))
+
+        to_delete = [obj for objs in by_key.values() for obj in objs]
+        return new_instances, matched, to_delete
+
+    def apply(self, parent, rows, existing=None):
+        """
+        Synchronisiert die Positionen von `parent` mit `rows` (Liste validierter Dicts).
+
+        Es werden höchstens ein DELETE, ein bulk_update und ein bulk_create
+        (jeweils in Batches) ausgeführt. Model-save()/Signale werden dabei
+        nicht ausgelöst - abhängige Werte (Summen etc.) muss der Aufrufer
+        danach einmalig aktualisieren.
+        """
+        if existing is None:
+            existing = list(self.model.objects.filter(**{self.parent_field: parent}))
+
+        new_instances, matched, to_delete = self.diff(parent, existing, rows)
+        return self._write(new_instances, matched, to_delete)
+
+    def apply_batch(self, parent, batch, defaults=None):
+        """
+        Wendet eine validierte Batch-Anfrage (ItemBatch) auf die Zeilen von `parent` an -
+        wie apply(), aber nur die angegebenen Zeilen werden geändert bzw. gelöscht.
+
+        Args:
+            defaults: Werte für neue Zeilen, die nicht aus den Daten stammen (z.B. created_by)
+        """
+        new_instances, matched, _ = self.diff(parent, batch.existing, batch.update + batch.create)
+        for obj in new_instances:
+            for name, value in (defaults or {}).items():
+                setattr(obj, name, value)
+        if self.position_field:
+            self._number(parent, [obj for obj, row in zip(new_instances, batch.create)
+                                  if self.position_field not in row])
+        return self._write(new_instances, matched, batch.delete)
+
+    def _number(self, parent, instances):
+        if not instances:
+            return
+        last = self.model.objects.filter(**{self.parent_field: parent}).aggregate(
+            last=models.Max(self.position_field)
+        )['last'] or 0
+        for offset, obj in enumerate(instances, start=1):
+            setattr(obj, self.position_field, last + offset)
+
+    def _write(self, new_instances, matched, to_delete):
+        if self.prepare:
+            self.prepare(new_instances + [obj for obj, _ in matched])
+
+        result = ItemSyncResult()
+        update_fields = set()
+        for obj, snapshot in matched:
+            changed = [name for name, value in snapshot.items()
+                       if getattr(obj, self._meta_fields[name].attname) != value]
+            if changed:
+                update_fields.update(changed)
+                result.updated.append(obj)
+            else:
+                result.unchanged.append(obj)
+
+        # bulk_update setzt auto_now-Felder (updated_at) nicht selbst
+        for model_field in self.model._meta.concrete_fields:
+            if result.updated and getattr(model_field, 'auto_now', False):
+                for obj in result.updated:
+                    model_field.pre_save(obj, add=False)
+                update_fields.add(model_field.name)
+
+        with transaction.atomic():
+            if to_delete:
+                self.model.objects.filter(pk__in=[obj.pk for obj in to_delete]).delete()
+                result.deleted = to_delete
+            if result.updated:
+                self.model.objects.bulk_update(
+                    result.updated, sorted(update_fields), batch_size=self.batch_size
+                )
+            if new_instances:
+                result.created = self.model.objects.bulk_create(new_instances, batch_size=self.batch_size)
+
+        return result
+
+
+def _related_lookups(serializer_class, rows, context, known):
+    """
+    Beschreibbare PrimaryKeyRelatedFields und ihre Objekte: eine Abfrage je Feld
+    für alle Zeilen, bereits geladene Objekte (`known`) ohne Abfrage.
+    """
+    template = serializer_class(context=context or {})
+    relations = {name: f for name, f in template.fields.items()
+                 if isinstance(f, serializers.PrimaryKeyRelatedField) and not f.read_only}
+    lookups = {}
+    for name, relation in relations.items():
+        queryset = relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        found = {str(obj.pk): obj for obj in known if isinstance(obj, queryset.model)}
+        pks = set()
+        for row in rows:
+            value = row.get(name)
+            if value in (None, '') or isinstance(value, (list, dict)) or str(value) in found:
+                continue
+            try:
+                pks.add(pk_field.to_python(value))
+            except (DjangoValidationError, TypeError):
+                pass
+        found.update((str(pk), obj) for pk, obj in queryset.in_bulk(pks).items())
+        lookups[name] = found
+    return relations, lookups
+
+
+def validate_item_rows(serializer_class, rows, existing=None, context=None, key='id',
+                       preload=False, known=()):
+    """
+    Validiert alle Positionsdaten, bevor etwas geschrieben wird.
+
+    Bestehende Positionen (über `key` zugeordnet) werden partiell gegen ihre
+    Instanz validiert, neue vollständig.
+
+    Args:
+        preload: Fremdschlüssel (PrimaryKeyRelatedField) aller Zeilen gesammelt
+                 laden statt einer Abfrage je Zeile und Feld - nur für Serializer,
+                 deren validate() diese Felder nicht liest.
+        known: bereits geladene Objekte für preload (z.B. das Dokument selbst)
+
+    Returns:
+        (validated_rows, errors) - errors ist eine Liste (ein Eintrag pro Zeile,
+        leeres Dict bei gültigen Zeilen) oder None wenn alles gültig ist.
+    """
+    existing = existing or {}
+    relations, lookups = _related_lookups(serializer_class, rows, context, known) if preload else ({}, {})
+    validated = []
+    errors = []
+    has_errors = False
+    for row in rows:
+        instance = existing.get(row.get(key)) if row.get(key) else None
+        if instance is not None:
+            serializer = serializer_class(instance, data=row, partial=True, context=context or {})
+        else:
+            serializer = serializer_class(data=row, context=context or {})
+
+        resolved = {}
+        row_errors = {}
+        for name, relation in relations.items():
+            value = row.get(name)
+            if value in (None, '') or isinstance(value, (list, dict)):
+                continue
+            # das Feld wird hier statt im Serializer aufgelöst
+            del serializer.fields[name]
+            obj = lookups[name].get(str(value))
+            if obj is None:
+                row_errors[name] = [relation.error_messages['does_not_exist'].format(pk_value=value)]
+            else:
+                resolved[name] = obj
+
+        if serializer.is_valid() and not row_errors:
+            data = dict(serializer.validated_data)
+            data.update(resolved)
+            if instance is not None:
+                data[key] = instance.pk
+            validated.append(data)
+            errors.append({})
+        else:
+            has_errors = True
+            validated.append(None)
+            errors.append({**serializer.errors, **row_errors})
+    return validated, (errors if has_errors else None)
+
+
+def _batch_pk(pk_field, value):
+    try:
+        return pk_field.to_python(value) if value not in (None, '') else None
+    except (DjangoValidationError, TypeError):
+        return None
+
+
+def time_entry_initial(user):
+    """Vorgaben für neue Zeiteinträge (initial von validate_item_batch) wie in add_time_entry"""
+    return {
+        'date': date.today().isoformat(),
+        'time': datetime.now().strftime('%H:%M:%S'),
+        'employee': user.pk,
+    }
+
+
+def validate_item_batch(sync, parent, data, serializer_class, context=None, initial=None):
+    """
+    Validiert eine Batch-Anfrage für die Zeilen von `parent`, bevor etwas geschrieben wird.
+
+    Args:
+        sync: ItemSync des Unterobjekts
+        data: {'create': [...], 'update': [{'id': ...}, ...], 'delete': [ids]} (jeweils optional)
+        initial: Vorgaben für neue Zeilen, soweit dort leer (z.B. Datum, Mitarbeiter)
+
+    Returns:
+        (ItemBatch, errors) - errors ist ein Dict mit denselben Schlüsseln
+        (Fehler je Zeile, leeres Dict bei gültigen Zeilen) oder None wenn alles gültig ist.
+    """
+    if not isinstance(data, dict):
+        return None, {'non_field_errors': ['Objekt mit create, update und/oder delete erwartet.']}
+    errors = {}
+    parts = {}
+    for name in ('create', 'update', 'delete'):
+        value = data.get(name) or []
+        if not isinstance(value, list) or (name != 'delete' and not all(isinstance(row, dict) for row in value)):
+            errors[name] = ['Liste von Zeilen erwartet.' if name != 'delete' else 'Liste von IDs erwartet.']
+            value = []
+        parts[name] = value
+    if errors:
+        return None, errors
+
+    pk_field = sync.model._meta.pk
+    update_ids = [_batch_pk(pk_field, row.get('id')) for row in parts['update']]
+    delete_ids = [_batch_pk(pk_field, value) for value in parts['delete']]
+    existing = {
+        obj.pk: obj for obj in sync.model.objects.filter(
+            **{sync.parent_field: parent}, pk__in=[pk for pk in update_ids + delete_ids if pk is not None]
+        )
+    }
+
+    seen = set()
+    update_errors = []
+    for pk in update_ids:
+        if pk not in existing:
+            update_errors.append({'id': ['Nicht gefunden.']})
+        elif pk in seen:
+            update_errors.append({'id': ['Mehrfach angegeben.']})
+        else:
+            update_errors.append({})
+        seen.add(pk)
+    delete_errors = []
+    for pk in delete_ids:
+        if pk not in existing:
+            delete_errors.append({'id': ['Nicht gefunden.']})
+        elif pk in seen:
+            delete_errors.append({'id': ['Mehrfach angegeben oder zugleich geändert.']})
+        else:
+            delete_errors.append({})
+        seen.add(pk)
+    if any(delete_errors):
+        errors['delete'] = delete_errors
+
+    create_rows = []
+    for row in parts['create']:
+        row = dict(row)
+        row.pop('id', None)
+        for name, value in (initial or {}).items():
+            if row.get(name) in (None, ''):
+                row[name] = value
+        row[sync.parent_field] = parent.pk
+        create_rows.append(row)
+    created, create_errors = validate_item_rows(serializer_class, create_rows, context=context,
+                                                preload=True, known=[parent])
+    if create_errors:
+        errors['create'] = create_errors
+
+    if any(update_errors):
+        errors['update'] = update_errors
+    else:
+        update_rows = [dict(row, id=pk) for row, pk in zip(parts['update'], update_ids)]
+        updated, row_errors = validate_item_rows(serializer_class, update_rows, existing=existing, context=context,
+                                                 preload=True, known=[parent])
+        if row_errors:
+            errors['update'] = row_errors
+
+    if errors:
+        return None, errors
+    batch = ItemBatch(
+        create=created,
+        update=updated,
+        delete=[existing[pk] for pk in delete_ids],
+        existing=[existing[pk] for pk in update_ids],
+    )
+    return batch, None
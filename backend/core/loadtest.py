@@ -0,0 +1,193 @@
+"""
+Lasttest gegen einen laufenden Server (z.B. gunicorn mit verp/gunicorn.conf.py).
+
+Anders als core.benchmarks (Test-Client im selben Prozess) gehen die
+Anfragen über HTTP an den Server - mit Workern, Threads, Keep-Alive und
+Datenbankverbindungen wie im Betrieb. `concurrency` Clients rufen die
+Endpunkte (standardmäßig die lesenden API-Benchmarks) in zufälliger, per
+seed reproduzierbarer Reihenfolge auf, bis `duration` Sekunden oder
+`requests` Anfragen erreicht sind. Ergebnis je Endpunkt: Anzahl, Fehler,
+Durchsatz und Latenz-Perzentile (p50/p95/p99).
+
+Reproduzierbarer Ablauf: manage.py generate_synthetic_data --scale 1,
+Server starten, manage.py load_test --url http://localhost:8000 (siehe dort).
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urlsplit
+
+from .benchmarks import BENCHMARKS
+
+
+@dataclass
+class Endpoint:
+    name: str
+    path: str                            # Platzhalter aus dem Kontext, z.B. {quotation}
+    params: dict = field(default_factory=dict)
+    weight: int = 1                      # relative Häufigkeit
+
+
+def default_endpoints():
+    """Die lesenden API-Benchmarks (GET, ohne direkte Funktionsaufrufe)"""
+    return [
+        Endpoint(b.name, b.path, dict(b.params))
+        for b in BENCHMARKS if b.path and b.method == 'get' and b.call is None
+    ]
+
+
+def percentile(values, percent):
+    """Perzentil nach Nearest-Rank (values sortiert)"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+class Client:
+    """HTTP-Verbindung eines Lasttest-Clients (Keep-Alive, Bearer-Token)"""
+
+    def __init__(self, base_url, token=None, timeout=60):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Accept': 'application/json', 'Accept-Encoding': 'gzip'}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+
+    def request(self, method, path, params=None, body=None):
+        """(Status, Antwort-Bytes); bei Verbindungsfehlern wird einmal neu verbunden"""
+        url = self.prefix + path + (f'?{urlencode(params)}' if params else '')
+        headers = dict(self.headers)
+        if body is not None:
+            body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            try:
+                self.connection.request(method, url, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        self.connection.close()
+
+
+def login(base_url, username, password):
+    """Access-Token über /api/auth/login/"""
+    client = Client(base_url)
+    try:
+        status, body = client.request('POST', '/api/auth/login/', body={'username': username, 'password': password})
+    finally:
+        client.close()
+    if status != 200:
+        raise ValueError(f'Anmeldung fehlgeschlagen (HTTP {status})')
+    return json.loads(body)['access']
+
+
+def _format(value, context):
+    return value.format(**context) if isinstance(value, str) else value
+
+
+def run_load_test(base_url, endpoints, context=None, token=None, concurrency=4,
+                  duration=30.0, requests=None, seed=42, warmup=True):
+    """
+    Führt den Lasttest aus.
+
+    Args:
+        context: Platzhalter für Pfade und Parameter (z.B. customer, quotation, user)
+        requests: Gesamtzahl der Anfragen (statt bzw. zusätzlich zu duration)
+        warmup: jeden Endpunkt vorab einmal aufrufen (nicht gemessen)
+
+    Returns:
+        dict mit concurrency, elapsed_s, requests, errors, throughput_rps,
+        p50/p95/p99/max_ms und 'endpoints' (gleiche Kennzahlen je Endpunkt)
+    """
+    context = context or {}
+    targets = [
+        (e.name, _format(e.path, context), {k: _format(v, context) for k, v in e.params.items()}, e.weight)
+        for e in endpoints
+    ]
+    if warmup:
+        client = Client(base_url, token)
+        try:
+            for _, path, params, _ in targets:
+                client.request('GET', path, params)
+        finally:
+            client.close()
+
+    samples = []            # (Name, Status, ms, Bytes)
+    lock = threading.Lock()
+    issued = [0]
+    names = [t[0] for t in targets]
+    by_name = {t[0]: t for t in targets}
+    weights = [t[3] for t in targets]
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def take():
+        with lock:
+            if requests is not None and issued[0] >= requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = Client(base_url, token)
+        own = []
+        try:
+            while (deadline is None or time.perf_counter() < deadline) and take():
+                name = rng.choices(names, weights)[0]
+                _, path, params, _ = by_name[name]
+                begin = time.perf_counter()
+                try:
+                    status, body = client.request('GET', path, params)
+                    size = len(body)
+                except (OSError, http.client.HTTPException):
+                    status, size = 0, 0
+                own.append((name, status, (time.perf_counter() - begin) * 1000, size))
+        finally:
+            client.close()
+            with lock:
+                samples.extend(own)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {'concurrency': concurrency, **_summary(samples, elapsed), 'endpoints': []}
+    for name in names:
+        own = [s for s in samples if s[0] == name]
+        result['endpoints'].append({'name': name, **_summary(own, elapsed)})
+    return result
+
+
+def _summary(samples, elapsed):
+    timings = sorted(s[2] for s in samples)
+    errors = sum(1 for s in samples if not 200 <= s[1] < 400)
+
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0,
+        'p50_ms': rounded(percentile(timings, 50)),
+        'p95_ms': rounded(percentile(timings, 95)),
+        'p99_ms': rounded(percentile(timings, 99)),
+        'max_ms': rounded(timings[-1] if timings else None),
+        'bytes_avg': round(sum(s[3] for s in samples) / len(samples)) if samples else 0,
+    }
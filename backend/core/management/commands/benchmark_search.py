@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.search import normalize_search_text, search_queryset
+
+
+FIRST_NAMES = ['Anna', 'Ben', 'Clara', 'David', 'Eva', 'Felix', 'Greta', 'Hannes', 'Ida', 'Jonas',
+               'Klara', 'Lukas', 'Mia', 'Noah', 'Olga', 'Paul', 'Rosa', 'Simon', 'Tara', 'Uwe']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker',
+              'Schulz', 'Hoffmann', 'Koch', 'Richter', 'Klein', 'Wolf', 'Neumann', 'Schwarz']
+CITIES = ['München', 'Berlin', 'Hamburg', 'Köln', 'Heidelberg', 'Göttingen', 'Dresden', 'Freiburg']
+INSTITUTES = ['Biozentrum', 'Max-Planck-Institut', 'Zellbiologie', 'Neurowissenschaften', 'Biophysik']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the customer search (legacy icontains over joins vs. denormalized search text) '
+        'on a synthetic dataset. The data is rolled back afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic customers to create')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per search term')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self._generate(options['rows'], rng)
+                self._run(options['repeat'])
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Synthetische Daten verworfen')
+
+    def _generate(self, rows, rng):
+        from customers.models import Customer, CustomerAddress, CustomerEmail
+
+        started = time.perf_counter()
+        batch_size = 2000
+        for start in range(0, rows, batch_size):
+            customers = []
+            extras = []
+            for n in range(start, min(start + batch_size, rows)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                email = f'{first}.{last}{n}@example.org'.lower()
+                city, institute = rng.choice(CITIES), rng.choice(INSTITUTES)
+                number = f'B-{n:07d}'
+                customers.append(Customer(
+                    customer_number=number, first_name=first, last_name=last,
+                    search_text=normalize_search_text(number, first, last, email, institute, city),
+                ))
+                extras.append((email, city, institute))
+            Customer.objects.bulk_create(customers, batch_size=batch_size)
+            CustomerEmail.objects.bulk_create([
+                CustomerEmail(customer=c, email=email) for c, (email, _, _) in zip(customers, extras)
+            ], batch_size=batch_size)
+            CustomerAddress.objects.bulk_create([
+                CustomerAddress(customer=c, institute=institute, city=city, street='Teststraße',
+                                house_number='1', postal_code='12345')
+                for c, (_, city, institute) in zip(customers, extras)
+            ], batch_size=batch_size)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in ('customers_customer', 'customers_customeremail', 'customers_customeraddress'):
+                    cursor.execute(f'ANALYZE {table}')
+        self.stdout.write(f'{rows} Kunden erzeugt in {time.perf_counter() - started:.1f}s')
+
+    def _run(self, repeat):
+        from customers.models import Customer
+
+        def legacy(term):
+            return Customer.objects.filter(
+                Q(customer_number__icontains=term) | Q(first_name__icontains=term) |
+                Q(last_name__icontains=term) | Q(title__icontains=term) |
+                Q(emails__email__icontains=term) | Q(phones__phone_number__icontains=term) |
+                Q(addresses__city__icontains=term)
+            ).distinct()
+
+        def indexed(term):
+            return search_queryset(Customer.objects.all(), term)
+
+        terms = ['B-0004711', 'schneider', 'heidelberg', 'mia.wolf', 'nicht-vorhanden']
+        self.stdout.write(f'{"Begriff":<18}{"Variante":<10}{"Treffer":>9}{"Median ms":>12}{"Max ms":>10}')
+        for term in terms:
+            for name, build in (('legacy', legacy), ('search', indexed)):
+                timings = []
+                hits = 0
+                for _ in range(repeat):
+                    queryset = build(term)
+                    started = time.perf_counter()
+                    hits = queryset.count()
+                    list(queryset[:20])
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f'{term:<18}{name:<10}{hits:>9}{statistics.median(timings):>12.1f}{max(timings):>10.1f}'
+                )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.synthetic import DEFAULT_VOLUMES, generate, volumes
+
+
+class Command(BaseCommand):
+    help = (
+        'Erzeugt synthetische Kunden, Systeme, Angebote, Kundenaufträge, Zeiteinträge und '
+        'Service-Tickets in einstellbarer Menge (für Benchmarks und Lasttests).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Faktor auf die Standardmengen')
+        parser.add_argument('--seed', type=int, default=42)
+        for key, value in DEFAULT_VOLUMES.items():
+            parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key,
+                                help=f'Anzahl {key} (Standard {value} x scale)')
+
+    def handle(self, *args, **options):
+        counts = volumes(options['scale'], **{key: options[key] for key in DEFAULT_VOLUMES})
+        self.stdout.write('Erzeuge synthetische Daten: ' + ', '.join(f'{k}={v}' for k, v in counts.items()))
+        with transaction.atomic():
+            generate(counts, seed=options['seed'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS('Synthetische Daten angelegt'))
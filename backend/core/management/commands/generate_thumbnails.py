@@ -0,0 +1,56 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+
+from core import thumbnails
+from core.models import FilePreview
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfill preview images for all registered file fields (synchronously). '
+        'By default only files without a preview are processed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', default=[], help='app_label.Model (repeatable)')
+        parser.add_argument('--retry-failed', action='store_true', help='Also retry failed previews')
+        parser.add_argument('--force', action='store_true', help='Regenerate all previews')
+        parser.add_argument('--prune', action='store_true', help='Delete preview images no longer referenced')
+
+    def handle(self, *args, **options):
+        registered = thumbnails.get_registered()
+        labels = {model._meta.label.lower() for model, _ in registered}
+        unknown = {label.lower() for label in options['model']} - labels
+        if unknown:
+            raise CommandError(f'Nicht registriert: {", ".join(sorted(unknown))} (verfügbar: {", ".join(sorted(labels))})')
+
+        started = time.perf_counter()
+        for model, field in registered:
+            if options['model'] and model._meta.label.lower() not in {m.lower() for m in options['model']}:
+                continue
+            done = self._backfill(model, field, options)
+            self.stdout.write(f'{model._meta.label}.{field}: {done} verarbeitet')
+
+        if options['prune']:
+            self.stdout.write(f'{thumbnails.prune()} verwaiste Vorschaubilder gelöscht')
+        self.stdout.write(self.style.SUCCESS(f'Done ({time.perf_counter() - started:.1f}s)'))
+
+    def _backfill(self, model, field, options):
+        previews = FilePreview.objects.filter(content_type=ContentType.objects.get_for_model(model), field_name=field)
+        skip = set()
+        if not options['force']:
+            finished = ['ready', 'unsupported'] + ([] if options['retry_failed'] else ['failed'])
+            skip = set(previews.filter(status__in=finished).values_list('object_id', flat=True))
+
+        done = 0
+        queryset = model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+        for instance in queryset.order_by('pk').iterator(chunk_size=200):
+            if instance.pk in skip:
+                continue
+            preview = thumbnails.request_preview(instance, field, force=True, schedule=False)
+            if preview.status == 'pending':
+                thumbnails.generate(preview.pk)
+            done += 1
+        return done
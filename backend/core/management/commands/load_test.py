@@ -0,0 +1,99 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import default_endpoints, login, run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        'Lasttest gegen einen laufenden Server: mehrere parallele Clients rufen die lesenden '
+        'API-Endpunkte (core.benchmarks) über HTTP auf; Ausgabe von Durchsatz und Latenz-'
+        'Perzentilen je Endpunkt. Reproduzierbar mit generate_synthetic_data und --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Basis-URL des Servers')
+        parser.add_argument('--username', help='Anmeldung über /api/auth/login/')
+        parser.add_argument('--password')
+        parser.add_argument('--token', help='Access-Token statt Benutzername/Passwort')
+        parser.add_argument('--concurrency', type=int, default=8, help='parallele Clients')
+        parser.add_argument('--duration', type=float, default=30, help='Dauer in Sekunden (0 = nur --requests)')
+        parser.add_argument('--requests', type=int, help='Gesamtzahl der Anfragen')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', nargs='*', help='Nur Endpunkte mit diesen Namens-Präfixen')
+        parser.add_argument('--context', nargs='*', default=[], metavar='NAME=WERT',
+                            help='Platzhalter der Pfade (Standard: erste Datensätze der Datenbank)')
+        parser.add_argument('--max-error-rate', type=float, default=0.01,
+                            help='Schlägt fehl, wenn mehr Anfragen fehlschlagen (Anteil)')
+        parser.add_argument('--json', dest='json_path', help='Ergebnisse zusätzlich als JSON schreiben')
+
+    def handle(self, *args, **options):
+        if not options['duration'] and not options['requests']:
+            raise CommandError('--duration oder --requests angeben')
+        token = options['token']
+        if not token:
+            if not options['username'] or not options['password']:
+                raise CommandError('--token oder --username/--password angeben')
+            try:
+                token = login(options['url'], options['username'], options['password'])
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+
+        endpoints = [
+            e for e in default_endpoints()
+            if not options['only'] or any(e.name.startswith(name) for name in options['only'])
+        ]
+        if not endpoints:
+            raise CommandError('Keine Endpunkte ausgewählt')
+        context = self._context(options)
+        self.stdout.write(
+            f"{len(endpoints)} Endpunkte, {options['concurrency']} Clients gegen {options['url']}"
+        )
+
+        result = run_load_test(
+            options['url'], endpoints, context=context, token=token,
+            concurrency=options['concurrency'], duration=options['duration'],
+            requests=options['requests'], seed=options['seed'],
+        )
+        self._report(result)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'url': options['url'], 'context': context, **result}, f, indent=2)
+
+        error_rate = result['errors'] / result['requests'] if result['requests'] else 1
+        if error_rate > options['max_error_rate']:
+            raise CommandError(f"Fehlerquote {error_rate:.1%} ({result['errors']} von {result['requests']})")
+
+    def _context(self, options):
+        """Platzhalter: erste Datensätze der (vom Server genutzten) Datenbank, überschreibbar"""
+        from customers.models import Customer
+        from sales.models import Quotation
+
+        users = get_user_model().objects.order_by('pk')
+        if options['username']:
+            users = users.filter(username=options['username'])
+        context = {
+            'user': users.values_list('pk', flat=True).first(),
+            'customer': Customer.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'quotation': Quotation.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        for item in options['context']:
+            name, _, value = item.partition('=')
+            context[name] = value
+        return context
+
+    def _report(self, result):
+        self.stdout.write(
+            f'\n{"Endpunkt":<26}{"Anfr.":>7}{"Fehler":>8}{"req/s":>8}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}'
+        )
+        rows = result['endpoints'] + [{'name': 'gesamt', **result}]
+        for row in rows:
+            line = (
+                f"{row['name']:<26}{row['requests']:>7}{row['errors']:>8}{row['throughput_rps']:>8.1f}"
+                f"{row['p50_ms'] or 0:>9.1f}{row['p95_ms'] or 0:>9.1f}{row['p99_ms'] or 0:>9.1f}"
+                f"{row['max_ms'] or 0:>9.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['errors'] else line)
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.deletion_utils import purge_trash
+
+
+class Command(BaseCommand):
+    help = (
+        'Permanently delete media trash items older than the retention period and/or beyond the size quota, '
+        'oldest first, in bounded batches. Safe to interrupt and re-run (e.g. from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.MEDIA_TRASH_RETENTION_DAYS,
+            help='Retention in days (default: MEDIA_TRASH_RETENTION_DAYS, 0 = no age limit)'
+        )
+        parser.add_argument(
+            '--max-size-gb', type=float, default=settings.MEDIA_TRASH_MAX_SIZE_GB,
+            help='Size quota of the trash in GB (default: MEDIA_TRASH_MAX_SIZE_GB, 0 = no quota)'
+        )
+        parser.add_argument('--all', action='store_true', help='Empty the whole trash')
+        parser.add_argument('--batch-size', type=int, default=500, help='Items per batch')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        max_size = options['max_size_gb']
+        result = purge_trash(
+            max_age_days=options['older_than_days'] or None,
+            max_total_bytes=int(max_size * 1024 ** 3) if max_size else None,
+            purge_all=options['all'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            dry_run=options['dry_run'],
+        )
+        self.stdout.write(
+            f"{result['items']} Dateien, {result['bytes'] / 1024 ** 2:.1f} MB freigegeben in "
+            f"{result['batches']} Batches ({time.perf_counter() - started:.1f}s); "
+            f"verbleibend: {result['remaining_items']} Dateien, {result['remaining_bytes'] / 1024 ** 2:.1f} MB"
+        )
+        if options['dry_run']:
+            self.stdout.write('Dry-Run: nichts gelöscht')
+        if not result['complete']:
+            self.stdout.write(self.style.WARNING('Batch-Limit erreicht - beim nächsten Lauf wird fortgesetzt'))
+        self.stdout.write(self.style.SUCCESS('Done'))
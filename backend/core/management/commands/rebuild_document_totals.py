@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.pricing import TOTAL_FIELDS, calculate_totals
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the stored totals of quotations and customer orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=['quotations', 'orders', 'all'], default='all',
+            help='Which documents to process (default: all)'
+        )
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare stored and calculated totals, do not write')
+        parser.add_argument('--batch-size', type=int, default=500, help='Documents per batch')
+
+    def handle(self, *args, **options):
+        from sales.models import Quotation, QuotationItem
+        from customer_orders.models import CustomerOrder, CustomerOrderItem
+
+        targets = []
+        if options['model'] in ('quotations', 'all'):
+            targets.append((Quotation, QuotationItem))
+        if options['model'] in ('orders', 'all'):
+            targets.append((CustomerOrder, CustomerOrderItem))
+
+        verify = options['verify']
+        batch_size = options['batch_size']
+        total_mismatches = 0
+
+        for model, item_model in targets:
+            label = model._meta.verbose_name_plural
+            ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            checked = 0
+            mismatches = 0
+
+            for start in range(0, len(ids), batch_size):
+                batch_ids = ids[start:start + batch_size]
+                documents = model.objects.filter(pk__in=batch_ids).prefetch_related(
+                    Prefetch('items', queryset=item_model.objects.all())
+                )
+                changed = []
+                for document in documents:
+                    totals = calculate_totals(document, list(document.items.all()))
+                    diff = {f: (getattr(document, f), v) for f, v in totals.items() if getattr(document, f) != v}
+                    checked += 1
+                    if not diff:
+                        continue
+                    mismatches += 1
+                    if verify:
+                        details = ', '.join(f'{f}: {old} -> {new}' for f, (old, new) in diff.items())
+                        self.stdout.write(f'  {document}: {details}')
+                    for field, value in totals.items():
+                        setattr(document, field, value)
+                    changed.append(document)
+
+                if changed and not verify:
+                    with transaction.atomic():
+                        model.objects.bulk_update(changed, TOTAL_FIELDS)
+
+            action = 'abweichend' if verify else 'aktualisiert'
+            self.stdout.write(f'{label}: {checked} geprüft, {mismatches} {action}')
+            total_mismatches += mismatches
+
+        if verify and total_mismatches:
+            raise CommandError(f'{total_mismatches} Dokumente mit abweichenden Summen')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global search index (SearchDocument) and remove orphaned documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', dest='types', default=[],
+            help='Entity type to rebuild (repeatable, default: all registered types)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        entities = {entity.entity_type: entity for entity in search_index.get_entities()}
+        unknown = set(options['types']) - set(entities)
+        if unknown:
+            raise CommandError(f'Unbekannte Typen: {", ".join(sorted(unknown))} (verfügbar: {", ".join(sorted(entities))})')
+
+        models = [entities[t].model for t in options['types']] or None
+        result = search_index.rebuild(models=models, batch_size=options['batch_size'])
+        for entity_type, (indexed, removed) in result.items():
+            self.stdout.write(f'{entities[entity_type].label}: {indexed} indiziert, {removed} entfernt')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
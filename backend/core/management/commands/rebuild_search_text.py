@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.search import refresh_search_text
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized search text of customers, customer orders and inventory items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=['customers', 'orders', 'inventory', 'all'], default='all',
+            help='Which entities to process (default: all)'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        from customers.models import Customer
+        from customer_orders.models import CustomerOrder
+        from inventory.models import InventoryItem
+
+        targets = {
+            'customers': Customer,
+            'orders': CustomerOrder,
+            'inventory': InventoryItem,
+        }
+        for key, model in targets.items():
+            if options['model'] not in (key, 'all'):
+                continue
+            changed = refresh_search_text(model.objects.order_by('pk'), batch_size=options['batch_size'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {changed} aktualisiert')
+
+        self.stdout.write(self.style.SUCCESS('Done'))
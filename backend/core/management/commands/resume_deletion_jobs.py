@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core import deletion
+from core.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Setzt unterbrochene Löschaufträge des Admin-Löschmoduls fort (synchron, z.B. nach einem '
+        'Neustart des Servers). Standardmäßig wartende Aufträge und laufende ohne Fortschritt seit '
+        'DELETION_STALE_MINUTES; Aufträge, die ein anderer Prozess gerade bearbeitet, bleiben unberührt.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Auch fehlgeschlagene Aufträge wiederholen')
+        parser.add_argument('--job', type=int, action='append', default=[], help='Nur diesen Auftrag (wiederholbar)')
+
+    def handle(self, *args, **options):
+        statuses = ['pending'] + (['failed'] if options['failed'] else [])
+        stale_before = deletion.stale_before()
+        jobs = DeletionJob.objects.filter(
+            Q(status__in=statuses) | Q(status='running', updated_at__lt=stale_before)
+        ).order_by('created_at')
+        if options['job']:
+            jobs = jobs.filter(pk__in=options['job'])
+
+        job_ids = list(jobs.values_list('pk', flat=True))
+        if not job_ids:
+            self.stdout.write('Keine offenen Löschaufträge')
+            return
+        for job_id in job_ids:
+            job = deletion.run_job(job_id, statuses=statuses, stale_before=stale_before)
+            if job.status == 'running':
+                self.stdout.write(f'#{job.pk} {job.object_description}: läuft bereits in einem anderen Prozess')
+                continue
+            line = f'#{job.pk} {job.object_description}: {job.get_status_display()} ' \
+                   f'({job.deleted_rows} Einträge, {job.media_count} Dateien)'
+            if job.status == 'failed':
+                self.stdout.write(self.style.ERROR(f'{line} - {job.error}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,88 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from core.benchmarks import run_benchmarks
+from core.synthetic import generate, volumes
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Misst Laufzeit und SQL-Abfragen der wichtigsten Endpunkte auf synthetischen Daten '
+        '(core.synthetic) und schlägt fehl, wenn ein Budget überschritten wird. Die Daten werden '
+        'anschließend verworfen, außer mit --keep.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Faktor auf die Standardmengen')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=5, help='Messläufe je Benchmark')
+        parser.add_argument('--only', nargs='*', help='Nur Benchmarks mit diesen Namens-Präfixen')
+        parser.add_argument('--queries-only', action='store_true',
+                            help='Nur Abfrage-Budgets prüfen (z.B. auf langsamer Hardware / SQLite)')
+        parser.add_argument('--latency-factor', type=float, default=1.0,
+                            help='Faktor auf die Laufzeit-Budgets')
+        parser.add_argument('--strict', action='store_true',
+                            help='Auch Benchmarks mit bekanntem Engpass (known_issue) schlagen fehl')
+        parser.add_argument('--json', dest='json_path', help='Ergebnisse zusätzlich als JSON schreiben')
+        parser.add_argument('--keep', action='store_true', help='Synthetische Daten behalten')
+
+    def handle(self, *args, **options):
+        results = []
+        try:
+            with transaction.atomic():
+                counts = volumes(options['scale'])
+                self.stdout.write('Erzeuge synthetische Daten: ' + ', '.join(f'{k}={v}' for k, v in counts.items()))
+                ids = generate(counts, seed=options['seed'], log=self.stdout.write)
+                user = get_user_model().objects.filter(is_superuser=True, is_active=True).first()
+                if user is None:
+                    raise CommandError('Kein aktiver Superuser vorhanden')
+                context = {'user': ids['users'][0], 'customer': ids['customers'][0],
+                           'quotation': ids['quotations'][0]}
+                # Der Test-Client meldet sich als 'testserver'
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    results = run_benchmarks(user, context, repeat=options['repeat'], names=options['only'])
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write('Synthetische Daten verworfen')
+
+        failed = self._report(results, options)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'scale': options['scale'], 'results': results}, f, indent=2)
+        if failed:
+            raise CommandError(f"Budget überschritten: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS('Alle Budgets eingehalten'))
+
+    def _report(self, results, options):
+        failed = []
+        self.stdout.write(f'\n{"Benchmark":<26}{"SQL":>6}{"Budget":>8}{"Median ms":>12}{"Max ms":>10}{"Budget":>9}')
+        for result in results:
+            budget_ms = result['budget_ms'] * options['latency_factor']
+            latency_ok = options['queries_only'] or (
+                result['error'] is None and result['median_ms'] <= budget_ms
+            )
+            ok = result['queries_ok'] and latency_ok
+            known = not ok and result['known_issue'] and not result['error']
+            if not ok and (not known or options['strict']):
+                failed.append(result['name'])
+            line = (f"{result['name']:<26}{result['queries']:>6}{result['max_queries']:>8}"
+                    f"{result['median_ms'] or 0:>12.1f}{result['max_ms'] or 0:>10.1f}{budget_ms:>9.0f}")
+            if result['error']:
+                line += f"  {result['error']}"
+            elif known:
+                line += f"  bekannt: {result['known_issue']}"
+            if ok:
+                self.stdout.write(line)
+            else:
+                self.stdout.write(self.style.WARNING(line) if known else self.style.ERROR(line))
+        return failed
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import media_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconcile the media catalog with MEDIA_ROOT: add new files and folders, update changed ones, '
+        'remove vanished entries and link files to the objects whose FileFields reference them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the differences')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = media_catalog.scan(dry_run=options['dry_run'], batch_size=options['batch_size'])
+        self.stdout.write(
+            f"{result['created']} neu, {result['updated']} aktualisiert, {result['deleted']} entfernt, "
+            f"{result['unchanged']} unverändert ({time.perf_counter() - started:.1f}s)"
+        )
+        if options['dry_run']:
+            self.stdout.write('Dry-Run: keine Änderungen gespeichert')
+        self.stdout.write(self.style.SUCCESS('Done'))
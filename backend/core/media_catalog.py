@@ -0,0 +1,314 @@
+"""
+Medienkatalog für MEDIA_ROOT.
+
+Jede Datei und jeder Ordner unterhalb von MEDIA_ROOT wird als MediaFile
+(Pfad, Größe, Änderungsdatum, MIME-Typ, besitzendes Objekt) gespiegelt,
+damit der Medien-Browser (Ordnerinhalt, Statistik, Suche) indizierte
+Abfragen statt os.walk/os.listdir/stat ausführt.
+
+Gepflegt wird der Katalog
+- beim Speichern von Models mit FileFields (Uploads über core.upload_paths),
+- von core.deletion_utils beim Verschieben in den / Wiederherstellen aus dem Papierkorb,
+- vom Befehl `manage.py scan_media`, der Katalog und Dateisystem abgleicht
+  (z.B. nach dem Deployment oder für Dateien, die am System vorbei abgelegt wurden).
+
+Versteckte Einträge (Name beginnt mit '.', z.B. der Papierkorb '.trash')
+werden nicht katalogisiert.
+"""
+import mimetypes
+import os
+import posixpath
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+
+def file_type_for(mime_type):
+    """Dateikategorie für die Anzeige im Medien-Browser"""
+    if not mime_type:
+        return 'unknown'
+    if mime_type.startswith('image/'):
+        return 'image'
+    if mime_type.startswith('video/'):
+        return 'video'
+    if mime_type.startswith('audio/'):
+        return 'audio'
+    if mime_type == 'application/pdf':
+        return 'pdf'
+    if mime_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
+        return 'document'
+    if mime_type in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
+        return 'spreadsheet'
+    if mime_type.startswith('text/'):
+        return 'text'
+    return 'unknown'
+
+
+def relative_path(path):
+    """
+    Pfad relativ zu MEDIA_ROOT ('/'-getrennt) oder None, wenn der Pfad
+    außerhalb liegt oder versteckt ist.
+    """
+    path = Path(path)
+    if path.is_absolute():
+        try:
+            path = path.relative_to(settings.MEDIA_ROOT)
+        except ValueError:
+            return None
+    rel = posixpath.normpath(path.as_posix()).strip('/')
+    if rel in ('', '.') or rel.startswith('..'):
+        return None
+    if any(part.startswith('.') for part in rel.split('/')):
+        return None
+    return rel
+
+
+def _parent(rel):
+    return posixpath.dirname(rel)
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+
+
+def _file_entry(rel, size, mtime, owner=None):
+    from .models import MediaFile
+
+    mime_type, _ = mimetypes.guess_type(rel)
+    entry = MediaFile(
+        path=rel, parent=_parent(rel), name=posixpath.basename(rel), is_folder=False,
+        extension=posixpath.splitext(rel)[1].lower()[:20], mime_type=(mime_type or '')[:100],
+        file_type=file_type_for(mime_type), size=size, modified_at=_timestamp(mtime),
+    )
+    if owner is not None:
+        entry.content_type_id, entry.object_id = owner
+    return entry
+
+
+def _folder_entry(rel, mtime=None):
+    from .models import MediaFile
+
+    return MediaFile(
+        path=rel, parent=_parent(rel), name=posixpath.basename(rel), is_folder=True,
+        modified_at=_timestamp(mtime) if mtime is not None else timezone.now(),
+    )
+
+
+def _ensure_folders(paths):
+    """Legt fehlende Ordner-Einträge für alle übergeordneten Ordner an"""
+    from .models import MediaFile
+
+    folders = set()
+    for rel in paths:
+        parent = _parent(rel)
+        while parent:
+            folders.add(parent)
+            parent = _parent(parent)
+    if folders:
+        MediaFile.objects.bulk_create([_folder_entry(f) for f in sorted(folders)], ignore_conflicts=True)
+
+
+UPDATE_FIELDS = ['parent', 'name', 'is_folder', 'extension', 'mime_type', 'file_type', 'size', 'modified_at', 'indexed_at']
+
+
+def _upsert(entries, update_owner=True):
+    from .models import MediaFile
+
+    if not entries:
+        return
+    _ensure_folders([e.path for e in entries])
+    MediaFile.objects.bulk_create(
+        entries, batch_size=500, update_conflicts=True, unique_fields=['path'],
+        update_fields=UPDATE_FIELDS + (['content_type', 'object_id'] if update_owner else []),
+    )
+
+
+def add_files(paths, owner=None):
+    """
+    Nimmt Dateien (absolute oder relative Pfade) in den Katalog auf bzw.
+    aktualisiert Größe/Änderungsdatum. `owner` ist das besitzende Objekt
+    (Modelinstanz oder Tupel (content_type_id, object_id)); ohne `owner`
+    bleibt eine bestehende Zuordnung erhalten.
+    """
+    owner_key = owner
+    if isinstance(owner, models.Model):
+        owner_key = (ContentType.objects.get_for_model(owner).pk, owner.pk) if owner.pk is not None else None
+    entries = []
+    for path in paths:
+        rel = relative_path(path)
+        if rel is None:
+            continue
+        try:
+            stat = (Path(settings.MEDIA_ROOT) / rel).stat()
+        except OSError:
+            continue
+        entries.append(_file_entry(rel, stat.st_size, stat.st_mtime, owner_key))
+    _upsert(entries, update_owner=owner_key is not None)
+    return len(entries)
+
+
+def remove(path):
+    """Entfernt eine Datei bzw. einen Ordner samt Inhalt aus dem Katalog"""
+    from .models import MediaFile
+
+    rel = relative_path(path)
+    if rel is None:
+        return 0
+    deleted, _ = MediaFile.objects.filter(models.Q(path=rel) | models.Q(path__startswith=rel + '/')).delete()
+    return deleted
+
+
+def remove_files(paths):
+    """Entfernt mehrere Dateien (keine Ordner) mit einer Abfrage aus dem Katalog"""
+    from .models import MediaFile
+
+    rels = [rel for rel in (relative_path(path) for path in paths) if rel is not None]
+    if not rels:
+        return 0
+    deleted, _ = MediaFile.objects.filter(path__in=rels).delete()
+    return deleted
+
+
+# ---------------------------------------------------------------------------
+# Signale für Models mit FileFields
+# ---------------------------------------------------------------------------
+
+_file_fields = {}
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    names = [f.name for f in _file_fields[sender]]
+    if update_fields is not None:
+        names = [name for name in names if name in update_fields]
+    paths = []
+    for name in names:
+        field_file = getattr(instance, name)
+        if not field_file:
+            continue
+        try:
+            paths.append(field_file.path)
+        except NotImplementedError:
+            # Storage ohne lokale Pfade
+            continue
+    if paths:
+        add_files(paths, owner=instance)
+
+
+def _on_delete(sender, instance, **kwargs):
+    # Die Dateien bleiben liegen (Papierkorb/scan_media); nur die Zuordnung entfällt
+    from .models import MediaFile
+    MediaFile.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).update(content_type=None, object_id=None)
+
+
+def connect_signals():
+    """Verbindet die Katalog-Signale mit allen Models, die FileFields haben (CoreConfig.ready)"""
+    for model in apps.get_models():
+        fields = [f for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+        if not fields or model._meta.proxy:
+            continue
+        _file_fields[model] = fields
+        uid = f'media_catalog:{model._meta.label}'
+        post_save.connect(_on_save, sender=model, dispatch_uid=f'{uid}:save')
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f'{uid}:delete')
+
+
+def owner_map():
+    """Dateiname (relativ zu MEDIA_ROOT) -> (content_type_id, object_id) aller FileFields"""
+    result = {}
+    for model, fields in _file_fields.items():
+        content_type_id = ContentType.objects.get_for_model(model).pk
+        names = [f.attname for f in fields]
+        for row in model._default_manager.values_list('pk', *names).iterator():
+            for name in row[1:]:
+                if name:
+                    result[posixpath.normpath(name.replace('\\', '/'))] = (content_type_id, row[0])
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Abgleich mit dem Dateisystem
+# ---------------------------------------------------------------------------
+
+def scan(dry_run=False, batch_size=1000):
+    """
+    Gleicht den Katalog mit MEDIA_ROOT ab: neue Dateien/Ordner anlegen,
+    geänderte aktualisieren, verschwundene entfernen und fehlende
+    Besitzer-Zuordnungen über die FileFields ergänzen.
+
+    Returns:
+        dict mit den Anzahlen created/updated/deleted/unchanged
+    """
+    from .models import MediaFile
+
+    media_root = str(settings.MEDIA_ROOT)
+    found = {}
+    for root, dirs, files in os.walk(media_root):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        rel_root = posixpath.normpath(os.path.relpath(root, media_root).replace(os.sep, '/'))
+        rel_root = '' if rel_root == '.' else rel_root
+        for name in dirs:
+            rel = posixpath.join(rel_root, name) if rel_root else name
+            try:
+                found[rel] = (True, 0, os.stat(os.path.join(root, name)).st_mtime)
+            except OSError:
+                continue
+        for name in files:
+            if name.startswith('.'):
+                continue
+            rel = posixpath.join(rel_root, name) if rel_root else name
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            found[rel] = (False, stat.st_size, stat.st_mtime)
+
+    owners = owner_map()
+    existing = {}
+    for pk, path, is_folder, size, modified_at, content_type_id, object_id in MediaFile.objects.values_list(
+        'pk', 'path', 'is_folder', 'size', 'modified_at', 'content_type_id', 'object_id'
+    ).iterator(chunk_size=batch_size):
+        existing[path] = (pk, is_folder, size, modified_at, (content_type_id, object_id) if content_type_id else None)
+
+    result = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    upserts = []
+    for rel, (is_folder, size, mtime) in found.items():
+        current = existing.get(rel)
+        owner = None if is_folder else owners.get(rel)
+        if current is not None:
+            _, was_folder, old_size, old_modified, old_owner = current
+            changed = (
+                was_folder != is_folder or old_size != size
+                or abs(old_modified.timestamp() - mtime) >= 1
+                or (owner is not None and old_owner is None)
+            )
+            owner = owner or old_owner
+            if not changed:
+                result['unchanged'] += 1
+                continue
+            result['updated'] += 1
+        else:
+            result['created'] += 1
+        upserts.append(_folder_entry(rel, mtime) if is_folder else _file_entry(rel, size, mtime, owner))
+
+    missing = [existing[path][0] for path in existing.keys() - found.keys()]
+    result['deleted'] = len(missing)
+
+    if not dry_run:
+        for start in range(0, len(upserts), batch_size):
+            MediaFile.objects.bulk_create(
+                upserts[start:start + batch_size], update_conflicts=True, unique_fields=['path'],
+                update_fields=UPDATE_FIELDS + ['content_type', 'object_id'],
+            )
+        for start in range(0, len(missing), batch_size):
+            MediaFile.objects.filter(pk__in=missing[start:start + batch_size]).delete()
+    return result
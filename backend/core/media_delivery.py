@@ -0,0 +1,146 @@
+"""
+Auslieferung von Mediendateien.
+
+Django prüft die Berechtigung (im jeweiligen View) und beantwortet bedingte
+Anfragen (ETag/If-None-Match, Last-Modified/If-Modified-Since) selbst mit
+304, ohne die Datei zu öffnen. Die eigentliche Übertragung übernimmt:
+
+- nginx per X-Accel-Redirect, wenn MEDIA_ACCEL_REDIRECT_PREFIX gesetzt ist
+  (interne Location, siehe nginx.conf). nginx beantwortet dann auch Range-
+  Anfragen; der Django-Worker ist sofort wieder frei.
+- sonst Django selbst (runserver/Entwicklung), mit Unterstützung für einen
+  einzelnen Byte-Bereich (Range/If-Range, 206/416).
+"""
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _resolve(file):
+    """Absoluter Pfad einer Datei (FieldFile, Path oder str relativ zu MEDIA_ROOT)"""
+    if hasattr(file, 'path'):
+        if not file:
+            raise Http404('Datei nicht gefunden')
+        return Path(file.path)
+    path = Path(file)
+    if not path.is_absolute():
+        path = Path(settings.MEDIA_ROOT) / path
+    return path
+
+
+def file_etag(stat):
+    """ETag aus Änderungszeit und Größe (ändert sich mit jeder neuen Dateiversion)"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _byte_range(header, size):
+    """
+    Wertet einen Range-Header aus.
+
+    Returns:
+        (start, end) inklusive, None für "ganze Datei" oder False für nicht erfüllbar
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Mehrere Bereiche oder ungültige Syntax: ganze Datei ausliefern
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix-Bereich: die letzten N Bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def media_response(request, file, filename=None, as_attachment=True, content_type=None):
+    """
+    Liefert eine Mediendatei aus (nach erfolgter Berechtigungsprüfung im View).
+
+    Args:
+        file: FieldFile, absoluter Pfad oder Pfad relativ zu MEDIA_ROOT
+        filename: Dateiname für Content-Disposition (Standard: Name der Datei)
+        as_attachment: Download (True) oder Anzeige im Browser (False)
+        content_type: MIME-Typ (Standard: aus dem Dateinamen ermittelt)
+    """
+    path = _resolve(file)
+    try:
+        stat = path.stat()
+    except OSError:
+        raise Http404('Datei nicht gefunden')
+    if not path.is_file():
+        raise Http404('Datei nicht gefunden')
+
+    filename = filename or path.name
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = file_etag(stat)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    try:
+        relative = path.resolve().relative_to(Path(settings.MEDIA_ROOT).resolve())
+    except ValueError:
+        relative = None
+
+    if prefix and relative is not None:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative.as_posix())
+    else:
+        response = _local_response(request, path, stat, etag, content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _local_response(request, path, stat, etag, content_type):
+    """Übertragung durch Django selbst, mit Range-Unterstützung"""
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if header and request.method in ('GET', 'HEAD') and (not if_range or if_range == etag):
+        byte_range = _byte_range(header, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(end - start + 1)
+            return response
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Content-Length'] = str(stat.st_size)
+    return response
+
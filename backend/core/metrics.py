@@ -0,0 +1,323 @@
+"""
+Laufzeit-Messung je API-Endpunkt.
+
+RequestMetricsMiddleware misst für jede Anfrage Gesamtdauer, Anzahl und
+Dauer der ORM-Abfragen (über connection.execute_wrapper, alle Datenbanken)
+sowie die Zeit in der Legacy-Datenbank (MSSQL über pyodbc, siehe
+timed_connection). Die Werte werden je Route (Methode + URL-Muster)
+gesammelt und sind über /api/core/metrics/requests/ (nur Admins) abrufbar.
+
+- Perzentile (p50/p95/p99) über die letzten REQUEST_METRICS_SAMPLES Anfragen je Route
+- Server-Timing-Header (REQUEST_METRICS_SERVER_TIMING, Standard: nur bei DEBUG)
+- Anfragen über REQUEST_METRICS_SLOW_MS werden mit ihren teuersten SQL-
+  Anweisungen (gleiche Anweisungen zusammengefasst, so fallen N+1-Muster
+  sofort auf) in 'verp.slow_requests' geloggt und im Endpunkt aufgelistet
+
+Die Werte liegen im Speicher des jeweiligen Server-Prozesses; bei mehreren
+Worker-Prozessen zeigt der Endpunkt nur die Anfragen des antwortenden
+Prozesses (pid in der Antwort).
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger('verp.slow_requests')
+
+# Verschiedene SQL-Anweisungen, die je Anfrage für das Slow-Log gemerkt werden
+MAX_STATEMENTS = 200
+# Anzahl Anweisungen im Slow-Log
+SLOW_LOG_STATEMENTS = 10
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestState:
+    """Zähler der laufenden Anfrage"""
+
+    __slots__ = ('sql_count', 'sql_time', 'legacy_count', 'legacy_time', 'statements')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.legacy_count = 0
+        self.legacy_time = 0.0
+        self.statements = {}
+
+    def _statement(self, label, sql, seconds):
+        key = (label, sql)
+        entry = self.statements.get(key)
+        if entry is None:
+            if len(self.statements) >= MAX_STATEMENTS:
+                return
+            entry = self.statements[key] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def record_sql(self, alias, sql, seconds):
+        self.sql_count += 1
+        self.sql_time += seconds
+        self._statement(alias, sql, seconds)
+
+    def record_legacy(self, sql, seconds):
+        self.legacy_count += 1
+        self.legacy_time += seconds
+        if sql:
+            self._statement('mssql', sql, seconds)
+
+    def top_statements(self, limit=SLOW_LOG_STATEMENTS):
+        rows = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {'db': label, 'sql': sql, 'count': count, 'ms': round(seconds * 1000, 2)}
+            for (label, sql), (count, seconds) in rows
+        ]
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+class _RouteStats:
+    __slots__ = ('count', 'errors', 'total', 'max', 'sql_count', 'sql_max', 'sql_time',
+                 'legacy_count', 'legacy_time', 'samples')
+
+    def __init__(self, samples):
+        self.count = self.errors = self.sql_count = self.sql_max = self.legacy_count = 0
+        self.total = self.max = self.sql_time = self.legacy_time = 0.0
+        self.samples = deque(maxlen=samples)
+
+    def as_dict(self, route):
+        latencies = sorted(self.samples)
+        ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None  # noqa: E731
+        return {
+            'route': route,
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': ms(self.total),
+            'avg_ms': ms(self.total / self.count),
+            'p50_ms': ms(_percentile(latencies, 0.50)),
+            'p95_ms': ms(_percentile(latencies, 0.95)),
+            'p99_ms': ms(_percentile(latencies, 0.99)),
+            'max_ms': ms(self.max),
+            'queries_avg': round(self.sql_count / self.count, 2),
+            'queries_max': self.sql_max,
+            'sql_ms_avg': ms(self.sql_time / self.count),
+            'legacy_calls': self.legacy_count,
+            'legacy_ms_avg': ms(self.legacy_time / self.count),
+        }
+
+
+class MetricsStore:
+    """Gesammelte Werte je Route (threadsicher, im Prozess-Speicher)"""
+
+    def __init__(self, samples=500, slow_entries=50):
+        self._lock = threading.Lock()
+        self._samples = samples
+        self._slow_entries = slow_entries
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._slow = deque(maxlen=self._slow_entries)
+            self.since = timezone.now()
+
+    def record(self, route, seconds, status_code, state):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = _RouteStats(self._samples)
+            stats.count += 1
+            stats.errors += status_code >= 500
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.samples.append(seconds)
+            stats.sql_count += state.sql_count
+            stats.sql_max = max(stats.sql_max, state.sql_count)
+            stats.sql_time += state.sql_time
+            stats.legacy_count += state.legacy_count
+            stats.legacy_time += state.legacy_time
+
+    def record_slow(self, entry):
+        with self._lock:
+            self._slow.append(entry)
+
+    def snapshot(self):
+        with self._lock:
+            routes = [stats.as_dict(route) for route, stats in self._routes.items()]
+            slow = list(self._slow)
+        routes.sort(key=lambda row: row['total_ms'], reverse=True)
+        return {
+            'pid': os.getpid(),
+            'since': self.since.isoformat(),
+            'routes': routes,
+            'slow_requests': slow[::-1],
+        }
+
+
+store = MetricsStore(samples=getattr(settings, 'REQUEST_METRICS_SAMPLES', 500))
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} <nicht aufgelöst>'
+    pattern = (match.route or '').replace('^', '').replace('$', '')
+    return f'{request.method} /{pattern}'
+
+
+def _sql_timer(alias):
+    def wrapper(execute, sql, params, many, context):
+        state = _current.get()
+        if state is None:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            state.record_sql(alias, sql, time.perf_counter() - start)
+    return wrapper
+
+
+class RequestMetricsMiddleware:
+    """Misst Dauer, ORM-Abfragen und Legacy-DB-Zeit je Anfrage (siehe Modul-Doku)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', settings.DEBUG)
+        self.slow_seconds = getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000) / 1000
+
+    def __call__(self, request):
+        state = RequestState()
+        token = _current.set(state)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_sql_timer(conn.alias)))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        seconds = time.perf_counter() - start
+
+        route = _route(request)
+        store.record(route, seconds, response.status_code, state)
+        if seconds >= self.slow_seconds:
+            self._log_slow(request, route, seconds, response.status_code, state)
+        if self.server_timing:
+            response['Server-Timing'] = self._server_timing(seconds, state)
+        return response
+
+    def _log_slow(self, request, route, seconds, status_code, state):
+        statements = state.top_statements()
+        store.record_slow({
+            'time': timezone.now().isoformat(),
+            'route': route,
+            'path': request.get_full_path(),
+            'status': status_code,
+            'ms': round(seconds * 1000, 2),
+            'queries': state.sql_count,
+            'sql_ms': round(state.sql_time * 1000, 2),
+            'legacy_ms': round(state.legacy_time * 1000, 2),
+            'statements': statements,
+        })
+        logger.warning(
+            'Langsame Anfrage %s %s: %.0f ms, %d SQL-Abfragen (%.0f ms), Legacy-DB %.0f ms\n%s',
+            request.method, request.get_full_path(), seconds * 1000, state.sql_count,
+            state.sql_time * 1000, state.legacy_time * 1000,
+            '\n'.join(f"  {s['count']}x {s['ms']} ms [{s['db']}] {s['sql']}" for s in statements)
+        )
+
+    @staticmethod
+    def _server_timing(seconds, state):
+        parts = [f'db;dur={state.sql_time * 1000:.1f};desc="SQL ({state.sql_count})"']
+        if state.legacy_count:
+            parts.append(f'legacy;dur={state.legacy_time * 1000:.1f};desc="MSSQL ({state.legacy_count})"')
+        parts.append(f'total;dur={seconds * 1000:.1f}')
+        return ', '.join(parts)
+
+
+class _TimedLegacyCursor:
+    """pyodbc-Cursor, der die Zeit seiner Aufrufe der laufenden Anfrage zurechnet"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, sql, *args, **kwargs):
+        state = _current.get()
+        if state is None:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            state.record_legacy(sql, time.perf_counter() - start)
+
+    def execute(self, sql, *params):
+        result = self._timed(self._cursor.execute, sql, sql, *params)
+        # pyodbc gibt den Cursor selbst zurück (Verkettung wie cursor.execute(...).fetchall())
+        return self if result is self._cursor else result
+
+    def executemany(self, sql, params):
+        return self._timed(self._cursor.executemany, sql, sql, params)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone, None)
+
+    def fetchmany(self, *args):
+        return self._timed(self._cursor.fetchmany, None, *args)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall, None)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TimedLegacyConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self):
+        return _TimedLegacyCursor(self._connection.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def __enter__(self):
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._connection.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def timed_connection(connection):
+    """Legacy-Datenbankverbindung (pyodbc) mit Zeitmessung je Anfrage"""
+    return _TimedLegacyConnection(connection)
@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-19 01:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.search import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Objekt-ID')),
+                ('entity_type', models.CharField(max_length=30, verbose_name='Typ')),
+                ('title', models.CharField(max_length=300, verbose_name='Titel')),
+                ('subtitle', models.CharField(blank=True, max_length=300, verbose_name='Untertitel')),
+                ('keywords', models.TextField(blank=True, verbose_name='Suchbegriffe')),
+                ('scope', models.CharField(help_text='Leserecht, das zum Anzeigen des Treffers nötig ist', max_length=100, verbose_name='Berechtigung')),
+                ('url', models.CharField(blank=True, max_length=200, verbose_name='Frontend-Link')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Objekttyp')),
+            ],
+            options={
+                'verbose_name': 'Suchindex-Eintrag',
+                'verbose_name_plural': 'Suchindex',
+                'indexes': [models.Index(fields=['scope', 'entity_type'], name='core_search_scope_0a862f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document'),
+        ),
+        trigram_index('core.SearchDocument', 'core_searchdocument_keywords_trgm', field='keywords'),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.search import trigram_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0002_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Relativ zu MEDIA_ROOT, mit / getrennt', max_length=500, unique=True, verbose_name='Pfad')),
+                ('parent', models.CharField(blank=True, db_index=True, max_length=500, verbose_name='Übergeordneter Ordner')),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('is_folder', models.BooleanField(default=False, verbose_name='Ordner')),
+                ('extension', models.CharField(blank=True, max_length=20, verbose_name='Dateiendung')),
+                ('mime_type', models.CharField(blank=True, max_length=100, verbose_name='MIME-Typ')),
+                ('file_type', models.CharField(blank=True, max_length=20, verbose_name='Dateikategorie')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Größe (Bytes)')),
+                ('modified_at', models.DateTimeField(verbose_name='Geändert am')),
+                ('object_id', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='Objekt-ID')),
+                ('indexed_at', models.DateTimeField(auto_now=True, verbose_name='Erfasst am')),
+                ('content_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contenttypes.contenttype', verbose_name='Objekttyp')),
+            ],
+            options={
+                'verbose_name': 'Mediendatei',
+                'verbose_name_plural': 'Medienkatalog',
+                'indexes': [models.Index(fields=['is_folder', 'extension'], name='core_mediaf_is_fold_5cec66_idx'), models.Index(fields=['content_type', 'object_id'], name='core_mediaf_content_ee6ac0_idx')],
+            },
+        ),
+        trigram_index('core.MediaFile', 'core_mediafile_name_trgm', field='name', case_insensitive=True),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-19 01:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0003_media_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Objekt-ID')),
+                ('field_name', models.CharField(max_length=50, verbose_name='Dateifeld')),
+                ('source_name', models.CharField(blank=True, max_length=500, verbose_name='Quelldatei')),
+                ('content_hash', models.CharField(blank=True, db_index=True, max_length=64, verbose_name='Inhalts-Hash')),
+                ('status', models.CharField(choices=[('pending', 'In Arbeit'), ('ready', 'Fertig'), ('failed', 'Fehlgeschlagen'), ('unsupported', 'Nicht unterstützt')], default='pending', max_length=20, verbose_name='Status')),
+                ('error', models.TextField(blank=True, verbose_name='Fehler')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Objekttyp')),
+            ],
+            options={
+                'verbose_name': 'Dateivorschau',
+                'verbose_name_plural': 'Dateivorschauen',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='filepreview',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'field_name'), name='unique_file_preview'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-19 01:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0004_file_preview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediatrash',
+            index=models.Index(fields=['deleted_at', 'id'], name='core_mediat_deleted_8e54be_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-19 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_mediatrash_deleted_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(max_length=64, verbose_name='Hash des Quelltexts')),
+                ('source_language', models.CharField(max_length=10, verbose_name='Quellsprache')),
+                ('target_language', models.CharField(max_length=10, verbose_name='Zielsprache')),
+                ('source_text', models.TextField(verbose_name='Quelltext')),
+                ('translated_text', models.TextField(verbose_name='Übersetzung')),
+                ('backend', models.CharField(blank=True, max_length=100, verbose_name='Übersetzungsdienst')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='Treffer')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, verbose_name='Zuletzt verwendet')),
+            ],
+            options={
+                'verbose_name': 'Übersetzungsspeicher',
+                'verbose_name_plural': 'Übersetzungsspeicher',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='translationmemory',
+            constraint=models.UniqueConstraint(fields=('source_hash', 'source_language', 'target_language'), name='unique_translation_memory'),
+        ),
+    ]
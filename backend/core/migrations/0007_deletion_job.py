@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-19 04:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0006_translation_memory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=50, verbose_name='Typ')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='Objekt-ID')),
+                ('object_description', models.CharField(max_length=500, verbose_name='Objektbeschreibung')),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('running', 'Läuft'), ('done', 'Abgeschlossen'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=20, verbose_name='Status')),
+                ('impact', models.JSONField(blank=True, default=list, verbose_name='Auswirkung')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Betroffene Einträge')),
+                ('deleted_rows', models.PositiveIntegerField(default=0, verbose_name='Gelöschte Einträge')),
+                ('media_count', models.PositiveIntegerField(default=0, verbose_name='Dateien im Papierkorb')),
+                ('error', models.TextField(blank=True, verbose_name='Fehler')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Beendet am')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Objekttyp')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Erstellt von')),
+            ],
+            options={
+                'verbose_name': 'Löschauftrag',
+                'verbose_name_plural': 'Löschaufträge',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='deletion_job_object_idx')],
+            },
+        ),
+    ]
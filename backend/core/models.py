@@ -88,6 +88,9 @@ class MediaTrash(models.Model):
         verbose_name = 'Gelöschte Medien'
         verbose_name_plural = 'Gelöschte Medien'
         ordering = ['-deleted_at']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.filename} - {self.object_description}"
@@ -180,3 +183,223 @@ class DeletionLog(models.Model):
     
     def __str__(self):
         return f"{self.get_action_display()}: {self.entity_description} am {self.deleted_at.strftime('%d.%m.%Y %H:%M')}"
+
+
+class SearchDocument(models.Model):
+    """
+    Eintrag im globalen Suchindex (siehe core.search_index).
+    Spiegelt ein durchsuchbares Objekt beliebiger Apps mit Titel,
+    Suchbegriffen und dem Leserecht, das zum Anzeigen nötig ist.
+    """
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name='Objekttyp'
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name='Objekt-ID')
+    
+    entity_type = models.CharField(max_length=30, verbose_name='Typ')
+    title = models.CharField(max_length=300, verbose_name='Titel')
+    subtitle = models.CharField(max_length=300, blank=True, verbose_name='Untertitel')
+    keywords = models.TextField(blank=True, verbose_name='Suchbegriffe')
+    scope = models.CharField(
+        max_length=100,
+        verbose_name='Berechtigung',
+        help_text='Leserecht, das zum Anzeigen des Treffers nötig ist'
+    )
+    url = models.CharField(max_length=200, blank=True, verbose_name='Frontend-Link')
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')
+    
+    class Meta:
+        verbose_name = 'Suchindex-Eintrag'
+        verbose_name_plural = 'Suchindex'
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_search_document'),
+        ]
+        indexes = [
+            models.Index(fields=['scope', 'entity_type']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity_type}: {self.title}"
+
+
+class MediaFile(models.Model):
+    """
+    Medienkatalog: Datei oder Ordner unterhalb von MEDIA_ROOT (siehe core.media_catalog).
+    Ersetzt Dateisystem-Durchläufe im Medien-Browser durch indizierte Abfragen.
+    """
+    path = models.CharField(
+        max_length=500,
+        unique=True,
+        verbose_name='Pfad',
+        help_text='Relativ zu MEDIA_ROOT, mit / getrennt'
+    )
+    parent = models.CharField(
+        max_length=500,
+        blank=True,
+        db_index=True,
+        verbose_name='Übergeordneter Ordner'
+    )
+    name = models.CharField(max_length=255, verbose_name='Name')
+    is_folder = models.BooleanField(default=False, verbose_name='Ordner')
+    
+    extension = models.CharField(max_length=20, blank=True, verbose_name='Dateiendung')
+    mime_type = models.CharField(max_length=100, blank=True, verbose_name='MIME-Typ')
+    file_type = models.CharField(max_length=20, blank=True, verbose_name='Dateikategorie')
+    size = models.BigIntegerField(default=0, verbose_name='Größe (Bytes)')
+    modified_at = models.DateTimeField(verbose_name='Geändert am')
+    
+    # Besitzendes Objekt (z.B. Anhang eines Tickets), falls bekannt
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Objekttyp'
+    )
+    object_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name='Objekt-ID')
+    owner = GenericForeignKey('content_type', 'object_id')
+    
+    indexed_at = models.DateTimeField(auto_now=True, verbose_name='Erfasst am')
+    
+    class Meta:
+        verbose_name = 'Mediendatei'
+        verbose_name_plural = 'Medienkatalog'
+        indexes = [
+            models.Index(fields=['is_folder', 'extension']),
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return self.path
+
+
+class FilePreview(models.Model):
+    """
+    Vorschaubilder einer hochgeladenen Datei (siehe core.thumbnails).
+    Die Bilddateien liegen nach Inhalts-Hash unter MEDIA_ROOT/.thumbnails,
+    identische Dateien teilen sich also ihre Vorschaubilder.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'In Arbeit'),
+        ('ready', 'Fertig'),
+        ('failed', 'Fehlgeschlagen'),
+        ('unsupported', 'Nicht unterstützt'),
+    ]
+    
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name='Objekttyp'
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name='Objekt-ID')
+    field_name = models.CharField(max_length=50, verbose_name='Dateifeld')
+    
+    source_name = models.CharField(max_length=500, blank=True, verbose_name='Quelldatei')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='Inhalts-Hash')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Status')
+    error = models.TextField(blank=True, verbose_name='Fehler')
+    
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')
+    
+    class Meta:
+        verbose_name = 'Dateivorschau'
+        verbose_name_plural = 'Dateivorschauen'
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'field_name'], name='unique_file_preview'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source_name} ({self.get_status_display()})"
+
+
+class TranslationMemory(models.Model):
+    """
+    Übersetzungsspeicher (siehe core.translation): bereits übersetzte Texte
+    werden ohne Aufruf der externen Übersetzungs-API beantwortet.
+    """
+    source_hash = models.CharField(max_length=64, verbose_name='Hash des Quelltexts')
+    source_language = models.CharField(max_length=10, verbose_name='Quellsprache')
+    target_language = models.CharField(max_length=10, verbose_name='Zielsprache')
+    source_text = models.TextField(verbose_name='Quelltext')
+    translated_text = models.TextField(verbose_name='Übersetzung')
+    backend = models.CharField(max_length=100, blank=True, verbose_name='Übersetzungsdienst')
+    
+    hit_count = models.PositiveIntegerField(default=0, verbose_name='Treffer')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')
+    last_used_at = models.DateTimeField(auto_now_add=True, verbose_name='Zuletzt verwendet')
+    
+    class Meta:
+        verbose_name = 'Übersetzungsspeicher'
+        verbose_name_plural = 'Übersetzungsspeicher'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source_hash', 'source_language', 'target_language'], name='unique_translation_memory'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.source_language}->{self.target_language}: {self.source_text[:50]}"
+
+
+class DeletionJob(models.Model):
+    """
+    Löschauftrag des Admin-Löschmoduls (siehe core.deletion): große
+    Kaskaden werden im Hintergrund in Blöcken gelöscht; der Auftrag hält
+    Auswirkung und Fortschritt und kann nach einem Abbruch fortgesetzt werden.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Wartend'),
+        ('running', 'Läuft'),
+        ('done', 'Abgeschlossen'),
+        ('failed', 'Fehlgeschlagen'),
+    ]
+    
+    entity_type = models.CharField(max_length=50, verbose_name='Typ')
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name='Objekttyp'
+    )
+    object_id = models.PositiveBigIntegerField(verbose_name='Objekt-ID')
+    object_description = models.CharField(max_length=500, verbose_name='Objektbeschreibung')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Status')
+    impact = models.JSONField(default=list, blank=True, verbose_name='Auswirkung')
+    total_rows = models.PositiveIntegerField(default=0, verbose_name='Betroffene Einträge')
+    deleted_rows = models.PositiveIntegerField(default=0, verbose_name='Gelöschte Einträge')
+    media_count = models.PositiveIntegerField(default=0, verbose_name='Dateien im Papierkorb')
+    error = models.TextField(blank=True, verbose_name='Fehler')
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Erstellt von'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Beendet am')
+    
+    class Meta:
+        verbose_name = 'Löschauftrag'
+        verbose_name_plural = 'Löschaufträge'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='deletion_job_object_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.object_description} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Fortschritt in Prozent (gelöschte / betroffene Einträge)"""
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, round(100 * self.deleted_rows / self.total_rows))
@@ -0,0 +1,181 @@
+"""
+Zentrale Preisberechnung für Angebote und Kundenaufträge.
+
+Die Summen (netto, MwSt, brutto, EK, Marge) werden denormalisiert auf
+Quotation und CustomerOrder gespeichert, damit Listen, Filter, Sortierung
+und BI-Auswertungen direkt in SQL laufen können. Alle Stellen, die Summen
+benötigen, verwenden ausschließlich die Funktionen in diesem Modul.
+"""
+import threading
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+
+TOTAL_FIELDS = (
+    'total_net',
+    'total_tax',
+    'total_gross',
+    'total_purchase_cost',
+    'total_margin',
+)
+
+# Kopf-Felder, deren Änderung eine Neuberechnung der Summen erfordert
+QUOTATION_PRICING_FIELDS = ('system_price', 'delivery_cost', 'tax_enabled', 'tax_rate')
+CUSTOMER_ORDER_PRICING_FIELDS = ('delivery_cost', 'tax_enabled', 'tax_rate')
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+
+_state = threading.local()
+
+
+def _money(value):
+    return (value or ZERO).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def quotation_item_subtotal(item, quotation):
+    """Netto-Zwischensumme einer Angebotsposition (ohne MwSt)."""
+    if item.uses_system_price and quotation.system_price:
+        return quotation.system_price
+    if item.is_group_header and item.sale_price:
+        return item.sale_price
+    price_after_discount = item.unit_price * (Decimal('1') - item.discount_percent / HUNDRED)
+    return item.quantity * price_after_discount
+
+
+def calculate_quotation_totals(quotation, items=None):
+    """
+    Berechnet die Summen eines Angebots.
+
+    Es zählen nur sichtbare Positionen (Gruppen-Header und Positionen ohne
+    group_id). Positionen mit Systempreis werden einmalig mit dem Systempreis
+    des Angebots berücksichtigt. Lieferkosten fließen vor der MwSt in die
+    Nettosumme ein (entspricht der Summenberechnung im Angebots-PDF).
+    """
+    if items is None:
+        items = quotation.items.all() if quotation.pk else []
+
+    visible_items = [it for it in items if it.is_group_header or not it.group_id]
+    system_price = quotation.system_price or ZERO
+
+    uses_system = bool(quotation.system_price) and any(it.uses_system_price for it in visible_items)
+    positions_net = sum(
+        (quotation_item_subtotal(it, quotation) for it in visible_items
+         if not (it.uses_system_price and quotation.system_price)),
+        ZERO
+    )
+    if uses_system:
+        positions_net += system_price
+
+    purchase_cost = sum((it.quantity * it.purchase_price for it in visible_items), ZERO)
+    net = positions_net + (quotation.delivery_cost or ZERO)
+    tax = net * (quotation.tax_rate / HUNDRED) if quotation.tax_enabled else ZERO
+
+    return {
+        'total_net': _money(net),
+        'total_tax': _money(tax),
+        'total_gross': _money(net + tax),
+        'total_purchase_cost': _money(purchase_cost),
+        'total_margin': _money(positions_net - purchase_cost),
+    }
+
+
+def calculate_customer_order_totals(order, items=None):
+    """
+    Berechnet die Summen eines Kundenauftrags.
+
+    Netto = Summe der Zeilensummen (Menge * Endpreis) + Lieferkosten.
+    """
+    if items is None:
+        items = order.items.all() if order.pk else []
+
+    positions_net = ZERO
+    purchase_cost = ZERO
+    for it in items:
+        positions_net += it.quantity * it.final_price
+        purchase_cost += it.quantity * it.purchase_price
+
+    net = positions_net + (order.delivery_cost or ZERO)
+    tax = net * (order.tax_rate / HUNDRED) if order.tax_enabled else ZERO
+
+    return {
+        'total_net': _money(net),
+        'total_tax': _money(tax),
+        'total_gross': _money(net + tax),
+        'total_purchase_cost': _money(purchase_cost),
+        'total_margin': _money(positions_net - purchase_cost),
+    }
+
+
+def calculate_totals(document, items=None):
+    """Dispatch auf die passende Berechnung für Angebot oder Auftrag."""
+    label = document._meta.label
+    if label == 'sales.Quotation':
+        return calculate_quotation_totals(document, items)
+    if label == 'customer_orders.CustomerOrder':
+        return calculate_customer_order_totals(document, items)
+    raise ValueError(f'Keine Preisberechnung für {label}')
+
+
+def apply_totals(document, totals, commit=True):
+    """
+    Setzt die Summen auf der Instanz und schreibt sie optional per UPDATE
+    (ohne save(), damit keine Signale oder auto_now-Felder ausgelöst werden).
+    Gibt True zurück, wenn sich mindestens ein Wert geändert hat.
+    """
+    changed = any(getattr(document, field) != value for field, value in totals.items())
+    for field, value in totals.items():
+        setattr(document, field, value)
+    if commit and document.pk:
+        type(document).objects.filter(pk=document.pk).update(**totals)
+    return changed
+
+
+def refresh_totals(document, commit=True):
+    """Berechnet die Summen aus der Datenbank neu und speichert sie."""
+    with transaction.atomic():
+        if commit and document.pk:
+            # Zeile sperren, damit parallele Positions-Änderungen serialisiert werden
+            type(document).objects.select_for_update().filter(pk=document.pk).exists()
+        # Vorab geladene (evtl. veraltete) Positionen verwerfen
+        getattr(document, '_prefetched_objects_cache', {}).pop('items', None)
+        items = list(document.items.all()) if document.pk else []
+        return apply_totals(document, calculate_totals(document, items), commit=commit)
+
+
+def schedule_refresh(document):
+    """
+    Fordert eine Neuberechnung an. Innerhalb von deferred_totals() wird pro
+    Dokument nur einmal am Ende gerechnet, sonst sofort.
+    """
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        refresh_totals(document)
+        return
+    pending[(document._meta.label, document.pk)] = document
+
+
+@contextmanager
+def deferred_totals():
+    """
+    Fasst Neuberechnungen zusammen, z.B. wenn viele Positionen eines
+    Dokuments in einer Schleife gespeichert oder gelöscht werden.
+    """
+    outer = getattr(_state, 'pending', None)
+    if outer is not None:
+        # Verschachtelt: der äußerste Block rechnet
+        yield
+        return
+
+    _state.pending = {}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    for document in pending.values():
+        if document.pk:
+            refresh_totals(document)
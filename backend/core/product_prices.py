@@ -0,0 +1,157 @@
+"""
+Gemeinsame Preisauflösung für alle Produktkataloge.
+
+VS-Hardware, VisiView-Produkte, VS-Service und Trading Products führen ihre
+Preise mit Gültigkeitszeitraum in eigenen Tabellen. Statt pro Produkt den
+gültigen Eintrag abzufragen, lädt dieses Modul die Einträge für eine ganze
+Menge von Produkten mit einer Abfrage pro Katalog (PostgreSQL: DISTINCT ON)
+und hängt sie an die Instanzen. Die get_current_*-Methoden der Modelle
+verwenden einen angehängten Eintrag, bevor sie selbst abfragen.
+"""
+from collections import defaultdict
+
+from django.db import connections, models
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+
+# Produkt-Model -> (related_name der Preistabelle, EK-Feld, VK-/Listenpreis-Feld)
+CATALOGS = {
+    'manufacturing.VSHardware': ('prices', 'purchase_price', 'sales_price'),
+    'visiview.VisiViewProduct': ('prices', 'purchase_price', 'list_price'),
+    'service.VSService': ('prices', 'purchase_price', 'sales_price'),
+    'suppliers.TradingProduct': ('price_history', 'purchase_price', 'list_price'),
+}
+
+# Attribut, unter dem der aufgelöste Preis-Eintrag an der Produkt-Instanz hängt
+ENTRY_ATTR = '_price_entry'
+
+
+def _catalog(product_model):
+    try:
+        return CATALOGS[product_model._meta.label]
+    except KeyError:
+        raise ValueError(f'Kein Preiskatalog für {product_model._meta.label}')
+
+
+def _price_relation(product_model):
+    """Gibt (Preis-Model, Name des ForeignKeys zum Produkt) zurück"""
+    related_name = _catalog(product_model)[0]
+    rel = product_model._meta.get_field(related_name)
+    return rel.related_model, rel.field.name
+
+
+def valid_on(day):
+    """Q-Filter für Preis-Einträge, die am Stichtag gültig sind"""
+    return models.Q(valid_from__lte=day) & (
+        models.Q(valid_until__isnull=True) | models.Q(valid_until__gte=day)
+    )
+
+
+def price_entries(product_model, product_ids, on=None):
+    """
+    Lädt die am Stichtag gültigen Preis-Einträge für mehrere Produkte.
+
+    Pro Produkt gilt der Eintrag mit dem jüngsten valid_from.
+
+    Args:
+        product_model: Produkt-Model (z.B. VSHardware)
+        product_ids: IDs der Produkte
+        on: Stichtag (Standard: heute)
+
+    Returns:
+        Dict {product_id: Preis-Eintrag}; Produkte ohne gültigen Preis fehlen.
+    """
+    product_ids = {pk for pk in product_ids if pk is not None}
+    if not product_ids:
+        return {}
+    on = on or timezone.now().date()
+    price_model, fk_name = _price_relation(product_model)
+    fk_attname = price_model._meta.get_field(fk_name).attname
+
+    queryset = price_model.objects.filter(valid_on(on), **{f'{fk_name}__in': product_ids})
+    queryset = queryset.order_by(fk_attname, '-valid_from', '-pk')
+    if connections[queryset.db].features.can_distinct_on_fields:
+        queryset = queryset.distinct(fk_attname)
+
+    entries = {}
+    for entry in queryset:
+        entries.setdefault(getattr(entry, fk_attname), entry)
+    return entries
+
+
+def attach_prices(products, on=None):
+    """
+    Hängt die am Stichtag gültigen Preis-Einträge an die Produkte an.
+
+    Gemischte Listen sind erlaubt - es wird eine Abfrage pro Katalog
+    ausgeführt, Produkte ohne Preistabelle werden übersprungen. Danach
+    liefern get_current_purchase_price(), get_current_sales_price() bzw.
+    get_current_price() ohne weitere Abfrage den Preis zum Stichtag.
+
+    Returns:
+        Die übergebene Produktliste
+    """
+    by_model = defaultdict(list)
+    for product in products:
+        by_model[type(product)].append(product)
+
+    for product_model, instances in by_model.items():
+        if product_model._meta.label not in CATALOGS:
+            continue
+        entries = price_entries(product_model, [p.pk for p in instances], on=on)
+        for product in instances:
+            setattr(product, ENTRY_ATTR, entries.get(product.pk))
+    return products
+
+
+def get_price_entry(product, on=None):
+    """
+    Preis-Eintrag eines einzelnen Produkts zum Stichtag.
+
+    Ohne Stichtag wird ein per attach_prices() angehängter Eintrag verwendet
+    bzw. das Ergebnis an der Instanz zwischengespeichert.
+    """
+    if on is None and ENTRY_ATTR in product.__dict__:
+        return product.__dict__[ENTRY_ATTR]
+    entry = price_entries(type(product), [product.pk], on=on).get(product.pk)
+    if on is None:
+        setattr(product, ENTRY_ATTR, entry)
+    return entry
+
+
+def purchase_price(product, on=None):
+    """Einkaufspreis zum Stichtag oder None"""
+    entry = get_price_entry(product, on)
+    return getattr(entry, _catalog(type(product))[1]) if entry else None
+
+
+def sales_price(product, on=None):
+    """Verkaufs-/Listenpreis zum Stichtag oder None"""
+    entry = get_price_entry(product, on)
+    return getattr(entry, _catalog(type(product))[2]) if entry else None
+
+
+def price_date_from_request(request):
+    """Liest den optionalen Stichtag ?price_date=YYYY-MM-DD aus dem Request"""
+    value = request.query_params.get('price_date') if request is not None else None
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise serializers.ValidationError({'price_date': 'Ungültiges Datum, erwartet YYYY-MM-DD.'})
+    return day
+
+
+class PriceResolvingListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer für Produktlisten: löst die Preise aller Produkte der
+    Seite vorab mit einer Abfrage auf (optional zum Stichtag ?price_date=).
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        products = list(iterable)
+        attach_prices(products, on=price_date_from_request(self.context.get('request')))
+        return super().to_representation(products)
@@ -0,0 +1,161 @@
+"""
+Volltextsuche über denormalisierte Suchtexte.
+
+Durchsuchbare Models (Kunden, Kundenaufträge, Lagerartikel) speichern ihre
+suchrelevanten Werte - auch aus verknüpften Objekten - kleingeschrieben in
+einem Feld `search_text`. Die Suche filtert nur noch auf diese eine Spalte;
+unter PostgreSQL liegt darauf ein pg_trgm-GIN-Index, der LIKE '%...%'
+unterstützt, und die Treffer werden per Trigramm-Ähnlichkeit gerankt.
+
+Models definieren dazu:
+    SEARCH_TEXT_FIELDS    - eigene Felder, deren Änderung den Suchtext betrifft
+    SEARCH_TEXT_SELECT    - select_related für build_search_text() (optional)
+    SEARCH_TEXT_PREFETCH  - prefetch_related für build_search_text() (optional)
+    build_search_text()   - liefert den Suchtext (über normalize_search_text)
+"""
+from django.db import connections, migrations
+from rest_framework.filters import BaseFilterBackend
+
+
+SEARCH_TEXT_FIELD = 'search_text'
+
+
+def normalize_search_text(*values):
+    """Fügt Werte zu einem kleingeschriebenen Suchtext mit einfachen Leerzeichen zusammen"""
+    text = ' '.join(str(value) for value in values if value not in (None, ''))
+    return ' '.join(text.lower().split())
+
+
+def search_tokens(term):
+    """Zerlegt eine Suchanfrage in Suchbegriffe (alle müssen vorkommen)"""
+    return normalize_search_text(term).split() if term else []
+
+
+def prepare_search_text(instance, kwargs):
+    """
+    Für Model.save(): aktualisiert instance.search_text, wenn suchrelevante
+    Felder gespeichert werden, und ergänzt ggf. update_fields.
+
+    Setzt instance._search_text_changed, damit Signale abhängige Suchtexte
+    nur bei echten Änderungen nachziehen.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(instance.SEARCH_TEXT_FIELDS):
+        instance._search_text_changed = False
+        return
+    search_text = instance.build_search_text()
+    instance._search_text_changed = search_text != getattr(instance, SEARCH_TEXT_FIELD)
+    setattr(instance, SEARCH_TEXT_FIELD, search_text)
+    if update_fields is not None:
+        kwargs['update_fields'] = set(update_fields) | {SEARCH_TEXT_FIELD}
+
+
+def refresh_search_text(queryset, batch_size=500):
+    """
+    Berechnet den Suchtext für alle Objekte des QuerySets neu und schreibt
+    geänderte Werte per bulk_update (ohne save()/Signale). Einträge im
+    globalen Suchindex (core.search_index) werden für diese Objekte
+    ebenfalls aktualisiert.
+
+    Returns:
+        Anzahl der geänderten Objekte
+    """
+    from .search_index import index_objects
+
+    model = queryset.model
+    queryset = queryset.select_related(*getattr(model, 'SEARCH_TEXT_SELECT', ()))
+    queryset = queryset.prefetch_related(*getattr(model, 'SEARCH_TEXT_PREFETCH', ()))
+
+    def flush(objects):
+        model.objects.bulk_update(objects, [SEARCH_TEXT_FIELD])
+        index_objects(objects)
+        return len(objects)
+
+    changed = []
+    count = 0
+    for obj in queryset.iterator(chunk_size=batch_size):
+        search_text = obj.build_search_text()
+        if search_text != getattr(obj, SEARCH_TEXT_FIELD):
+            setattr(obj, SEARCH_TEXT_FIELD, search_text)
+            changed.append(obj)
+        if len(changed) >= batch_size:
+            count += flush(changed)
+            changed = []
+    if changed:
+        count += flush(changed)
+    return count
+
+
+def search_queryset(queryset, term, field=SEARCH_TEXT_FIELD, rank=True):
+    """
+    Filtert ein QuerySet auf Objekte, deren Suchtext alle Suchbegriffe enthält.
+
+    Unter PostgreSQL werden die Treffer zusätzlich nach Trigramm-Ähnlichkeit
+    (Annotation `search_rank`) sortiert, sofern `rank` gesetzt ist; die
+    bisherige Sortierung bleibt als zweites Kriterium erhalten.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return queryset
+    for token in tokens:
+        queryset = queryset.filter(**{f'{field}__contains': token})
+
+    if rank and connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        queryset = queryset.annotate(
+            search_rank=TrigramWordSimilarity(' '.join(tokens), field)
+        ).order_by('-search_rank', *ordering)
+    return queryset
+
+
+class SearchTextFilter(BaseFilterBackend):
+    """
+    DRF-Filter für ?search= auf dem denormalisierten Suchtext.
+
+    Nach dem OrderingFilter einbinden: ohne explizites ?ordering= werden die
+    Treffer nach Relevanz sortiert.
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        field = getattr(view, 'search_text_field', SEARCH_TEXT_FIELD)
+        rank = not request.query_params.get(self.ordering_param)
+        return search_queryset(queryset, term, field=field, rank=rank)
+
+
+# ---------------------------------------------------------------------------
+# Migrationen
+# ---------------------------------------------------------------------------
+
+def trigram_index(model_name, index_name, field=SEARCH_TEXT_FIELD, case_insensitive=False):
+    """
+    Migrations-Operation: legt unter PostgreSQL die Extension pg_trgm und
+    einen GIN-Trigramm-Index auf dem Suchtext an. Auf anderen Datenbanken
+    (z.B. SQLite in Tests) passiert nichts.
+
+    Mit `case_insensitive` wird der Index auf UPPER(feld) angelegt - so, wie
+    Django __icontains unter PostgreSQL formuliert.
+    """
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = apps.get_model(model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        column = schema_editor.quote_name(model._meta.get_field(field).column)
+        if case_insensitive:
+            column = f'UPPER({column}::text)'
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(index_name)} '
+            f'ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}')
+
+    return migrations.RunPython(forwards, backwards)
@@ -0,0 +1,239 @@
+"""
+Globaler Suchindex über alle VERP-Entitäten.
+
+Jede durchsuchbare Entität (Kunde, System, Lizenz, Auftrag, Angebot, Ticket,
+Lagerartikel, ...) wird mit register() angemeldet und als SearchDocument
+(Typ, ID, Titel, Untertitel, Suchbegriffe, Berechtigungs-Scope) gespiegelt.
+Die Dokumente werden per Signal beim Speichern/Löschen gepflegt; Änderungen
+an abhängigen Objekten (z.B. Kundenname) werden über `depends_on` nachgezogen.
+
+Die Suche (/api/core/search/) läuft mit einer einzigen Abfrage über die
+Tabelle SearchDocument: Filter auf die Suchbegriffe (pg_trgm-GIN-Index unter
+PostgreSQL), Ranking und Begrenzung pro Typ per Fensterfunktion.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.db.models import Case, F, FloatField, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_delete, post_save
+
+from .search import normalize_search_text, search_tokens
+
+
+@dataclass
+class SearchEntity:
+    model: type
+    entity_type: str
+    label: str
+    title: Callable
+    keywords: Callable
+    scope: str
+    main_scope: Optional[str] = None
+    subtitle: Optional[Callable] = None
+    url: str = ''
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    depends_on: dict = field(default_factory=dict)
+
+    def build(self, obj):
+        """Werte für das SearchDocument eines Objekts"""
+        keywords = self.keywords(obj)
+        if not isinstance(keywords, str):
+            keywords = normalize_search_text(*keywords)
+        return {
+            'entity_type': self.entity_type,
+            'title': str(self.title(obj) or '')[:300],
+            'subtitle': str(self.subtitle(obj) or '')[:300] if self.subtitle else '',
+            'keywords': keywords,
+            'scope': self.scope,
+            'url': self.url.format(pk=obj.pk) if self.url else '',
+        }
+
+    def queryset(self):
+        return self.model._default_manager.select_related(*self.select_related).prefetch_related(*self.prefetch_related)
+
+
+_registry = {}
+
+
+def get_entities():
+    return list(_registry.values())
+
+
+def get_entity(model):
+    return _registry.get(model)
+
+
+def register(model, entity_type, label, title, keywords, scope, main_scope=None, subtitle=None,
+             url='', select_related=(), prefetch_related=(), depends_on=None):
+    """
+    Meldet ein Model für den globalen Suchindex an.
+
+    Args:
+        entity_type: Kurzname des Typs in den Ergebnissen (z.B. 'quotation')
+        label: Anzeigename des Typs
+        title/subtitle: Callables obj -> str
+        keywords: Callable obj -> str oder Liste von Werten
+        scope: Leserecht des Submoduls (z.B. 'can_read_sales_quotations')
+        main_scope: Leserecht des Hauptmoduls als Fallback (z.B. 'can_read_sales')
+        url: Frontend-Route mit Platzhalter {pk}
+        depends_on: {'app_label.Model': 'lookup'} - bei Änderungen dieser Objekte
+                    werden die über `lookup` verknüpften Dokumente neu aufgebaut
+    """
+    entity = SearchEntity(
+        model=model, entity_type=entity_type, label=label, title=title, keywords=keywords,
+        scope=scope, main_scope=main_scope, subtitle=subtitle, url=url,
+        select_related=tuple(select_related), prefetch_related=tuple(prefetch_related),
+        depends_on=dict(depends_on or {}),
+    )
+    _registry[model] = entity
+
+    uid = f'search_index:{model._meta.label}'
+    post_save.connect(_on_save, sender=model, dispatch_uid=f'{uid}:save')
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=f'{uid}:delete')
+    for dependency, lookup in entity.depends_on.items():
+        post_save.connect(
+            _dependency_handler(entity, lookup), sender=dependency, weak=False,
+            dispatch_uid=f'{uid}:depends:{dependency}:{lookup}'
+        )
+    return entity
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_objects([instance])
+
+
+def _on_delete(sender, instance, **kwargs):
+    from .models import SearchDocument
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).delete()
+
+
+def _dependency_handler(entity, lookup):
+    def handler(sender, instance, created=False, raw=False, **kwargs):
+        if created or raw or not getattr(instance, '_search_text_changed', True):
+            return
+        index_queryset(entity.queryset().filter(**{lookup: instance}))
+    return handler
+
+
+def _upsert(model, objects):
+    from .models import SearchDocument
+    entity = _registry[model]
+    content_type = ContentType.objects.get_for_model(model)
+    documents = [
+        SearchDocument(content_type=content_type, object_id=obj.pk, **entity.build(obj))
+        for obj in objects
+    ]
+    if documents:
+        SearchDocument.objects.bulk_create(
+            documents, batch_size=500, update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['entity_type', 'title', 'subtitle', 'keywords', 'scope', 'url', 'updated_at'],
+        )
+    return len(documents)
+
+
+def index_objects(objects):
+    """Schreibt die SearchDocuments für bereits geladene Objekte (ein Upsert pro Model)"""
+    by_model = {}
+    for obj in objects:
+        if type(obj) in _registry and obj.pk is not None:
+            by_model.setdefault(type(obj), []).append(obj)
+    return sum(_upsert(model, objs) for model, objs in by_model.items())
+
+
+def index_queryset(queryset, batch_size=500):
+    """Baut die SearchDocuments für alle Objekte eines QuerySets neu auf"""
+    model = queryset.model
+    entity = _registry.get(model)
+    if entity is None:
+        return 0
+    queryset = queryset.select_related(*entity.select_related).prefetch_related(*entity.prefetch_related)
+    count = 0
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            count += _upsert(model, batch)
+            batch = []
+    return count + _upsert(model, batch)
+
+
+def allowed_scopes(user):
+    """Scopes (Leserechte), deren Dokumente der Benutzer sehen darf; None = alle"""
+    if user.is_superuser or user.is_staff:
+        return None
+
+    def has(perm):
+        return bool(perm) and (
+            getattr(user, perm, False) or getattr(user, perm.replace('can_read_', 'can_write_', 1), False)
+        )
+
+    return sorted({e.scope for e in _registry.values() if has(e.scope) or has(e.main_scope)})
+
+
+def search(user, term, types=None, limit_per_type=5):
+    """
+    Globale Suche: liefert gerankte Treffer, höchstens `limit_per_type` pro Typ.
+
+    Alle Typen werden mit einer einzigen Abfrage ermittelt.
+    """
+    from .models import SearchDocument
+
+    tokens = search_tokens(term)
+    if not tokens:
+        return []
+
+    queryset = SearchDocument.objects.all()
+    scopes = allowed_scopes(user)
+    if scopes is not None:
+        queryset = queryset.filter(scope__in=scopes)
+    if types:
+        queryset = queryset.filter(entity_type__in=types)
+    for token in tokens:
+        queryset = queryset.filter(keywords__contains=token)
+
+    phrase = ' '.join(tokens)
+    rank = Case(
+        When(title__iexact=phrase, then=Value(2.0)),
+        When(title__istartswith=phrase, then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        rank = rank + TrigramWordSimilarity(phrase, 'keywords')
+
+    queryset = queryset.annotate(rank=rank).annotate(
+        type_position=Window(
+            RowNumber(), partition_by=[F('entity_type')],
+            order_by=[F('rank').desc(), F('updated_at').desc()],
+        )
+    ).filter(type_position__lte=limit_per_type).order_by('-rank', 'entity_type', 'type_position')
+
+    return list(queryset.values('entity_type', 'object_id', 'title', 'subtitle', 'url', 'rank'))
+
+
+def rebuild(models=None, batch_size=500):
+    """Baut den Index für alle (oder die angegebenen) Models neu auf und entfernt verwaiste Dokumente"""
+    from .models import SearchDocument
+
+    result = {}
+    for entity in get_entities():
+        if models and entity.model not in models:
+            continue
+        content_type = ContentType.objects.get_for_model(entity.model)
+        indexed = index_queryset(entity.model._default_manager.all(), batch_size=batch_size)
+        existing_ids = entity.model._default_manager.values('pk')
+        removed, _ = SearchDocument.objects.filter(content_type=content_type).exclude(
+            object_id__in=existing_ids
+        ).delete()
+        result[entity.entity_type] = (indexed, removed)
+    return result
@@ -0,0 +1,188 @@
+"""
+Zählstatistiken mit einer Abfrage je Model.
+
+grouped_counts() zählt Gesamtzahl, Verteilung über die Choices einzelner
+Felder und beliebige Bedingungen per bedingter Aggregation
+(COUNT(*) FILTER (WHERE ...)) in einer einzigen Abfrage - statt einer
+count()-Abfrage je Status, Kategorie usw.
+
+    grouped_counts(queryset, 'status', 'category', open=~Q(status='closed'))
+    -> {'total': 12, 'by_status': {'new': 3, ...}, 'by_category': {...}, 'open': 9}
+
+Ergebnisse können kurz zwischengespeichert werden (cached_counts, cached).
+Der Cache-Schlüssel enthält die Schreibversion aller beteiligten Tabellen:
+jedes Speichern/Löschen über das ORM erhöht die Version der Tabelle
+(connect_signals, CoreConfig.ready), der nächste Aufruf rechnet also neu.
+Schreibzugriffe ohne Signale (QuerySet.update, bulk_create) und - solange
+kein gemeinsamer Cache (CACHES) konfiguriert ist - Schreibzugriffe anderer
+Server-Prozesse fallen erst nach STATS_CACHE_SECONDS auf.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+VERSION_PREFIX = 'stats:version:'
+MODIFIED_PREFIX = 'stats:modified:'
+
+
+def _group_conditions(model, group):
+    """Feldname -> ('by_<feld>', {choice: Q})"""
+    field = model._meta.get_field(group)
+    return f'by_{group}', {value: Q(**{group: value}) for value, _ in field.flatchoices}
+
+
+def grouped_counts(queryset, *fields, **conditions):
+    """
+    Zählt in einer Abfrage.
+
+    Args:
+        fields: Feldnamen mit choices -> 'by_<feld>': {choice: anzahl} (auch 0)
+        conditions: name=Q(...) -> name: anzahl, oder
+                    name={schlüssel: Q(...)} -> name: {schlüssel: anzahl}
+
+    Returns:
+        dict mit 'total' und je Feld/Bedingung einem Eintrag
+    """
+    groups = dict(_group_conditions(queryset.model, field) for field in fields)
+    aggregates = {'total': Count('pk')}
+    layout = {}
+    for name, condition in conditions.items():
+        if isinstance(condition, dict):
+            groups[name] = condition
+        else:
+            aggregates[name] = Count('pk', filter=condition)
+            layout[name] = name
+    for name, entries in groups.items():
+        layout[name] = {}
+        for key, condition in entries.items():
+            alias = f'_c{len(aggregates)}'
+            aggregates[alias] = Count('pk', filter=condition)
+            layout[name][key] = alias
+
+    values = queryset.order_by().aggregate(**aggregates)
+    result = {'total': values['total']}
+    for name, alias in layout.items():
+        if isinstance(alias, dict):
+            result[name] = {key: values[a] for key, a in alias.items()}
+        else:
+            result[name] = values[alias]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Cache mit Tabellen-Schreibversion
+# ---------------------------------------------------------------------------
+
+def _timeout():
+    return getattr(settings, 'STATS_CACHE_SECONDS', 30)
+
+
+def table_versions(tables):
+    """Schreibversion je Tabelle (fehlende Versionen werden neu vergeben)"""
+    keys = [VERSION_PREFIX + table for table in tables]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Zeitstempel statt 0: ein verdrängter Zähler trifft keine alten Einträge
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(table):
+    """Erhöht die Schreibversion einer Tabelle (und merkt sich den Zeitpunkt)"""
+    key = VERSION_PREFIX + table
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+    cache.set(MODIFIED_PREFIX + table, time.time(), None)
+
+
+def table_modified(tables):
+    """
+    Zeitpunkt (Unix-Zeit) der letzten Schreibversion der Tabellen - für noch nicht
+    gesehene Tabellen der Zeitpunkt des ersten Aufrufs
+    """
+    keys = [MODIFIED_PREFIX + table for table in tables]
+    stamps = cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, time.time(), None)
+            stamps[key] = cache.get(key)
+    return max(stamps.values(), default=0)
+
+
+def cached(name, tables, compute, timeout=None):
+    """
+    Ergebnis von compute() für STATS_CACHE_SECONDS (bzw. timeout) zwischenspeichern,
+    gültig solange sich keine der Tabellen ändert.
+
+    Args:
+        name: Schlüssel des Ergebnisses (ohne Versionen)
+        tables: Tabellennamen oder Models, aus denen compute() liest
+    """
+    timeout = _timeout() if timeout is None else timeout
+    if timeout <= 0:
+        return compute()
+    tables = sorted({t if isinstance(t, str) else t._meta.db_table for t in tables})
+    versions = table_versions(tables)
+    digest = hashlib.sha256(repr((name, tables, versions)).encode('utf-8')).hexdigest()
+    key = f'stats:{digest}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def query_tables(queryset):
+    """Alle Tabellen, die die Abfrage liest (inkl. Joins)"""
+    query = queryset.query
+    tables = {queryset.model._meta.db_table}
+    tables.update(join.table_name for join in query.alias_map.values())
+    return tables
+
+
+def cached_counts(queryset, *fields, timeout=None, **conditions):
+    """grouped_counts() mit Cache (Schlüssel: SQL der Abfrage + Felder/Bedingungen)"""
+    compute = lambda: grouped_counts(queryset, *fields, **conditions)  # noqa: E731
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return compute()
+    return cached(('counts', sql, repr(params), fields, repr(sorted(conditions.items()))),
+                  query_tables(queryset), compute, timeout=timeout)
+
+
+# ---------------------------------------------------------------------------
+# Signale
+# ---------------------------------------------------------------------------
+
+def _bump_later(table):
+    bump_version(table)
+    # nach dem Commit erneut: ein Leser, der vor dem Commit neu gerechnet und
+    # den alten Stand unter der neuen Version abgelegt hat, wird so überholt
+    transaction.on_commit(lambda: bump_version(table))
+
+
+def _on_write(sender, **kwargs):
+    _bump_later(sender._meta.db_table)
+
+
+def _on_m2m(sender, action, **kwargs):
+    if action.startswith('post_'):
+        _bump_later(sender._meta.db_table)
+
+
+def connect_signals():
+    """Versionen bei jedem Speichern/Löschen erhöhen (CoreConfig.ready)"""
+    post_save.connect(_on_write, dispatch_uid='stats:save')
+    post_delete.connect(_on_write, dispatch_uid='stats:delete')
+    m2m_changed.connect(_on_m2m, dispatch_uid='stats:m2m')
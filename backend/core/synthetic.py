@@ -0,0 +1,300 @@
+"""
+Synthetische Testdaten in einstellbarer Menge (für Benchmarks und Lasttests).
+
+generate() legt Benutzer, Kunden (mit Adresse und E-Mail), Systeme,
+Angebote mit Positionen, Kundenaufträge mit Positionen, Zeiteinträge und
+Service-Tickets per bulk_create an. Nummern (Kunden-, System-, Angebots-,
+Ticketnummer) werden im Format der jeweiligen Nummernvergabe fortlaufend ab
+der aktuell höchsten Nummer vergeben, damit Nummernvergabe und Suche unter
+realistischen Bedingungen laufen.
+
+Alle Datensätze tragen das Kennzeichen SYNTHETIC_MARK (Nachname, Titel bzw.
+Beschreibung), die Benutzer heißen synth-<n>.
+"""
+import random
+import time
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from .search import normalize_search_text
+
+SYNTHETIC_MARK = 'SYNTH'
+
+# Menge je Faktor 1.0 (--scale)
+DEFAULT_VOLUMES = {
+    'users': 20,
+    'customers': 2000,
+    'systems': 1000,
+    'quotations': 2000,
+    'quotation_items': 6,       # je Angebot
+    'customer_orders': 1000,
+    'order_items': 4,           # je Auftrag
+    'time_entries': 20000,
+    'tickets': 1000,
+}
+
+FIRST_NAMES = ['Anna', 'Ben', 'Clara', 'David', 'Eva', 'Felix', 'Greta', 'Hannes', 'Ida', 'Jonas',
+               'Klara', 'Lukas', 'Mia', 'Noah', 'Olga', 'Paul', 'Rosa', 'Simon', 'Tara', 'Uwe']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker',
+              'Schulz', 'Hoffmann', 'Koch', 'Richter', 'Klein', 'Wolf', 'Neumann', 'Schwarz']
+CITIES = ['München', 'Berlin', 'Hamburg', 'Köln', 'Heidelberg', 'Göttingen', 'Dresden', 'Freiburg']
+INSTITUTES = ['Biozentrum', 'Max-Planck-Institut', 'Zellbiologie', 'Neurowissenschaften', 'Biophysik']
+PRODUCTS = ['Mikroskop-Stativ', 'Objektiv 60x', 'Kamera sCMOS', 'Laserquelle 488 nm', 'Filterwürfel',
+            'Piezo-Tisch', 'VisiView Lizenz', 'Inkubationskammer', 'Autofokus-Modul', 'Service-Pauschale']
+
+BATCH_SIZE = 2000
+
+
+def volumes(scale=1.0, **overrides):
+    """Mengen für generate(): DEFAULT_VOLUMES * scale, einzelne Werte überschreibbar"""
+    result = {}
+    for key, value in DEFAULT_VOLUMES.items():
+        if key in ('quotation_items', 'order_items'):
+            result[key] = value
+        else:
+            result[key] = max(1, int(value * scale))
+    result.update({key: value for key, value in overrides.items() if value is not None})
+    return result
+
+
+def _next_number(numbers, prefix, position=1):
+    """Höchster Zahlenteil der vorhandenen Nummern (Format wie die Nummernvergabe)"""
+    highest = 0
+    for number in numbers:
+        if number and number.startswith(prefix):
+            try:
+                highest = max(highest, int(number.split('-')[position]))
+            except (ValueError, IndexError):
+                continue
+    return highest + 1
+
+
+def _money(rng, low, high):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+class Generator:
+    def __init__(self, counts, seed=42, log=None):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.today = date.today()
+
+    def _random_date(self, days_back=730, days_ahead=0):
+        return self.today + timedelta(days=self.rng.randint(-days_back, days_ahead))
+
+    def _step(self, label, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.log(f'{len(result):>8} {label} ({time.perf_counter() - started:.1f}s)')
+        return result
+
+    def run(self):
+        users = self._step('Benutzer', self.users)
+        customers = self._step('Kunden', self.customers)
+        self._step('Systeme', self.systems, customers, users)
+        quotations = self._step('Angebote', self.quotations, customers, users)
+        self._step('Kundenaufträge', self.customer_orders, customers, quotations, users)
+        self._step('Zeiteinträge', self.time_entries, users)
+        self._step('Service-Tickets', self.tickets, customers, users)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return {
+            'users': [user.pk for user in users],
+            'customers': [customer.pk for customer in customers[:50]],
+            'quotations': [quotation.pk for quotation in quotations[:50]],
+        }
+
+    def users(self):
+        User = get_user_model()
+        existing = set(User.objects.filter(username__startswith='synth-').values_list('username', flat=True))
+        users = []
+        for n in range(self.counts['users']):
+            username = f'synth-{n}'
+            if username in existing:
+                continue
+            user = User(username=username, email=f'{username}@example.org',
+                        first_name=self.rng.choice(FIRST_NAMES), last_name=SYNTHETIC_MARK)
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        return list(User.objects.filter(username__startswith='synth-').order_by('pk'))
+
+    def customers(self):
+        from customers.models import Customer, CustomerAddress, CustomerEmail
+
+        start = _next_number(Customer.objects.values_list('customer_number', flat=True), 'K-')
+        created = []
+        for offset in range(0, self.counts['customers'], BATCH_SIZE):
+            customers, extras = [], []
+            for n in range(offset, min(offset + BATCH_SIZE, self.counts['customers'])):
+                first = self.rng.choice(FIRST_NAMES)
+                last = f'{self.rng.choice(LAST_NAMES)} {SYNTHETIC_MARK}'
+                number = f'K-{start + n:05d}'
+                email = f'{first}.{n}@synth.example.org'.lower()
+                city, institute = self.rng.choice(CITIES), self.rng.choice(INSTITUTES)
+                customers.append(Customer(
+                    customer_number=number, first_name=first, last_name=last,
+                    search_text=normalize_search_text(number, first, last, email, institute, city),
+                ))
+                extras.append((email, city, institute))
+            Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+            CustomerEmail.objects.bulk_create([
+                CustomerEmail(customer=customer, email=email)
+                for customer, (email, _, _) in zip(customers, extras)
+            ], batch_size=BATCH_SIZE)
+            CustomerAddress.objects.bulk_create([
+                CustomerAddress(customer=customer, institute=institute, city=city, street='Teststraße',
+                                house_number=str(self.rng.randint(1, 120)), postal_code='12345')
+                for customer, (_, city, institute) in zip(customers, extras)
+            ], batch_size=BATCH_SIZE)
+            created.extend(customers)
+        return created
+
+    def systems(self, customers, users):
+        from systems.models import System
+
+        start = _next_number(System.objects.values_list('system_number', flat=True), 'S-')
+        systems = [
+            System(
+                system_number=f'S-{start + n:05d}',
+                system_name=f'{self.rng.choice(PRODUCTS)} {SYNTHETIC_MARK} {n}',
+                customer=self.rng.choice(customers),
+                location_city=self.rng.choice(CITIES),
+                installation_date=self._random_date(),
+                created_by=self.rng.choice(users),
+            )
+            for n in range(self.counts['systems'])
+        ]
+        System.objects.bulk_create(systems, batch_size=BATCH_SIZE)
+        return systems
+
+    def quotations(self, customers, users):
+        from sales.models import Quotation, QuotationItem
+
+        prefix = f'Q-{self.today.year}-'
+        start = _next_number(Quotation.objects.values_list('quotation_number', flat=True), prefix, position=2)
+        quotations, item_prices = [], []
+        for n in range(self.counts['quotations']):
+            quotation_date = self._random_date()
+            prices = [(_money(self.rng, 50, 20000), Decimal(self.rng.randint(1, 4)))
+                      for _ in range(self.counts['quotation_items'])]
+            total_net = sum((price * quantity for price, quantity in prices), Decimal('0'))
+            quotations.append(Quotation(
+                quotation_number=f'{prefix}{start + n:04d}',
+                customer=self.rng.choice(customers),
+                reference=f'Angebot {SYNTHETIC_MARK} {n}',
+                date=quotation_date,
+                valid_until=quotation_date + timedelta(days=60),
+                status=self.rng.choice(Quotation.STATUS_CHOICES)[0],
+                total_net=total_net,
+                total_tax=(total_net * Decimal('0.19')).quantize(Decimal('0.01')),
+                total_gross=(total_net * Decimal('1.19')).quantize(Decimal('0.01')),
+                created_by=self.rng.choice(users),
+            ))
+            item_prices.append(prices)
+        Quotation.objects.bulk_create(quotations, batch_size=BATCH_SIZE)
+
+        items = [
+            QuotationItem(
+                quotation=quotation, position=position, item_article_number=f'ART-{position:03d}',
+                custom_description=self.rng.choice(PRODUCTS), quantity=quantity, unit_price=price,
+                purchase_price=(price * Decimal('0.6')).quantize(Decimal('0.01')), sale_price=price,
+            )
+            for quotation, prices in zip(quotations, item_prices)
+            for position, (price, quantity) in enumerate(prices, start=1)
+        ]
+        QuotationItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+        return quotations
+
+    def customer_orders(self, customers, quotations, users):
+        from customer_orders.models import CustomerOrder, CustomerOrderItem
+
+        statuses = [value for value, _ in CustomerOrder.STATUS_CHOICES]
+        orders, item_prices = [], []
+        for n in range(self.counts['customer_orders']):
+            prices = [(_money(self.rng, 50, 20000), Decimal(self.rng.randint(1, 4)))
+                      for _ in range(self.counts['order_items'])]
+            total_net = sum((price * quantity for price, quantity in prices), Decimal('0'))
+            order_date = self._random_date()
+            orders.append(CustomerOrder(
+                status=self.rng.choice(statuses),
+                customer=self.rng.choice(customers),
+                quotation=self.rng.choice(quotations) if self.rng.random() < 0.5 else None,
+                project_reference=f'{SYNTHETIC_MARK} {n}',
+                order_date=order_date,
+                delivery_date=order_date + timedelta(weeks=self.rng.randint(2, 16)),
+                total_net=total_net,
+                total_tax=(total_net * Decimal('0.19')).quantize(Decimal('0.01')),
+                total_gross=(total_net * Decimal('1.19')).quantize(Decimal('0.01')),
+                created_by=self.rng.choice(users),
+                sales_person=self.rng.choice(users),
+            ))
+            item_prices.append(prices)
+        CustomerOrder.objects.bulk_create(orders, batch_size=BATCH_SIZE)
+
+        items = [
+            CustomerOrderItem(
+                order=order, position=position, position_display=str(position),
+                article_number=f'ART-{position:03d}', name=self.rng.choice(PRODUCTS),
+                purchase_price=(price * Decimal('0.6')).quantize(Decimal('0.01')),
+                list_price=price, final_price=price, quantity=quantity,
+            )
+            for order, prices in zip(orders, item_prices)
+            for position, (price, quantity) in enumerate(prices, start=1)
+        ]
+        CustomerOrderItem.objects.bulk_create(items, batch_size=BATCH_SIZE)
+        return orders
+
+    def time_entries(self, users):
+        from users.models import TimeEntry
+
+        # Ein Eintrag je Benutzer und Tag (eindeutig je Benutzer, Datum und Beginn), rückwärts ab heute
+        entries = []
+        for n in range(self.counts['time_entries']):
+            start_hour = self.rng.randint(6, 10)
+            hours = self.rng.randint(4, 10)
+            entry = TimeEntry(
+                user=users[n % len(users)], date=self.today - timedelta(days=n // len(users)),
+                start_time=dt_time(start_hour, 0), end_time=dt_time(start_hour + hours, 0),
+                description=SYNTHETIC_MARK,
+            )
+            # bulk_create umgeht save() - Dauer wie TimeEntry.save() setzen
+            entry.duration_seconds = int(entry.duration.total_seconds())
+            entries.append(entry)
+        TimeEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return entries
+
+    def tickets(self, customers, users):
+        from service.models import ServiceTicket
+
+        start = _next_number(ServiceTicket.objects.values_list('ticket_number', flat=True), 'TKT-')
+        statuses = [value for value, _ in ServiceTicket.STATUS_CHOICES]
+        tickets = [
+            ServiceTicket(
+                ticket_number=f'TKT-{start + n:05d}',
+                title=f'{self.rng.choice(PRODUCTS)} defekt ({SYNTHETIC_MARK})',
+                customer=self.rng.choice(customers),
+                status=self.rng.choice(statuses),
+                assigned_to=self.rng.choice(users),
+                created_by=self.rng.choice(users),
+            )
+            for n in range(self.counts['tickets'])
+        ]
+        ServiceTicket.objects.bulk_create(tickets, batch_size=BATCH_SIZE)
+        return tickets
+
+
+def generate(counts, seed=42, log=None):
+    """
+    Legt die synthetischen Daten an (Mengen siehe volumes()).
+
+    Returns:
+        dict mit IDs für Benchmarks: users (alle synth-Benutzer), customers
+        und quotations (jeweils die ersten 50 angelegten)
+    """
+    return Generator(counts, seed=seed, log=log).run()
@@ -0,0 +1,569 @@
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from sales.models import MarketingItem, MarketingItemFile, Quotation, QuotationItem
+from sales.serializers import MarketingItemFileSerializer
+from . import deletion, media_catalog, metrics, thumbnails
+from .benchmarks import run_benchmarks
+from .stats import cached_counts, grouped_counts
+from .deletion_utils import get_media_trash_path, move_file_to_trash, purge_trash
+from .models import DeletionJob, DeletionLog, FilePreview, MediaFile, MediaTrash, TranslationMemory
+from .synthetic import generate, volumes
+from .translation import StubBackend, translate_texts
+
+
+class MediaCatalogTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = get_user_model().objects.create_user('media', email='media@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def write(self, path, content=b'x'):
+        full_path = os.path.join(self.media_root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(content)
+        return full_path
+
+    def test_scan_reconciles_catalog_with_media_root(self):
+        self.write('Systems/S-001/photo.jpg', b'12345')
+        self.write('Systems/S-001/manual.pdf', b'123')
+        self.write('.trash/old.pdf')
+        result = media_catalog.scan()
+        self.assertEqual(result['created'], 4)
+        self.assertFalse(MediaFile.objects.filter(path__startswith='.trash').exists())
+
+        os.remove(os.path.join(self.media_root, 'Systems/S-001/manual.pdf'))
+        self.write('Systems/S-001/photo.jpg', b'1234567')
+        result = media_catalog.scan()
+        self.assertEqual((result['updated'], result['deleted'], result['unchanged']), (1, 1, 2))
+        self.assertEqual(MediaFile.objects.get(path='Systems/S-001/photo.jpg').size, 7)
+
+    def test_browse_stats_and_search_use_catalog(self):
+        self.write('Systems/S-001/photo.jpg', b'12345')
+        self.write('Systems/S-002/report.pdf', b'123')
+        media_catalog.scan()
+
+        response = self.client.get('/api/core/media-browser/browse/', {'path': 'Systems'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(i['name'], i['item_count']) for i in response.data['items']], [('S-001', 1), ('S-002', 1)])
+
+        response = self.client.get('/api/core/media-browser/browse/', {'path': 'Systems/S-001'})
+        self.assertEqual(response.data['items'][0]['file_type'], 'image')
+
+        response = self.client.get('/api/core/media-browser/stats/')
+        self.assertEqual((response.data['file_count'], response.data['folder_count'], response.data['total_size']), (2, 3, 8))
+
+        response = self.client.get('/api/core/media-browser/search/', {'q': 'REPORT'})
+        self.assertEqual([i['path'] for i in response.data['items']], ['Systems/S-002/report.pdf'])
+
+    def test_uploads_and_trash_update_catalog(self):
+        item = MarketingItem.objects.create(category='brochure', title='Flyer', created_by=self.user)
+        attachment = MarketingItemFile(marketing_item=item, filename='flyer.pdf')
+        attachment.file.save('flyer.pdf', ContentFile(b'%PDF'), save=True)
+
+        entry = MediaFile.objects.get(path=attachment.file.name)
+        self.assertEqual((entry.owner, entry.size, entry.mime_type), (attachment, 4, 'application/pdf'))
+        self.assertTrue(MediaFile.objects.filter(path=entry.parent, is_folder=True).exists())
+
+        move_file_to_trash(attachment.file.path, attachment, self.user)
+        self.assertFalse(MediaFile.objects.filter(path=attachment.file.name).exists())
+
+    def test_download_supports_conditional_and_range_requests(self):
+        self.write('Systems/S-001/manual.pdf', b'0123456789')
+        url = '/api/core/media-browser/download/'
+
+        response = self.client.get(url, {'path': 'Systems/S-001/manual.pdf'})
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        etag = response['ETag']
+
+        response = self.client.get(url, {'path': 'Systems/S-001/manual.pdf'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(url, {'path': 'Systems/S-001/manual.pdf'}, HTTP_RANGE='bytes=2-4')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 2-4/10'))
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+
+        response = self.client.get(url, {'path': 'Systems/S-001/manual.pdf'}, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(url, {'path': 'Systems/S-001/manual.pdf'})
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/Systems/S-001/manual.pdf')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(THUMBNAIL_ASYNC=False)
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.item = MarketingItem.objects.create(category='brochure', title='Broschüre')
+
+    def upload(self, name, content):
+        attachment = MarketingItemFile(marketing_item=self.item, filename=name)
+        attachment.file.save(name, ContentFile(content), save=True)
+        return attachment
+
+    def png(self, size=(800, 400)):
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 255)).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def test_previews_are_generated_after_commit_and_shared_by_hash(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            first = self.upload('photo.png', self.png())
+        data = MarketingItemFileSerializer(first).data
+        self.assertEqual(data['thumbnails']['status'], 'pending')
+        self.assertTrue(data['thumbnail_url'].endswith('thumbnail-placeholder.svg'))
+
+        for callback in callbacks:
+            callback()
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.upload('copy.png', self.png())
+
+        previews = {p.object_id: p for p in FilePreview.objects.all()}
+        self.assertEqual({p.status for p in previews.values()}, {'ready'})
+        self.assertEqual(previews[first.pk].content_hash, previews[second.pk].content_hash)
+        from PIL import Image
+        with Image.open(thumbnails.thumbnail_path(previews[first.pk].content_hash, 'grid')) as image:
+            self.assertEqual(image.size, (300, 150))
+
+        files = MarketingItemFile.objects.order_by('pk')
+        # Dateien + Vorschau-Einträge, unabhängig von der Anzahl der Dateien
+        with self.assertNumQueries(2):
+            data = MarketingItemFileSerializer(files, many=True).data
+        self.assertEqual(data[0]['thumbnails']['list'], thumbnails.thumbnail_url(previews[first.pk].content_hash, 'list'))
+
+    def test_unsupported_files_have_no_preview(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment = self.upload('notes.docx', b'PK')
+        self.assertIsNone(MarketingItemFileSerializer(attachment).data['thumbnails'])
+
+    def test_backfill_command(self):
+        attachment = self.upload('photo.png', self.png())
+        FilePreview.objects.all().delete()
+        call_command('generate_thumbnails', '--model', 'sales.MarketingItemFile', stdout=io.StringIO())
+        self.assertEqual(FilePreview.objects.get(object_id=attachment.pk).status, 'ready')
+
+
+class TrashRetentionTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.owner = MarketingItem.objects.create(category='brochure', title='Broschüre')
+
+    def trash(self, name, size, days_ago=0):
+        path = os.path.join(self.media_root, 'Sales', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        item = move_file_to_trash(path, self.owner, None)
+        MediaTrash.objects.filter(pk=item.pk).update(deleted_at=timezone.now() - timedelta(days=days_ago))
+        return item
+
+    def test_same_name_is_trashed_without_collision(self):
+        first, second = self.trash('a.pdf', 1), self.trash('a.pdf', 2)
+        self.assertNotEqual(first.trash_path, second.trash_path)
+        self.assertEqual(first.original_path, second.original_path)
+        self.assertTrue((get_media_trash_path() / second.trash_path).exists())
+
+    def test_purge_by_age_and_quota_in_batches(self):
+        old = [self.trash(f'old{i}.pdf', 100, days_ago=100 + i) for i in range(3)]
+        recent = [self.trash(f'new{i}.pdf', 100, days_ago=10 - i) for i in range(3)]
+
+        result = purge_trash(max_age_days=90, batch_size=2, max_batches=1)
+        self.assertEqual((result['items'], result['complete']), (2, False))
+        result = purge_trash(max_age_days=90, batch_size=2)
+        self.assertEqual((result['items'], result['bytes']), (1, 100))
+        self.assertFalse(MediaTrash.objects.filter(pk__in=[i.pk for i in old]).exists())
+        self.assertFalse((get_media_trash_path() / old[0].trash_path).exists())
+
+        result = purge_trash(max_total_bytes=150, dry_run=True)
+        self.assertEqual((result['items'], result['remaining_bytes']), (2, 100))
+        self.assertEqual(MediaTrash.objects.count(), 3)
+
+        purge_trash(max_total_bytes=150)
+        self.assertEqual(list(MediaTrash.objects.values_list('pk', flat=True)), [recent[2].pk])
+
+
+class CountingBackend(StubBackend):
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, texts, source, target):
+        self.calls.append(list(texts))
+        return super().translate(texts, source, target)
+
+
+class TranslationMemoryTests(TestCase):
+    def test_known_texts_are_served_from_memory(self):
+        backend = CountingBackend()
+        result = translate_texts(['Kabel', '', 'Stecker', 'Kabel'], target='EN', backend=backend)
+        self.assertEqual(result, ['[EN] Kabel', '', '[EN] Stecker', '[EN] Kabel'])
+        self.assertEqual(backend.calls, [['Kabel', 'Stecker']])
+
+        result = translate_texts(['Stecker', 'Netzteil'], target='en', backend=backend)
+        self.assertEqual(result, ['[EN] Stecker', '[EN] Netzteil'])
+        self.assertEqual(backend.calls[-1], ['Netzteil'])
+        self.assertEqual(TranslationMemory.objects.get(source_text='Stecker').hit_count, 1)
+
+    @override_settings(TRANSLATION_BACKEND='core.translation.StubBackend')
+    def test_procurement_translate_endpoint(self):
+        from procurement.models import ProductCollection
+
+        user = get_user_model().objects.create_user('translator', email='translator@example.org', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        collection = ProductCollection.objects.create(title='Mikroskop', short_description='Kurz')
+
+        url = f'/api/procurement/product-collections/{collection.pk}/translate/'
+        response = client.post(url, {'field': 'title'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['translated'], '[EN] Mikroskop')
+
+        response = client.post(url, {'fields': ['title', 'short_description']}, format='json')
+        self.assertEqual(response.data['translated'], {'title': '[EN] Mikroskop', 'short_description': '[EN] Kurz'})
+        collection.refresh_from_db()
+        self.assertEqual(collection.short_description_en, '[EN] Kurz')
+        self.assertEqual(TranslationMemory.objects.get(source_text='Mikroskop').hit_count, 1)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.store.reset()
+        self.admin = get_user_model().objects.create_user(
+            'messung', email='messung@example.org', password='x', is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True, REQUEST_METRICS_SLOW_MS=0)
+    def test_route_stats_and_server_timing(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with self.assertLogs('verp.slow_requests', 'WARNING') as logs:
+            for _ in range(3):
+                response = client.get('/api/core/search/', {'q': 'xy'})
+        self.assertIn('core_searchdocument', logs.output[0])
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        data = client.get('/api/core/metrics/requests/').data
+        route = next(r for r in data['routes'] if r['route'] == 'GET /api/core/search/')
+        self.assertEqual(route['count'], 3)
+        self.assertGreater(route['queries_avg'], 0)
+        self.assertIsNotNone(route['p95_ms'])
+        slow = data['slow_requests'][0]
+        self.assertEqual(slow['route'], 'GET /api/core/search/')
+        self.assertTrue(slow['statements'][0]['sql'])
+
+        self.assertEqual(self.client.delete('/api/core/metrics/requests/').status_code, 204)
+        other = get_user_model().objects.create_user('gast', email='gast@example.org', password='x')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/core/metrics/requests/').status_code, 403)
+
+    def test_legacy_connection_timing(self):
+        conn = metrics.timed_connection(sqlite3.connect(':memory:'))
+        state = metrics.RequestState()
+        token = metrics._current.set(state)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT ? UNION SELECT ?', (1, 2))
+            self.assertEqual(sorted(row[0] for row in cursor), [1, 2])
+            self.assertEqual(cursor.description[0][0], '?')
+        finally:
+            metrics._current.reset(token)
+            conn.close()
+        self.assertEqual(state.legacy_count, 4)  # execute, zwei Zeilen, Ende
+        self.assertEqual(state.top_statements()[0]['db'], 'mssql')
+
+
+class BenchmarkBudgetTests(TestCase):
+    def test_query_budgets(self):
+        counts = volumes(0.02, users=3)
+        ids = generate(counts)
+        self.assertEqual(len(ids['users']), 3)
+        admin = get_user_model().objects.create_superuser('bench', email='bench@example.org', password='x')
+        context = {'user': ids['users'][0], 'customer': ids['customers'][0], 'quotation': ids['quotations'][0]}
+
+        results = run_benchmarks(admin, context, repeat=1)
+        failed = [
+            f"{r['name']}: {r['error'] or r['queries']} > {r['max_queries']}"
+            for r in results if r['error'] or (not r['queries_ok'] and not r['known_issue'])
+        ]
+        self.assertEqual(failed, [])
+
+
+class GroupedStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        from service.models import TroubleshootingTicket
+        self.model = TroubleshootingTicket
+        for status, category in [('new', 'hardware'), ('new', 'software'), ('resolved', 'software')]:
+            TroubleshootingTicket.objects.create(title='T', status=status, category=category)
+
+    def test_one_query_for_all_groups(self):
+        with self.assertNumQueries(1):
+            counts = grouped_counts(self.model.objects.all(), 'status', 'category',
+                                    open=~Q(status='resolved'), by_kind={'hw': Q(category='hardware')})
+        self.assertEqual(counts['total'], 3)
+        self.assertEqual(counts['by_status']['new'], 2)
+        self.assertEqual(counts['by_status']['closed'], 0)
+        self.assertEqual(counts['by_category']['software'], 2)
+        self.assertEqual(counts['open'], 2)
+        self.assertEqual(counts['by_kind'], {'hw': 1})
+
+    def test_cache_follows_write_version(self):
+        queryset = self.model.objects.filter(category='software')
+        self.assertEqual(cached_counts(queryset, 'status')['total'], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_counts(queryset, 'status')['total'], 2)
+        self.model.objects.create(title='T', status='new', category='software')
+        self.assertEqual(cached_counts(queryset, 'status')['by_status']['new'], 2)
+
+    def test_dashboard_served_from_cache(self):
+        from customers.models import Customer
+        user = get_user_model().objects.create_user('dash', email='dash@example.org', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.assertNumQueries(8):
+            client.get('/api/core/dashboard/')
+        with self.assertNumQueries(0):
+            response = client.get('/api/core/dashboard/')
+        self.assertEqual(response.data['stats']['total_customers'], 0)
+        Customer.objects.create(last_name='Neu')
+        self.assertEqual(client.get('/api/core/dashboard/').data['stats']['total_customers'], 1)
+
+
+@override_settings(API_CACHE_MODE='validate', API_COMPRESS_MIN_BYTES=200)
+class ConditionalGetTests(TestCase):
+    url = '/api/systems/model-organisms/'
+
+    def setUp(self):
+        cache.clear()
+        from systems.models import ModelOrganismOption
+        self.model = ModelOrganismOption
+        for index in range(20):
+            ModelOrganismOption.objects.create(name=f'Organismus {index:02d}')
+        user = get_user_model().objects.create_user('etag', email='etag@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_unchanged_list_is_answered_with_304(self):
+        first = self.client.get(self.url)
+        self.assertNotIn('ETag', first)  # Tabellen werden erst ermittelt
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.model.objects.create(name='Neu')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.model.objects.count())
+
+    def test_large_json_is_compressed(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    @override_settings(API_CACHE_MODE='no-store')
+    def test_no_store_mode_has_no_validators(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotIn('ETag', response)
+        self.assertTrue(response['Cache-Control'].startswith('no-store'))
+
+
+class LoadTestHarnessTests(TestCase):
+    def test_percentiles_and_default_endpoints(self):
+        from .loadtest import default_endpoints, percentile
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+        names = [endpoint.name for endpoint in default_endpoints()]
+        self.assertIn('customers.list', names)
+        self.assertNotIn('quotations.update', names)
+        self.assertNotIn('numbers.customer', names)
+
+
+@override_settings(DELETION_ASYNC=False, DELETION_BATCH_SIZE=2, THUMBNAIL_ASYNC=False)
+class DeletionServiceTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item_with_files(self, count):
+        item = MarketingItem.objects.create(category='brochure', title='Broschüre')
+        for index in range(count):
+            attachment = MarketingItemFile(marketing_item=item, filename=f'datei{index}.txt')
+            attachment.file.save(f'datei{index}.txt', ContentFile(b'x' * 10), save=True)
+        return item
+
+    def test_impact_is_counted_in_one_query(self):
+        item = self.item_with_files(3)
+        impact = deletion.impact_graph(item)
+        with self.assertNumQueries(1):
+            counted = deletion.count_impact(impact)
+        by_model = {entry['model']: entry['count'] for entry in counted if entry['action'] == 'delete'}
+        self.assertEqual(by_model['sales.MarketingItemFile'], 3)
+        self.assertEqual(by_model['sales.MarketingItem'], 1)
+        self.assertEqual(deletion.total_rows(counted), 4)
+        self.assertEqual(impact.deletion_order()[-1], MarketingItem)
+
+    def test_job_deletes_in_batches_and_moves_files_to_trash(self):
+        item = self.item_with_files(5)
+        other = self.item_with_files(1)
+        paths = [f.file.path for f in item.files.all()]
+        job = deletion.create_job(item, 'other', 'Broschüre', self.user,
+                                  deletion.count_impact(deletion.impact_graph(item)))
+        self.assertEqual(job.total_rows, 6)
+
+        job = deletion.run_job(job.pk)
+        self.assertEqual((job.status, job.deleted_rows, job.media_count, job.progress), ('done', 6, 5, 100))
+        self.assertFalse(MarketingItem.objects.filter(pk=item.pk).exists())
+        self.assertEqual(other.files.count(), 1)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertEqual(MediaTrash.objects.count(), 5)
+        self.assertTrue(DeletionLog.objects.filter(entity_id=item.pk, media_count=5).exists())
+
+        # erneut ausführen (z.B. resume_deletion_jobs) ändert nichts mehr
+        self.assertEqual(deletion.run_job(job.pk).deleted_rows, 6)
+
+    def test_admin_delete_preview_and_execute(self):
+        from customers.models import Customer, CustomerEmail
+
+        customer = Customer.objects.create(first_name='Erika', last_name='Muster')
+        CustomerEmail.objects.create(customer=customer, email='erika@example.com')
+
+        response = self.client.get('/api/core/admin-delete/preview/', {'type': 'customer', 'id': customer.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_rows'], 2)
+        self.assertTrue(response.data['has_related_objects'])
+        self.assertFalse(response.data['runs_in_background'])
+
+        with self.settings(DELETION_SYNC_LIMIT=1):
+            response = self.client.post('/api/core/admin-delete/execute/',
+                                        {'type': 'customer', 'id': customer.pk, 'confirm': True}, format='json')
+        # DELETION_ASYNC=False: der Hintergrund-Auftrag läuft sofort
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['job']['status'], 'done')
+        self.assertFalse(Customer.objects.filter(pk=customer.pk).exists())
+
+        response = self.client.get(f"/api/core/admin-delete/jobs/{response.data['job']['id']}/")
+        self.assertEqual((response.status_code, response.data['deleted_rows']), (200, 2))
+        self.assertEqual(DeletionJob.objects.count(), 1)
+
+    def quotation(self, items):
+        from customers.models import Customer
+
+        customer, _ = Customer.objects.get_or_create(first_name='Erika', last_name='Angebot')
+        quotation = Quotation.objects.create(customer=customer, valid_until=date.today())
+        QuotationItem.objects.bulk_create([
+            QuotationItem(quotation=quotation, position=n, quantity=1, unit_price=Decimal('10.00'))
+            for n in range(1, items + 1)
+        ])
+        return quotation
+
+    def job_queries(self, instance):
+        job = deletion.create_job(instance, 'quotation', str(instance), self.user,
+                                  deletion.count_impact(deletion.impact_graph(instance)))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(deletion.run_job(job.pk).status, 'done')
+        return len(queries)
+
+    def plain_queries(self, instance):
+        with CaptureQueriesContext(connection) as queries:
+            instance.delete()
+        return len(queries)
+
+    @override_settings(DELETION_BATCH_SIZE=500)
+    def test_job_costs_a_constant_overhead_over_plain_delete(self):
+        with mock.patch('core.pricing.refresh_totals') as refresh_totals:
+            overhead = {
+                items: self.job_queries(self.quotation(items)) - self.plain_queries(self.quotation(items))
+                for items in (5, 40)
+            }
+        self.assertEqual(overhead[5], overhead[40])
+        self.assertLessEqual(overhead[40], 10)
+        # Kaskade wie bei quotation.delete(): keine Summen-Neuberechnung je Position
+        refresh_totals.assert_not_called()
+
+    def test_batches_keep_the_cascade_origin(self):
+        quotation = self.quotation(5)
+        with mock.patch('core.pricing.refresh_totals') as refresh_totals:
+            self.job_queries(quotation)
+        refresh_totals.assert_not_called()
+        self.assertFalse(QuotationItem.objects.exists())
+
+    def test_root_is_deleted_through_its_delete_method(self):
+        from users.models import TimeEntry
+
+        entry = TimeEntry.objects.create(user=self.user, date=date.today(), start_time=time(8), end_time=time(16))
+        with mock.patch('users.working_time.apply_entry_change') as apply_entry_change:
+            job = deletion.create_job(entry, 'other', 'Zeiteintrag', self.user,
+                                      deletion.count_impact(deletion.impact_graph(entry)))
+            job = deletion.run_job(job.pk)
+        self.assertEqual((job.status, job.deleted_rows), ('done', 1))
+        apply_entry_change.assert_called_once()
+
+    def test_running_job_is_not_run_twice(self):
+        item = self.item_with_files(1)
+        job = deletion.create_job(item, 'other', 'Broschüre', self.user,
+                                  deletion.count_impact(deletion.impact_graph(item)))
+        DeletionJob.objects.filter(pk=job.pk).update(status='running')
+        self.assertEqual(deletion.create_job(item, 'other', 'Broschüre', self.user, []), job)
+
+        # läuft in einem anderen Prozess: weder run_job noch resume_deletion_jobs übernehmen ihn
+        self.assertEqual(deletion.run_job(job.pk).status, 'running')
+        call_command('resume_deletion_jobs', stdout=io.StringIO())
+        self.assertTrue(MarketingItem.objects.filter(pk=item.pk).exists())
+
+        # ohne Fortschritt seit DELETION_STALE_MINUTES: wird fortgesetzt
+        DeletionJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        call_command('resume_deletion_jobs', stdout=io.StringIO())
+        self.assertEqual(DeletionJob.objects.get(pk=job.pk).status, 'done')
+        self.assertFalse(MarketingItem.objects.filter(pk=item.pk).exists())
+
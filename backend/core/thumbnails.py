@@ -0,0 +1,300 @@
+"""
+Vorschaubilder (Thumbnails) für hochgeladene Bilder und PDFs.
+
+Models melden ihre Dateifelder mit register() an. Nach dem Speichern wird
+die Erzeugung nach dem Commit in einem Hintergrund-Thread angestoßen, der
+Upload-Request wartet also nicht auf das Rastern großer PDFs. Erzeugt
+werden mehrere Größen (SIZES), abgelegt nach SHA-256 des Dateiinhalts unter
+MEDIA_ROOT/.thumbnails/<hash[:2]>/<hash>_<größe>.jpg. Bis die Bilder fertig
+sind, liefern die Serializer ein Platzhalterbild.
+
+Bestehende Dateien werden mit `manage.py generate_thumbnails` nachgezogen.
+
+Einstellungen:
+    THUMBNAIL_ASYNC    - Erzeugung im Hintergrund-Thread (Standard True)
+    THUMBNAIL_WORKERS  - Anzahl der Hintergrund-Threads (Standard 2)
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.templatetags.static import static
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Name -> maximale Kantenlänge (Breite, Höhe); größte zuerst
+SIZES = {
+    'preview': (1200, 1200),
+    'grid': (300, 300),
+    'list': (64, 64),
+}
+THUMBNAIL_DIR = '.thumbnails'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+PDF_EXTENSIONS = ('.pdf',)
+PLACEHOLDER = 'core/thumbnail-placeholder.svg'
+
+_registry = {}
+_executor = None
+
+
+def register(model, field='file'):
+    """Meldet ein Dateifeld eines Models für Vorschaubilder an"""
+    fields = _registry.setdefault(model, [])
+    if field not in fields:
+        fields.append(field)
+    uid = f'thumbnails:{model._meta.label}'
+    post_save.connect(_on_save, sender=model, dispatch_uid=f'{uid}:save')
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=f'{uid}:delete')
+
+
+def get_registered():
+    """[(model, field_name), ...] aller angemeldeten Dateifelder"""
+    return [(model, field) for model, fields in _registry.items() for field in fields]
+
+
+def is_supported(name):
+    return os.path.splitext(name or '')[1].lower() in IMAGE_EXTENSIONS + PDF_EXTENSIONS
+
+
+def thumbnail_path(content_hash, size):
+    return Path(settings.MEDIA_ROOT) / THUMBNAIL_DIR / content_hash[:2] / f'{content_hash}_{size}.jpg'
+
+
+def thumbnail_url(content_hash, size):
+    return f'{settings.MEDIA_URL}{THUMBNAIL_DIR}/{content_hash[:2]}/{content_hash}_{size}.jpg'
+
+
+# ---------------------------------------------------------------------------
+# Signale und Planung
+# ---------------------------------------------------------------------------
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    for field in _registry[sender]:
+        request_preview(instance, field)
+
+
+def _on_delete(sender, instance, **kwargs):
+    # Die Bilddateien können von anderen Objekten mit gleichem Inhalt genutzt
+    # werden; verwaiste Dateien entfernt `generate_thumbnails --prune`
+    from .models import FilePreview
+    FilePreview.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk
+    ).delete()
+
+
+def request_preview(instance, field, force=False, schedule=True):
+    """
+    Legt den Vorschau-Eintrag für ein Dateifeld an bzw. setzt ihn zurück, wenn
+    sich die Datei geändert hat, und plant die Erzeugung nach dem Commit
+    (ohne `schedule` erzeugt der Aufrufer selbst über generate()).
+    """
+    from .models import FilePreview
+
+    name = getattr(instance, field).name or ''
+    status = 'pending' if is_supported(name) else 'unsupported'
+    preview, created = FilePreview.objects.get_or_create(
+        content_type=ContentType.objects.get_for_model(instance), object_id=instance.pk, field_name=field,
+        defaults={'source_name': name, 'status': status},
+    )
+    if not created:
+        if preview.source_name == name and preview.status != 'failed' and not force:
+            return preview
+        preview.source_name, preview.status, preview.content_hash, preview.error = name, status, '', ''
+        preview.save(update_fields=['source_name', 'status', 'content_hash', 'error', 'updated_at'])
+    if status == 'pending' and schedule:
+        transaction.on_commit(lambda: _submit(preview.pk))
+    return preview
+
+
+def _submit(preview_id):
+    global _executor
+    if not getattr(settings, 'THUMBNAIL_ASYNC', True):
+        generate(preview_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2), thread_name_prefix='thumbnails'
+        )
+    _executor.submit(_run_in_thread, preview_id)
+
+
+def _run_in_thread(preview_id):
+    try:
+        generate(preview_id)
+    finally:
+        connections.close_all()
+
+
+# ---------------------------------------------------------------------------
+# Erzeugung
+# ---------------------------------------------------------------------------
+
+def _content_hash(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _render(field_file):
+    """Erstes Bild bzw. erste PDF-Seite als RGB-Bild in Vorschau-Auflösung"""
+    from PIL import Image, ImageOps
+
+    largest = max(SIZES.values())
+    extension = os.path.splitext(field_file.name)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        import fitz  # PyMuPDF
+        with field_file.open('rb') as f:
+            document = fitz.open(stream=f.read(), filetype='pdf')
+        try:
+            if document.page_count == 0:
+                raise ValueError('PDF ohne Seiten')
+            page = document[0]
+            zoom = min(largest[0] / page.rect.width, largest[1] / page.rect.height, 2.0)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', [pixmap.width, pixmap.height], pixmap.samples)
+        finally:
+            document.close()
+
+    with field_file.open('rb') as f:
+        image = Image.open(f)
+        # JPEGs direkt in reduzierter Auflösung dekodieren
+        image.draft('RGB', largest)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def generate(preview_id):
+    """Erzeugt alle Größen für einen Vorschau-Eintrag (synchron)"""
+    from PIL import Image
+    from .models import FilePreview
+
+    preview = FilePreview.objects.select_related('content_type').filter(pk=preview_id).first()
+    if preview is None:
+        return None
+    try:
+        instance = preview.content_type.get_object_for_this_type(pk=preview.object_id)
+    except preview.content_type.model_class().DoesNotExist:
+        preview.delete()
+        return None
+
+    field_file = getattr(instance, preview.field_name)
+    try:
+        content_hash = _content_hash(field_file)
+        paths = {size: thumbnail_path(content_hash, size) for size in SIZES}
+        if not all(path.exists() for path in paths.values()):
+            image = _render(field_file)
+            for size, dimensions in SIZES.items():
+                # Von groß nach klein verkleinern, jeweils ausgehend vom vorherigen Ergebnis
+                image.thumbnail(dimensions, Image.LANCZOS)
+                paths[size].parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = paths[size].with_suffix('.tmp')
+                image.save(tmp_path, format='JPEG', quality=85, optimize=True)
+                os.replace(tmp_path, paths[size])
+        preview.content_hash, preview.status, preview.error = content_hash, 'ready', ''
+    except Exception as e:
+        logger.error(f"Vorschau-Erzeugung fehlgeschlagen für {preview.source_name}: {e}", exc_info=True)
+        preview.status, preview.error = 'failed', str(e)
+    preview.save(update_fields=['content_hash', 'status', 'error', 'updated_at'])
+    return preview
+
+
+def prune():
+    """Löscht Vorschaubilder, deren Inhalts-Hash von keinem Eintrag mehr genutzt wird"""
+    from .models import FilePreview
+
+    root = Path(settings.MEDIA_ROOT) / THUMBNAIL_DIR
+    if not root.exists():
+        return 0
+    used = set(FilePreview.objects.exclude(content_hash='').values_list('content_hash', flat=True))
+    removed = 0
+    for path in root.glob('*/*.jpg'):
+        if path.name.split('_', 1)[0] not in used:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# Serializer
+# ---------------------------------------------------------------------------
+
+def attach_previews(objects, field):
+    """Lädt die Vorschau-Einträge für eine Liste von Objekten mit einer Abfrage"""
+    from .models import FilePreview
+
+    objects = [obj for obj in objects if obj.pk is not None]
+    if not objects:
+        return objects
+    previews = {
+        p.object_id: p for p in FilePreview.objects.filter(
+            content_type=ContentType.objects.get_for_model(objects[0]), field_name=field,
+            object_id__in=[obj.pk for obj in objects],
+        )
+    }
+    for obj in objects:
+        obj.__dict__.setdefault('_file_previews', {})[field] = previews.get(obj.pk)
+    return objects
+
+
+def get_preview(obj, field):
+    cache = obj.__dict__.setdefault('_file_previews', {})
+    if field not in cache:
+        attach_previews([obj], field)
+    return cache[field]
+
+
+def preview_data(obj, field='file'):
+    """
+    {'status': ..., 'list': url, 'grid': url, 'preview': url} oder None, wenn
+    für die Datei keine Vorschau erzeugt werden kann.
+    """
+    preview = get_preview(obj, field)
+    if preview is None or preview.status in ('unsupported', 'failed'):
+        return None
+    if preview.status == 'ready':
+        urls = {size: thumbnail_url(preview.content_hash, size) for size in SIZES}
+    else:
+        placeholder = static(PLACEHOLDER)
+        urls = {size: placeholder for size in SIZES}
+    return {'status': preview.status, **urls}
+
+
+class ThumbnailField(serializers.Field):
+    """Read-only-Feld mit den Vorschaubild-URLs eines Dateifelds"""
+
+    def __init__(self, file_field='file', **kwargs):
+        self.file_field = file_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return preview_data(obj, self.file_field)
+
+
+class PreviewListSerializer(serializers.ListSerializer):
+    """ListSerializer, der die Vorschau-Einträge aller Objekte vorab mit einer Abfrage lädt"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        objects = list(iterable)
+        for field in self.child.fields.values():
+            if isinstance(field, ThumbnailField):
+                attach_previews(objects, field.file_field)
+        return super().to_representation(objects)
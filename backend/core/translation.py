@@ -0,0 +1,124 @@
+"""
+Übersetzungen mit Übersetzungsspeicher.
+
+translate_texts() beantwortet bereits übersetzte Texte aus dem
+TranslationMemory (Schlüssel: SHA-256 des Quelltexts, Quell- und
+Zielsprache) und schickt nur die fehlenden Texte gesammelt an den
+Übersetzungsdienst.
+
+Der Dienst ist über TRANSLATION_BACKEND austauschbar:
+    core.translation.LibreTranslateBackend  - TRANSLATION_API_URL/-KEY (Standard)
+    core.translation.StubBackend            - offline, z.B. für Tests
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class TranslationError(Exception):
+    """Der Übersetzungsdienst ist fehlgeschlagen"""
+
+
+class TranslationUnavailable(TranslationError):
+    """Kein Übersetzungsdienst konfiguriert"""
+
+
+class LibreTranslateBackend:
+    """LibreTranslate-kompatible API (unterstützt mehrere Texte pro Anfrage)"""
+    name = 'libretranslate'
+    batch_size = 50
+    timeout = 30
+
+    def translate(self, texts, source, target):
+        import requests
+
+        api_url = getattr(settings, 'TRANSLATION_API_URL', None)
+        api_key = getattr(settings, 'TRANSLATION_API_KEY', None)
+        if not api_url:
+            raise TranslationUnavailable('Keine Übersetzungs-API konfiguriert')
+        try:
+            resp = requests.post(api_url, json={
+                'q': texts,
+                'source': source,
+                'target': target,
+                'format': 'text'
+            }, headers={'Authorization': f'Bearer {api_key}'} if api_key else {}, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            raise TranslationError(str(e)) from e
+
+        if isinstance(data, dict):
+            translated = data.get('translatedText') or data.get('translation') or data.get('translated')
+        else:
+            translated = data
+        if isinstance(translated, str):
+            translated = [translated]
+        if not isinstance(translated, list) or len(translated) != len(texts):
+            raise TranslationError('Unerwartete Antwort der Übersetzungs-API')
+        return [str(t) for t in translated]
+
+
+class StubBackend:
+    """Lokaler Ersatz ohne Netzwerk: markiert den Text nur mit der Zielsprache"""
+    name = 'stub'
+    batch_size = 1000
+
+    def translate(self, texts, source, target):
+        return [f'[{target.upper()}] {text}' for text in texts]
+
+
+def get_backend():
+    path = getattr(settings, 'TRANSLATION_BACKEND', None) or 'core.translation.LibreTranslateBackend'
+    return import_string(path)()
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def translate_texts(texts, source='de', target='en', backend=None):
+    """
+    Übersetzt eine Liste von Texten; Ergebnis in derselben Reihenfolge.
+
+    Bekannte Texte kommen aus dem Übersetzungsspeicher (eine Abfrage), alle
+    übrigen werden in Batches an den Dienst geschickt und gespeichert.
+    Leere Texte bleiben leer.
+
+    Raises:
+        TranslationUnavailable / TranslationError, wenn fehlende Texte nicht
+        übersetzt werden können
+    """
+    from .models import TranslationMemory
+
+    source, target = source.lower(), target.lower()
+    hashes = {text: source_hash(text) for text in texts if text}
+    if not hashes:
+        return list(texts)
+
+    found = dict(TranslationMemory.objects.filter(
+        source_language=source, target_language=target, source_hash__in=set(hashes.values())
+    ).values_list('source_hash', 'translated_text'))
+    if found:
+        TranslationMemory.objects.filter(
+            source_language=source, target_language=target, source_hash__in=list(found)
+        ).update(hit_count=F('hit_count') + 1, last_used_at=timezone.now())
+
+    missing = [text for text, digest in hashes.items() if digest not in found]
+    if missing:
+        backend = backend or get_backend()
+        entries = []
+        for start in range(0, len(missing), backend.batch_size):
+            chunk = missing[start:start + backend.batch_size]
+            for text, translated in zip(chunk, backend.translate(chunk, source, target)):
+                found[hashes[text]] = translated
+                entries.append(TranslationMemory(
+                    source_hash=hashes[text], source_language=source, target_language=target,
+                    source_text=text, translated_text=translated, backend=backend.name,
+                ))
+        TranslationMemory.objects.bulk_create(entries, ignore_conflicts=True)
+
+    return [found[hashes[text]] if text else text for text in texts]
@@ -1,8 +1,9 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
-    dashboard_stats, module_list, MediaBrowserViewSet,
-    admin_delete_types, admin_delete_preview, admin_delete_execute
+    dashboard_stats, module_list, global_search, MediaBrowserViewSet,
+    admin_delete_types, admin_delete_preview, admin_delete_execute, admin_delete_jobs,
+    request_metrics
 )
 
 router = DefaultRouter()
@@ -11,9 +12,13 @@ router.register(r'media-browser', MediaBrowserViewSet, basename='media-browser')
 urlpatterns = [
     path('dashboard/', dashboard_stats, name='dashboard-stats'),
     path('modules/', module_list, name='module-list'),
+    path('search/', global_search, name='global-search'),
     # Admin Delete Module
     path('admin-delete/types/', admin_delete_types, name='admin-delete-types'),
     path('admin-delete/preview/', admin_delete_preview, name='admin-delete-preview'),
     path('admin-delete/execute/', admin_delete_execute, name='admin-delete-execute'),
+    path('admin-delete/jobs/', admin_delete_jobs, name='admin-delete-jobs'),
+    path('admin-delete/jobs/<int:job_id>/', admin_delete_jobs, name='admin-delete-job'),
+    path('metrics/requests/', request_metrics, name='request-metrics'),
 ] + router.urls
 
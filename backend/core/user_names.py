@@ -0,0 +1,45 @@
+"""
+Anzeigenamen von Benutzern per Annotation statt je Zeile.
+
+Serializer zeigen Benutzer als "Vorname Nachname" (leer: Benutzername).
+with_user_names() berechnet diesen Namen in der Abfrage der Liste,
+UserNameField liest ihn von dort - und lädt den Benutzer nur nach, wenn das
+Objekt nicht aus einer annotierten Abfrage stammt (z.B. gerade angelegt).
+
+    queryset = with_user_names(Ticket.objects.all(), 'assigned_to')   # -> assigned_to_name
+    assigned_to_name = UserNameField('assigned_to')
+"""
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from rest_framework import serializers
+
+
+def display_name(user):
+    """Anzeigename wie in den Serializern ("Vorname Nachname" oder Benutzername)"""
+    if user is None:
+        return None
+    return f"{user.first_name} {user.last_name}".strip() or user.username
+
+
+def user_name(field):
+    """SQL-Ausdruck für den Anzeigenamen des Benutzers im Fremdschlüssel `field` (NULL ohne Benutzer)"""
+    full_name = Trim(Concat(F(f'{field}__first_name'), Value(' '), F(f'{field}__last_name')))
+    return Coalesce(NullIf(full_name, Value('')), F(f'{field}__username'))
+
+
+def with_user_names(queryset, *fields):
+    """Annotiert `<feld>_name` für jeden Benutzer-Fremdschlüssel in `fields`"""
+    return queryset.annotate(**{f'{field}_name': user_name(field) for field in fields})
+
+
+class UserNameField(serializers.ReadOnlyField):
+    """Anzeigename des Benutzers `user_field` - aus der Annotation gleichen Namens, falls vorhanden"""
+
+    def __init__(self, user_field, **kwargs):
+        self.user_field = user_field
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if self.field_name in instance.__dict__:
+            return instance.__dict__[self.field_name]
+        return display_name(getattr(instance, self.user_field))
@@ -5,7 +5,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.apps import apps
 from suppliers.models import Supplier, TradingProduct
 from customers.models import Customer
@@ -13,12 +13,54 @@ from visiview.models import VisiViewProduct, VisiViewLicense
 from systems.models import System
 from manufacturing.models import VSHardware
 from service.models import VSService
+from core import deletion, media_catalog, metrics, search_index
+from core import stats as stats_module
+from core.media_delivery import media_response
+from core.models import DeletionJob, MediaFile
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Lower
 import os
 from pathlib import Path
-import mimetypes
 
 User = get_user_model()
 
+# Tabellen der Dashboard-Statistik (Schlüssel des Caches)
+DASHBOARD_MODELS = [
+    TradingProduct, VSHardware, VisiViewProduct, VSService, System, VisiViewLicense, Customer, Supplier,
+]
+
+
+def _dashboard_counts():
+    """Zählungen des Dashboards - eine Abfrage je Model"""
+    active = Q(is_active=True)
+    trading = stats_module.grouped_counts(TradingProduct.objects.all(), active=active)
+    vshardware = stats_module.grouped_counts(VSHardware.objects.all(), active=active)
+    visiview = stats_module.grouped_counts(VisiViewProduct.objects.all(), active=active)
+    vsservice = stats_module.grouped_counts(VSService.objects.all(), active=active)
+    systems = stats_module.grouped_counts(System.objects.all(), active=Q(status='in_nutzung'))
+    licenses = stats_module.grouped_counts(VisiViewLicense.objects.all(), active=Q(status='active'))
+    customers = stats_module.grouped_counts(Customer.objects.all(), active=active)
+    suppliers = stats_module.grouped_counts(Supplier.objects.all(), active=active)
+    products = [trading, vshardware, visiview, vsservice]
+    
+    return {
+        'total_customers': customers['total'],
+        'active_customers': customers['active'],
+        'total_suppliers': suppliers['total'],
+        'active_suppliers': suppliers['active'],
+        'total_systems': systems['total'],
+        'active_systems': systems['active'],
+        'total_licenses': licenses['total'],
+        'active_licenses': licenses['active'],
+        'total_products': sum(p['total'] for p in products),
+        'active_products': sum(p['active'] for p in products),
+        # Einzelne Produktkategorien für Details
+        'trading_products': trading['total'],
+        'vshardware_products': vshardware['total'],
+        'visiview_products': visiview['total'],
+        'vsservice_products': vsservice['total'],
+    }
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -28,45 +70,7 @@ def dashboard_stats(request):
     """
     user = request.user
     
-    # Produktzählung: Trading + VS-Hardware + VisiView + VS-Service
-    trading_total = TradingProduct.objects.count()
-    trading_active = TradingProduct.objects.filter(is_active=True).count()
-    vshardware_total = VSHardware.objects.count()
-    vshardware_active = VSHardware.objects.filter(is_active=True).count()
-    visiview_total = VisiViewProduct.objects.count()
-    visiview_active = VisiViewProduct.objects.filter(is_active=True).count()
-    vsservice_total = VSService.objects.count()
-    vsservice_active = VSService.objects.filter(is_active=True).count()
-    
-    total_products = trading_total + vshardware_total + visiview_total + vsservice_total
-    active_products = trading_active + vshardware_active + visiview_active + vsservice_active
-    
-    # System-Statistiken
-    total_systems = System.objects.count()
-    active_systems = System.objects.filter(status='in_nutzung').count()
-    
-    # VisiView-Lizenz-Statistiken
-    total_licenses = VisiViewLicense.objects.count()
-    active_licenses = VisiViewLicense.objects.filter(status='active').count()
-    
-    # Sammle Statistiken
-    stats = {
-        'total_customers': Customer.objects.count(),
-        'active_customers': Customer.objects.filter(is_active=True).count(),
-        'total_suppliers': Supplier.objects.count(),
-        'active_suppliers': Supplier.objects.filter(is_active=True).count(),
-        'total_systems': total_systems,
-        'active_systems': active_systems,
-        'total_licenses': total_licenses,
-        'active_licenses': active_licenses,
-        'total_products': total_products,
-        'active_products': active_products,
-        # Einzelne Produktkategorien für Details
-        'trading_products': trading_total,
-        'vshardware_products': vshardware_total,
-        'visiview_products': visiview_total,
-        'vsservice_products': vsservice_total,
-    }
+    stats = stats_module.cached('dashboard', DASHBOARD_MODELS, _dashboard_counts)
     
     # Module zu denen der Benutzer Zugang hat
     modules = []
@@ -268,6 +272,43 @@ def module_list(request):
     return Response({'modules': all_modules})
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def global_search(request):
+    """
+    Globale Suche über alle Module (Typeahead)
+
+    Query-Parameter:
+        q: Suchbegriff(e), mindestens 2 Zeichen
+        types: kommagetrennte Typen (z.B. 'customer,quotation'), optional
+        limit: Treffer pro Typ (Standard 5, max. 20)
+    """
+    term = request.query_params.get('q', '').strip()
+    types = [t for t in request.query_params.get('types', '').split(',') if t]
+    try:
+        limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+    except ValueError:
+        return Response({'error': 'limit muss eine Zahl sein'}, status=status.HTTP_400_BAD_REQUEST)
+
+    labels = {entity.entity_type: entity.label for entity in search_index.get_entities()}
+    if len(term) < 2:
+        return Response({'query': term, 'results': [], 'types': labels})
+
+    results = [
+        {
+            'type': row['entity_type'],
+            'type_label': labels.get(row['entity_type'], row['entity_type']),
+            'id': row['object_id'],
+            'title': row['title'],
+            'subtitle': row['subtitle'],
+            'url': row['url'],
+            'rank': round(row['rank'], 3),
+        }
+        for row in search_index.search(request.user, term, types=types, limit_per_type=limit)
+    ]
+    return Response({'query': term, 'results': results, 'types': labels})
+
+
 class MediaBrowserViewSet(viewsets.ViewSet):
     """
     ViewSet for browsing media files and folders
@@ -294,133 +335,125 @@ class MediaBrowserViewSet(viewsets.ViewSet):
         
         return full_path
     
-    def _get_file_info(self, file_path, relative_path):
+    def _relative_path(self, path_param):
         """
-        Get file information
+        Validate path_param and return it relative to MEDIA_ROOT ('' for the root)
         """
-        stats = os.stat(file_path)
-        file_size = stats.st_size
-        modified_time = stats.st_mtime
-        
-        # Get MIME type
-        mime_type, _ = mimetypes.guess_type(file_path)
-        
-        # Determine file type category
-        file_type = 'unknown'
-        if mime_type:
-            if mime_type.startswith('image/'):
-                file_type = 'image'
-            elif mime_type.startswith('video/'):
-                file_type = 'video'
-            elif mime_type.startswith('audio/'):
-                file_type = 'audio'
-            elif mime_type == 'application/pdf':
-                file_type = 'pdf'
-            elif mime_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                file_type = 'document'
-            elif mime_type in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-                file_type = 'spreadsheet'
-            elif mime_type.startswith('text/'):
-                file_type = 'text'
-        
-        return {
-            'name': os.path.basename(file_path),
-            'path': relative_path.replace('\\', '/'),
-            'type': 'file',
-            'file_type': file_type,
-            'mime_type': mime_type,
-            'size': file_size,
-            'modified': modified_time,
-            'extension': os.path.splitext(file_path)[1].lower()
-        }
-    
-    def _get_folder_info(self, folder_path, relative_path):
+        full_path = self._get_safe_path(path_param)
+        return media_catalog.relative_path(full_path) or ''
+    
+    def _entries(self):
+        children = MediaFile.objects.filter(parent=OuterRef('path')).order_by().values('parent').annotate(
+            count=Count('pk')
+        ).values('count')
+        return MediaFile.objects.select_related('content_type').annotate(
+            item_count=Coalesce(Subquery(children), 0)
+        )
+    
+    def _get_item_info(self, entry):
         """
-        Get folder information
+        Serialize a catalog entry (file or folder)
         """
-        stats = os.stat(folder_path)
-        modified_time = stats.st_mtime
-        
-        # Count items in folder
-        try:
-            items = os.listdir(folder_path)
-            item_count = len(items)
-        except PermissionError:
-            item_count = 0
-        
-        return {
-            'name': os.path.basename(folder_path) or 'media',
-            'path': relative_path.replace('\\', '/'),
-            'type': 'folder',
-            'modified': modified_time,
-            'item_count': item_count
+        info = {
+            'name': entry.name,
+            'path': entry.path,
+            'type': 'folder' if entry.is_folder else 'file',
+            'modified': entry.modified_at.timestamp(),
         }
+        if entry.is_folder:
+            info['item_count'] = entry.item_count
+            return info
+        info.update({
+            'file_type': entry.file_type,
+            'mime_type': entry.mime_type or None,
+            'size': entry.size,
+            'extension': entry.extension,
+            'owner': {
+                'type': f'{entry.content_type.app_label}.{entry.content_type.model}',
+                'id': entry.object_id,
+            } if entry.content_type_id else None,
+        })
+        return info
     
     @action(detail=False, methods=['get'])
     def browse(self, request):
         """
-        Browse media folder structure
+        Browse media folder structure (aus dem Medienkatalog, siehe core.media_catalog)
         GET /core/media-browser/browse/?path=some/folder
         """
         path_param = request.query_params.get('path', '')
         
         try:
-            full_path = self._get_safe_path(path_param)
+            relative_path = self._relative_path(path_param)
             
-            if not os.path.exists(full_path):
-                return Response({'error': 'Path does not exist'}, status=status.HTTP_404_NOT_FOUND)
-            
-            if not os.path.isdir(full_path):
-                return Response({'error': 'Path is not a directory'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Get current folder info
-            current_folder = self._get_folder_info(full_path, path_param)
+            if relative_path:
+                folder = self._entries().filter(path=relative_path).first()
+                if folder is None:
+                    return Response({'error': 'Path does not exist'}, status=status.HTTP_404_NOT_FOUND)
+                if not folder.is_folder:
+                    return Response({'error': 'Path is not a directory'}, status=status.HTTP_400_BAD_REQUEST)
+                current_folder = self._get_item_info(folder)
+            else:
+                current_folder = {
+                    'name': 'media',
+                    'path': '',
+                    'type': 'folder',
+                    'modified': os.stat(settings.MEDIA_ROOT).st_mtime,
+                }
             
             # Get parent folder path
             parent_path = None
-            if path_param:
-                parent_path = str(Path(path_param).parent)
+            if relative_path:
+                parent_path = str(Path(relative_path).parent)
                 if parent_path == '.':
                     parent_path = ''
             
-            # List contents
-            items = []
-            try:
-                for item_name in sorted(os.listdir(full_path)):
-                    item_path = os.path.join(full_path, item_name)
-                    relative_item_path = os.path.join(path_param, item_name) if path_param else item_name
-                    
-                    # Skip hidden files and special folders
-                    if item_name.startswith('.'):
-                        continue
-                    
-                    try:
-                        if os.path.isdir(item_path):
-                            items.append(self._get_folder_info(item_path, relative_item_path))
-                        else:
-                            items.append(self._get_file_info(item_path, relative_item_path))
-                    except (PermissionError, OSError):
-                        # Skip items we can't access
-                        continue
-                        
-            except PermissionError:
-                return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-            
-            # Sort: folders first, then files, alphabetically
-            folders = [item for item in items if item['type'] == 'folder']
-            files = [item for item in items if item['type'] == 'file']
-            sorted_items = sorted(folders, key=lambda x: x['name'].lower()) + sorted(files, key=lambda x: x['name'].lower())
+            # Folders first, then files, alphabetically
+            items = [
+                self._get_item_info(entry)
+                for entry in self._entries().filter(parent=relative_path).order_by('-is_folder', Lower('name'))
+            ]
+            current_folder['item_count'] = len(items)
             
             return Response({
                 'current_folder': current_folder,
                 'parent_path': parent_path,
-                'items': sorted_items,
-                'total_items': len(sorted_items)
+                'items': items,
+                'total_items': len(items)
             })
             
+        except Http404:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Search files by name
+        GET /core/media-browser/search/?q=report&path=some/folder&file_type=pdf&limit=100
+        """
+        term = request.query_params.get('q', '').strip()
+        if len(term) < 2:
+            return Response({'error': 'Suchbegriff muss mindestens 2 Zeichen haben'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 500)
+        except ValueError:
+            return Response({'error': 'limit muss eine Zahl sein'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = MediaFile.objects.select_related('content_type').filter(is_folder=False)
+        for token in term.split():
+            queryset = queryset.filter(name__icontains=token)
+        relative_path = self._relative_path(request.query_params.get('path', ''))
+        if relative_path:
+            queryset = queryset.filter(path__startswith=relative_path + '/')
+        file_type = request.query_params.get('file_type')
+        if file_type:
+            queryset = queryset.filter(file_type=file_type)
+        
+        items = [self._get_item_info(entry) for entry in queryset.order_by(Lower('name'), 'path')[:limit]]
+        return Response({'query': term, 'items': items, 'total_items': len(items)})
+    
     @action(detail=False, methods=['get'])
     def download(self, request):
         """
@@ -441,14 +474,10 @@ class MediaBrowserViewSet(viewsets.ViewSet):
             if not os.path.isfile(full_path):
                 return Response({'error': 'Path is not a file'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get MIME type
-            mime_type, _ = mimetypes.guess_type(full_path)
-            
-            # Open and return file
-            response = FileResponse(open(full_path, 'rb'), content_type=mime_type)
-            response['Content-Disposition'] = f'attachment; filename="{os.path.basename(full_path)}"'
-            return response
+            return media_response(request, full_path, as_attachment=True)
             
+        except Http404:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -472,54 +501,33 @@ class MediaBrowserViewSet(viewsets.ViewSet):
             if not os.path.isfile(full_path):
                 return Response({'error': 'Path is not a file'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get MIME type
-            mime_type, _ = mimetypes.guess_type(full_path)
-            
-            # Open and return file for inline viewing
-            response = FileResponse(open(full_path, 'rb'), content_type=mime_type)
-            response['Content-Disposition'] = f'inline; filename="{os.path.basename(full_path)}"'
-            return response
+            return media_response(request, full_path, as_attachment=False)
             
+        except Http404:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """
-        Get statistics about media storage
+        Get statistics about media storage (aus dem Medienkatalog)
         GET /core/media-browser/stats/
         """
         try:
-            media_root = settings.MEDIA_ROOT
-            
-            total_size = 0
-            file_count = 0
-            folder_count = 0
-            file_types = {}
-            
-            # Walk through all files
-            for root, dirs, files in os.walk(media_root):
-                folder_count += len(dirs)
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                    
-                    file_path = os.path.join(root, file)
-                    try:
-                        file_size = os.path.getsize(file_path)
-                        total_size += file_size
-                        file_count += 1
-                        
-                        # Track file types
-                        _, ext = os.path.splitext(file)
-                        ext = ext.lower()
-                        if ext:
-                            file_types[ext] = file_types.get(ext, 0) + 1
-                    except (OSError, PermissionError):
-                        continue
+            totals = MediaFile.objects.aggregate(
+                total_size=Coalesce(Sum('size', filter=Q(is_folder=False)), 0),
+                file_count=Count('pk', filter=Q(is_folder=False)),
+                folder_count=Count('pk', filter=Q(is_folder=True)),
+            )
+            total_size = totals['total_size']
+            file_count = totals['file_count']
+            folder_count = totals['folder_count']
             
             # Get top file types
-            top_file_types = sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_file_types = MediaFile.objects.filter(is_folder=False).exclude(extension='').values_list(
+                'extension'
+            ).annotate(count=Count('pk')).order_by('-count', 'extension')[:10]
             
             return Response({
                 'total_size': total_size,
@@ -542,7 +550,7 @@ DELETABLE_MODELS = {
     'supplier': ('suppliers', 'Supplier', 'supplier_number', 'Lieferant'),
     'order': ('orders', 'Order', 'order_number', 'Lieferantenbestellung'),
     'customer_order': ('customer_orders', 'CustomerOrder', 'order_number', 'Kundenauftrag'),
-    'quotation': ('quotations', 'Quotation', 'quotation_number', 'Angebot'),
+    'quotation': ('sales', 'Quotation', 'quotation_number', 'Angebot'),
     'dealer': ('dealers', 'Dealer', 'name', 'Händler'),
     'system': ('systems', 'System', 'system_number', 'System'),
     'project': ('projects', 'Project', 'project_number', 'Projekt'),
@@ -653,22 +661,21 @@ def admin_delete_preview(request):
     if hasattr(item, 'created_at'):
         item_info['created_at'] = item.created_at.isoformat() if item.created_at else None
     
-    # Verknüpfte Objekte zählen (für Warnung)
-    related_counts = []
-    for rel in item._meta.related_objects:
-        try:
-            related_manager = getattr(item, rel.get_accessor_name())
-            count = related_manager.count()
-            if count > 0:
-                related_counts.append({
-                    'name': rel.related_model._meta.verbose_name_plural,
-                    'count': count
-                })
-        except Exception:
-            pass
+    # Auswirkung über alle Ebenen der Kaskade (eine Zählabfrage, siehe core.deletion)
+    impact = deletion.count_impact(deletion.impact_graph(item))
+    root_label = item._meta.concrete_model._meta.label
+    related_counts = [
+        {'name': entry['name'], 'count': entry['count']}
+        for entry in impact
+        if entry['action'] == 'delete' and entry['model'] != root_label
+    ]
     
     item_info['related_objects'] = related_counts
     item_info['has_related_objects'] = len(related_counts) > 0
+    item_info['impact'] = impact
+    item_info['total_rows'] = deletion.total_rows(impact)
+    item_info['blocked_rows'] = deletion.blocked_rows(impact)
+    item_info['runs_in_background'] = deletion.runs_in_background(impact)
     
     return Response(item_info)
 
@@ -719,16 +726,91 @@ def admin_delete_execute(request):
     deleted_id = item.pk
     deleted_identifier = getattr(item, identifier_field, str(item.pk))
     
-    try:
-        item.delete()
+    impact = deletion.count_impact(deletion.impact_graph(item))
+    blocked = [entry for entry in impact if entry['action'] == 'blocked']
+    if blocked:
         return Response({
-            'success': True,
-            'message': f'{display_name} "{deleted_identifier}" (ID: {deleted_id}) wurde gelöscht.',
-            'deleted_id': deleted_id,
-            'deleted_identifier': deleted_identifier
-        })
-    except Exception as e:
+            'error': f'{display_name} "{deleted_identifier}" kann nicht gelöscht werden.',
+            'detail': 'Verknüpfte Einträge verhindern das Löschen: ' + ', '.join(
+                f"{entry['count']} {entry['name']}" for entry in blocked
+            ),
+            'impact': impact,
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    job = deletion.create_job(
+        item, model_type, f'{display_name} {deleted_identifier}', request.user, impact
+    )
+    
+    # Große Kaskaden: Löschauftrag im Hintergrund, Fortschritt über admin-delete/jobs/<id>/.
+    # Ein bereits offener Auftrag für dasselbe Objekt wird nicht ein zweites Mal ausgeführt (run_job).
+    if deletion.runs_in_background(impact):
+        job = deletion.submit(job)
+    else:
+        job = deletion.run_job(job.pk)
+    
+    if job.status == 'failed':
         return Response({
-            'error': f'Fehler beim Löschen: {str(e)}',
-            'detail': 'Möglicherweise gibt es noch verknüpfte Einträge die das Löschen verhindern.'
+            'error': f'Fehler beim Löschen: {job.error}',
+            'detail': 'Möglicherweise gibt es noch verknüpfte Einträge die das Löschen verhindern.',
+            'job': deletion.job_data(job),
         }, status=status.HTTP_400_BAD_REQUEST)
+    if job.status != 'done':
+        return Response({
+            'success': True,
+            'message': (
+                f'{display_name} "{deleted_identifier}" (ID: {deleted_id}) wird gelöscht '
+                f'({job.total_rows} Einträge, Löschauftrag #{job.pk}).'
+            ),
+            'deleted_id': deleted_id,
+            'deleted_identifier': deleted_identifier,
+            'job': deletion.job_data(job),
+        }, status=status.HTTP_202_ACCEPTED)
+    return Response({
+        'success': True,
+        'message': f'{display_name} "{deleted_identifier}" (ID: {deleted_id}) wurde gelöscht.',
+        'deleted_id': deleted_id,
+        'deleted_identifier': deleted_identifier,
+        'job': deletion.job_data(job),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_delete_jobs(request, job_id=None):
+    """
+    Löschaufträge des Admin-Löschmoduls mit Fortschritt.
+    GET /core/admin-delete/jobs/           - letzte Aufträge (?status=running)
+    GET /core/admin-delete/jobs/<id>/      - einzelner Auftrag
+    Nur für Superuser.
+    """
+    if not request.user.is_superuser:
+        return Response({'error': 'Nur für VERP Super User'}, status=status.HTTP_403_FORBIDDEN)
+    
+    if job_id is not None:
+        job = DeletionJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({'error': f'Löschauftrag {job_id} nicht gefunden'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(deletion.job_data(job))
+    
+    jobs = DeletionJob.objects.all()
+    if request.query_params.get('status'):
+        jobs = jobs.filter(status=request.query_params['status'])
+    return Response({'jobs': [deletion.job_data(job) for job in jobs[:50]]})
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def request_metrics(request):
+    """
+    Laufzeit-Messwerte je Route (siehe core.metrics).
+    GET    /core/metrics/requests/  - Routen nach Gesamtzeit sortiert, zuletzt langsame Anfragen
+    DELETE /core/metrics/requests/  - Messwerte zurücksetzen
+    Nur für Staff/Superuser.
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response({'error': 'Nur für Administratoren'}, status=status.HTTP_403_FORBIDDEN)
+
+    if request.method == 'DELETE':
+        metrics.store.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(metrics.store.snapshot())
@@ -5,7 +5,6 @@ from rest_framework.response import Response
 from django.core.files.base import ContentFile
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
 
 from .models import CustomerLoan, CustomerLoanItem
 from .serializers import (
@@ -15,6 +14,7 @@ from .serializers import (
     CustomerLoanItemSerializer,
 )
 from .pdf_generator import generate_loan_delivery_note_pdf
+from core.media_delivery import media_response
 
 
 class CustomerLoanViewSet(viewsets.ModelViewSet):
@@ -114,10 +114,9 @@ class CustomerLoanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        return FileResponse(
-            customer_loan.pdf_file.open('rb'),
+        return media_response(
+            request, customer_loan.pdf_file,
             content_type='application/pdf',
-            as_attachment=True,
             filename=f"Leihlieferschein_{customer_loan.loan_number}.pdf"
         )
 
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CustomerOrdersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'customer_orders'
+    verbose_name = 'Kundenaufträge'
+
+    def ready(self):
+        # Signale für die Pflege der Auftragssummen und Suchtexte registrieren
+        from . import signals  # noqa: F401
@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+def populate_totals(apps, schema_editor):
+    """Befüllt die neuen Summenfelder aus den bestehenden Positionen"""
+    from core.pricing import calculate_customer_order_totals, TOTAL_FIELDS
+    CustomerOrder = apps.get_model('customer_orders', 'CustomerOrder')
+    batch = []
+    for document in CustomerOrder.objects.prefetch_related('items').iterator(chunk_size=500):
+        for field, value in calculate_customer_order_totals(document, list(document.items.all())).items():
+            setattr(document, field, value)
+        batch.append(document)
+        if len(batch) >= 500:
+            CustomerOrder.objects.bulk_update(batch, TOTAL_FIELDS)
+            batch = []
+    if batch:
+        CustomerOrder.objects.bulk_update(batch, TOTAL_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_orders', '0014_add_legacy_auftrags_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_gross',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Brutto-Gesamtsumme'),
+        ),
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_margin',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Marge (absolut)'),
+        ),
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_net',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Netto-Gesamtsumme'),
+        ),
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_purchase_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Gesamt-EK'),
+        ),
+        migrations.AddField(
+            model_name='customerorder',
+            name='total_tax',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='MwSt-Betrag'),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
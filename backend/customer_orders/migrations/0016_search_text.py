@@ -0,0 +1,46 @@
+# Generated by Django 5.0 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+from core.search import trigram_index
+
+
+def populate_search_text(apps, schema_editor):
+    """Befüllt den Suchtext für bestehende Kundenaufträge"""
+    from core.search import normalize_search_text
+    CustomerOrder = apps.get_model('customer_orders', 'CustomerOrder')
+    batch = []
+    queryset = CustomerOrder.objects.select_related('customer').prefetch_related('customer__addresses')
+    for order in queryset.iterator(chunk_size=500):
+        values = [
+            order.order_number, order.customer_order_number, order.project_reference,
+            order.system_reference, order.customer_contact_name,
+        ]
+        if order.customer_id:
+            values += [order.customer.customer_number, order.customer.first_name, order.customer.last_name]
+            for address in order.customer.addresses.all():
+                values += [address.university, address.institute]
+        order.search_text = normalize_search_text(*values)
+        batch.append(order)
+        if len(batch) >= 500:
+            CustomerOrder.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        CustomerOrder.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_orders', '0015_document_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customerorder',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext'),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        trigram_index('customer_orders.CustomerOrder', 'customer_order_search_trgm'),
+    ]
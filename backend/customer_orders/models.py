@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from customers.models import Customer
 from core.upload_paths import customer_order_upload_path
+from core.search import normalize_search_text, prepare_search_text
 from datetime import datetime
 from decimal import Decimal
 from django.conf import settings
@@ -175,6 +176,13 @@ class CustomerOrder(models.Model):
     # Lieferkosten
     delivery_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='Lieferkosten')
     
+    # Denormalisierte Summen - werden über core.pricing bei jeder Positionsänderung gepflegt
+    total_net = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Netto-Gesamtsumme')
+    total_tax = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='MwSt-Betrag')
+    total_gross = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Brutto-Gesamtsumme')
+    total_purchase_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Gesamt-EK')
+    total_margin = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name='Marge (absolut)')
+    
     # Bemerkungen
     notes = models.TextField(blank=True, verbose_name='Interne Bemerkungen')
     order_notes = models.TextField(blank=True, verbose_name='Bemerkungen für Kunden')
@@ -189,6 +197,16 @@ class CustomerOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalisierter Suchtext (inkl. Kunde und Kundenadressen), siehe core.search
+    search_text = models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext')
+
+    SEARCH_TEXT_FIELDS = (
+        'order_number', 'customer_order_number', 'project_reference', 'system_reference',
+        'customer_contact_name', 'customer',
+    )
+    SEARCH_TEXT_SELECT = ('customer',)
+    SEARCH_TEXT_PREFETCH = ('customer__addresses',)
+
     class Meta:
         verbose_name = 'Kundenauftrag'
         verbose_name_plural = 'Kundenaufträge'
@@ -201,9 +219,36 @@ class CustomerOrder(models.Model):
 
     def save(self, *args, **kwargs):
         """Override save to generate order number on confirmation"""
+        # Summen neu berechnen, wenn preisrelevante Kopf-Felder gespeichert werden
+        from core.pricing import calculate_customer_order_totals, CUSTOMER_ORDER_PRICING_FIELDS, TOTAL_FIELDS
+        update_fields = kwargs.get('update_fields')
+        if self.pk and (update_fields is None or set(update_fields) & set(CUSTOMER_ORDER_PRICING_FIELDS)):
+            for field, value in calculate_customer_order_totals(self).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(TOTAL_FIELDS)
+        prepare_search_text(self, kwargs)
         # Save first (commission calculation now handled in serializer)
         super().save(*args, **kwargs)
 
+    def build_search_text(self):
+        """Suchtext aus Auftrags-/Bestellnummer, Referenzen, Besteller, Kunde und Kundenadressen"""
+        values = [
+            self.order_number, self.customer_order_number, self.project_reference,
+            self.system_reference, self.customer_contact_name,
+        ]
+        if self.customer_id:
+            customer = self.customer
+            values += [customer.customer_number, customer.first_name, customer.last_name]
+            for address in customer.addresses.all():
+                values += [address.university, address.institute]
+        return normalize_search_text(*values)
+
+    def refresh_totals(self):
+        """Berechnet die gespeicherten Summen aus den Positionen neu"""
+        from core.pricing import refresh_totals
+        return refresh_totals(self)
+
     def _calculate_commissions(self):
         """Calculate and save commissions for this order"""
         from users.models import Employee
@@ -271,28 +316,10 @@ class CustomerOrder(models.Model):
         self.order_number = f"{prefix}-{running:03d}-{month}-{year}"
         return self.order_number
 
-    @property
-    def total_net(self):
-        """Netto-Gesamtsumme"""
-        total = sum(item.line_total for item in self.items.all())
-        return total + self.delivery_cost
-
-    @property
-    def total_tax(self):
-        """MwSt-Betrag"""
-        if not self.tax_enabled:
-            return 0
-        return self.total_net * (self.tax_rate / 100)
-
-    @property
-    def total_gross(self):
-        """Brutto-Gesamtsumme"""
-        return self.total_net + self.total_tax
-
     def calculate_total(self):
         """Backward-compatible helper used by serializers/views.
 
-        Returns the net total (positions + delivery_cost) as Decimal.
+        Returns the stored net total (positions + delivery_cost) as Decimal.
         """
         return self.total_net
 
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from decimal import Decimal
+from core.fieldsets import SparseFieldsMixin, annotated
+from core.item_sync import ItemSync
+from core.pricing import deferred_totals, schedule_refresh
 from .models import CustomerOrder, CustomerOrderItem, DeliveryNote, Invoice, Payment, CustomerOrderCommissionRecipient, EmployeeCommission
 
 
@@ -36,6 +38,8 @@ class CustomerOrderItemSerializer(serializers.ModelSerializer):
 
 class CustomerOrderItemCreateSerializer(serializers.ModelSerializer):
     """Serializer zum Erstellen/Bearbeiten von Positionen"""
+    # Beschreibbar, damit bestehende Positionen beim Speichern zugeordnet werden können
+    id = serializers.IntegerField(required=False, allow_null=True)
     quotation_position = serializers.IntegerField(required=False, allow_null=True)
     
     class Meta:
@@ -48,6 +52,11 @@ class CustomerOrderItemCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+CUSTOMER_ORDER_ITEM_SYNC = ItemSync(
+    CustomerOrderItem, 'order', fields=CustomerOrderItemCreateSerializer.Meta.fields
+)
+
+
 # =============================================================================
 # Payment Serializers
 # =============================================================================
@@ -421,8 +430,8 @@ class EmployeeCommissionSerializer(serializers.ModelSerializer):
 # Customer Order Serializers
 # =============================================================================
 
-class CustomerOrderListSerializer(serializers.ModelSerializer):
-    """Listenansicht für Aufträge"""
+class CustomerOrderListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Listenansicht für Aufträge (?fields= / ?omit=)"""
     customer_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     total_amount = serializers.SerializerMethodField()
@@ -438,10 +447,10 @@ class CustomerOrderListSerializer(serializers.ModelSerializer):
         ]
     
     def get_total_amount(self, obj):
-        return obj.calculate_total()
+        return obj.total_net
     
     def get_items_count(self, obj):
-        return obj.items.count()
+        return annotated(obj, 'items_count', obj.items.count)
 
     def get_customer_name(self, obj):
         cust = getattr(obj, 'customer', None)
@@ -618,18 +627,13 @@ class CustomerOrderDetailSerializer(serializers.ModelSerializer):
         return None
     
     def get_total_net(self, obj):
-        return obj.calculate_total()
+        return obj.total_net
     
     def get_total_tax(self, obj):
-        net = obj.calculate_total()
-        rate = obj.tax_rate or Decimal('19.00')
-        return round(net * rate / Decimal('100'), 2)
+        return obj.total_tax
     
     def get_total_gross(self, obj):
-        net = obj.calculate_total()
-        rate = obj.tax_rate or Decimal('19.00')
-        tax = net * rate / Decimal('100')
-        return round(net + tax, 2)
+        return obj.total_gross
     
     def get_total_paid(self, obj):
         return sum(
@@ -718,7 +722,8 @@ class CustomerOrderCreateUpdateSerializer(serializers.ModelSerializer):
             pass
         for idx, item in enumerate(items_data):
             item['position'] = item.get('position', idx + 1)
-            CustomerOrderItem.objects.create(order=order, **item)
+        CUSTOMER_ORDER_ITEM_SYNC.apply(order, items_data, existing=[])
+        order.refresh_totals()
         return order
 
     def update(self, instance, validated_data):
@@ -763,11 +768,13 @@ class CustomerOrderCreateUpdateSerializer(serializers.ModelSerializer):
             instance._calculate_commissions()
         
         if items_data is not None:
-            # Lösche alte Positionen und erstelle neue
-            instance.items.all().delete()
+            # Positionen per Differenz abgleichen: bestehende (mit id) werden aktualisiert,
+            # neue angelegt, fehlende gelöscht - Verknüpfungen bestehender Positionen bleiben erhalten
             for idx, item in enumerate(items_data):
                 item['position'] = item.get('position', idx + 1)
-                CustomerOrderItem.objects.create(order=instance, **item)
+            with deferred_totals():
+                CUSTOMER_ORDER_ITEM_SYNC.apply(instance, items_data)
+                schedule_refresh(instance)
         return instance
 
 
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.pricing import schedule_refresh
+from core import search_index
+from core.search import refresh_search_text
+from customers.models import Customer, CustomerAddress
+from .models import CustomerOrder, CustomerOrderItem
+
+
+@receiver(post_save, sender=CustomerOrderItem)
+@receiver(post_delete, sender=CustomerOrderItem)
+def refresh_customer_order_totals(sender, instance, origin=None, **kwargs):
+    """Hält die gespeicherten Auftragssummen bei Positionsänderungen aktuell."""
+    # Kaskaden (z.B. Löschen des ganzen Dokuments) brauchen keine Neuberechnung
+    if origin is not None and not (isinstance(origin, CustomerOrderItem) or getattr(origin, 'model', None) is CustomerOrderItem):
+        return
+    order = instance.order
+    if order is not None:
+        schedule_refresh(order)
+
+
+@receiver(post_save, sender=Customer)
+def refresh_order_search_text_for_customer(sender, instance, created=False, **kwargs):
+    """Übernimmt geänderte Kundennummer/-namen in den Suchtext der Aufträge."""
+    if created or not getattr(instance, '_search_text_changed', False):
+        return
+    refresh_search_text(CustomerOrder.objects.filter(customer=instance))
+
+
+@receiver(post_save, sender=CustomerAddress)
+@receiver(post_delete, sender=CustomerAddress)
+def refresh_order_search_text_for_address(sender, instance, origin=None, **kwargs):
+    """Universität/Institut der Kundenadressen sind Teil des Auftrags-Suchtexts."""
+    if isinstance(origin, Customer):
+        return
+    refresh_search_text(CustomerOrder.objects.filter(customer_id=instance.customer_id))
+
+
+# Globaler Suchindex; Kundenänderungen kommen über refresh_search_text an
+search_index.register(
+    CustomerOrder, 'order', 'Auftrag',
+    title=lambda o: o.order_number or f'Auftrag (Entwurf #{o.pk})',
+    subtitle=lambda o: f"{o.customer.first_name} {o.customer.last_name}" if o.customer_id else '',
+    keywords=lambda o: o.search_text,
+    scope='can_read_sales_order_processing', main_scope='can_read_sales',
+    url='/sales/order-processing/{pk}',
+    select_related=['customer'],
+)
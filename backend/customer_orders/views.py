@@ -2,6 +2,9 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
+from core.search import SearchTextFilter
+from core.fieldsets import SparseQueryMixin, subquery_count
+from django.db.models import OuterRef
 from django_filters import CharFilter
 from django.utils import timezone
 from django.http import FileResponse
@@ -42,7 +45,7 @@ class CustomerOrderFilter(FilterSet):
         fields = ['status', 'customer', 'year']
 
 
-class CustomerOrderViewSet(viewsets.ModelViewSet):
+class CustomerOrderViewSet(SparseQueryMixin, viewsets.ModelViewSet):
     """
     ViewSet für Kundenaufträge
     
@@ -59,15 +62,27 @@ class CustomerOrderViewSet(viewsets.ModelViewSet):
         'created_by', 'confirmed_by'
     ).prefetch_related('items', 'delivery_notes', 'invoices')
     
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ?search= läuft über den denormalisierten Suchtext (inkl. Kunde und Kundenadressen)
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SearchTextFilter]
     filterset_class = CustomerOrderFilter
-    search_fields = ['order_number', 'project_reference', 'system_reference', 
-                     'customer__first_name', 'customer__last_name', 
-                     'customer__addresses__university', 'customer__addresses__institute',
-                     'customer_contact_name']
-    ordering_fields = ['order_number', 'order_date', 'created_at', 'status', 'customer__last_name']
+    ordering_fields = ['order_number', 'order_date', 'created_at', 'status', 'customer__last_name',
+                       'total_net', 'total_gross', 'total_margin']
     ordering = ['-created_at']
     pagination_class = CustomerOrderPagination
+    # Liste: nur der Kunde (falls angefordert) und die Anzahl der Positionen statt
+    # sechs Joins und drei Prefetches
+    query_plan = {
+        'customer_name': lambda queryset: queryset.select_related('customer'),
+        'items_count': lambda queryset: queryset.annotate(
+            items_count=subquery_count(CustomerOrderItem.objects.filter(order=OuterRef('pk')))
+        ),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = self.plan_queryset(queryset.select_related(None).prefetch_related(None))
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -298,7 +313,7 @@ class CustomerOrderViewSet(viewsets.ModelViewSet):
             for payment in invoice.payments.all()
         )
         
-        total_gross = order.calculate_total() * (1 + (order.tax_rate or 19) / 100)
+        total_gross = order.total_gross
         
         return Response({
             'order_number': order.order_number,
@@ -313,7 +328,7 @@ class CustomerOrderViewSet(viewsets.ModelViewSet):
                 'pending_invoice': total_items - invoiced_items,
             },
             'financials': {
-                'total_net': float(order.calculate_total()),
+                'total_net': float(order.total_net),
                 'total_gross': float(total_gross),
                 'total_paid': float(total_paid),
                 'open_amount': float(total_gross - total_paid),
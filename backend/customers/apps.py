@@ -5,3 +5,7 @@ class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
     verbose_name = 'Kundenverwaltung'
+
+    def ready(self):
+        # Signale für die Pflege des Suchtexts registrieren
+        from . import signals  # noqa: F401
@@ -0,0 +1,111 @@
+"""
+Spalten des Kunden-Exports (CSV/XLSX, siehe core.exports).
+
+Prefetches und Joins werden nur für die gewählten Spalten geladen
+(export_queryset); E-Mail, Telefon und Adresse kommen aus den Prefetches,
+nicht aus einer Abfrage je Kunde.
+"""
+from core.exports import Column
+
+
+def _first(items, flag=None):
+    """Erster Eintrag - mit `flag` nur, wenn er dieses Kennzeichen trägt"""
+    # Listen sind nach Meta.ordering sortiert (-is_primary bzw. -is_active zuerst)
+    first = next(iter(items), None)
+    if first is None or (flag and not getattr(first, flag)):
+        return None
+    return first
+
+
+def _primary_email(customer):
+    email = _first(customer.emails.all())
+    return email.email if email else ''
+
+
+def _primary_phone(customer):
+    phone = _first(customer.phones.all())
+    return phone.phone_number if phone else ''
+
+
+def _address(customer):
+    return _first(customer.addresses.all(), 'is_active')
+
+
+def _address_value(attribute):
+    def value(customer):
+        address = _address(customer)
+        return getattr(address, attribute) if address else ''
+    return value
+
+
+def _street(customer):
+    address = _address(customer)
+    return f"{address.street} {address.house_number}".strip() if address else ''
+
+
+def _all_addresses(customer):
+    lines = []
+    for address in customer.addresses.all():
+        parts = [address.street, address.house_number, address.postal_code, address.city, address.country]
+        lines.append(' '.join(part for part in parts if part))
+    return ' | '.join(lines)
+
+
+def _yes_no(attribute):
+    return lambda customer: 'Ja' if getattr(customer, attribute) else 'Nein'
+
+
+def _text(attribute):
+    return lambda customer: getattr(customer, attribute) or ''
+
+
+CUSTOMER_COLUMNS = [
+    Column('customer_number', 'Kundennummer', _text('customer_number')),
+    Column('salutation', 'Anrede', _text('salutation')),
+    Column('title', 'Titel', _text('title')),
+    Column('first_name', 'Vorname', _text('first_name')),
+    Column('last_name', 'Nachname', _text('last_name')),
+    Column('language', 'Sprache', lambda c: c.get_language_display() if c.language else ''),
+    Column('advertising_status', 'Werbestatus',
+           lambda c: c.get_advertising_status_display() if c.advertising_status else ''),
+    Column('is_reference', 'Referenzkunde', _yes_no('is_reference')),
+    Column('is_active', 'Aktiv', _yes_no('is_active')),
+    Column('primary_email', 'E-Mail', _primary_email),
+    Column('all_emails', 'Alle E-Mails', lambda c: ', '.join(e.email for e in c.emails.all())),
+    Column('primary_phone', 'Telefon', _primary_phone),
+    Column('all_phones', 'Alle Telefonnummern', lambda c: ', '.join(p.phone_number for p in c.phones.all())),
+    Column('primary_address_street', 'Straße', _street),
+    Column('primary_address_postal_code', 'PLZ', _address_value('postal_code')),
+    Column('primary_address_city', 'Stadt', _address_value('city')),
+    Column('primary_address_country', 'Land', _address_value('country')),
+    Column('primary_address_university', 'Universität/Firma', _address_value('university')),
+    Column('primary_address_institute', 'Institut', _address_value('institute')),
+    Column('all_addresses', 'Alle Adressen', _all_addresses),
+    Column('responsible_user', 'Zuständiger Mitarbeiter',
+           lambda c: c.responsible_user.get_full_name() if c.responsible_user else ''),
+    Column('description', 'Beschreibung', _text('description')),
+    Column('notes', 'Notizen', _text('notes')),
+    Column('created_at', 'Erstellt am', lambda c: c.created_at.strftime('%d.%m.%Y') if c.created_at else ''),
+]
+
+DEFAULT_EXPORT_COLUMNS = [
+    'customer_number', 'salutation', 'title', 'first_name', 'last_name',
+    'language', 'advertising_status', 'is_reference', 'is_active',
+    'primary_email', 'primary_phone',
+    'primary_address_street', 'primary_address_postal_code',
+    'primary_address_city', 'primary_address_country',
+    'primary_address_university', 'primary_address_institute',
+    'responsible_user',
+]
+
+
+def export_queryset(queryset, columns):
+    """Joins und Prefetches nur für die gewählten Spalten"""
+    keys = {column.key for column in columns}
+    if 'responsible_user' in keys:
+        queryset = queryset.select_related('responsible_user')
+    related = [
+        name for name, prefix in (('emails', '_email'), ('phones', '_phone'), ('addresses', '_address'))
+        if any(prefix in key or key == f'all_{name}' for key in keys)
+    ]
+    return queryset.prefetch_related(*related)
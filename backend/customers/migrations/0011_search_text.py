@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+from core.search import trigram_index
+
+
+def populate_search_text(apps, schema_editor):
+    """Befüllt den Suchtext für bestehende Kunden"""
+    from core.search import normalize_search_text
+    Customer = apps.get_model('customers', 'Customer')
+    batch = []
+    queryset = Customer.objects.prefetch_related('emails', 'phones', 'addresses')
+    for customer in queryset.iterator(chunk_size=500):
+        values = [customer.customer_number, customer.title, customer.first_name, customer.last_name]
+        values += [email.email for email in customer.emails.all()]
+        values += [phone.phone_number for phone in customer.phones.all()]
+        for address in customer.addresses.all():
+            values += [address.university, address.institute, address.department, address.city]
+        customer.search_text = normalize_search_text(*values)
+        batch.append(customer)
+        if len(batch) >= 500:
+            Customer.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Customer.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0010_sqlprojektextra_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext'),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        trigram_index('customers.Customer', 'customers_customer_search_trgm'),
+    ]
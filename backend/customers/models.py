@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from core.search import normalize_search_text, prepare_search_text
 
 User = get_user_model()
 
@@ -166,10 +167,20 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')
     
+    # Denormalisierter Suchtext (inkl. E-Mails, Telefonnummern, Adressen), siehe core.search
+    search_text = models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext')
+    
+    SEARCH_TEXT_FIELDS = ('customer_number', 'title', 'first_name', 'last_name')
+    SEARCH_TEXT_PREFETCH = ('emails', 'phones', 'addresses')
+    
     class Meta:
         verbose_name = 'Kunde'
         verbose_name_plural = 'Kunden'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Keyset-Paginierung (?cursor=)
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         full_name = f"{self.title} {self.first_name} {self.last_name}".strip()
@@ -180,8 +191,19 @@ class Customer(models.Model):
     def save(self, *args, **kwargs):
         if not self.customer_number:
             self.customer_number = self._generate_customer_number()
+        prepare_search_text(self, kwargs)
         super().save(*args, **kwargs)
     
+    def build_search_text(self):
+        """Suchtext aus Stammdaten, E-Mails, Telefonnummern und Adressen"""
+        values = [self.customer_number, self.title, self.first_name, self.last_name]
+        if self.pk:
+            values += [email.email for email in self.emails.all()]
+            values += [phone.phone_number for phone in self.phones.all()]
+            for address in self.addresses.all():
+                values += [address.university, address.institute, address.department, address.city]
+        return normalize_search_text(*values)
+    
     @staticmethod
     def _generate_customer_number():
         """Generiert die nächste freie Kundennummer im Format K-XXXXX"""
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, annotated, prefetched
 from .models import Customer, CustomerAddress, CustomerPhone, CustomerEmail, ContactHistory, CustomerSystem, CustomerLegacyMapping
 
 
@@ -34,8 +35,8 @@ class CustomerEmailSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'is_primary', 'newsletter_consent', 'marketing_consent']
 
 
-class CustomerListSerializer(serializers.ModelSerializer):
-    """Serializer für Kundenliste (reduzierte Daten)"""
+class CustomerListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer für Kundenliste (reduzierte Daten, ?fields= / ?omit=)"""
     full_name = serializers.SerializerMethodField()
     language_display = serializers.CharField(source='get_language_display', read_only=True)
     advertising_status_display = serializers.CharField(source='get_advertising_status_display', read_only=True)
@@ -69,48 +70,49 @@ class CustomerListSerializer(serializers.ModelSerializer):
         return f"{obj.title} {obj.first_name} {obj.last_name}".strip()
     
     def get_primary_email(self, obj):
-        primary = obj.emails.filter(is_primary=True).first()
-        return primary.email if primary else None
+        emails = prefetched(obj, 'primary_emails', lambda: obj.emails.filter(is_primary=True)[:1])
+        return emails[0].email if emails else None
     
     def get_primary_phone(self, obj):
-        primary = obj.phones.filter(is_primary=True).first()
-        return primary.phone_number if primary else None
+        phones = prefetched(obj, 'primary_phones', lambda: obj.phones.filter(is_primary=True)[:1])
+        return phones[0].phone_number if phones else None
+    
+    def _primary_address(self, obj):
+        # Erste aktive Adresse (sortiert nach is_active DESC, address_type)
+        addresses = prefetched(obj, 'active_addresses', lambda: obj.addresses.filter(is_active=True)[:1])
+        return addresses[0] if addresses else None
     
     def get_primary_address_city(self, obj):
-        # Get first active address (ordered by is_active DESC, address_type)
-        primary = obj.addresses.filter(is_active=True).first()
+        primary = self._primary_address(obj)
         return primary.city if primary else None
     
     def get_primary_address_country(self, obj):
-        primary = obj.addresses.filter(is_active=True).first()
+        primary = self._primary_address(obj)
         return primary.country if primary else None
     
     def get_primary_address_latitude(self, obj):
-        primary = obj.addresses.filter(is_active=True).first()
+        primary = self._primary_address(obj)
         return str(primary.latitude) if primary and primary.latitude else None
     
     def get_primary_address_longitude(self, obj):
-        primary = obj.addresses.filter(is_active=True).first()
+        primary = self._primary_address(obj)
         return str(primary.longitude) if primary and primary.longitude else None
 
     def get_system_count(self, obj):
         # system_records is the related_name from systems.System
-        if hasattr(obj, 'system_records'):
-            return obj.system_records.count()
-        return 0
+        return annotated(obj, 'system_count', obj.system_records.count)
 
     def get_project_count(self, obj):
-        if hasattr(obj, 'projects'):
-            return obj.projects.count()
-        return 0
+        return annotated(obj, 'project_count', obj.projects.count)
 
     def get_open_ticket_count(self, obj):
-        if hasattr(obj, 'service_tickets'):
-            return obj.service_tickets.exclude(status__in=['resolved', 'no_solution']).count()
-        return 0
+        return annotated(
+            obj, 'open_ticket_count',
+            lambda: obj.service_tickets.exclude(status__in=['resolved', 'no_solution']).count()
+        )
 
     def get_legacy_sql_ids(self, obj):
-        return list(obj.legacy_mappings.values_list('sql_id', flat=True))
+        return [mapping.sql_id for mapping in obj.legacy_mappings.all()]
 
 
 class CustomerDetailSerializer(serializers.ModelSerializer):
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core import search_index
+from core.search import refresh_search_text
+from .models import Customer, CustomerAddress, CustomerEmail, CustomerPhone
+
+
+@receiver(post_save, sender=CustomerEmail)
+@receiver(post_delete, sender=CustomerEmail)
+@receiver(post_save, sender=CustomerPhone)
+@receiver(post_delete, sender=CustomerPhone)
+@receiver(post_save, sender=CustomerAddress)
+@receiver(post_delete, sender=CustomerAddress)
+def refresh_customer_search_text(sender, instance, origin=None, **kwargs):
+    """Hält den Suchtext des Kunden bei Änderungen an Kontaktdaten/Adressen aktuell."""
+    # Beim Löschen des Kunden selbst (Kaskade) nichts zu tun
+    if isinstance(origin, Customer):
+        return
+    refresh_search_text(Customer.objects.filter(pk=instance.customer_id))
+
+
+# Globaler Suchindex (siehe core.search_index)
+search_index.register(
+    Customer, 'customer', 'Kunde',
+    title=lambda c: f"{c.title} {c.first_name} {c.last_name}".strip(),
+    subtitle=lambda c: c.customer_number,
+    keywords=lambda c: c.search_text,
+    scope='can_read_customers',
+    url='/sales/customers/{pk}',
+)
@@ -0,0 +1,220 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import SearchDocument
+from customer_orders.models import CustomerOrder
+from inventory.models import InventoryItem
+from sales.models import Quotation
+from systems.models import System
+from .models import Customer, CustomerAddress, CustomerEmail
+
+
+class SearchTextTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Erika', last_name='Mustermann')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('search', password='x'))
+
+    def test_customer_search_text_follows_related_objects(self):
+        CustomerEmail.objects.create(customer=self.customer, email='E.Muster@Uni-Example.de')
+        address = CustomerAddress.objects.create(
+            customer=self.customer, university='Universität Heidelberg', street='Im Neuenheimer Feld',
+            house_number='1', postal_code='69120', city='Heidelberg'
+        )
+        self.customer.refresh_from_db()
+        self.assertIn('e.muster@uni-example.de', self.customer.search_text)
+        self.assertIn('heidelberg', self.customer.search_text)
+
+        address.delete()
+        self.customer.refresh_from_db()
+        self.assertNotIn('heidelberg', self.customer.search_text)
+
+    def test_dependent_search_texts_follow_customer(self):
+        order = CustomerOrder.objects.create(customer=self.customer, project_reference='Lichtblatt')
+        from suppliers.models import Supplier
+        supplier = Supplier.objects.create(company_name='Test Supplier')
+        item = InventoryItem.objects.create(name='Kamera', supplier=supplier, customer=self.customer, purchase_price=0)
+        CustomerAddress.objects.create(
+            customer=self.customer, institute='Biozentrum', street='Weg', house_number='2',
+            postal_code='80000', city='München'
+        )
+        order.refresh_from_db()
+        self.assertIn('biozentrum', order.search_text)
+
+        self.customer.last_name = 'Musterfrau'
+        self.customer.save()
+        order.refresh_from_db()
+        item.refresh_from_db()
+        self.assertIn('musterfrau', order.search_text)
+        self.assertIn('musterfrau', item.search_text)
+
+    def test_api_search_matches_all_terms(self):
+        other = Customer.objects.create(first_name='Max', last_name='Mustermann')
+        CustomerEmail.objects.create(customer=other, email='max@example.org')
+
+        response = self.client.get('/api/customers/customers/', {'search': 'Mustermann'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+        response = self.client.get('/api/customers/customers/', {'search': 'mustermann MAX@example'})
+        self.assertEqual([row['id'] for row in response.data['results']], [other.id])
+
+        response = self.client.get('/api/inventory/inventory-items/', {'search': self.customer.customer_number})
+        self.assertEqual(response.status_code, 200)
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        self.customers = [Customer.objects.create(first_name='Erika', last_name=f'Musterfrau{i}') for i in range(4)]
+        self.quotation = Quotation.objects.create(
+            customer=self.customers[0], project_reference='Lichtblatt', valid_until=date.today()
+        )
+        self.client = APIClient()
+
+    def login(self, **permissions):
+        name = f'global{len(permissions)}'
+        user = get_user_model().objects.create_user(name, email=f'{name}@example.org', password='x', **permissions)
+        self.client.force_authenticate(user)
+
+    def test_results_respect_read_permissions_and_type_limit(self):
+        self.login(can_read_customers=True)
+        response = self.client.get('/api/core/search/', {'q': 'erika', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['type'] for row in response.data['results']], ['customer', 'customer'])
+
+        self.login(can_read_customers=True, can_read_sales=True)
+        response = self.client.get('/api/core/search/', {'q': 'lichtblatt musterfrau0'})
+        self.assertEqual(
+            [(row['type'], row['id']) for row in response.data['results']], [('quotation', self.quotation.pk)]
+        )
+
+    def test_index_follows_customer_changes_and_deletion(self):
+        self.customers[0].last_name = 'Beispiel'
+        self.customers[0].save()
+        document = SearchDocument.objects.get(entity_type='quotation', object_id=self.quotation.pk)
+        self.assertIn('beispiel', document.keywords)
+
+        self.quotation.delete()
+        self.assertFalse(SearchDocument.objects.filter(entity_type='quotation').exists())
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.customers = [Customer.objects.create(first_name='Kim', last_name=f'Kunde {n}') for n in range(25)]
+        # gleiche Zeitstempel über Seitengrenzen hinweg
+        Customer.objects.filter(pk__in=[c.pk for c in self.customers[8:13]]).update(created_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('cursor', password='x'))
+
+    def test_pages_cover_all_rows_without_count_or_offset(self):
+        expected = list(Customer.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        seen = []
+        url = '/api/customers/customers/?cursor=&page_size=10'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # eine Abfrage auf die Kundentabelle je Seite, ohne COUNT(*) und OFFSET
+            page_queries = [q['sql'] for q in queries if 'FROM "customers_customer"' in q['sql']]
+            self.assertEqual(len(page_queries), 1)
+            # (Zählungen je Zeile als Unterabfrage sind erlaubt, siehe CustomerViewSet.query_plan)
+            self.assertNotIn('COUNT(*)', page_queries[0].upper())
+            self.assertNotIn('OFFSET', page_queries[0].upper())
+            self.assertIsNone(response.data['count'])
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+    def test_count_and_invalid_cursor(self):
+        response = self.client.get('/api/customers/customers/', {'cursor': '', 'count': 'exact', 'page_size': 5})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+        estimate = self.client.get('/api/customers/customers/', {'cursor': '', 'count': 'estimate'})
+        self.assertGreater(estimate.data['count'], 0)
+        self.assertEqual(self.client.get('/api/customers/customers/', {'cursor': 'kaputt'}).status_code, 404)
+        # ohne Cursor bleibt die Seitennummer-Paginierung
+        self.assertIn('previous', self.client.get('/api/customers/customers/').data)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        for n in range(4):
+            customer = Customer.objects.create(first_name='Kim', last_name=f'Kunde {n}')
+            CustomerEmail.objects.create(customer=customer, email=f'kunde{n}@example.org', is_primary=True)
+            CustomerAddress.objects.create(customer=customer, address_type='Office', street='Weg', house_number='1',
+                                           postal_code='10115', city='Berlin', country='DE')
+            System.objects.create(system_name=f'System {n}', customer=customer)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('sparse', password='x'))
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/customers/customers/')
+        row = response.data['results'][0]
+        self.assertEqual(row['primary_email'], 'kunde0@example.org')
+        self.assertEqual(row['primary_address_city'], 'Berlin')
+        self.assertEqual(row['system_count'], 1)
+        Customer.objects.create(first_name='Kim', last_name='Kunde 9')
+        with self.assertNumQueries(len(queries)):
+            self.client.get('/api/customers/customers/')
+
+    def test_fields_and_omit_select_fields_and_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/customers/customers/', {'fields': 'id,customer_number'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'customer_number'})
+        # nur Zählung und Kundentabelle - ohne Join, Prefetches und Unterabfragen
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[1]['sql'].upper())
+
+        response = self.client.get('/api/customers/customers/', {'omit': 'legacy_sql_ids,system_count'})
+        row = response.data['results'][0]
+        self.assertNotIn('system_count', row)
+        self.assertIn('primary_email', row)
+
+        response = self.client.get('/api/systems/systems/', {'fields': 'id,customer_name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'customer_name'})
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        for n in range(3):
+            customer = Customer.objects.create(first_name='Kim', last_name=f'Kunde {n}', is_active=n != 2)
+            CustomerEmail.objects.create(customer=customer, email=f'kunde{n}@example.org', is_primary=True)
+            CustomerAddress.objects.create(customer=customer, address_type='Office', street='Weg', house_number='1',
+                                           postal_code='10115', city='Berlin', country='DE')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('export', password='x'))
+
+    def _download(self, path, params=None):
+        response = self.client.get(path, params or {})
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_columns_filters_and_constant_queries(self):
+        params = {'fields': 'last_name,primary_email,primary_address_city', 'is_active': 'true'}
+        with CaptureQueriesContext(connection) as queries:
+            response, body = self._download('/api/customers/customers/export_csv/', params)
+        lines = body.decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'Nachname;E-Mail;Stadt')
+        self.assertEqual(lines[1:], ['Kunde 0;kunde0@example.org;Berlin', 'Kunde 1;kunde1@example.org;Berlin'])
+        Customer.objects.create(first_name='Kim', last_name='Kunde 9')
+        with self.assertNumQueries(len(queries)):
+            self._download('/api/customers/customers/export_csv/', params)
+
+    def test_xlsx_is_a_valid_workbook(self):
+        import io
+        import zipfile
+        from xml.dom.minidom import parseString
+        response, body = self._download('/api/customers/customers/export_xlsx/', {'fields': 'last_name,all_emails'})
+        self.assertIn('spreadsheetml', response['Content-Type'])
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        self.assertIsNone(archive.testzip())
+        sheet = parseString(archive.read('xl/worksheets/sheet1.xml'))
+        self.assertEqual(len(sheet.getElementsByTagName('row')), 4)
+        self.assertIn('kunde2@example.org', archive.read('xl/worksheets/sheet1.xml').decode('utf-8'))
@@ -1,11 +1,14 @@
 from rest_framework import viewsets, filters
 from rest_framework.pagination import PageNumberPagination
+from verp.pagination import KeysetCursorMixin
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Exists, OuterRef
-from django.http import HttpResponse
-import csv
+from core.search import SearchTextFilter
+from core.fieldsets import SparseQueryMixin, subquery_count
+from django.db.models import Q, Exists, OuterRef, Prefetch
+from core.exports import EXPORT_CHUNK_SIZE, export_response, requested_columns, select_columns
+from .exports import CUSTOMER_COLUMNS, DEFAULT_EXPORT_COLUMNS, export_queryset
 from .models import Customer, CustomerAddress, CustomerPhone, CustomerEmail, CustomerSystem, ContactHistory
 from .serializers import (
     CustomerListSerializer, CustomerDetailSerializer,
@@ -14,30 +17,76 @@ from .serializers import (
 )
 
 
-class CustomerPagination(PageNumberPagination):
+class CustomerPagination(KeysetCursorMixin, PageNumberPagination):
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 10000
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+def _prefetch_primary_emails(queryset):
+    return queryset.prefetch_related(
+        Prefetch('emails', CustomerEmail.objects.filter(is_primary=True), to_attr='primary_emails')
+    )
+
+
+def _prefetch_primary_phones(queryset):
+    return queryset.prefetch_related(
+        Prefetch('phones', CustomerPhone.objects.filter(is_primary=True), to_attr='primary_phones')
+    )
+
+
+def _prefetch_active_addresses(queryset):
+    return queryset.prefetch_related(
+        Prefetch('addresses', CustomerAddress.objects.filter(is_active=True), to_attr='active_addresses')
+    )
+
+
+def _annotate_system_count(queryset):
+    from systems.models import System
+    return queryset.annotate(system_count=subquery_count(System.objects.filter(customer=OuterRef('pk'))))
+
+
+def _annotate_project_count(queryset):
+    from projects.models import Project
+    return queryset.annotate(project_count=subquery_count(Project.objects.filter(customer=OuterRef('pk'))))
+
+
+def _annotate_open_ticket_count(queryset):
+    from service.models import ServiceTicket
+    open_tickets = ServiceTicket.objects.exclude(status__in=['resolved', 'no_solution'])
+    return queryset.annotate(open_ticket_count=subquery_count(open_tickets.filter(customer=OuterRef('pk'))))
+
+
+class CustomerViewSet(SparseQueryMixin, viewsets.ModelViewSet):
     """
     ViewSet für Kunden
     """
     queryset = Customer.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Suche über den denormalisierten Suchtext (Stammdaten, E-Mails, Telefon, Adressen), siehe core.search
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SearchTextFilter]
     filterset_fields = ['is_active', 'language', 'is_reference', 'advertising_status', 'responsible_user']
-    # Use only valid model fields. Include related fields for broader search (emails, phones, addresses).
-    search_fields = [
-        'customer_number', 'first_name', 'last_name', 'title',
-        'emails__email', 'phones__phone_number', 'addresses__city'
-    ]
     ordering_fields = ['customer_number', 'last_name', 'first_name', 'created_at']
     ordering = ['last_name', 'first_name']
     pagination_class = CustomerPagination
+    # Liste: Joins, Prefetches und Zählungen nur für angeforderte Felder (?fields= / ?omit=)
+    query_plan = {
+        'responsible_user_name': lambda queryset: queryset.select_related('responsible_user'),
+        'primary_email': _prefetch_primary_emails,
+        'primary_phone': _prefetch_primary_phones,
+        'primary_address_city': _prefetch_active_addresses,
+        'primary_address_country': _prefetch_active_addresses,
+        'primary_address_latitude': _prefetch_active_addresses,
+        'primary_address_longitude': _prefetch_active_addresses,
+        'system_count': _annotate_system_count,
+        'project_count': _annotate_project_count,
+        'open_ticket_count': _annotate_open_ticket_count,
+        'legacy_sql_ids': lambda queryset: queryset.prefetch_related('legacy_mappings'),
+    }
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = self.plan_queryset(queryset)
         
         # Suche nach Stadt (unterstützt mehrere Städte durch Komma getrennt)
         city = self.request.query_params.get('city', None)
@@ -202,143 +251,23 @@ class CustomerViewSet(viewsets.ModelViewSet):
     def export_csv(self, request):
         """
         Exportiert Kunden als CSV-Datei.
-        Verwendet die gleichen Filter wie die Liste.
+        Verwendet die gleichen Filter wie die Liste, Spalten über ?fields=.
+        Die Datei wird während des Lesens gestreamt (siehe core.exports).
         """
-        # Hole gefilterte Queryset
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        # Welche Felder exportieren (kann über fields Parameter gesteuert werden)
-        requested_fields = request.query_params.get('fields', None)
-        if requested_fields:
-            export_fields = [f.strip() for f in requested_fields.split(',')]
-        else:
-            # Standard-Felder
-            export_fields = [
-                'customer_number', 'salutation', 'title', 'first_name', 'last_name',
-                'language', 'advertising_status', 'is_reference', 'is_active',
-                'primary_email', 'primary_phone',
-                'primary_address_street', 'primary_address_postal_code', 
-                'primary_address_city', 'primary_address_country',
-                'primary_address_university', 'primary_address_institute',
-                'responsible_user'
-            ]
-        
-        # CSV-Response erstellen
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="kunden_export.csv"'
-        # UTF-8 BOM für Excel
-        response.write('\ufeff')
-        
-        writer = csv.writer(response, delimiter=';')
-        
-        # Header-Zeile
-        header_mapping = {
-            'customer_number': 'Kundennummer',
-            'salutation': 'Anrede',
-            'title': 'Titel',
-            'first_name': 'Vorname',
-            'last_name': 'Nachname',
-            'language': 'Sprache',
-            'advertising_status': 'Werbestatus',
-            'is_reference': 'Referenzkunde',
-            'is_active': 'Aktiv',
-            'primary_email': 'E-Mail',
-            'all_emails': 'Alle E-Mails',
-            'primary_phone': 'Telefon',
-            'all_phones': 'Alle Telefonnummern',
-            'primary_address_street': 'Straße',
-            'primary_address_postal_code': 'PLZ',
-            'primary_address_city': 'Stadt',
-            'primary_address_country': 'Land',
-            'primary_address_university': 'Universität/Firma',
-            'primary_address_institute': 'Institut',
-            'all_addresses': 'Alle Adressen',
-            'responsible_user': 'Zuständiger Mitarbeiter',
-            'description': 'Beschreibung',
-            'notes': 'Notizen',
-            'created_at': 'Erstellt am',
-        }
-        writer.writerow([header_mapping.get(f, f) for f in export_fields])
-        
-        # Daten schreiben
-        for customer in queryset.prefetch_related('emails', 'phones', 'addresses'):
-            row = []
-            for field in export_fields:
-                if field == 'customer_number':
-                    row.append(customer.customer_number or '')
-                elif field == 'salutation':
-                    row.append(customer.salutation or '')
-                elif field == 'title':
-                    row.append(customer.title or '')
-                elif field == 'first_name':
-                    row.append(customer.first_name or '')
-                elif field == 'last_name':
-                    row.append(customer.last_name or '')
-                elif field == 'language':
-                    row.append(customer.get_language_display() if customer.language else '')
-                elif field == 'advertising_status':
-                    row.append(customer.get_advertising_status_display() if customer.advertising_status else '')
-                elif field == 'is_reference':
-                    row.append('Ja' if customer.is_reference else 'Nein')
-                elif field == 'is_active':
-                    row.append('Ja' if customer.is_active else 'Nein')
-                elif field == 'primary_email':
-                    primary = customer.emails.filter(is_primary=True).first()
-                    if not primary:
-                        primary = customer.emails.first()
-                    row.append(primary.email if primary else '')
-                elif field == 'all_emails':
-                    emails = [e.email for e in customer.emails.all()]
-                    row.append(', '.join(emails))
-                elif field == 'primary_phone':
-                    primary = customer.phones.filter(is_primary=True).first()
-                    if not primary:
-                        primary = customer.phones.first()
-                    row.append(primary.phone_number if primary else '')
-                elif field == 'all_phones':
-                    phones = [p.phone_number for p in customer.phones.all()]
-                    row.append(', '.join(phones))
-                elif field == 'primary_address_street':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    if addr:
-                        street = f"{addr.street} {addr.house_number}".strip()
-                        row.append(street)
-                    else:
-                        row.append('')
-                elif field == 'primary_address_postal_code':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    row.append(addr.postal_code if addr else '')
-                elif field == 'primary_address_city':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    row.append(addr.city if addr else '')
-                elif field == 'primary_address_country':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    row.append(addr.country if addr else '')
-                elif field == 'primary_address_university':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    row.append(addr.university if addr else '')
-                elif field == 'primary_address_institute':
-                    addr = customer.addresses.filter(is_active=True).first()
-                    row.append(addr.institute if addr else '')
-                elif field == 'all_addresses':
-                    addrs = []
-                    for addr in customer.addresses.all():
-                        parts = [addr.street, addr.house_number, addr.postal_code, addr.city, addr.country]
-                        addrs.append(' '.join(p for p in parts if p))
-                    row.append(' | '.join(addrs))
-                elif field == 'responsible_user':
-                    row.append(customer.responsible_user.get_full_name() if customer.responsible_user else '')
-                elif field == 'description':
-                    row.append(customer.description or '')
-                elif field == 'notes':
-                    row.append(customer.notes or '')
-                elif field == 'created_at':
-                    row.append(customer.created_at.strftime('%d.%m.%Y') if customer.created_at else '')
-                else:
-                    row.append('')
-            writer.writerow(row)
-        
-        return response
+        return self._export(request, 'csv')
+
+    @action(detail=False, methods=['get'])
+    def export_xlsx(self, request):
+        """Exportiert Kunden als Excel-Datei (wie export_csv)"""
+        return self._export(request, 'xlsx')
+
+    def _export(self, request, file_format):
+        columns = select_columns(CUSTOMER_COLUMNS, requested_columns(request), DEFAULT_EXPORT_COLUMNS)
+        queryset = export_queryset(self.filter_queryset(self.get_queryset()), columns)
+        return export_response(
+            queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE), columns, file_format,
+            'kunden_export', sheet_name='Kunden',
+        )
 
 
 class CustomerAddressViewSet(viewsets.ModelViewSet):
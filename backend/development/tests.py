@@ -0,0 +1,107 @@
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from suppliers.models import MaterialSupply, Supplier
+from .models import (DevelopmentProject, DevelopmentProjectMaterialItem, DevelopmentProjectTimeEntry,
+                     DevelopmentProjectTodo)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BatchEndpointTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser('entwicklung', 'dev@example.org', 'x')
+        self.project = DevelopmentProject.objects.create(name='Neue Optik', created_by=self.user)
+        self.todos = [
+            DevelopmentProjectTodo.objects.create(project=self.project, text=f'Aufgabe {n}', position=n)
+            for n in (1, 2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/development/projects/{self.project.pk}/'
+
+    def test_batch_todos_numbers_new_rows_and_applies_changes(self):
+        response = self.client.post(self.url + 'batch_todos/', {
+            'create': [{'text': 'neu A'}, {'text': 'neu B'}, {'text': 'mit Position', 'position': 9}],
+            'update': [{'id': self.todos[0].pk, 'is_completed': True}],
+            'delete': [self.todos[1].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 4)
+        positions = dict(DevelopmentProjectTodo.objects.values_list('text', 'position'))
+        self.assertEqual(positions, {'Aufgabe 1': 1, 'neu A': 3, 'neu B': 4, 'mit Position': 9})
+        self.todos[0].refresh_from_db()
+        self.assertTrue(self.todos[0].is_completed)
+        self.assertEqual(DevelopmentProjectTodo.objects.get(text='neu A').created_by, self.user)
+
+    def test_batch_todos_invalid_rows_write_nothing(self):
+        response = self.client.post(self.url + 'batch_todos/', {
+            'create': [{'text': 'gültig'}, {'is_completed': True}],
+            'update': [{'id': self.todos[0].pk, 'text': 'geändert'}],
+            'delete': [self.todos[1].pk, self.todos[1].pk + 100],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('text', response.data['create'][1])
+        self.assertEqual(response.data['delete'], [{}, {'id': ['Nicht gefunden.']}])
+        self.assertEqual(DevelopmentProjectTodo.objects.count(), 2)
+        self.todos[0].refresh_from_db()
+        self.assertEqual(self.todos[0].text, 'Aufgabe 1')
+
+    def test_batch_rejects_body_that_is_not_an_object(self):
+        for body in ([], ['create'], 'create'):
+            response = self.client.post(self.url + 'batch_todos/', body, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('non_field_errors', response.data)
+
+    def test_batch_material_items(self):
+        supplier = Supplier.objects.create(company_name='Test Supplier')
+        supply = MaterialSupply.objects.create(
+            name='Kabel', supplier=supplier, list_price=Decimal('5.00'), price_valid_from=date.today())
+        existing = DevelopmentProjectMaterialItem.objects.create(
+            project=self.project, material_supply=supply, quantity=1, position=1)
+
+        response = self.client.post(self.url + 'batch_material_items/', {
+            'create': [{'material_supply': supply.pk, 'quantity': 2}],
+            'update': [{'id': existing.pk, 'quantity': 5}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.project.material_items.order_by('position').values_list('position', 'quantity')),
+            [(1, 5), (2, 2)],
+        )
+
+        response = self.client.post(self.url + 'batch_material_items/', {
+            'create': [{'material_supply': supply.pk + 100, 'quantity': 1}],
+            'delete': [existing.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('material_supply', response.data['create'][0])
+        self.assertTrue(DevelopmentProjectMaterialItem.objects.filter(pk=existing.pk).exists())
+
+    def test_batch_time_entries(self):
+        entry = DevelopmentProjectTimeEntry.objects.create(
+            project=self.project, date=date.today(), time='09:00', employee=self.user,
+            hours_spent=Decimal('1'), description='alt')
+
+        response = self.client.post(self.url + 'batch_time_entries/', {
+            'create': [{'hours_spent': '0.5', 'description': 'neu'}],
+            'delete': [entry.pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        created = DevelopmentProjectTimeEntry.objects.get()
+        self.assertEqual((created.description, created.date, created.employee, created.created_by),
+                         ('neu', date.today(), self.user, self.user))
+
+        response = self.client.post(self.url + 'batch_time_entries/', {
+            'create': [{'hours_spent': '1', 'description': 'gültig'}, {'description': 'ohne Zeit'}],
+            'update': [{'id': created.pk, 'hours_spent': 'viel'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('hours_spent', response.data['create'][1])
+        self.assertIn('hours_spent', response.data['update'][0])
+        self.assertEqual(DevelopmentProjectTimeEntry.objects.count(), 1)
@@ -6,9 +6,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Sum, Max
 from django.db import models
-from django.utils import timezone
-from django.http import Http404, FileResponse
-from datetime import datetime, date, timedelta
+from django.http import Http404
+from datetime import datetime, date
 from decimal import Decimal
 
 from core.permissions import DevelopmentProjectPermission
@@ -25,6 +24,25 @@ from .serializers import (
     DevelopmentProjectCostCalculationSerializer, DevelopmentProjectAttachmentSerializer,
     DevelopmentProjectTimeEntrySerializer, DevelopmentProjectSourceSerializer
 )
+from core.fanout import fan_out
+from core.item_sync import ItemSync, time_entry_initial, validate_item_batch
+from core.media_delivery import media_response
+
+# Batch-Endpunkte der Unterobjekte (batch_todos, batch_material_items, batch_time_entries)
+TODO_SYNC = ItemSync(
+    DevelopmentProjectTodo, 'project',
+    fields=['text', 'is_completed', 'position', 'assigned_to'],
+    position_field='position',
+)
+MATERIAL_ITEM_SYNC = ItemSync(
+    DevelopmentProjectMaterialItem, 'project',
+    fields=['material_supply', 'quantity', 'position', 'notes'],
+    position_field='position',
+)
+TIME_ENTRY_SYNC = ItemSync(
+    DevelopmentProjectTimeEntry, 'project',
+    fields=['date', 'time', 'employee', 'hours_spent', 'description'],
+)
 
 
 class DevelopmentProjectViewSet(viewsets.ModelViewSet):
@@ -82,78 +100,48 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         return queryset.select_related('assigned_to', 'created_by')
     
     def perform_create(self, serializer):
-        old_assigned_to = None
-        project = serializer.save(created_by=self.request.user)
-        
-        # Notification bei Zuweisung
-        if project.assigned_to and project.assigned_to != self.request.user:
-            self._create_assignment_notification(project)
+        with fan_out(actor=self.request.user) as fanout:
+            project = serializer.save(created_by=self.request.user)
+            
+            # Notification bei Zuweisung
+            if project.assigned_to_id and project.assigned_to_id != self.request.user.pk:
+                self._create_assignment_notification(fanout, project)
     
     def perform_update(self, serializer):
-        old_assigned_to = serializer.instance.assigned_to
-        project = serializer.save()
-        
-        # Notification bei Zuweisung an neuen User
-        if project.assigned_to and project.assigned_to != old_assigned_to:
-            if project.assigned_to != self.request.user:
-                self._create_assignment_notification(project)
-    
-    def _create_assignment_notification(self, project):
-        """Erstellt eine Benachrichtigung bei Zuweisung"""
-        try:
-            from users.models import Notification, Reminder
+        old_assigned_to_id = serializer.instance.assigned_to_id
+        with fan_out(actor=self.request.user) as fanout:
+            project = serializer.save()
             
-            # Notification erstellen
-            Notification.objects.create(
-                user=project.assigned_to,
-                title=f"Entwicklungsprojekt {project.project_number} zugewiesen",
-                message=f"Das Projekt '{project.name}' wurde Ihnen zugewiesen.",
-                notification_type='info',
-                related_url=f'/development/projects/{project.id}'
-            )
-            
-            # Reminder erstellen
-            Reminder.objects.create(
-                user=project.assigned_to,
-                title=f"Zugewiesen: Entwicklungsprojekt {project.project_number}",
-                description=f"Projekt '{project.name}' wurde Ihnen zugewiesen.",
-                due_date=timezone.now().date() + timedelta(days=1),
-                related_object_type='development_project',
-                related_object_id=project.id,
-                related_url=f"/development/projects/{project.id}"
-            )
-        except Exception as e:
-            # Fehler bei Notification sollte nicht den Hauptvorgang stoppen
-            print(f"Fehler bei Notification-Erstellung: {e}")
+            # Notification bei Zuweisung an neuen User
+            if project.assigned_to_id and project.assigned_to_id not in (old_assigned_to_id, self.request.user.pk):
+                self._create_assignment_notification(fanout, project)
+    
+    def _create_assignment_notification(self, fanout, project):
+        """Erstellt Benachrichtigung und Erinnerung bei Zuweisung"""
+        fanout.assign(
+            project.assigned_to_id,
+            reminder_title=f"Zugewiesen: Entwicklungsprojekt {project.project_number}",
+            description=f"Projekt '{project.name}' wurde Ihnen zugewiesen.",
+            notification_title=f"Entwicklungsprojekt {project.project_number} zugewiesen",
+            notification_message=f"Das Projekt '{project.name}' wurde Ihnen zugewiesen.",
+            related_object_type='development_project',
+            related_object_id=project.id,
+            related_url=f'/development/projects/{project.id}',
+        )
     
-    def _create_todo_assignment_notification(self, project, todo, assigning_user):
+    def _create_todo_assignment_notification(self, fanout, project, todo, assigning_user):
         """Erstellt Benachrichtigung und Erinnerung bei ToDo-Zuweisung"""
-        try:
-            from users.models import Notification, Reminder
-            
-            assigner_name = f"{assigning_user.first_name} {assigning_user.last_name}".strip() or assigning_user.username
-            
-            # Notification erstellen
-            Notification.objects.create(
-                user=todo.assigned_to,
-                title=f"ToDo zugewiesen: {project.project_number}",
-                message=f"{assigner_name} hat Ihnen eine Aufgabe im Projekt '{project.name}' zugewiesen: {todo.text[:100]}",
-                notification_type='info',
-                related_url=f'/development/projects/{project.id}'
-            )
-            
-            # Reminder mit Fälligkeit nach einem Tag erstellen
-            Reminder.objects.create(
-                user=todo.assigned_to,
-                title=f"ToDo: {todo.text[:80]}",
-                description=f"Aufgabe im Entwicklungsprojekt {project.project_number} - '{project.name}'.",
-                due_date=timezone.now().date() + timedelta(days=1),
-                related_object_type='development_project',
-                related_object_id=project.id,
-                related_url=f"/development/projects/{project.id}"
-            )
-        except Exception as e:
-            print(f"Fehler bei ToDo-Notification-Erstellung: {e}")
+        assigner_name = f"{assigning_user.first_name} {assigning_user.last_name}".strip() or assigning_user.username
+        fanout.assign(
+            todo.assigned_to_id,
+            reminder_title=f"ToDo: {todo.text[:80]}",
+            description=f"Aufgabe im Entwicklungsprojekt {project.project_number} - '{project.name}'.",
+            notification_title=f"ToDo zugewiesen: {project.project_number}",
+            notification_message=f"{assigner_name} hat Ihnen eine Aufgabe im Projekt '{project.name}' zugewiesen: {todo.text[:100]}",
+            related_object_type='development_project',
+            related_object_id=project.id,
+            related_url=f'/development/projects/{project.id}',
+        )
     
     # ============================================
     # TODO ACTIONS
@@ -176,17 +164,18 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         
         assigned_to_id = request.data.get('assigned_to', None)
         
-        todo = DevelopmentProjectTodo.objects.create(
-            project=project,
-            text=text,
-            position=max_position + 1,
-            assigned_to_id=assigned_to_id if assigned_to_id else None,
-            created_by=request.user
-        )
-        
-        # Notification & Reminder bei Zuweisung
-        if todo.assigned_to and todo.assigned_to != request.user:
-            self._create_todo_assignment_notification(project, todo, request.user)
+        with fan_out(actor=request.user) as fanout:
+            todo = DevelopmentProjectTodo.objects.create(
+                project=project,
+                text=text,
+                position=max_position + 1,
+                assigned_to_id=assigned_to_id if assigned_to_id else None,
+                created_by=request.user
+            )
+            
+            # Notification & Reminder bei Zuweisung
+            if todo.assigned_to_id and todo.assigned_to_id != request.user.pk:
+                self._create_todo_assignment_notification(fanout, project, todo, request.user)
         
         serializer = DevelopmentProjectTodoSerializer(todo)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -200,7 +189,7 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         except DevelopmentProjectTodo.DoesNotExist:
             raise Http404("ToDo nicht gefunden")
         
-        old_assigned_to = todo.assigned_to
+        old_assigned_to_id = todo.assigned_to_id
         
         if 'text' in request.data:
             todo.text = request.data['text']
@@ -212,12 +201,12 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
             assigned_to_val = request.data['assigned_to']
             todo.assigned_to_id = assigned_to_val if assigned_to_val else None
         
-        todo.save()
-        
-        # Notification & Reminder bei neuer Zuweisung
-        if todo.assigned_to and todo.assigned_to != old_assigned_to:
-            if todo.assigned_to != request.user:
-                self._create_todo_assignment_notification(project, todo, request.user)
+        with fan_out(actor=request.user) as fanout:
+            todo.save()
+            
+            # Notification & Reminder bei neuer Zuweisung
+            if todo.assigned_to_id and todo.assigned_to_id not in (old_assigned_to_id, request.user.pk):
+                self._create_todo_assignment_notification(fanout, project, todo, request.user)
         
         serializer = DevelopmentProjectTodoSerializer(todo)
         return Response(serializer.data)
@@ -233,6 +222,28 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         except DevelopmentProjectTodo.DoesNotExist:
             raise Http404("ToDo nicht gefunden")
     
+    @action(detail=True, methods=['post'])
+    def batch_todos(self, request, pk=None):
+        """
+        Legt ToDos an, ändert und löscht sie in einer Anfrage
+        ({'create': [...], 'update': [{'id': ...}], 'delete': [ids]}) und gibt alle ToDos zurück
+        """
+        project = self.get_object()
+        batch, errors = validate_item_batch(TODO_SYNC, project, request.data, DevelopmentProjectTodoSerializer)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        old_assigned = {todo.pk: todo.assigned_to_id for todo in batch.existing}
+        with fan_out(actor=request.user) as fanout:
+            result = TODO_SYNC.apply_batch(project, batch, defaults={'created_by': request.user})
+            # Notification & Reminder bei (neuer) Zuweisung
+            for todo in result.created + result.updated:
+                if todo.assigned_to_id and todo.assigned_to_id not in (old_assigned.get(todo.pk), request.user.pk):
+                    self._create_todo_assignment_notification(fanout, project, todo, request.user)
+        
+        todos = project.todos.select_related('assigned_to', 'created_by')
+        return Response(DevelopmentProjectTodoSerializer(todos, many=True).data)
+    
     # ============================================
     # COMMENT ACTIONS
     # ============================================
@@ -356,6 +367,20 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         except DevelopmentProjectMaterialItem.DoesNotExist:
             raise Http404("Material-Position nicht gefunden")
     
+    @action(detail=True, methods=['post'])
+    def batch_material_items(self, request, pk=None):
+        """Legt Material-Positionen an, ändert und löscht sie in einer Anfrage (siehe batch_todos)"""
+        project = self.get_object()
+        batch, errors = validate_item_batch(
+            MATERIAL_ITEM_SYNC, project, request.data, DevelopmentProjectMaterialItemSerializer
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        MATERIAL_ITEM_SYNC.apply_batch(project, batch)
+        
+        items = project.material_items.select_related('material_supply')
+        return Response(DevelopmentProjectMaterialItemSerializer(items, many=True).data)
+    
     # ============================================
     # COST CALCULATION ACTIONS
     # ============================================
@@ -508,11 +533,7 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         try:
             attachment = DevelopmentProjectAttachment.objects.get(id=attachment_id, project=project)
-            if attachment.file:
-                response = FileResponse(attachment.file.open('rb'), as_attachment=True)
-                response['Content-Disposition'] = f'attachment; filename="{attachment.filename}"'
-                return response
-            raise Http404("Datei nicht gefunden")
+            return media_response(request, attachment.file, filename=attachment.filename)
         except DevelopmentProjectAttachment.DoesNotExist:
             raise Http404("Anhang nicht gefunden")
     
@@ -591,6 +612,21 @@ class DevelopmentProjectViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
         except DevelopmentProjectTimeEntry.DoesNotExist:
             raise Http404("Zeiteintrag nicht gefunden")
+    
+    @action(detail=True, methods=['post'])
+    def batch_time_entries(self, request, pk=None):
+        """Legt Zeiteinträge an, ändert und löscht sie in einer Anfrage (siehe batch_todos)"""
+        project = self.get_object()
+        batch, errors = validate_item_batch(
+            TIME_ENTRY_SYNC, project, request.data, DevelopmentProjectTimeEntrySerializer,
+            initial=time_entry_initial(request.user),
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        TIME_ENTRY_SYNC.apply_batch(project, batch, defaults={'created_by': request.user})
+        
+        entries = project.time_entries.select_related('employee', 'created_by')
+        return Response(DevelopmentProjectTimeEntrySerializer(entries, many=True).data)
 
     # ============================================
     # SOURCE ACTIONS
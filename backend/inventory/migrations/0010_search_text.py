@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+from core.search import trigram_index
+
+
+def populate_search_text(apps, schema_editor):
+    """Befüllt den Suchtext für bestehende Lagerartikel"""
+    from core.search import normalize_search_text
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    batch = []
+    for item in InventoryItem.objects.select_related('customer').iterator(chunk_size=500):
+        values = [
+            item.name, item.article_number, item.visitron_part_number, item.inventory_number,
+            item.serial_number, item.order_number, item.customer_order_number, item.customer_name,
+            item.system_number, item.project_number,
+        ]
+        if item.customer_id:
+            values += [item.customer.customer_number, item.customer.first_name, item.customer.last_name]
+        item.search_text = normalize_search_text(*values)
+        batch.append(item)
+        if len(batch) >= 500:
+            InventoryItem.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        InventoryItem.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_inventoryitem_production_checklist_data_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext'),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        trigram_index('inventory.InventoryItem', 'inventory_item_search_trgm'),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_search_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['stored_at', 'id'], name='inventory_i_stored__7a050f_idx'),
+        ),
+    ]
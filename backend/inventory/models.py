@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from core.search import normalize_search_text, prepare_search_text
 
 User = get_user_model()
 
@@ -556,6 +557,16 @@ class InventoryItem(models.Model):
         verbose_name='Aktualisiert am'
     )
     
+    # Denormalisierter Suchtext (inkl. Kundennummer/-name), siehe core.search
+    search_text = models.TextField(blank=True, default='', editable=False, verbose_name='Suchtext')
+    
+    SEARCH_TEXT_FIELDS = (
+        'name', 'article_number', 'visitron_part_number', 'inventory_number', 'serial_number',
+        'order_number', 'customer_order_number', 'customer_name', 'system_number',
+        'project_number', 'customer',
+    )
+    SEARCH_TEXT_SELECT = ('customer',)
+    
     class Meta:
         verbose_name = 'Lagerartikel'
         verbose_name_plural = 'Lagerartikel'
@@ -568,6 +579,8 @@ class InventoryItem(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['item_function']),
             models.Index(fields=['item_category']),
+            # Keyset-Paginierung (?cursor=)
+            models.Index(fields=['stored_at', 'id']),
         ]
     
     def __str__(self):
@@ -579,8 +592,20 @@ class InventoryItem(models.Model):
         # Generiere Inventarnummer beim ersten Speichern
         if not self.inventory_number:
             self.inventory_number = self._generate_inventory_number()
+        prepare_search_text(self, kwargs)
         super().save(*args, **kwargs)
     
+    def build_search_text(self):
+        """Suchtext aus Artikel-, Inventar-, Serien- und Auftragsnummern sowie Kunde"""
+        values = [
+            self.name, self.article_number, self.visitron_part_number, self.inventory_number,
+            self.serial_number, self.order_number, self.customer_order_number, self.customer_name,
+            self.system_number, self.project_number,
+        ]
+        if self.customer_id:
+            values += [self.customer.customer_number, self.customer.first_name, self.customer.last_name]
+        return normalize_search_text(*values)
+    
     @staticmethod
     def _generate_inventory_number():
         """Generiert die nächste freie Inventarnummer: I-00001"""
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from core import search_index
+from core.search import refresh_search_text
+from customers.models import Customer
+from .models import InventoryItem
+
+
+@receiver(post_save, sender=Customer)
+def refresh_inventory_search_text(sender, instance, created=False, **kwargs):
+    """Übernimmt geänderte Kundennummer/-namen in den Suchtext der Lagerartikel."""
+    if created or not getattr(instance, '_search_text_changed', False):
+        return
+    refresh_search_text(InventoryItem.objects.filter(customer=instance))
+
+
+# Globaler Suchindex; Kundenänderungen kommen über refresh_search_text an
+search_index.register(
+    InventoryItem, 'inventory', 'Lagerartikel',
+    title=lambda i: f"{i.inventory_number} - {i.name}",
+    subtitle=lambda i: f"SN {i.serial_number}" if i.serial_number else i.get_status_display(),
+    keywords=lambda i: i.search_text,
+    scope='can_read_inventory_warehouse', main_scope='can_read_inventory',
+    url='/inventory/warehouse/{pk}',
+)
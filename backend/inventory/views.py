@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from core.search import SearchTextFilter
+from core.stats import cached_counts
 from django.db.models import Q
 from django.utils import timezone
 from decimal import Decimal
@@ -210,9 +212,11 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     """
     queryset = InventoryItem.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, SearchTextFilter]
     ordering_fields = ['inventory_number', 'name', 'delivery_date', 'status', 'supplier__company_name', 'updated_at']
     ordering = ['-updated_at']
+    # Keyset-Paginierung (?cursor=) nach Einlagerung
+    cursor_ordering = ('stored_at', 'id')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -269,25 +273,7 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         if system:
             queryset = queryset.filter(system_id=system)
         
-        # Suche
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(article_number__icontains=search) |
-                Q(visitron_part_number__icontains=search) |
-                Q(inventory_number__icontains=search) |
-                Q(serial_number__icontains=search) |
-                Q(order_number__icontains=search) |
-                Q(customer_order_number__icontains=search) |
-                Q(customer_name__icontains=search) |
-                Q(system_number__icontains=search) |
-                Q(project_number__icontains=search) |
-                # Suche nach Kundennummer und Kundenname über Relation
-                Q(customer__customer_number__icontains=search) |
-                Q(customer__first_name__icontains=search) |
-                Q(customer__last_name__icontains=search)
-            )
+        # Suche (?search=) übernimmt der SearchTextFilter auf dem Suchtext
         
         return queryset.select_related('supplier', 'product_category', 'customer', 'project', 'system')
     
@@ -299,23 +285,25 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         """
         Liefert Statistiken zum Warenlager
         """
-        queryset = self.get_queryset()
-        
-        stats = {
-            'total_items': queryset.count(),
-            'by_status': {
-                'auf_lager': queryset.filter(status='AUF_LAGER').count(),
-                'rma': queryset.filter(status='RMA').count(),
-                'bei_kunde': queryset.filter(status='BEI_KUNDE').count(),
+        counts = cached_counts(
+            self.get_queryset(),
+            by_status={
+                'auf_lager': Q(status='AUF_LAGER'),
+                'rma': Q(status='RMA'),
+                'bei_kunde': Q(status='BEI_KUNDE'),
+            },
+            by_function={
+                'trading_good': Q(item_function='TRADING_GOOD'),
+                'asset': Q(item_function='ASSET'),
+                'material': Q(item_function='MATERIAL'),
             },
-            'by_function': {
-                'trading_good': queryset.filter(item_function='TRADING_GOOD').count(),
-                    'asset': queryset.filter(item_function='ASSET').count(),
-                    'material': queryset.filter(item_function='MATERIAL').count(),
-            }
-        }
+        )
         
-        return Response(stats)
+        return Response({
+            'total_items': counts['total'],
+            'by_status': counts['by_status'],
+            'by_function': counts['by_function'],
+        })
     
     @action(detail=True, methods=['get'])
     def equipment_template(self, request, pk=None):
@@ -0,0 +1,78 @@
+import tempfile
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from suppliers.models import Supplier
+from .models import Loan, LoanItem, LoanItemReceipt
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class BatchEndpointTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('leihe', email='leihe@example.org', password='x')
+        supplier = Supplier.objects.create(company_name='Test Supplier')
+        self.loan = Loan.objects.create(supplier=supplier, request_date=date.today(), created_by=self.user)
+        self.items = [
+            LoanItem.objects.create(loan=self.loan, position=n, product_name=f'Objektiv {n}')
+            for n in (1, 2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/loans/loans/{self.loan.pk}/'
+
+    def test_batch_items_numbers_new_rows_and_applies_changes(self):
+        response = self.client.post(self.url + 'batch_items/', {
+            'create': [{'product_name': 'Kamera'}, {'product_name': 'Filter', 'quantity': '3'}],
+            'update': [{'id': self.items[0].pk, 'serial_number': 'SN-1'}],
+            'delete': [self.items[1].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.loan.items.order_by('position').values_list('product_name', 'position')),
+            [('Objektiv 1', 1), ('Kamera', 3), ('Filter', 4)],
+        )
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].serial_number, 'SN-1')
+
+    def test_batch_items_invalid_rows_write_nothing(self):
+        response = self.client.post(self.url + 'batch_items/', {
+            'create': [{'product_name': 'Kamera'}, {'quantity': '1'}],
+            'update': [{'id': self.items[0].pk, 'quantity': 'viel'}],
+            'delete': [self.items[1].pk],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('product_name', response.data['create'][1])
+        self.assertIn('quantity', response.data['update'][0])
+        self.assertEqual(self.loan.items.count(), 2)
+
+        response = self.client.post(self.url + 'batch_items/', [], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_item_receipts_creates_and_updates(self):
+        LoanItemReceipt.objects.create(loan_item=self.items[0], notes='alt')
+        response = self.client.post(self.url + 'batch_item_receipts/', {'receipts': [
+            {'item_id': self.items[0].pk, 'is_complete': True, 'notes': 'geprüft'},
+            {'item_id': self.items[1].pk, 'is_intact': True},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        receipts = {r.loan_item_id: r for r in LoanItemReceipt.objects.all()}
+        self.assertEqual((receipts[self.items[0].pk].is_complete, receipts[self.items[0].pk].notes), (True, 'geprüft'))
+        self.assertEqual((receipts[self.items[1].pk].is_intact, receipts[self.items[1].pk].notes), (True, ''))
+
+    def test_batch_item_receipts_invalid_rows_write_nothing(self):
+        response = self.client.post(self.url + 'batch_item_receipts/', {'receipts': [
+            {'item_id': self.items[0].pk, 'is_complete': True},
+            {'item_id': self.items[1].pk, 'notes': None},
+            {'item_id': self.items[1].pk + 100, 'is_intact': 'vielleicht'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['receipts']
+        self.assertEqual(errors[0], {})
+        self.assertIn('notes', errors[1])
+        self.assertEqual(set(errors[2]), {'item_id', 'is_intact'})
+        self.assertFalse(LoanItemReceipt.objects.exists())
@@ -2,10 +2,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django.core.files.base import ContentFile
-from django.db.models import Q
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
 import os
 
 from .models import (
@@ -19,49 +20,63 @@ from .serializers import (
     LoanReturnItemSerializer
 )
 from .pdf_generator import generate_return_note_pdf
-from users.models import Notification, Reminder
+from users.models import Reminder
+from core.fanout import fan_out
+from core.item_sync import ItemSync, validate_item_batch
+from core.media_delivery import media_response
+
+# Batch-Endpunkt der Leihpositionen (batch_items)
+LOAN_ITEM_SYNC = ItemSync(
+    LoanItem, 'loan',
+    fields=['position', 'product_name', 'supplier_article_number', 'quantity', 'unit', 'serial_number', 'notes'],
+    position_field='position',
+)
+
+
+def loan_recipients(loan):
+    """
+    Empfänger einer Leihung mit einer Abfrage: der (erste aktive) User des
+    zuständigen Mitarbeiters und alle aktiven User der Beobachter.
+
+    Returns:
+        (User-ID des Zuständigen oder None, Liste aller zu benachrichtigenden User-IDs)
+    """
+    observed = Loan.observers.through.objects.filter(loan_id=loan.pk, employee_id=OuterRef('employee_id'))
+    condition = Q(Exists(observed))
+    if loan.responsible_employee_id:
+        condition |= Q(employee_id=loan.responsible_employee_id)
+    rows = get_user_model().objects.filter(condition, is_active=True) \
+        .annotate(is_observer=Exists(observed)).values_list('pk', 'employee_id', 'is_observer')
+
+    responsible_user_id = None
+    user_ids = []
+    for user_id, employee_id, is_observer in rows:
+        if responsible_user_id is None and employee_id == loan.responsible_employee_id:
+            responsible_user_id = user_id
+        elif not is_observer:
+            continue
+        if user_id not in user_ids:
+            user_ids.append(user_id)
+    return responsible_user_id, user_ids
 
 
-def create_loan_notifications(loan, is_new=False):
+def create_loan_notifications(fanout, loan, user_ids, is_new=False):
     """Erstellt Benachrichtigungen für zuständigen Mitarbeiter und Beobachter"""
     action_text = "erstellt" if is_new else "aktualisiert"
+    supplier_name = loan.supplier.company_name if loan.supplier else 'Unbekannt'
     # use existing notification type values defined in users.models.Notification.NOTIFICATION_TYPES
-    notification_type = 'loan'
-    
-    # Sammle alle zu benachrichtigenden User
-    users_to_notify = set()
-    
-    # Zuständiger Mitarbeiter
-    if loan.responsible_employee:
-        # User ist über das reverse-relationship `users` auf `Employee` erreichbar
-        rep_user = loan.responsible_employee.users.filter(is_active=True).first()
-        if rep_user:
-            users_to_notify.add(rep_user)
-    
-    # Beobachter
-    for observer in loan.observers.all():
-        # Jeder Beobachter kann 0..n User haben; benachrichtige alle aktiven
-        for u in observer.users.filter(is_active=True):
-            users_to_notify.add(u)
-    
-    # Erstelle Benachrichtigungen
-    for user in users_to_notify:
-            Notification.objects.create(
-            user=user,
-            title=f"Leihung {loan.loan_number} {action_text}",
-            message=f"Leihung {loan.loan_number} von {loan.supplier.company_name if loan.supplier else 'Unbekannt'} wurde {action_text}.",
-            notification_type=notification_type,
-            related_url=f"/procurement/loans/{loan.id}"
-        )
+    fanout.notify(
+        user_ids,
+        title=f"Leihung {loan.loan_number} {action_text}",
+        message=f"Leihung {loan.loan_number} von {supplier_name} wurde {action_text}.",
+        notification_type='loan',
+        related_url=f"/procurement/loans/{loan.id}"
+    )
 
 
-def create_loan_reminder(loan):
+def create_loan_reminder(fanout, loan, responsible_user_id):
     """Erstellt eine Erinnerung für das Rückgabedatum"""
-    if not loan.return_deadline or not loan.responsible_employee:
-        return
-    # finde den zugehörigen User über Employee.users
-    responsible_user = loan.responsible_employee.users.filter(is_active=True).first()
-    if not responsible_user:
+    if not loan.return_deadline or not responsible_user_id:
         return
     
     # Lösche bestehende Erinnerungen für diese Leihung
@@ -71,10 +86,11 @@ def create_loan_reminder(loan):
     ).delete()
     
     # Erstelle neue Erinnerung
-    Reminder.objects.create(
-        user=responsible_user,
+    supplier_name = loan.supplier.company_name if loan.supplier else 'Unbekannt'
+    fanout.remind(
+        [responsible_user_id],
         title=f"Leihung {loan.loan_number} zurückgeben",
-        description=f"Die Leihung {loan.loan_number} von {loan.supplier.company_name if loan.supplier else 'Unbekannt'} muss bis {loan.return_deadline.strftime('%d.%m.%Y')} zurückgegeben werden.",
+        description=f"Die Leihung {loan.loan_number} von {supplier_name} muss bis {loan.return_deadline.strftime('%d.%m.%Y')} zurückgegeben werden.",
         due_date=loan.return_deadline,
         related_object_type='loan',
         related_object_id=loan.id,
@@ -82,6 +98,14 @@ def create_loan_reminder(loan):
     )
 
 
+def notify_loan_change(loan, actor, is_new=False):
+    """Benachrichtigungen und Rückgabe-Erinnerung in einer Transaktion schreiben"""
+    responsible_user_id, user_ids = loan_recipients(loan)
+    with fan_out(actor=actor) as fanout:
+        create_loan_notifications(fanout, loan, user_ids, is_new=is_new)
+        create_loan_reminder(fanout, loan, responsible_user_id)
+
+
 class LoanViewSet(viewsets.ModelViewSet):
     """ViewSet für Leihungen"""
     permission_classes = [IsAuthenticated]
@@ -145,16 +169,16 @@ class LoanViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        loan = serializer.save(created_by=self.request.user, updated_by=self.request.user)
-        # Benachrichtigungen und Erinnerungen erstellen
-        create_loan_notifications(loan, is_new=True)
-        create_loan_reminder(loan)
+        with transaction.atomic():
+            loan = serializer.save(created_by=self.request.user, updated_by=self.request.user)
+            # Benachrichtigungen und Erinnerungen erstellen
+            notify_loan_change(loan, self.request.user, is_new=True)
     
     def perform_update(self, serializer):
-        loan = serializer.save(updated_by=self.request.user)
-        # Benachrichtigungen und Erinnerungen aktualisieren
-        create_loan_notifications(loan, is_new=False)
-        create_loan_reminder(loan)
+        with transaction.atomic():
+            loan = serializer.save(updated_by=self.request.user)
+            # Benachrichtigungen und Erinnerungen aktualisieren
+            notify_loan_change(loan, self.request.user, is_new=False)
     
     @action(detail=True, methods=['get'])
     def items(self, request, pk=None):
@@ -170,7 +194,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         loan = self.get_object()
         
         # Get next position
-        max_pos = loan.items.aggregate(max_pos=models.Max('position'))['max_pos'] or 0
+        max_pos = loan.items.aggregate(max_pos=Max('position'))['max_pos'] or 0
         request.data['position'] = max_pos + 1
         request.data['loan'] = loan.id
         
@@ -180,6 +204,21 @@ class LoanViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['post'])
+    def batch_items(self, request, pk=None):
+        """
+        Legt Positionen an, ändert und löscht sie in einer Anfrage
+        ({'create': [...], 'update': [{'id': ...}], 'delete': [ids]}) und gibt alle Positionen zurück
+        """
+        loan = self.get_object()
+        batch, errors = validate_item_batch(LOAN_ITEM_SYNC, loan, request.data, LoanItemSerializer)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        LOAN_ITEM_SYNC.apply_batch(loan, batch)
+        
+        items = loan.items.select_related('receipt_check').prefetch_related('photos__uploaded_by')
+        return Response(LoanItemSerializer(items, many=True, context={'request': request}).data)
+    
     @action(detail=True, methods=['post'])
     def create_receipt(self, request, pk=None):
         """Erstellt den Wareneingang"""
@@ -225,6 +264,58 @@ class LoanViewSet(viewsets.ModelViewSet):
         serializer = LoanItemReceiptSerializer(receipt)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['post'])
+    def batch_item_receipts(self, request, pk=None):
+        """
+        Aktualisiert die Wareneingangs-Checklisten mehrerer Positionen in einer Anfrage
+        ({'receipts': [{'item_id', 'is_complete', 'is_intact', 'notes'}, ...]}, je Zeile wie
+        update_item_receipt) und gibt alle Checklisten der Leihung zurück
+        """
+        loan = self.get_object()
+        rows = request.data.get('receipts')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response({'receipts': ['Liste von Zeilen erwartet.']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        items = {str(item.pk): item for item in loan.items.select_related('receipt_check')}
+        validated, row_errors = [], []
+        for row in rows:
+            # Feldtypen wie im Serializer prüfen (loan_item kommt aus item_id)
+            serializer = LoanItemReceiptSerializer(data={
+                'is_complete': row.get('is_complete', False),
+                'is_intact': row.get('is_intact', False),
+                'notes': row.get('notes', ''),
+            }, partial=True)
+            errors = {} if serializer.is_valid() else dict(serializer.errors)
+            if str(row.get('item_id')) not in items:
+                errors['item_id'] = ['Nicht gefunden.']
+            validated.append(serializer.validated_data if not errors else None)
+            row_errors.append(errors)
+        if any(row_errors):
+            return Response({'receipts': row_errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        created, updated = {}, {}
+        for row, values in zip(rows, validated):
+            item = items[str(row['item_id'])]
+            if hasattr(item, 'receipt_check'):
+                receipt = updated[item.pk] = item.receipt_check
+            else:
+                receipt = created.setdefault(item.pk, LoanItemReceipt(loan_item=item))
+            for name, value in values.items():
+                setattr(receipt, name, value)
+        
+        with transaction.atomic():
+            if updated:
+                for receipt in updated.values():
+                    LoanItemReceipt._meta.get_field('updated_at').pre_save(receipt, add=False)
+                LoanItemReceipt.objects.bulk_update(
+                    list(updated.values()), ['is_complete', 'is_intact', 'notes', 'updated_at']
+                )
+            if created:
+                LoanItemReceipt.objects.bulk_create(list(created.values()))
+        
+        receipts = LoanItemReceipt.objects.filter(loan_item__loan=loan).order_by('loan_item__position')
+        return Response(LoanItemReceiptSerializer(receipts, many=True).data)
+    
     @action(detail=True, methods=['post'])
     def upload_receipt_document(self, request, pk=None):
         """Lädt ein Dokument (Lieferschein/Leihvereinbarung) zum Wareneingang hoch"""
@@ -312,14 +403,16 @@ class LoanViewSet(viewsets.ModelViewSet):
             created_by=request.user
         )
         
-        # Create return items
-        for item_data in items_data:
-            LoanReturnItem.objects.create(
+        # Create return items (ein bulk_create statt eines INSERT je Position)
+        LoanReturnItem.objects.bulk_create([
+            LoanReturnItem(
                 loan_return=loan_return,
                 loan_item_id=item_data.get('loan_item_id'),
                 quantity_returned=item_data.get('quantity_returned', 0),
                 condition_notes=item_data.get('condition_notes', '')
             )
+            for item_data in items_data
+        ])
         
         # Generate PDF
         pdf_content = generate_return_note_pdf(loan_return)
@@ -376,9 +469,10 @@ class LoanReturnViewSet(viewsets.ModelViewSet):
             filename = f"Ruecklieferschein_{loan_return.return_number}.pdf"
             loan_return.pdf_file.save(filename, ContentFile(pdf_content), save=True)
         
-        response = HttpResponse(loan_return.pdf_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Ruecklieferschein_{loan_return.return_number}.pdf"'
-        return response
+        return media_response(
+            request, loan_return.pdf_file, content_type='application/pdf',
+            filename=f"Ruecklieferschein_{loan_return.return_number}.pdf"
+        )
     
     @action(detail=True, methods=['post'])
     def regenerate_pdf(self, request, pk=None):
@@ -143,27 +143,20 @@ class VSHardware(models.Model):
         next_number = max(numeric_numbers) + 1
         return f'VSH-{next_number:05d}'
     
-    def get_current_purchase_price(self):
-        """Gibt den aktuell gültigen Einkaufspreis zurück"""
-        from django.utils import timezone
-        today = timezone.now().date()
-        price = self.prices.filter(
-            valid_from__lte=today
-        ).filter(
-            models.Q(valid_until__isnull=True) | models.Q(valid_until__gte=today)
-        ).order_by('-valid_from').first()
-        return price.purchase_price if price else None
-    
-    def get_current_sales_price(self):
-        """Gibt den aktuell gültigen Verkaufspreis zurück"""
-        from django.utils import timezone
-        today = timezone.now().date()
-        price = self.prices.filter(
-            valid_from__lte=today
-        ).filter(
-            models.Q(valid_until__isnull=True) | models.Q(valid_until__gte=today)
-        ).order_by('-valid_from').first()
-        return price.sales_price if price else None
+    def get_price_entry(self, on=None):
+        """Gibt den am Stichtag (Standard: heute) gültigen Preis-Eintrag zurück"""
+        from core.product_prices import get_price_entry
+        return get_price_entry(self, on)
+    
+    def get_current_purchase_price(self, on=None):
+        """Gibt den aktuell (bzw. am Stichtag) gültigen Einkaufspreis zurück"""
+        from core.product_prices import purchase_price
+        return purchase_price(self, on)
+    
+    def get_current_sales_price(self, on=None):
+        """Gibt den aktuell (bzw. am Stichtag) gültigen Verkaufspreis zurück"""
+        from core.product_prices import sales_price
+        return sales_price(self, on)
 
 
 class VSHardwarePrice(models.Model):
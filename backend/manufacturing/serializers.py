@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from core.product_prices import PriceResolvingListSerializer
 from .models import (
     VSHardware, VSHardwarePrice, VSHardwareMaterialItem,
     VSHardwareCostCalculation, VSHardwareDocument,
@@ -173,6 +174,7 @@ class VSHardwareListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = VSHardware
+        list_serializer_class = PriceResolvingListSerializer
         fields = [
             'id', 'part_number', 'name', 'model_designation',
             'description', 'description_en',
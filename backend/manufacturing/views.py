@@ -6,6 +6,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from users.models import Notification
+from core.conditional import ConditionalGetMixin
 
 from .models import (
     VSHardware, VSHardwarePrice, VSHardwareMaterialItem,
@@ -25,7 +26,7 @@ from .serializers import (
 # VS-HARDWARE VIEWSETS
 # ============================================
 
-class VSHardwareViewSet(viewsets.ModelViewSet):
+class VSHardwareViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet für VS-Hardware Produkte"""
     # Pagination für infinite scroll
     from verp.pagination import InfinitePagination
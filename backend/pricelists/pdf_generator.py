@@ -20,6 +20,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from reportlab.lib.utils import ImageReader
 from company.models import CompanySettings
+from core.product_prices import attach_prices
 from django.conf import settings
 import os
 
@@ -127,11 +128,26 @@ class PriceListDocTemplate(BaseDocTemplate):
         canvas.restoreState()
 
 
-def get_vs_hardware_products():
-    """Holt alle aktiven VS-Hardware Produkte mit Preisen"""
+def get_price_date(pricelist):
+    """
+    Stichtag für die Preise einer Preisliste: Beginn des Gültigkeitszeitraums,
+    frühestens heute (für zukünftige Preislisten gelten die dann gültigen Preise).
+    """
+    from datetime import date
+    from django.utils import timezone
+    today = timezone.now().date()
+    try:
+        start = date(pricelist.valid_from_year, pricelist.valid_from_month, 1)
+    except (TypeError, ValueError):
+        return today
+    return max(today, start)
+
+
+def get_vs_hardware_products(price_date=None):
+    """Holt alle aktiven VS-Hardware Produkte mit Preisen (zum Stichtag, Standard: heute)"""
     from manufacturing.models import VSHardware
     
-    products = VSHardware.objects.filter(is_active=True).order_by('part_number')
+    products = attach_prices(list(VSHardware.objects.filter(is_active=True).order_by('part_number')), on=price_date)
     result = []
     
     for product in products:
@@ -147,11 +163,11 @@ def get_vs_hardware_products():
     return result
 
 
-def get_visiview_products():
-    """Holt alle aktiven VisiView Produkte mit Preisen"""
+def get_visiview_products(price_date=None):
+    """Holt alle aktiven VisiView Produkte mit Preisen (zum Stichtag, Standard: heute)"""
     from visiview.models import VisiViewProduct
     
-    products = VisiViewProduct.objects.filter(is_active=True).order_by('article_number')
+    products = attach_prices(list(VisiViewProduct.objects.filter(is_active=True).order_by('article_number')), on=price_date)
     result = []
     
     for product in products:
@@ -167,8 +183,8 @@ def get_visiview_products():
     return result
 
 
-def get_trading_products(supplier=None):
-    """Holt alle aktiven Trading Products, optional gefiltert nach Lieferant"""
+def get_trading_products(supplier=None, price_date=None):
+    """Holt alle aktiven Trading Products, optional gefiltert nach Lieferant (Preise zum Stichtag)"""
     from suppliers.models import TradingProduct
     
     products = TradingProduct.objects.filter(is_active=True)
@@ -177,6 +193,7 @@ def get_trading_products(supplier=None):
         products = products.filter(supplier=supplier)
     
     products = products.select_related('supplier').order_by('supplier__company_name', 'visitron_part_number')
+    products = attach_prices(list(products), on=price_date)
     result = []
     
     for product in products:
@@ -203,11 +220,11 @@ def get_trading_products(supplier=None):
     return result
 
 
-def get_vs_service_products():
-    """Holt alle aktiven VS-Service Produkte mit Preisen"""
+def get_vs_service_products(price_date=None):
+    """Holt alle aktiven VS-Service Produkte mit Preisen (zum Stichtag, Standard: heute)"""
     from service.models import VSService
     
-    products = VSService.objects.filter(is_active=True).order_by('article_number')
+    products = attach_prices(list(VSService.objects.filter(is_active=True).order_by('article_number')), on=price_date)
     result = []
     
     for product in products:
@@ -301,21 +318,22 @@ def generate_pricelist_pdf(pricelist):
     elements.append(Paragraph(pricelist.get_subtitle(), style_subtitle))
     elements.append(Paragraph(pricelist.get_validity_string(), style_validity))
     
-    # Sammle alle Produkte
+    # Sammle alle Produkte (Preise zum Beginn des Gültigkeitszeitraums)
     sections = []
+    price_date = get_price_date(pricelist)
     
     if pricelist.pricelist_type == 'vs_hardware':
-        products = get_vs_hardware_products()
+        products = get_vs_hardware_products(price_date)
         if products:
             sections.append(('VS-Hardware Products', products))
     
     elif pricelist.pricelist_type == 'visiview':
-        products = get_visiview_products()
+        products = get_visiview_products(price_date)
         if products:
             sections.append(('VisiView Software Products', products))
     
     elif pricelist.pricelist_type == 'trading':
-        products = get_trading_products(pricelist.supplier)
+        products = get_trading_products(pricelist.supplier, price_date)
         if products:
             # Gruppiere nach Lieferant
             suppliers = {}
@@ -329,23 +347,23 @@ def generate_pricelist_pdf(pricelist):
                 sections.append((f'Trading Products - {supplier_name}', supplier_products))
     
     elif pricelist.pricelist_type == 'vs_service':
-        products = get_vs_service_products()
+        products = get_vs_service_products(price_date)
         if products:
             sections.append(('VS-Service Products', products))
     
     elif pricelist.pricelist_type == 'combined':
         if pricelist.include_vs_hardware:
-            products = get_vs_hardware_products()
+            products = get_vs_hardware_products(price_date)
             if products:
                 sections.append(('VS-Hardware Products', products))
         
         if pricelist.include_visiview:
-            products = get_visiview_products()
+            products = get_visiview_products(price_date)
             if products:
                 sections.append(('VisiView Software Products', products))
         
         if pricelist.include_trading:
-            products = get_trading_products(pricelist.trading_supplier)
+            products = get_trading_products(pricelist.trading_supplier, price_date)
             if products:
                 # Gruppiere nach Lieferant
                 suppliers = {}
@@ -359,7 +377,7 @@ def generate_pricelist_pdf(pricelist):
                     sections.append((f'Trading Products - {supplier_name}', supplier_products))
         
         if pricelist.include_vs_service:
-            products = get_vs_service_products()
+            products = get_vs_service_products(price_date)
             if products:
                 sections.append(('VS-Service Products', products))
     
@@ -6,6 +6,7 @@ from rest_framework.pagination import PageNumberPagination
 from django.http import HttpResponse
 from django.core.files.base import ContentFile
 from django.db.models import Q
+from core.conditional import ConditionalGetMixin
 from .models import SalesPriceList
 from .serializers import (
     SalesPriceListListSerializer,
@@ -21,7 +22,7 @@ class StandardPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class SalesPriceListViewSet(viewsets.ModelViewSet):
+class SalesPriceListViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für Verkaufs-Preislisten
     
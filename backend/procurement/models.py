@@ -478,10 +478,15 @@ class ProductCollectionItem(models.Model):
     def __str__(self):
         return f"{self.collection.collection_number} - Pos. {self.position}: {self.name}"
     
+    def calculate_totals(self):
+        """Berechnet die Gesamtpreise aus Einzelpreis und Menge"""
+        quantity = Decimal(str(self.quantity))
+        self.total_purchase_price = self.unit_purchase_price * quantity
+        self.total_list_price = self.unit_list_price * quantity
+    
     def save(self, *args, **kwargs):
         # Berechne Gesamtpreise
-        self.total_purchase_price = self.unit_purchase_price * self.quantity
-        self.total_list_price = self.unit_list_price * self.quantity
+        self.calculate_totals()
         
         super().save(*args, **kwargs)
         
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
+from decimal import Decimal
+from django.db import transaction
+from core.item_sync import ItemSync
+from core.product_prices import attach_prices
 from .models import ProductCollection, ProductCollectionItem
 from suppliers.models import TradingProduct, Supplier
 from service.models import VSService
@@ -7,6 +11,67 @@ from visiview.models import VisiViewProduct
 from manufacturing.models import VSHardware
 
 
+# Produkttyp (Frontend) -> (app_label, model)
+PRODUCT_TYPE_CONTENT_TYPES = {
+    'trading_product': ('suppliers', 'tradingproduct'),
+    'vs_service': ('service', 'vsservice'),
+    'visiview': ('visiview', 'visiviewproduct'),
+    'vs_hardware': ('manufacturing', 'vshardware'),
+}
+
+COLLECTION_ITEM_FIELDS = [
+    'position', 'content_type', 'object_id', 'article_number', 'name', 'name_en',
+    'description', 'description_en', 'quantity', 'unit', 'unit_purchase_price',
+    'unit_list_price', 'total_purchase_price', 'total_list_price', 'price_valid_until',
+]
+
+
+def build_collection_item_rows(items_data):
+    """
+    Baut die Positionsdaten einer Warensammlung aus den Frontend-Daten.
+    
+    Die Produkte werden mit einer Abfrage pro Produkttyp geladen; Positionen
+    mit unbekanntem Typ oder nicht vorhandenem Produkt werden übersprungen.
+    """
+    from collections import defaultdict
+    
+    def product_key(item_data):
+        try:
+            return item_data.get('product_type'), int(item_data.get('product_id'))
+        except (TypeError, ValueError):
+            return None
+    
+    ids_by_type = defaultdict(set)
+    for item_data in items_data:
+        key = product_key(item_data)
+        if key and key[0] in PRODUCT_TYPE_CONTENT_TYPES:
+            ids_by_type[key[0]].add(key[1])
+    
+    products = {}
+    for product_type, ids in ids_by_type.items():
+        ct = ContentType.objects.get_by_natural_key(*PRODUCT_TYPE_CONTENT_TYPES[product_type])
+        for product in attach_prices(list(ct.model_class().objects.filter(id__in=ids))):
+            products[(product_type, product.id)] = product
+    
+    rows = []
+    for position, item_data in enumerate(items_data, start=1):
+        product = products.get(product_key(item_data))
+        if product is None:
+            continue
+        
+        item = ProductCollectionItem(position=position, quantity=Decimal(str(item_data.get('quantity', 1))))
+        item.product = product
+        # Fülle Daten vom Produkt
+        item.update_from_product()
+        item.calculate_totals()
+        rows.append({name: getattr(item, name) for name in COLLECTION_ITEM_FIELDS})
+    return rows
+
+
+# Positionen tragen keine IDs aus dem Frontend - bestehende werden ersetzt
+COLLECTION_ITEM_SYNC = ItemSync(ProductCollectionItem, 'collection', fields=COLLECTION_ITEM_FIELDS)
+
+
 class ProductCollectionItemSerializer(serializers.ModelSerializer):
     """Serializer für Warensammlungs-Positionen"""
     
@@ -208,55 +273,16 @@ class ProductCollectionCreateSerializer(serializers.ModelSerializer):
         if request and request.user:
             validated_data['created_by'] = request.user
         
-        collection = ProductCollection.objects.create(**validated_data)
-        
-        # Erstelle Items
-        for idx, item_data in enumerate(items_data, start=1):
-            self._create_item(collection, item_data, idx)
-        
-        # Aktualisiere Gesamtwerte
-        collection.update_totals()
+        with transaction.atomic():
+            collection = ProductCollection.objects.create(**validated_data)
+            
+            # Erstelle Items in einem Batch
+            COLLECTION_ITEM_SYNC.apply(collection, build_collection_item_rows(items_data), existing=[])
+            
+            # Aktualisiere Gesamtwerte
+            collection.update_totals()
         
         return collection
-    
-    def _create_item(self, collection, item_data, position):
-        """Erstellt eine Warensammlungs-Position"""
-        product_type = item_data.get('product_type')
-        product_id = item_data.get('product_id')
-        quantity = item_data.get('quantity', 1)
-        
-        # Bestimme ContentType und hole Produkt
-        if product_type == 'trading_product':
-            ct = ContentType.objects.get(app_label='suppliers', model='tradingproduct')
-            product = TradingProduct.objects.filter(id=product_id).first()
-        elif product_type == 'vs_service':
-            ct = ContentType.objects.get(app_label='service', model='vsservice')
-            product = VSService.objects.filter(id=product_id).first()
-        elif product_type == 'visiview':
-            ct = ContentType.objects.get(app_label='visiview', model='visiviewproduct')
-            product = VisiViewProduct.objects.filter(id=product_id).first()
-        elif product_type == 'vs_hardware':
-            ct = ContentType.objects.get(app_label='manufacturing', model='vshardware')
-            product = VSHardware.objects.filter(id=product_id).first()
-        else:
-            return None
-        
-        if not product:
-            return None
-        
-        item = ProductCollectionItem(
-            collection=collection,
-            position=position,
-            content_type=ct,
-            object_id=product_id,
-            quantity=quantity
-        )
-        
-        # Fülle Daten vom Produkt
-        item.update_from_product()
-        item.save()
-        
-        return item
 
 
 class ProductCollectionUpdateSerializer(serializers.ModelSerializer):
@@ -295,60 +321,17 @@ class ProductCollectionUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items_data', None)
         
-        # Update Hauptdaten
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update Items wenn vorhanden
-        if items_data is not None:
-            # Lösche alte Items
-            instance.items.all().delete()
+        with transaction.atomic():
+            # Update Hauptdaten
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            # Erstelle neue Items
-            for idx, item_data in enumerate(items_data, start=1):
-                self._create_item(instance, item_data, idx)
-        
-        # Aktualisiere Gesamtwerte
-        instance.update_totals()
+            # Update Items wenn vorhanden: alte Positionen ersetzen (ein DELETE + ein INSERT)
+            if items_data is not None:
+                COLLECTION_ITEM_SYNC.apply(instance, build_collection_item_rows(items_data))
+            
+            # Aktualisiere Gesamtwerte
+            instance.update_totals()
         
         return instance
-    
-    def _create_item(self, collection, item_data, position):
-        """Erstellt eine Warensammlungs-Position"""
-        product_type = item_data.get('product_type')
-        product_id = item_data.get('product_id')
-        quantity = item_data.get('quantity', 1)
-        
-        # Bestimme ContentType und hole Produkt
-        if product_type == 'trading_product':
-            ct = ContentType.objects.get(app_label='suppliers', model='tradingproduct')
-            product = TradingProduct.objects.filter(id=product_id).first()
-        elif product_type == 'vs_service':
-            ct = ContentType.objects.get(app_label='service', model='vsservice')
-            product = VSService.objects.filter(id=product_id).first()
-        elif product_type == 'visiview':
-            ct = ContentType.objects.get(app_label='visiview', model='visiviewproduct')
-            product = VisiViewProduct.objects.filter(id=product_id).first()
-        elif product_type == 'vs_hardware':
-            ct = ContentType.objects.get(app_label='manufacturing', model='vshardware')
-            product = VSHardware.objects.filter(id=product_id).first()
-        else:
-            return None
-        
-        if not product:
-            return None
-        
-        item = ProductCollectionItem(
-            collection=collection,
-            position=position,
-            content_type=ct,
-            object_id=product_id,
-            quantity=quantity
-        )
-        
-        # Fülle Daten vom Produkt
-        item.update_from_product()
-        item.save()
-        
-        return item
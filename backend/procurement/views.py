@@ -5,6 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q, Max
+from core.product_prices import attach_prices
+from core.translation import TranslationError, TranslationUnavailable, translate_texts
 
 from .models import ProductCollection, ProductCollectionItem
 from .serializers import (
@@ -61,9 +63,16 @@ class ProductCollectionViewSet(viewsets.ModelViewSet):
         """
         collection = self.get_object()
         
-        for item in collection.items.all():
+        items = list(collection.items.select_related('content_type').prefetch_related('product'))
+        attach_prices([item.product for item in items if item.product is not None])
+        for item in items:
             item.update_from_product()
-            item.save()
+            item.calculate_totals()
+        ProductCollectionItem.objects.bulk_update(items, [
+            'article_number', 'name', 'name_en', 'description', 'description_en', 'unit',
+            'unit_purchase_price', 'unit_list_price', 'total_purchase_price',
+            'total_list_price', 'price_valid_until',
+        ])
         
         collection.update_totals()
         
@@ -103,49 +112,43 @@ class ProductCollectionViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def translate(self, request, pk=None):
-        """Übersetzt Stammdaten-Felder (DE -> EN) mit konfigurierbarer Übersetzungs-API"""
-        from django.conf import settings
-        import requests
+        """
+        Übersetzt Stammdaten-Felder (DE -> EN) über den Übersetzungsspeicher
+        (core.translation); nur unbekannte Texte gehen an die Übersetzungs-API.
 
+        Body: {'field': 'title'} oder {'fields': ['title', 'description', ...]}
+        """
         collection = self.get_object()
-        field = request.data.get('field')  # e.g. 'title' or 'short_description' or 'description' or 'quotation_text_short' or 'quotation_text_long'
+        fields = request.data.get('fields') or [request.data.get('field')]
         to_lang = request.data.get('to', 'EN')
 
         allowed_fields = ['title', 'short_description', 'description', 'quotation_text_short', 'quotation_text_long']
-        if field not in allowed_fields:
+        if not isinstance(fields, list) or any(field not in allowed_fields for field in fields):
             return Response({'error': 'Ungültiges Feld'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Determiniere Quelltext (Deutsch)
-        source_text = getattr(collection, field, None) or ''
-        if not source_text:
+        # Determiniere Quelltexte (Deutsch)
+        source_texts = [getattr(collection, field, None) or '' for field in fields]
+        if not any(source_texts):
             return Response({'error': 'Quelltext leer'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Prüfe ob Übersetzungs-API konfiguriert ist
-        api_url = getattr(settings, 'TRANSLATION_API_URL', None)
-        api_key = getattr(settings, 'TRANSLATION_API_KEY', None)
-        if not api_url:
-            return Response({'error': 'Keine Übersetzungs-API konfiguriert'}, status=status.HTTP_501_NOT_IMPLEMENTED)
-
-        # Beispiel: LibreTranslate kompatibler Request
         try:
-            resp = requests.post(api_url, json={
-                'q': source_text,
-                'source': 'de',
-                'target': to_lang.lower(),
-                'format': 'text'
-            }, headers={'Authorization': f'Bearer {api_key}'} if api_key else {})
-            resp.raise_for_status()
-            data = resp.json()
-            translated = data.get('translatedText') or data.get('translation') or data.get('translated') or data
+            translated = translate_texts(source_texts, source='de', target=to_lang)
+        except TranslationUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        except TranslationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
-            # Fülle das entsprechende _en Feld im Modell
-            en_field = f"{field}_en"
-            setattr(collection, en_field, translated if isinstance(translated, str) else str(translated))
-            collection.save(update_fields=[en_field])
+        # Fülle die entsprechenden _en Felder im Modell
+        en_fields = []
+        for field, source_text, text in zip(fields, source_texts, translated):
+            if source_text:
+                setattr(collection, f"{field}_en", text)
+                en_fields.append(f"{field}_en")
+        collection.save(update_fields=en_fields)
 
-            return Response({ 'translated': getattr(collection, en_field) })
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        if len(fields) == 1:
+            return Response({'translated': getattr(collection, en_fields[0])})
+        return Response({'translated': {field: getattr(collection, f"{field}_en") for field in fields}})
     
     @action(detail=True, methods=['get'])
     def usage_statistics(self, request, pk=None):
@@ -207,45 +210,45 @@ class ProductCollectionViewSet(viewsets.ModelViewSet):
                 'list_price': float(p.get_current_sales_price() or 0),
                 'price_valid_until': None,
                 'product_type': 'vs_service'
-            } for p in queryset[:100]]
+            } for p in attach_prices(list(queryset[:100]))]
         
         elif product_source == 'VISIVIEW':
             queryset = VisiViewProduct.objects.filter(is_active=True)
             if search:
                 queryset = queryset.filter(
-                    Q(product_number__icontains=search) |
+                    Q(article_number__icontains=search) |
                     Q(name__icontains=search)
                 )
             products = [{
                 'id': p.id,
-                'article_number': p.product_number,
+                'article_number': p.article_number,
                 'name': p.name,
                 'description': p.description or '',
-                'unit': p.unit if hasattr(p, 'unit') else 'Stück',
-                'purchase_price': float(getattr(p, 'current_purchase_price', 0) or 0),
-                'list_price': float(getattr(p, 'current_list_price', 0) or 0),
+                'unit': p.unit,
+                'purchase_price': float(p.get_current_purchase_price() or 0),
+                'list_price': float(p.get_current_sales_price() or 0),
                 'price_valid_until': None,
                 'product_type': 'visiview'
-            } for p in queryset[:100]]
+            } for p in attach_prices(list(queryset[:100]))]
         
         elif product_source == 'VS_HARDWARE':
             queryset = VSHardware.objects.filter(is_active=True)
             if search:
                 queryset = queryset.filter(
-                    Q(article_number__icontains=search) |
+                    Q(part_number__icontains=search) |
                     Q(name__icontains=search)
                 )
             products = [{
                 'id': p.id,
-                'article_number': p.article_number,
+                'article_number': p.part_number,
                 'name': p.name,
                 'description': p.description or '',
-                'unit': p.unit if hasattr(p, 'unit') else 'Stück',
-                'purchase_price': float(p.get_current_purchase_price() or 0) if hasattr(p, 'get_current_purchase_price') else 0,
-                'list_price': float(p.get_current_sales_price() or 0) if hasattr(p, 'get_current_sales_price') else 0,
+                'unit': p.unit,
+                'purchase_price': float(p.get_current_purchase_price() or 0),
+                'list_price': float(p.get_current_sales_price() or 0),
                 'price_valid_until': None,
                 'product_type': 'vs_hardware'
-            } for p in queryset[:100]]
+            } for p in attach_prices(list(queryset[:100]))]
         
         return Response(products)
     
@@ -4,7 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.db import models as db_models
 from .models import Project, ProjectComment, ProjectTodo, ProjectDocument, ProjectOrderPosition
 from .serializers import (
@@ -16,6 +16,8 @@ from .serializers import (
     ProjectDocumentSerializer,
     ProjectOrderPositionSerializer,
 )
+from core.media_delivery import media_response
+from core.stats import cached_counts
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -48,17 +50,16 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """Projekt-Statistiken"""
         queryset = self.filter_queryset(self.get_queryset())
         
-        total = queryset.count()
+        counts = cached_counts(queryset, 'status')
         by_status = {}
         for choice in Project.STATUS_CHOICES:
-            count = queryset.filter(status=choice[0]).count()
             by_status[choice[0]] = {
                 'label': choice[1],
-                'count': count
+                'count': counts['by_status'][choice[0]]
             }
 
         return Response({
-            'total': total,
+            'total': counts['total'],
             'by_status': by_status
         })
 
@@ -217,9 +218,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project = self.get_object()
         try:
             document = ProjectDocument.objects.get(id=document_id, project=project)
-            return FileResponse(document.file.open('rb'), 
-                              as_attachment=True, 
-                              filename=document.filename)
+            return media_response(request, document.file, filename=document.filename)
         except ProjectDocument.DoesNotExist:
             raise Http404("Dokument nicht gefunden")
 
@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+def populate_totals(apps, schema_editor):
+    """Befüllt die neuen Summenfelder aus den bestehenden Positionen"""
+    from core.pricing import calculate_quotation_totals, TOTAL_FIELDS
+    Quotation = apps.get_model('sales', 'Quotation')
+    batch = []
+    for document in Quotation.objects.prefetch_related('items').iterator(chunk_size=500):
+        for field, value in calculate_quotation_totals(document, list(document.items.all())).items():
+            setattr(document, field, value)
+        batch.append(document)
+        if len(batch) >= 500:
+            Quotation.objects.bulk_update(batch, TOTAL_FIELDS)
+            batch = []
+    if batch:
+        Quotation.objects.bulk_update(batch, TOTAL_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0021_eventreport_eventreportlead'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotation',
+            name='total_gross',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Gesamtsumme brutto'),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='total_margin',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Marge (absolut)'),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='total_net',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Inkl. Systempreis und Lieferkosten', max_digits=12, verbose_name='Gesamtsumme netto'),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='total_purchase_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Gesamt-EK'),
+        ),
+        migrations.AddField(
+            model_name='quotation',
+            name='total_tax',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='MwSt-Betrag'),
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
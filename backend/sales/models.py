@@ -241,6 +241,44 @@ class Quotation(models.Model):
         verbose_name='Interne Notizen'
     )
     
+    # Denormalisierte Summen - werden über core.pricing bei jeder Positionsänderung gepflegt
+    total_net = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Gesamtsumme netto',
+        help_text='Inkl. Systempreis und Lieferkosten'
+    )
+    total_tax = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='MwSt-Betrag'
+    )
+    total_gross = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Gesamtsumme brutto'
+    )
+    total_purchase_cost = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Gesamt-EK'
+    )
+    total_margin = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        verbose_name='Marge (absolut)'
+    )
+    
     # Metadaten
     created_by = models.ForeignKey(
         User,
@@ -278,8 +316,21 @@ class Quotation(models.Model):
         if not self.date:
             import datetime
             self.date = datetime.date.today()
+        # Summen neu berechnen, wenn preisrelevante Kopf-Felder gespeichert werden
+        from core.pricing import calculate_quotation_totals, QUOTATION_PRICING_FIELDS, TOTAL_FIELDS
+        update_fields = kwargs.get('update_fields')
+        if self.pk and (update_fields is None or set(update_fields) & set(QUOTATION_PRICING_FIELDS)):
+            for field, value in calculate_quotation_totals(self).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(TOTAL_FIELDS)
         super().save(*args, **kwargs)
     
+    def refresh_totals(self):
+        """Berechnet die gespeicherten Summen aus den Positionen neu"""
+        from core.pricing import refresh_totals
+        return refresh_totals(self)
+    
     @staticmethod
     def _generate_quotation_number():
         """Generiert die nächste Angebotsnummer im Format Q-YEAR-XXXX"""
@@ -463,20 +514,9 @@ class QuotationItem(models.Model):
     
     @property
     def subtotal(self):
-        """Zwischensumme ohne MwSt"""
-        from decimal import Decimal
-        
-        # Wenn diese Position den Systempreis verwendet
-        if self.uses_system_price and self.quotation.system_price:
-            return self.quotation.system_price
-        
-        # Für Gruppen-Header mit manuellem Verkaufspreis
-        if self.is_group_header and self.sale_price:
-            return self.sale_price
-        
-        # Für normale Positionen: Menge * Preis mit Rabatt
-        price_after_discount = self.unit_price * (Decimal('1') - self.discount_percent / Decimal('100'))
-        return self.quantity * price_after_discount
+        """Zwischensumme ohne MwSt (Systempreis, Gruppen-VK oder Menge * Preis mit Rabatt)"""
+        from core.pricing import quotation_item_subtotal
+        return quotation_item_subtotal(self, self.quotation)
     
     @property
     def tax_amount(self):
@@ -535,32 +575,45 @@ class QuotationItem(models.Model):
     @staticmethod
     def _generate_ws_article_number():
         """Generiert die nächste WS-Artikelnummer im Format 100-WS00001"""
+        return QuotationItem._format_ws_article_number(QuotationItem._next_ws_number())
+    
+    @classmethod
+    def assign_ws_article_numbers(cls, items):
+        """
+        Vergibt WS-Artikelnummern für alle Gruppen-Header ohne Nummer
+        mit einer einzigen Abfrage (für Batch-Speicherungen ohne save()).
+        """
+        headers = [it for it in items if it.is_group_header and not it.item_article_number]
+        if not headers:
+            return
+        next_number = cls._next_ws_number()
+        for offset, item in enumerate(headers):
+            item.item_article_number = cls._format_ws_article_number(next_number + offset)
+    
+    @staticmethod
+    def _format_ws_article_number(number):
         # Lieferantennummer ist fest 100
-        supplier_number = '100'
-        prefix = f'{supplier_number}-WS'
-        
-        # Finde die höchste WS-Nummer
+        return f'100-WS{number:05d}'
+    
+    @staticmethod
+    def _next_ws_number():
+        """Ermittelt die nächste freie laufende WS-Nummer"""
         existing_numbers = QuotationItem.objects.filter(
-            item_article_number__startswith=prefix
+            item_article_number__startswith='100-WS'
         ).values_list('item_article_number', flat=True)
         
-        if not existing_numbers:
-            return f'{prefix}00001'
-        
         # Extrahiere Nummern und finde Maximum
         numeric_numbers = []
         for num in existing_numbers:
             try:
-                numeric_part = int(num.split('-')[2][2:])  # Entferne 'WS' und konvertiere
+                numeric_part = int(num.split('-')[1][2:])  # Entferne 'WS' und konvertiere
                 numeric_numbers.append(numeric_part)
             except (ValueError, IndexError):
                 continue
         
         if not numeric_numbers:
-            return f'{prefix}00001'
-        
-        next_number = max(numeric_numbers) + 1
-        return f'{prefix}{next_number:05d}'
+            return 1
+        return max(numeric_numbers) + 1
     
     def get_group_margin(self):
         """Marge für eine Gruppe (Verkaufspreis - Summe Einkaufspreise)"""
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, annotated
+from core.thumbnails import PreviewListSerializer, ThumbnailField, preview_data
 from .models import (
     Quotation, QuotationItem, MarketingItem, MarketingItemFile,
     SalesTicket, SalesTicketAttachment, SalesTicketComment, SalesTicketChangeLog,
@@ -129,31 +131,17 @@ class QuotationItemCreateUpdateSerializer(serializers.ModelSerializer):
             'custom_description'
         ]
     
-    def to_internal_value(self, data):
-        """Override to add debugging"""
-        print(f"DEBUG ITEM to_internal_value: Received data: {data}")
-        try:
-            result = super().to_internal_value(data)
-            print(f"DEBUG ITEM to_internal_value: Result: {result}")
-            return result
-        except Exception as e:
-            print(f"DEBUG ITEM to_internal_value ERROR: {e}")
-            raise
-    
     def validate(self, data):
         """Validiere dass das Item existiert (außer für Gruppen-Header)"""
         content_type_dict = data.get('content_type')
         object_id = data.get('object_id')
         is_group_header = data.get('is_group_header', False)
         
-        print(f"DEBUG ITEM validate: content_type={content_type_dict}, object_id={object_id}, is_group_header={is_group_header}")
-        
         # Gruppen-Header brauchen kein konkretes Item
         if is_group_header:
             # Entferne content_type wenn es leer/None ist
             if not content_type_dict:
                 data.pop('content_type', None)
-            print(f"DEBUG ITEM: Is group header, validation passed")
             return data
         
         # Wenn wir ein Update machen und content_type nicht gesetzt ist, 
@@ -161,49 +149,47 @@ class QuotationItemCreateUpdateSerializer(serializers.ModelSerializer):
         if self.instance and not content_type_dict:
             # content_type bleibt unverändert, entferne es aus data
             data.pop('content_type', None)
-            print(f"DEBUG ITEM: Is update without content_type, validation passed")
             return data
         
         if content_type_dict and object_id:
-            # Konvertiere Dict zu ContentType
-            from django.contrib.contenttypes.models import ContentType
+            # Konvertiere Dict zu ContentType (über den ContentType-Cache)
             try:
-                content_type = ContentType.objects.get(
-                    app_label=content_type_dict['app_label'],
-                    model=content_type_dict['model']
+                content_type = ContentType.objects.get_by_natural_key(
+                    content_type_dict['app_label'],
+                    content_type_dict['model']
                 )
-                data['content_type'] = content_type
-                
-                model_class = content_type.model_class()
-                if not model_class.objects.filter(id=object_id).exists():
-                    print(f"DEBUG ITEM ERROR: Item with id {object_id} does not exist")
-                    raise serializers.ValidationError(
-                        f"{content_type.model} mit ID {object_id} existiert nicht"
-                    )
-                print(f"DEBUG ITEM: Validation passed, content_type converted")
-            except ContentType.DoesNotExist:
-                print(f"DEBUG ITEM ERROR: ContentType does not exist")
+            except (ContentType.DoesNotExist, KeyError):
                 raise serializers.ValidationError(
                     f"Content Type {content_type_dict} existiert nicht"
                 )
+            data['content_type'] = content_type
+            
+            # Bei Batch-Validierung liefert die View die vorhandenen Objekte vorab
+            existing_objects = self.context.get('existing_objects')
+            if existing_objects is not None:
+                exists = (content_type.id, object_id) in existing_objects
+            else:
+                exists = content_type.model_class().objects.filter(id=object_id).exists()
+            if not exists:
+                raise serializers.ValidationError(
+                    f"{content_type.model} mit ID {object_id} existiert nicht"
+                )
         elif not is_group_header:
             # Normale Items brauchen content_type und object_id
             # Aber nur bei Create, nicht bei Update
             if not self.instance:
-                print(f"DEBUG ITEM ERROR: Missing content_type or object_id for new item")
                 raise serializers.ValidationError(
                     "content_type und object_id sind erforderlich für normale Positionen"
                 )
         
-        print(f"DEBUG ITEM: Validation passed")
         return data
         
         return data
 
 
-class QuotationListSerializer(serializers.ModelSerializer):
+class QuotationListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
-    Serializer für Auflistung von Angeboten
+    Serializer für Auflistung von Angeboten (?fields= / ?omit=)
     """
     customer_name = serializers.CharField(source='customer.__str__', read_only=True)
     customer_number = serializers.CharField(source='customer.customer_number', read_only=True)
@@ -221,29 +207,11 @@ class QuotationListSerializer(serializers.ModelSerializer):
     
     def get_items_count(self, obj):
         """Anzahl der Positionen"""
-        return obj.items.count()
+        return annotated(obj, 'items_count', obj.items.count)
     
     def get_total_amount(self, obj):
-        """Gesamtsumme NETTO - nur Gruppen-Header und Einzelpositionen (ohne group_id)"""
-        from decimal import Decimal
-        
-        items = [it for it in obj.items.all() if (it.is_group_header or not it.group_id)]
-        total = Decimal('0.00')
-
-        # Detect items using system price
-        uses_system = any(getattr(it, 'uses_system_price', False) and obj.system_price for it in items)
-
-        # Sum subtotals for items not using system price
-        for it in items:
-            if getattr(it, 'uses_system_price', False) and obj.system_price:
-                continue
-            total += it.subtotal  # Netto (nicht total welches Brutto ist)
-
-        # If any item uses system price, add the quotation.system_price once (netto)
-        if uses_system:
-            total += (obj.system_price or Decimal('0.00'))
-
-        return float(total)
+        """Gesamtsumme NETTO (gespeicherte Summe, siehe core.pricing)"""
+        return float(obj.total_net)
 
 
 class QuotationDetailSerializer(serializers.ModelSerializer):
@@ -257,9 +225,11 @@ class QuotationDetailSerializer(serializers.ModelSerializer):
     items = QuotationItemSerializer(many=True, read_only=True)
     payment_term_display = serializers.SerializerMethodField()
     delivery_term_display = serializers.SerializerMethodField()
-    total_net = serializers.SerializerMethodField()
-    total_tax = serializers.SerializerMethodField()
-    total_gross = serializers.SerializerMethodField()
+    total_net = serializers.FloatField(read_only=True)
+    total_tax = serializers.FloatField(read_only=True)
+    total_gross = serializers.FloatField(read_only=True)
+    total_purchase_cost = serializers.FloatField(read_only=True)
+    total_margin = serializers.FloatField(read_only=True)
     created_by_name = serializers.SerializerMethodField()
     commission_user_name = serializers.SerializerMethodField()
     pdf_file_url = serializers.SerializerMethodField()
@@ -278,7 +248,7 @@ class QuotationDetailSerializer(serializers.ModelSerializer):
             'recipient_postal_code', 'recipient_city', 'recipient_country',
             'description_text', 'footer_text', 'pdf_file', 'pdf_file_url',
             'notes',
-            'items', 'total_net', 'total_tax', 'total_gross',
+            'items', 'total_net', 'total_tax', 'total_gross', 'total_purchase_cost', 'total_margin',
             'created_by', 'created_by_name', 'commission_user', 'commission_user_name', 'created_at', 'updated_at'
         ]
     
@@ -308,69 +278,6 @@ class QuotationDetailSerializer(serializers.ModelSerializer):
                 return str(obj.delivery_term)
         return None
     
-    def get_total_net(self, obj):
-        """Gesamtsumme netto - nur Gruppen-Header und Einzelpositionen"""
-        from decimal import Decimal
-
-        items = [it for it in obj.items.all() if (it.is_group_header or not it.group_id)]
-        total = Decimal('0.00')
-
-        # Detect items using system price
-        uses_system = any(getattr(it, 'uses_system_price', False) and obj.system_price for it in items)
-
-        # Sum subtotals for items not using system price
-        for it in items:
-            if getattr(it, 'uses_system_price', False) and obj.system_price:
-                continue
-            total += it.subtotal
-
-        # If any item uses system price, add the quotation.system_price once
-        if uses_system:
-            total += (obj.system_price or Decimal('0.00'))
-
-        return float(total)
-    
-    def get_total_tax(self, obj):
-        """Gesamtsumme MwSt - nur Gruppen-Header und Einzelpositionen"""
-        from decimal import Decimal
-
-        items = [it for it in obj.items.all() if (it.is_group_header or not it.group_id)]
-        total_tax = Decimal('0.00')
-
-        # Sum tax for items not using system price
-        for it in items:
-            if getattr(it, 'uses_system_price', False) and obj.system_price:
-                continue
-            total_tax += it.tax_amount
-
-        # If any item uses system price, compute tax on the system price once
-        if any(getattr(it, 'uses_system_price', False) and obj.system_price for it in items):
-            if obj.tax_enabled:
-                total_tax += (obj.system_price or Decimal('0.00')) * (obj.tax_rate / Decimal('100'))
-
-        return float(total_tax)
-    
-    def get_total_gross(self, obj):
-        """Gesamtsumme brutto - nur Gruppen-Header und Einzelpositionen"""
-        from decimal import Decimal
-
-        items = [it for it in obj.items.all() if (it.is_group_header or not it.group_id)]
-        total = Decimal('0.00')
-
-        # Sum totals for items not using system price
-        for it in items:
-            if getattr(it, 'uses_system_price', False) and obj.system_price:
-                continue
-            total += it.total
-
-        # If any item uses system price, add system price + tax once
-        if any(getattr(it, 'uses_system_price', False) and obj.system_price for it in items):
-            sys_price = obj.system_price or Decimal('0.00')
-            sys_tax = sys_price * (obj.tax_rate / Decimal('100')) if obj.tax_enabled else Decimal('0.00')
-            total += sys_price + sys_tax
-
-        return float(total)
-    
     def get_created_by_name(self, obj):
         """Name des Erstellers"""
         if obj.created_by:
@@ -411,15 +318,17 @@ class MarketingItemFileSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
     uploaded_by_name = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField()
     
     class Meta:
         model = MarketingItemFile
         fields = [
             'id', 'marketing_item', 'file', 'file_url', 'filename', 
             'file_size', 'content_type', 'uploaded_by', 'uploaded_by_name',
-            'uploaded_at', 'is_image', 'thumbnail_url'
+            'uploaded_at', 'is_image', 'thumbnail_url', 'thumbnails'
         ]
         read_only_fields = ['uploaded_at', 'is_image', 'thumbnail_url']
+        list_serializer_class = PreviewListSerializer
     
     def get_file_url(self, obj):
         """Gibt die vollständige URL zur Datei zurück"""
@@ -434,7 +343,10 @@ class MarketingItemFileSerializer(serializers.ModelSerializer):
         return None
     
     def get_thumbnail_url(self, obj):
-        """Gibt die URL des Vorschaubilds zurück"""
+        """Gibt die URL des Vorschaubilds zurück (Rasteransicht, sonst altes Einzel-Vorschaubild)"""
+        preview = preview_data(obj)
+        if preview:
+            return preview['grid']
         if obj.thumbnail:
             return obj.thumbnail.url
         return None
@@ -587,15 +499,17 @@ class SalesTicketAttachmentSerializer(serializers.ModelSerializer):
     """Serializer für Sales-Ticket Anhänge"""
     file_url = serializers.SerializerMethodField()
     uploaded_by_name = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField()
     
     class Meta:
         model = SalesTicketAttachment
         fields = [
             'id', 'ticket', 'file', 'file_url', 'filename',
             'file_size', 'content_type', 'uploaded_by', 'uploaded_by_name',
-            'uploaded_at', 'is_image'
+            'uploaded_at', 'is_image', 'thumbnails'
         ]
         read_only_fields = ['uploaded_at', 'is_image']
+        list_serializer_class = PreviewListSerializer
     
     def get_file_url(self, obj):
         if obj.file:
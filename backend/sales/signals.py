@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.pricing import schedule_refresh
+from core import search_index, thumbnails
+from .models import MarketingItemFile, Quotation, QuotationItem, SalesTicketAttachment
+
+
+@receiver(post_save, sender=QuotationItem)
+@receiver(post_delete, sender=QuotationItem)
+def refresh_quotation_totals(sender, instance, origin=None, **kwargs):
+    """Hält die gespeicherten Angebotssummen bei Positionsänderungen aktuell."""
+    # Kaskaden (z.B. Löschen des ganzen Dokuments) brauchen keine Neuberechnung
+    if origin is not None and not (isinstance(origin, QuotationItem) or getattr(origin, 'model', None) is QuotationItem):
+        return
+    quotation = instance.quotation
+    if quotation is not None:
+        schedule_refresh(quotation)
+
+
+# Globaler Suchindex (siehe core.search_index)
+search_index.register(
+    Quotation, 'quotation', 'Angebot',
+    title=lambda q: q.quotation_number or f'Angebot (Entwurf #{q.pk})',
+    subtitle=lambda q: q.customer or q.recipient_company,
+    keywords=lambda q: [
+        q.quotation_number, q.project_reference, q.system_reference, q.reference,
+        q.recipient_company, q.recipient_name,
+        q.customer and q.customer.search_text,
+    ],
+    scope='can_read_sales_quotations', main_scope='can_read_sales',
+    url='/sales/quotations/{pk}',
+    select_related=['customer'],
+    depends_on={'customers.Customer': 'customer'},
+)
+
+# Vorschaubilder (siehe core.thumbnails)
+thumbnails.register(MarketingItemFile)
+thumbnails.register(SalesTicketAttachment)
@@ -1,3 +1,132 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from customers.models import Customer
+from customer_orders.models import CustomerOrder, CustomerOrderItem
+from .models import Quotation, QuotationItem
+
+
+class DocumentTotalsTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(first_name='Max', last_name='Muster')
+
+    def test_quotation_totals_follow_item_changes(self):
+        quotation = Quotation.objects.create(
+            customer=self.customer, valid_until=date.today() + timedelta(days=30),
+            delivery_cost=Decimal('50.00'), tax_rate=Decimal('19')
+        )
+        item = QuotationItem.objects.create(
+            quotation=quotation, position=1, quantity=2, unit_price=Decimal('100.00'),
+            purchase_price=Decimal('40.00'), discount_percent=Decimal('10')
+        )
+        # Gruppen-Unterpositionen zählen nicht zur Angebotssumme
+        QuotationItem.objects.create(
+            quotation=quotation, position=2, group_id='g1', quantity=1, unit_price=Decimal('999.00')
+        )
+
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.total_net, Decimal('230.00'))
+        self.assertEqual(quotation.total_tax, Decimal('43.70'))
+        self.assertEqual(quotation.total_gross, Decimal('273.70'))
+        self.assertEqual(quotation.total_purchase_cost, Decimal('80.00'))
+        self.assertEqual(quotation.total_margin, Decimal('100.00'))
+
+        item.delete()
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.total_net, Decimal('50.00'))
+
+    def test_quotation_system_price_counts_once(self):
+        quotation = Quotation.objects.create(
+            customer=self.customer, valid_until=date.today(), system_price=Decimal('1000.00'),
+            tax_enabled=False
+        )
+        for pos in (1, 2):
+            QuotationItem.objects.create(
+                quotation=quotation, position=pos, quantity=1, unit_price=Decimal('700.00'),
+                uses_system_price=True
+            )
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.total_net, Decimal('1000.00'))
+        self.assertEqual(quotation.total_gross, Decimal('1000.00'))
+
+        # Kopf-Änderungen lösen ebenfalls eine Neuberechnung aus
+        quotation.system_price = Decimal('1200.00')
+        quotation.save()
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.total_net, Decimal('1200.00'))
+
+    def test_customer_order_totals(self):
+        order = CustomerOrder.objects.create(customer=self.customer, delivery_cost=Decimal('10.00'))
+        CustomerOrderItem.objects.create(
+            order=order, position=1, name='A', quantity=3, final_price=Decimal('20.00'),
+            purchase_price=Decimal('5.00')
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.total_net, Decimal('70.00'))
+        self.assertEqual(order.total_gross, Decimal('83.30'))
+        self.assertEqual(order.total_margin, Decimal('45.00'))
+        self.assertEqual(order.calculate_total(), order.total_net)
+
+
+class QuotationItemSyncTests(TestCase):
+    def setUp(self):
+        from suppliers.models import Supplier, TradingProduct
+        from rest_framework.test import APIClient
+        self.customer = Customer.objects.create(first_name='Erika', last_name='Muster')
+        supplier = Supplier.objects.create(company_name='Test Supplier')
+        self.product = TradingProduct.objects.create(name='Objektiv', supplier=supplier, list_price=100, price_valid_from=date.today())
+        self.client = APIClient()
+
+    def _item(self, position, **extra):
+        data = {
+            'position': position, 'quantity': '1', 'unit_price': '100.00',
+            'content_type': {'app_label': 'suppliers', 'model': 'tradingproduct'},
+            'object_id': self.product.id,
+        }
+        data.update(extra)
+        return data
+
+    def test_update_diffs_items_in_batch(self):
+        quotation = Quotation.objects.create(customer=self.customer, valid_until=date.today())
+        keep = QuotationItem.objects.create(quotation=quotation, position=1, quantity=1, unit_price=10)
+        drop = QuotationItem.objects.create(quotation=quotation, position=2, quantity=1, unit_price=20)
+
+        payload = {
+            'customer': self.customer.id,
+            'valid_until': date.today().isoformat(),
+            'items': [
+                {'id': keep.id, 'position': 1, 'quantity': '3', 'unit_price': '10.00'},
+                {'position': 2, 'is_group_header': True, 'group_id': 'g1', 'group_name': 'Set',
+                 'quantity': '1', 'unit_price': '0', 'sale_price': '500.00'},
+            ] + [self._item(pos, group_id='g1') for pos in range(3, 13)],
+        }
+        resp = self.client.put(f'/api/sales/quotations/{quotation.id}/', payload, format='json')
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+        self.assertFalse(QuotationItem.objects.filter(id=drop.id).exists())
+        keep.refresh_from_db()
+        self.assertEqual(keep.quantity, Decimal('3'))
+        self.assertEqual(quotation.items.count(), 12)
+        header = quotation.items.get(is_group_header=True)
+        self.assertTrue(header.item_article_number.startswith('100-WS'))
+
+        quotation.refresh_from_db()
+        # 3 * 10 + Gruppen-VK 500 (Unterpositionen zählen nicht)
+        self.assertEqual(quotation.total_net, Decimal('530.00'))
+
+    def test_invalid_item_leaves_quotation_untouched(self):
+        quotation = Quotation.objects.create(customer=self.customer, valid_until=date.today(), reference='alt')
+        item = QuotationItem.objects.create(quotation=quotation, position=1, quantity=1, unit_price=10)
 
-# Create your tests here.
+        payload = {
+            'customer': self.customer.id,
+            'valid_until': date.today().isoformat(),
+            'reference': 'neu',
+            'items': [self._item(1, object_id=999999)],
+        }
+        resp = self.client.put(f'/api/sales/quotations/{quotation.id}/', payload, format='json')
+        self.assertEqual(resp.status_code, 400)
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.reference, 'alt')
+        self.assertTrue(QuotationItem.objects.filter(id=item.id).exists())
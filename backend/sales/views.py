@@ -23,17 +23,30 @@ from .serializers import (
     SalesTicketAttachmentSerializer,
     SalesTicketCommentSerializer
 )
+from django.db import transaction
+from django.db.models import OuterRef
+from core.fanout import fan_out, field_changes, recipient_ids
+from core.fieldsets import SparseQueryMixin, subquery_count
+from core.item_sync import ItemSync, validate_item_rows
+from core.pricing import deferred_totals, schedule_refresh
 import traceback
 import json
 import io
 import logging
-from PIL import Image
-from django.core.files.base import ContentFile
+from core.media_delivery import media_response
 
 logger = logging.getLogger(__name__)
 
+# Batch-Synchronisation der Angebotspositionen (WS-Nummern werden einmal pro Batch vergeben)
+QUOTATION_ITEM_SYNC = ItemSync(
+    QuotationItem,
+    'quotation',
+    fields=QuotationItemCreateUpdateSerializer.Meta.fields,
+    prepare=QuotationItem.assign_ws_article_numbers,
+)
+
 
-class QuotationViewSet(viewsets.ModelViewSet):
+class QuotationViewSet(SparseQueryMixin, viewsets.ModelViewSet):
     """
     ViewSet für Angebote
     """
@@ -42,12 +55,22 @@ class QuotationViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['customer', 'status', 'language', 'created_by']
     search_fields = ['quotation_number', 'reference', 'customer__first_name', 'customer__last_name', 'customer__customer_number']
-    ordering_fields = ['date', 'valid_until', 'quotation_number', 'status']
+    ordering_fields = ['date', 'valid_until', 'quotation_number', 'status', 'total_net', 'total_gross', 'total_margin']
     ordering = ['-date']
+    # Liste: nur der Kunde (falls angefordert) und die Anzahl der Positionen statt aller Positionen
+    query_plan = {
+        'customer_name': lambda queryset: queryset.select_related('customer'),
+        'customer_number': lambda queryset: queryset.select_related('customer'),
+        'items_count': lambda queryset: queryset.annotate(
+            items_count=subquery_count(QuotationItem.objects.filter(quotation=OuterRef('pk')))
+        ),
+    }
     
     def get_queryset(self):
         """Custom queryset mit Jahresfilterung und exclude_ordered"""
         queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = self.plan_queryset(queryset.select_related(None).prefetch_related(None))
         
         # Jahresfilter
         year = self.request.query_params.get('year', None)
@@ -68,55 +91,93 @@ class QuotationViewSet(viewsets.ModelViewSet):
             return QuotationCreateUpdateSerializer
         return QuotationListSerializer
     
-    def create(self, request, *args, **kwargs):
-        """Custom create um items als JSON zu verarbeiten"""
-        data = request.data.copy()
-        
-        # Parse items if it's a JSON string
-        if 'items' in data and isinstance(data['items'], str):
-            try:
-                data['items'] = json.loads(data['items'])
-            except json.JSONDecodeError:
-                pass
+    @staticmethod
+    def _parse_items(data):
+        """Extrahiert die Positionsliste aus den Request-Daten (JSON-String oder Liste)"""
+        items_data = data.pop('items', [])
         
-        print(f"DEBUG VIEW: Creating quotation with {len(data.get('items', []))} items")
+        # QueryDict.pop liefert eine Liste der Werte
+        if isinstance(items_data, list) and len(items_data) == 1 and isinstance(items_data[0], str):
+            items_data = items_data[0]
         
-        # Trenne items vom rest der Daten
-        items_data = data.pop('items', [])
+        # Parse items if it's a JSON string (ggf. doppelt kodiert)
+        for _ in range(2):
+            if isinstance(items_data, str):
+                try:
+                    items_data = json.loads(items_data)
+                except json.JSONDecodeError:
+                    items_data = []
         
         # Check if items_data is a nested list (happens with some JSON parsing)
-        if items_data and isinstance(items_data, list) and len(items_data) > 0 and isinstance(items_data[0], list):
+        if items_data and isinstance(items_data, list) and isinstance(items_data[0], list):
             items_data = items_data[0]
-            print(f"DEBUG: Unwrapped nested list in create()")
+        return items_data or []
+    
+    @staticmethod
+    def _existing_item_objects(items_data):
+        """
+        Ermittelt die referenzierten Produkte aller Positionen mit einer Abfrage
+        pro Produkttyp, damit die Positionsvalidierung keine Einzelabfragen braucht.
+        """
+        from collections import defaultdict
+        from django.contrib.contenttypes.models import ContentType
         
-        print(f"DEBUG: Items data type: {type(items_data)}, length: {len(items_data) if items_data else 0}")
-        if items_data:
-            print(f"DEBUG: First item type: {type(items_data[0]) if items_data else 'N/A'}")
-            if items_data and isinstance(items_data[0], dict):
-                print(f"DEBUG: First item preview: {list(items_data[0].keys())}")
+        wanted = defaultdict(set)
+        for row in items_data:
+            content_type = row.get('content_type')
+            if not isinstance(content_type, dict) or not row.get('object_id'):
+                continue
+            try:
+                wanted[(content_type.get('app_label'), content_type.get('model'))].add(int(row['object_id']))
+            except (TypeError, ValueError):
+                continue
+        
+        existing = set()
+        for (app_label, model), ids in wanted.items():
+            try:
+                content_type = ContentType.objects.get_by_natural_key(app_label, model)
+            except ContentType.DoesNotExist:
+                continue
+            model_class = content_type.model_class()
+            if model_class is None:
+                continue
+            for pk in model_class.objects.filter(pk__in=ids).values_list('pk', flat=True):
+                existing.add((content_type.id, pk))
+        return existing
+    
+    def _validate_items(self, items_data, existing_items):
+        """Validiert alle Positionen gemeinsam; gibt (validierte Daten, Fehler-Response) zurück"""
+        validated, errors = validate_item_rows(
+            QuotationItemCreateUpdateSerializer,
+            items_data,
+            existing=existing_items,
+            context={'existing_objects': self._existing_item_objects(items_data)}
+        )
+        if errors:
+            # Fehler der ersten ungültigen Position (Antwortformat wie bisher)
+            first_error = next(e for e in errors if e)
+            return None, Response(first_error, status=status.HTTP_400_BAD_REQUEST)
+        return validated, None
+    
+    def create(self, request, *args, **kwargs):
+        """Custom create um items als JSON zu verarbeiten"""
+        data = request.data.copy()
+        
+        # Trenne items vom rest der Daten
+        items_data = self._parse_items(data)
         
-        # Create quotation ohne items
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        print(f"DEBUG VIEW: Serializer is valid")
-        self.perform_create(serializer)
-        instance = serializer.instance
+        validated_items, error_response = self._validate_items(items_data, {})
+        if error_response:
+            return error_response
         
-        # Items manuell verarbeiten
-        print(f"DEBUG: Creating {len(items_data)} items")
-        
-        for item_data in items_data:
-            print(f"DEBUG: Creating item")
-            item_serializer = QuotationItemCreateUpdateSerializer(data=item_data)
-            
-            if item_serializer.is_valid():
-                saved_item = item_serializer.save(quotation=instance)
-                print(f"DEBUG: Item saved successfully: {saved_item.id}")
-            else:
-                print(f"DEBUG: Item validation failed: {item_serializer.errors}")
-                # Rollback: Lösche das gerade erstellte Angebot
-                instance.delete()
-                return Response(item_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # Angebot und alle Positionen in einer Transaktion anlegen
+        with transaction.atomic(), deferred_totals():
+            self.perform_create(serializer)
+            instance = serializer.instance
+            QUOTATION_ITEM_SYNC.apply(instance, validated_items, existing=[])
+            schedule_refresh(instance)
         
         # Nutze DetailSerializer für die Response um items zu inkludieren
         detail_serializer = QuotationDetailSerializer(instance)
@@ -124,88 +185,37 @@ class QuotationViewSet(viewsets.ModelViewSet):
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
     def update(self, request, *args, **kwargs):
-        """Custom update um items als JSON zu verarbeiten"""
+        """
+        Custom update um items als JSON zu verarbeiten.
+        
+        Alle Positionen werden gemeinsam validiert und anschließend als Differenz
+        (delete / bulk_update / bulk_create) in einer Transaktion geschrieben.
+        """
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         data = request.data.copy()
-        
-        # Parse items if it's a JSON string
-        if 'items' in data and isinstance(data['items'], str):
-            try:
-                data['items'] = json.loads(data['items'])
-            except json.JSONDecodeError:
-                pass
-        
-        print(f"DEBUG VIEW: Updating quotation {instance.id} with {len(data.get('items', []))} items")
-        if 'items' in data and data['items']:
-            print(f"DEBUG VIEW: First item data: {data['items'][0]}")
-            print(f"DEBUG VIEW: First item type: {type(data['items'][0])}")
+        items_provided = 'items' in data
         
         # Trenne items vom rest der Daten
-        items_data = data.pop('items', [])
+        items_data = self._parse_items(data)
         
-        # Check if items_data is a nested list (happens with some JSON parsing)
-        if items_data and isinstance(items_data, list) and len(items_data) > 0 and isinstance(items_data[0], list):
-            items_data = items_data[0]
-            print(f"DEBUG: Unwrapped nested list")
-        
-        # Check if items_data is already a list - might be double-parsed JSON
-        if items_data and isinstance(items_data, str):
-            try:
-                items_data = json.loads(items_data)
-            except:
-                pass
-        
-        print(f"DEBUG: Items data type: {type(items_data)}, length: {len(items_data) if items_data else 0}")
-        if items_data:
-            print(f"DEBUG: First item type: {type(items_data[0]) if items_data else 'N/A'}")
-            if items_data and isinstance(items_data[0], dict):
-                print(f"DEBUG: First item: {items_data[0].get('id', 'new')}")
-        
-        # Update quotation ohne items
         serializer = self.get_serializer(instance, data=data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        print(f"DEBUG VIEW: Serializer is valid")
-        self.perform_update(serializer)
         
-        # Items manuell verarbeiten
-        print(f"DEBUG: Processing {len(items_data)} items")
+        existing_items = list(QuotationItem.objects.filter(quotation=instance))
+        sync_items = items_provided or not partial
+        if sync_items:
+            validated_items, error_response = self._validate_items(
+                items_data, {item.id: item for item in existing_items}
+            )
+            if error_response:
+                return error_response
         
-        # Bestehende items sammeln
-        existing_items = {item.id: item for item in instance.items.all()}
-        processed_item_ids = set()
-        
-        for item_data in items_data:
-            print(f"DEBUG: Processing item: {item_data.get('id', 'new')}")
-            
-            item_id = item_data.get('id')
-            
-            if item_id and item_id in existing_items:
-                # Update existing item
-                print(f"DEBUG: Updating existing item {item_id}")
-                item_serializer = QuotationItemCreateUpdateSerializer(
-                    existing_items[item_id],
-                    data=item_data,
-                    partial=True
-                )
-            else:
-                # Create new item
-                print(f"DEBUG: Creating new item")
-                item_serializer = QuotationItemCreateUpdateSerializer(data=item_data)
-            
-            if item_serializer.is_valid():
-                saved_item = item_serializer.save(quotation=instance)
-                processed_item_ids.add(saved_item.id)
-                print(f"DEBUG: Item saved successfully: {saved_item.id}")
-            else:
-                print(f"DEBUG: Item validation failed: {item_serializer.errors}")
-                return Response(item_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Delete items that weren't in the update
-        for item_id, item in existing_items.items():
-            if item_id not in processed_item_ids:
-                print(f"DEBUG: Deleting item {item_id}")
-                item.delete()
+        with transaction.atomic(), deferred_totals():
+            self.perform_update(serializer)
+            if sync_items:
+                QUOTATION_ITEM_SYNC.apply(instance, validated_items, existing=existing_items)
+                schedule_refresh(instance)
         
         if getattr(instance, '_prefetched_objects_cache', None):
             instance._prefetched_objects_cache = {}
@@ -323,12 +333,13 @@ class QuotationViewSet(viewsets.ModelViewSet):
         
         original.save()
         
-        # Kopiere alle Items
+        # Kopiere alle Items in einem Batch
         for item in original_items:
             item.pk = None
             item.id = None
             item.quotation = original
-            item.save()
+        QuotationItem.objects.bulk_create(original_items)
+        original.refresh_totals()
         
         serializer = QuotationDetailSerializer(original)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -393,57 +404,11 @@ class MarketingItemViewSet(viewsets.ModelViewSet):
             uploaded_by=request.user
         )
         
-        # Generate thumbnail from saved file on disk
-        self._generate_thumbnail(attachment)
-        
+        # Vorschaubilder entstehen im Hintergrund (core.thumbnails)
         from .serializers import MarketingItemFileSerializer
         serializer = MarketingItemFileSerializer(attachment, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
-    def _generate_thumbnail(self, attachment, max_size=(300, 300)):
-        """Erzeugt ein Vorschaubild für Bilder und PDFs"""
-        try:
-            content_type = (attachment.content_type or '').lower()
-            filename_lower = attachment.filename.lower()
-            
-            # Read bytes from the saved file on disk
-            with attachment.file.open('rb') as f:
-                file_bytes = f.read()
-            
-            thumb_image = None
-            
-            if content_type.startswith('image/') or filename_lower.endswith(
-                ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
-            ):
-                img = Image.open(io.BytesIO(file_bytes))
-                img.load()
-                img.thumbnail(max_size, Image.LANCZOS)
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                thumb_image = img
-                
-            elif content_type == 'application/pdf' or filename_lower.endswith('.pdf'):
-                import fitz  # PyMuPDF
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                if doc.page_count > 0:
-                    page = doc[0]
-                    mat = fitz.Matrix(2.0, 2.0)
-                    pix = page.get_pixmap(matrix=mat, alpha=False)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    img.thumbnail(max_size, Image.LANCZOS)
-                    thumb_image = img
-                doc.close()
-            
-            if thumb_image:
-                buffer = io.BytesIO()
-                thumb_image.save(buffer, format='JPEG', quality=85)
-                buffer.seek(0)
-                thumb_name = f"thumb_{attachment.id}.jpg"
-                attachment.thumbnail.save(thumb_name, ContentFile(buffer.read()), save=True)
-                
-        except Exception as e:
-            logger.error(f"Thumbnail-Generierung fehlgeschlagen für {attachment.filename}: {e}", exc_info=True)
-    
     @action(detail=True, methods=['delete'], url_path='delete_attachment/(?P<attachment_id>[^/.]+)')
     def delete_attachment(self, request, pk=None, attachment_id=None):
         """Löscht einen Dateianhang"""
@@ -464,9 +429,7 @@ class MarketingItemViewSet(viewsets.ModelViewSet):
         marketing_item = self.get_object()
         try:
             attachment = MarketingItemFile.objects.get(id=attachment_id, marketing_item=marketing_item)
-            return FileResponse(attachment.file.open('rb'), 
-                              as_attachment=True, 
-                              filename=attachment.filename)
+            return media_response(request, attachment.file, filename=attachment.filename)
         except MarketingItemFile.DoesNotExist:
             raise Http404("Anhang nicht gefunden")
 
@@ -626,140 +589,76 @@ class SalesTicketViewSet(viewsets.ModelViewSet):
             return SalesTicketCreateUpdateSerializer
         return SalesTicketDetailSerializer
     
+    # Protokollierte Felder (Änderungsprotokoll und Beobachter-Benachrichtigung)
+    TRACKED_FIELDS = {
+        'title': 'Titel',
+        'status': 'Status',
+        'category': 'Kategorie',
+        'assigned_to_id': 'Zugewiesen an',
+        'due_date': 'Fälligkeitsdatum',
+    }
+
+    @staticmethod
+    def _assign(fanout, ticket):
+        """Erinnerung und Notification für den zugewiesenen User"""
+        fanout.assign(
+            ticket.assigned_to_id,
+            reminder_title=f"Zugewiesen: Sales-Ticket #{ticket.ticket_number}",
+            description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            notification_title=f"Sales-Ticket #{ticket.ticket_number} zugewiesen",
+            notification_message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            related_object_type='sales_ticket',
+            related_object_id=ticket.id,
+            related_url=f"/sales/tickets/{ticket.id}",
+        )
+
     def perform_create(self, serializer):
         """Setze created_by beim Erstellen und füge Ersteller + Zugewiesenen als Beobachter hinzu"""
-        ticket = serializer.save(created_by=self.request.user)
-        
-        # Ersteller automatisch als Beobachter hinzufügen
-        if ticket.created_by:
-            ticket.watchers.add(ticket.created_by)
-        
-        # Wenn ein User zugewiesen wurde, Erinnerung und Notification erstellen
-        if ticket.assigned_to:
-            ticket.watchers.add(ticket.assigned_to)
-            try:
-                from django.utils import timezone
-                from datetime import timedelta
-                from users.models import Reminder, Notification
-                due = timezone.now().date() + timedelta(days=1)
-                Reminder.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Zugewiesen: Sales-Ticket #{ticket.ticket_number}",
-                    description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    due_date=due,
-                    related_object_type='sales_ticket',
-                    related_object_id=ticket.id,
-                    related_url=f"/sales/tickets/{ticket.id}"
-                )
-                # Benachrichtigung im NotificationCenter
-                Notification.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Sales-Ticket #{ticket.ticket_number} zugewiesen",
-                    message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    notification_type='info',
-                    related_url=f'/sales/tickets/{ticket.id}'
-                )
-            except Exception:
-                pass
+        with fan_out(actor=self.request.user) as fanout:
+            ticket = serializer.save(created_by=self.request.user)
+            watchers = recipient_ids(ticket.created_by_id, ticket.assigned_to_id)
+            if watchers:
+                ticket.watchers.add(*watchers)
+            # Wenn ein User zugewiesen wurde, Erinnerung und Notification erstellen
+            self._assign(fanout, ticket)
     
     def perform_update(self, serializer):
         """Update mit Changelog und Watcher-Benachrichtigungen"""
-        old_instance = self.get_object()
-        old_data = {
-            'title': old_instance.title,
-            'status': old_instance.status,
-            'category': old_instance.category,
-            'assigned_to': old_instance.assigned_to_id,
-            'due_date': old_instance.due_date,
-        }
-        old_assigned_to = old_instance.assigned_to
-        
-        instance = serializer.save()
-        
-        # Änderungen protokollieren
         from .models import SalesTicketChangeLog
-        field_labels = {
-            'title': 'Titel',
-            'status': 'Status',
-            'category': 'Kategorie',
-            'assigned_to': 'Zugewiesen an',
-            'due_date': 'Fälligkeitsdatum',
-        }
         
-        changes = []
-        new_data = {
-            'title': instance.title,
-            'status': instance.status,
-            'category': instance.category,
-            'assigned_to': instance.assigned_to_id,
-            'due_date': instance.due_date,
-        }
+        # serializer.instance enthält bis zum Speichern noch die alten Werte
+        old_data = {field: getattr(serializer.instance, field) for field in self.TRACKED_FIELDS}
         
-        for field, old_value in old_data.items():
-            new_value = new_data.get(field)
-            if old_value != new_value:
-                SalesTicketChangeLog.objects.create(
-                    ticket=instance,
-                    field_name=field_labels.get(field, field),
-                    old_value=str(old_value or ''),
-                    new_value=str(new_value or ''),
-                    changed_by=self.request.user
-                )
-                changes.append((field_labels.get(field, field), str(old_value or ''), str(new_value or '')))
-        
-        # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
-        if old_assigned_to != instance.assigned_to:
-            if old_assigned_to:
-                instance.watchers.remove(old_assigned_to)
-            if instance.assigned_to:
-                instance.watchers.add(instance.assigned_to)
-                # Erinnerung und Notification für neu zugewiesenen User
-                try:
-                    from django.utils import timezone
-                    from datetime import timedelta
-                    from users.models import Reminder, Notification
-                    due = timezone.now().date() + timedelta(days=1)
-                    Reminder.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Zugewiesen: Sales-Ticket #{instance.ticket_number}",
-                        description=f"Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        due_date=due,
-                        related_object_type='sales_ticket',
-                        related_object_id=instance.id,
-                        related_url=f"/sales/tickets/{instance.id}"
-                    )
-                    Notification.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Sales-Ticket #{instance.ticket_number} zugewiesen",
-                        message=f"Das Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        notification_type='info',
-                        related_url=f'/sales/tickets/{instance.id}'
-                    )
-                except Exception:
-                    pass
-        
-        # Benachrichtige Beobachter über Änderungen
-        if changes:
-            from users.models import Notification
-            message_lines = [f"Änderungen an Sales-Ticket #{instance.ticket_number} - {instance.title}"]
-            message_lines.append("")
-            for label, oldv, newv in changes:
-                message_lines.append(f"• {label}: {oldv or '(leer)'} → {newv or '(leer)'}")
-            message_text = "\n".join(message_lines)
+        with fan_out(actor=self.request.user) as fanout:
+            instance = serializer.save()
+            new_data = {field: getattr(instance, field) for field in self.TRACKED_FIELDS}
+            changes = field_changes(old_data, new_data, self.TRACKED_FIELDS)
             
-            for watcher in instance.watchers.all():
-                if watcher == self.request.user:
-                    continue
-                try:
-                    Notification.objects.create(
-                        user=watcher,
-                        title=f"Änderung des Sales-Tickets #{instance.ticket_number}",
-                        message=message_text,
-                        notification_type='info',
-                        related_url=f'/sales/tickets/{instance.id}'
-                    )
-                except Exception:
-                    pass
+            # Änderungen protokollieren
+            fanout.log_changes(SalesTicketChangeLog, changes, ticket=instance)
+            
+            # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
+            old_assigned_to = old_data['assigned_to_id']
+            if old_assigned_to != instance.assigned_to_id:
+                if old_assigned_to:
+                    instance.watchers.remove(old_assigned_to)
+                if instance.assigned_to_id:
+                    instance.watchers.add(instance.assigned_to_id)
+                    self._assign(fanout, instance)
+            
+            # Benachrichtige Beobachter über Änderungen
+            if changes:
+                message_lines = [f"Änderungen an Sales-Ticket #{instance.ticket_number} - {instance.title}"]
+                message_lines.append("")
+                for label, oldv, newv in changes:
+                    message_lines.append(f"• {label}: {oldv or '(leer)'} → {newv or '(leer)'}")
+                fanout.notify(
+                    recipient_ids(instance.watchers, exclude=self.request.user),
+                    title=f"Änderung des Sales-Tickets #{instance.ticket_number}",
+                    message="\n".join(message_lines),
+                    notification_type='info',
+                    related_url=f'/sales/tickets/{instance.id}'
+                )
 
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
@@ -799,14 +698,10 @@ class SalesTicketViewSet(viewsets.ModelViewSet):
         try:
             attachment = SalesTicketAttachment.objects.get(id=attachment_id, ticket_id=pk)
             
-            if not attachment.file:
-                raise Http404('Datei nicht gefunden')
-            
-            response = FileResponse(attachment.file.open('rb'))
-            response['Content-Disposition'] = f'attachment; filename="{attachment.filename}"'
-            response['Content-Type'] = attachment.content_type or 'application/octet-stream'
-            
-            return response
+            return media_response(
+                request, attachment.file, filename=attachment.filename,
+                content_type=attachment.content_type or 'application/octet-stream'
+            )
         
         except SalesTicketAttachment.DoesNotExist:
             raise Http404('Anhang nicht gefunden')
@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from core.product_prices import PriceResolvingListSerializer
+from core.thumbnails import PreviewListSerializer, ThumbnailField
+from core.user_names import UserNameField
 from .models import (VSService, VSServicePrice, ServiceTicket, RMACase, TicketComment, 
                      TicketChangeLog, TroubleshootingTicket, TroubleshootingComment,
                      ServiceTicketAttachment, TroubleshootingAttachment, ServiceTicketTimeEntry,
@@ -40,6 +43,7 @@ class VSServiceListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = VSService
+        list_serializer_class = PriceResolvingListSerializer
         fields = [
             'id', 'article_number', 'name', 'short_description',
             'product_category', 'product_category_name',
@@ -62,7 +66,7 @@ class VSServiceDetailSerializer(serializers.ModelSerializer):
     prices = VSServicePriceSerializer(many=True, read_only=True)
     current_purchase_price = serializers.SerializerMethodField()
     current_list_price = serializers.SerializerMethodField()
-    created_by_name = serializers.SerializerMethodField()
+    created_by_name = UserNameField('created_by')
     product_category_name = serializers.CharField(source='product_category.name', read_only=True)
     
     class Meta:
@@ -85,12 +89,6 @@ class VSServiceDetailSerializer(serializers.ModelSerializer):
     def get_current_list_price(self, obj):
         price = obj.get_current_sales_price()
         return float(price) if price else None
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-
 
 class VSServiceCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer für Erstellen/Aktualisieren von VS-Service"""
@@ -112,7 +110,7 @@ class ServiceTicketListSerializer(serializers.ModelSerializer):
     customer_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     billing_display = serializers.CharField(source='get_billing_display', read_only=True)
-    assigned_to_name = serializers.SerializerMethodField()
+    assigned_to_name = UserNameField('assigned_to')
     is_open = serializers.BooleanField(read_only=True)
     
     class Meta:
@@ -128,58 +126,39 @@ class ServiceTicketListSerializer(serializers.ModelSerializer):
         if obj.customer:
             return str(obj.customer)
         return None
-    
-    def get_assigned_to_name(self, obj):
-        if obj.assigned_to:
-            return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
-        return None
 
 
 class TicketCommentSerializer(serializers.ModelSerializer):
     """Serializer für Ticket Kommentare"""
-    created_by_name = serializers.SerializerMethodField()
+    created_by_name = UserNameField('created_by')
     
     class Meta:
         model = TicketComment
         fields = ['id', 'comment', 'created_by', 'created_by_name', 'created_at']
         read_only_fields = ['id', 'created_at', 'created_by', 'created_by_name']
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-
 
 class TicketChangeLogSerializer(serializers.ModelSerializer):
     """Serializer für Ticket Änderungsprotokoll"""
-    changed_by_name = serializers.SerializerMethodField()
+    changed_by_name = UserNameField('changed_by')
     
     class Meta:
         model = TicketChangeLog
         fields = ['id', 'field_name', 'old_value', 'new_value', 'changed_by', 'changed_by_name', 'changed_at']
         read_only_fields = ['id', 'changed_at', 'changed_by', 'changed_by_name']
-    
-    def get_changed_by_name(self, obj):
-        if obj.changed_by:
-            return f"{obj.changed_by.first_name} {obj.changed_by.last_name}".strip() or obj.changed_by.username
-        return None
-
 
 class ServiceTicketAttachmentSerializer(serializers.ModelSerializer):
     """Serializer für Service-Ticket Anhänge"""
-    uploaded_by_name = serializers.SerializerMethodField()
+    uploaded_by_name = UserNameField('uploaded_by')
     file_url = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField()
     
     class Meta:
         model = ServiceTicketAttachment
         fields = ['id', 'file', 'file_url', 'filename', 'file_size', 'content_type', 
-                  'is_image', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
+                  'is_image', 'thumbnails', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at', 'file_size', 'content_type', 'is_image']
+        list_serializer_class = PreviewListSerializer
     
-    def get_uploaded_by_name(self, obj):
-        if obj.uploaded_by:
-            return f"{obj.uploaded_by.first_name} {obj.uploaded_by.last_name}".strip() or obj.uploaded_by.username
-        return None
     
     def get_file_url(self, obj):
         if obj.file:
@@ -189,8 +168,8 @@ class ServiceTicketAttachmentSerializer(serializers.ModelSerializer):
 
 class ServiceTicketTimeEntrySerializer(serializers.ModelSerializer):
     """Serializer für Service-Ticket Zeiteinträge"""
-    employee_name = serializers.SerializerMethodField()
-    created_by_name = serializers.SerializerMethodField()
+    employee_name = UserNameField('employee')
+    created_by_name = UserNameField('created_by')
     
     class Meta:
         model = ServiceTicketTimeEntry
@@ -199,24 +178,14 @@ class ServiceTicketTimeEntrySerializer(serializers.ModelSerializer):
                   'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
-    def get_employee_name(self, obj):
-        if obj.employee:
-            return f"{obj.employee.first_name} {obj.employee.last_name}".strip() or obj.employee.username
-        return None
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-
 
 class ServiceTicketDetailSerializer(serializers.ModelSerializer):
     """Detaillierter Serializer für Service Tickets"""
     customer_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     billing_display = serializers.CharField(source='get_billing_display', read_only=True)
-    assigned_to_name = serializers.SerializerMethodField()
-    created_by_name = serializers.SerializerMethodField()
+    assigned_to_name = UserNameField('assigned_to')
+    created_by_name = UserNameField('created_by')
     linked_rma_number = serializers.SerializerMethodField()
     linked_system_name = serializers.SerializerMethodField()
     comments = TicketCommentSerializer(many=True, read_only=True)
@@ -251,16 +220,6 @@ class ServiceTicketDetailSerializer(serializers.ModelSerializer):
             return str(obj.customer)
         return None
     
-    def get_assigned_to_name(self, obj):
-        if obj.assigned_to:
-            return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
-        return None
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-    
     def get_linked_rma_number(self, obj):
         if obj.linked_rma:
             return obj.linked_rma.rma_number
@@ -275,9 +234,12 @@ class ServiceTicketDetailSerializer(serializers.ModelSerializer):
         return None
     
     def get_total_hours_spent(self, obj):
-        """Berechnet die Gesamtstunden aus allen Zeiteinträgen"""
-        from django.db.models import Sum
-        total = obj.time_entries.aggregate(Sum('hours_spent'))['hours_spent__sum']
+        """Gesamtstunden aus allen Zeiteinträgen (Annotation hours_spent_total, sonst Abfrage)"""
+        if 'hours_spent_total' in obj.__dict__:
+            total = obj.hours_spent_total
+        else:
+            from django.db.models import Sum
+            total = obj.time_entries.aggregate(Sum('hours_spent'))['hours_spent__sum']
         return float(total) if total else 0.0
 
 
@@ -297,8 +259,8 @@ class ServiceTicketCreateUpdateSerializer(serializers.ModelSerializer):
 
 class RMACaseTimeEntrySerializer(serializers.ModelSerializer):
     """Serializer für RMA-Fall Zeiteinträge"""
-    employee_name = serializers.SerializerMethodField()
-    created_by_name = serializers.SerializerMethodField()
+    employee_name = UserNameField('employee')
+    created_by_name = UserNameField('created_by')
     
     class Meta:
         model = RMACaseTimeEntry
@@ -307,16 +269,6 @@ class RMACaseTimeEntrySerializer(serializers.ModelSerializer):
                   'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
-    def get_employee_name(self, obj):
-        if obj.employee:
-            return f"{obj.employee.first_name} {obj.employee.last_name}".strip() or obj.employee.username
-        return None
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-
 
 class RMACaseListSerializer(serializers.ModelSerializer):
     """Serializer für RMA-Fall Liste"""
@@ -335,8 +287,8 @@ class RMACaseListSerializer(serializers.ModelSerializer):
 class RMACaseDetailSerializer(serializers.ModelSerializer):
     """Detaillierter Serializer für RMA-Fälle - alle Felder für Edit-Form"""
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    assigned_to_name = serializers.SerializerMethodField()
-    created_by_name = serializers.SerializerMethodField()
+    assigned_to_name = UserNameField('assigned_to')
+    created_by_name = UserNameField('created_by')
     time_entries = RMACaseTimeEntrySerializer(many=True, read_only=True)
     total_hours_spent = serializers.SerializerMethodField()
     
@@ -374,20 +326,15 @@ class RMACaseDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['rma_number', 'created_at', 'updated_at']
     
-    def get_assigned_to_name(self, obj):
-        if obj.assigned_to:
-            return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
-        return None
     
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
     
     def get_total_hours_spent(self, obj):
-        """Berechnet die Gesamtstunden aus allen Zeiteinträgen"""
-        from django.db.models import Sum
-        total = obj.time_entries.aggregate(Sum('hours_spent'))['hours_spent__sum']
+        """Gesamtstunden aus allen Zeiteinträgen (Annotation hours_spent_total, sonst Abfrage)"""
+        if 'hours_spent_total' in obj.__dict__:
+            total = obj.hours_spent_total
+        else:
+            from django.db.models import Sum
+            total = obj.time_entries.aggregate(Sum('hours_spent'))['hours_spent__sum']
         return float(total) if total else 0.0
 
 
@@ -425,34 +372,26 @@ class RMACaseCreateUpdateSerializer(serializers.ModelSerializer):
 
 class TroubleshootingCommentSerializer(serializers.ModelSerializer):
     """Serializer für Troubleshooting Kommentare"""
-    created_by_name = serializers.SerializerMethodField()
+    created_by_name = UserNameField('created_by')
     
     class Meta:
         model = TroubleshootingComment
         fields = ['id', 'comment', 'created_by', 'created_by_name', 'created_at']
         read_only_fields = ['id', 'created_at', 'created_by', 'created_by_name']
-    
-    def get_created_by_name(self, obj):
-        if obj.created_by:
-            return f"{obj.created_by.first_name} {obj.created_by.last_name}".strip() or obj.created_by.username
-        return None
-
 
 class TroubleshootingAttachmentSerializer(serializers.ModelSerializer):
     """Serializer für Troubleshooting Anhänge"""
-    uploaded_by_name = serializers.SerializerMethodField()
+    uploaded_by_name = UserNameField('uploaded_by')
     file_url = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField()
     
     class Meta:
         model = TroubleshootingAttachment
         fields = ['id', 'file', 'file_url', 'filename', 'file_size', 'content_type', 
-                  'is_image', 'is_primary', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
+                  'is_image', 'is_primary', 'thumbnails', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at', 'file_size', 'content_type', 'is_image']
+        list_serializer_class = PreviewListSerializer
     
-    def get_uploaded_by_name(self, obj):
-        if obj.uploaded_by:
-            return f"{obj.uploaded_by.first_name} {obj.uploaded_by.last_name}".strip() or obj.uploaded_by.username
-        return None
     
     def get_file_url(self, obj):
         if obj.file:
@@ -465,8 +404,8 @@ class TroubleshootingListSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
     category_display = serializers.CharField(source='get_category_display', read_only=True)
-    assigned_to_name = serializers.SerializerMethodField()
-    author_name = serializers.SerializerMethodField()
+    assigned_to_name = UserNameField('assigned_to')
+    author_name = UserNameField('author')
     is_open = serializers.BooleanField(read_only=True)
     main_photo_url = serializers.SerializerMethodField()
     
@@ -482,16 +421,7 @@ class TroubleshootingListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
     
-    def get_assigned_to_name(self, obj):
-        if obj.assigned_to:
-            return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
-        return None
     
-    def get_author_name(self, obj):
-        if obj.author:
-            return f"{obj.author.first_name} {obj.author.last_name}".strip() or obj.author.username
-        return None
-
     def get_main_photo_url(self, obj):
         attachments = list(obj.attachments.all())
         primary = next((att for att in attachments if att.is_primary and att.is_image), None)
@@ -507,9 +437,9 @@ class TroubleshootingDetailSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
     category_display = serializers.CharField(source='get_category_display', read_only=True)
-    assigned_to_name = serializers.SerializerMethodField()
-    author_name = serializers.SerializerMethodField()
-    last_changed_by_name = serializers.SerializerMethodField()
+    assigned_to_name = UserNameField('assigned_to')
+    author_name = UserNameField('author')
+    last_changed_by_name = UserNameField('last_changed_by')
     comments = TroubleshootingCommentSerializer(many=True, read_only=True)
     attachments = TroubleshootingAttachmentSerializer(many=True, read_only=True)
     is_open = serializers.BooleanField(read_only=True)
@@ -532,21 +462,8 @@ class TroubleshootingDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['ticket_number', 'created_at', 'updated_at', 'comments', 'attachments']
     
-    def get_assigned_to_name(self, obj):
-        if obj.assigned_to:
-            return f"{obj.assigned_to.first_name} {obj.assigned_to.last_name}".strip() or obj.assigned_to.username
-        return None
     
-    def get_author_name(self, obj):
-        if obj.author:
-            return f"{obj.author.first_name} {obj.author.last_name}".strip() or obj.author.username
-        return None
     
-    def get_last_changed_by_name(self, obj):
-        if obj.last_changed_by:
-            return f"{obj.last_changed_by.first_name} {obj.last_changed_by.last_name}".strip() or obj.last_changed_by.username
-        return None
-
     def get_main_photo_url(self, obj):
         attachments = list(obj.attachments.all())
         primary = next((att for att in attachments if att.is_primary and att.is_image), None)
@@ -0,0 +1,37 @@
+from core import search_index, thumbnails
+from .models import RMACase, ServiceTicket, ServiceTicketAttachment, TroubleshootingAttachment
+
+
+# Globaler Suchindex (siehe core.search_index)
+search_index.register(
+    ServiceTicket, 'service_ticket', 'Service-Ticket',
+    title=lambda t: f"{t.ticket_number} - {t.title}",
+    subtitle=lambda t: t.customer or t.get_status_display(),
+    keywords=lambda t: [
+        t.ticket_number, t.title, t.contact_email,
+        t.customer and t.customer.search_text,
+    ],
+    scope='can_read_service_tickets', main_scope='can_read_service',
+    url='/service/tickets/{pk}',
+    select_related=['customer'],
+    depends_on={'customers.Customer': 'customer'},
+)
+
+search_index.register(
+    RMACase, 'rma', 'RMA-Fall',
+    title=lambda r: r,
+    subtitle=lambda r: r.customer or r.customer_name,
+    keywords=lambda r: [
+        r.rma_number, r.title, r.customer_name, r.customer_contact, r.customer_email,
+        r.product_name, r.product_serial,
+        r.customer and r.customer.search_text,
+    ],
+    scope='can_read_service_rma', main_scope='can_read_service',
+    url='/service/rma/{pk}',
+    select_related=['customer'],
+    depends_on={'customers.Customer': 'customer'},
+)
+
+# Vorschaubilder (siehe core.thumbnails)
+thumbnails.register(ServiceTicketAttachment)
+thumbnails.register(TroubleshootingAttachment)
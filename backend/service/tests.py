@@ -1,3 +1,230 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.product_prices import attach_prices
+from users.models import Message, Notification, Reminder
+from customers.models import Customer
+from .models import (RMACase, RMACaseTimeEntry, ServiceTicket, ServiceTicketTimeEntry, TicketChangeLog,
+                     TicketComment, TroubleshootingComment, TroubleshootingTicket, VSService, VSServicePrice)
+from .serializers import VSServiceListSerializer
+
+
+class ProductPriceResolutionTests(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.services = [VSService.objects.create(name=f'Service {i}') for i in range(5)]
+        for i, service in enumerate(self.services):
+            VSServicePrice.objects.create(
+                vs_service=service, purchase_price=Decimal('10.00'), sales_price=Decimal('100.00') + i,
+                valid_from=today - timedelta(days=60), valid_until=today - timedelta(days=1)
+            )
+            VSServicePrice.objects.create(
+                vs_service=service, purchase_price=Decimal('20.00'), sales_price=Decimal('200.00') + i,
+                valid_from=today
+            )
+        self.yesterday = today - timedelta(days=1)
+
+    def test_list_serializer_resolves_prices_in_one_query(self):
+        services = VSService.objects.order_by('id')
+        with CaptureQueriesContext(connection) as queries:
+            data = VSServiceListSerializer(services, many=True).data
+        # Produkte + Preise, unabhängig von der Anzahl der Produkte
+        self.assertEqual(len(queries), 2)
+        self.assertEqual([row['current_sales_price'] for row in data], [200.0, 201.0, 202.0, 203.0, 204.0])
+        self.assertEqual(data[0]['current_purchase_price'], 20.0)
+
+    def test_prices_as_of_date(self):
+        service = self.services[2]
+        self.assertEqual(service.get_current_sales_price(on=self.yesterday), Decimal('102.00'))
+        self.assertEqual(service.get_current_sales_price(), Decimal('202.00'))
+
+        products = attach_prices(list(VSService.objects.order_by('id')), on=self.yesterday)
+        with self.assertNumQueries(0):
+            self.assertEqual(products[4].get_current_sales_price(), Decimal('104.00'))
+            self.assertEqual(products[4].get_current_purchase_price(), Decimal('10.00'))
+
+    def test_product_without_valid_price(self):
+        service = VSService.objects.create(name='Ohne Preis')
+        self.assertIsNone(service.get_current_sales_price())
+        self.assertIsNone(service.get_current_purchase_price(on=date.today() - timedelta(days=365)))
+
+
+class TicketFanOutTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.editor = User.objects.create_user('bearbeiter', email='bearbeiter@example.org', password='x')
+        self.assignee = User.objects.create_user('techniker', email='techniker@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.editor)
+
+    def _ticket_with_watchers(self, count):
+        User = get_user_model()
+        ticket = ServiceTicket.objects.create(title='Kamera defekt', created_by=self.editor)
+        watchers = [
+            User.objects.create_user(f'beobachter{ticket.pk}-{n}', email=f'b{ticket.pk}-{n}@example.org', password='x')
+            for n in range(count)
+        ]
+        ticket.watchers.add(self.editor, *watchers)
+        return ticket
+
+    def _edit(self, ticket):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/api/service/tickets/{ticket.pk}/', {
+                'title': 'Kamera ohne Bild', 'status': 'assigned', 'assigned_to': self.assignee.pk,
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_edit_cost_is_flat_in_number_of_watchers(self):
+        few = self._ticket_with_watchers(2)
+        many = self._ticket_with_watchers(25)
+        self.assertEqual(self._edit(few), self._edit(many))
+
+        self.assertEqual(TicketChangeLog.objects.filter(ticket=many).count(), 3)
+        # Beobachter und neu Zugewiesener, nicht der Bearbeiter selbst
+        messages = Message.objects.filter(related_ticket=many)
+        self.assertEqual(messages.count(), 26)
+        self.assertFalse(messages.filter(user=self.editor).exists())
+        self.assertEqual(Reminder.objects.filter(user=self.assignee, related_object_type='service_ticket').count(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.assignee).count(), 2)
+
+
+class ServiceListQueryTests(TestCase):
+    """Listen und Details brauchen eine feste Anzahl Abfragen, unabhängig von der Datenmenge"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user('service', email='service@example.org', password='x',
+                                             first_name='Sina', last_name='Service')
+        self.anonymous = User.objects.create_user('ohnename', email='ohnename@example.org', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def _tickets(self, count):
+        for n in range(count):
+            customer = Customer.objects.create(first_name='Kim', last_name=f'Kunde {n}')
+            ticket = ServiceTicket.objects.create(title=f'Ticket {n}', customer=customer,
+                                                  assigned_to=self.user, created_by=self.anonymous)
+            ServiceTicketTimeEntry.objects.create(ticket=ticket, date=date.today(), time=time(9), employee=self.user,
+                                                  hours_spent=Decimal('1.5'), description='x', created_by=self.user)
+            TicketComment.objects.create(ticket=ticket, comment='x', created_by=self.anonymous)
+        return ticket
+
+    def test_service_ticket_list_and_detail(self):
+        self._tickets(2)
+        few, _ = self._queries('/api/service/tickets/')
+        ticket = self._tickets(10)
+        many, data = self._queries('/api/service/tickets/')
+        self.assertEqual(few, many)
+        row = next(row for row in data['results'] if row['id'] == ticket.pk)
+        self.assertEqual(row['assigned_to_name'], 'Sina Service')
+        self.assertEqual(row['customer_name'], str(ticket.customer))
+
+        ServiceTicketTimeEntry.objects.create(ticket=ticket, date=date.today(), time=time(10), employee=self.anonymous,
+                                              hours_spent=Decimal('2'), description='y', created_by=self.user)
+        TicketComment.objects.create(ticket=ticket, comment='y', created_by=self.user)
+        detail_queries, detail = self._queries(f'/api/service/tickets/{ticket.pk}/')
+        # Ticket, Kommentare, Änderungen, Anhänge, Zeiteinträge, Beobachter
+        self.assertEqual(detail_queries, 6)
+        self.assertEqual(detail['total_hours_spent'], 3.5)
+        self.assertEqual(detail['created_by_name'], 'ohnename')
+        self.assertEqual({entry['employee_name'] for entry in detail['time_entries']}, {'Sina Service', 'ohnename'})
+
+    def test_rma_detail(self):
+        rma = RMACase.objects.create(title='Netzteil', assigned_to=self.user, created_by=self.user)
+        RMACaseTimeEntry.objects.create(rma_case=rma, date=date.today(), time=time(9), employee=self.user,
+                                        hours_spent=Decimal('0.5'), description='x', created_by=self.user)
+        few, _ = self._queries(f'/api/service/rma/{rma.pk}/')
+        for n in range(5):
+            RMACaseTimeEntry.objects.create(rma_case=rma, date=date.today(), time=time(10 + n), employee=self.anonymous,
+                                            hours_spent=Decimal('1'), description='x', created_by=self.anonymous)
+        many, data = self._queries(f'/api/service/rma/{rma.pk}/')
+        self.assertEqual(few, many)
+        self.assertEqual(data['total_hours_spent'], 5.5)
+        self.assertEqual(data['assigned_to_name'], 'Sina Service')
+
+    def test_troubleshooting_list_and_detail(self):
+        def create(count):
+            for n in range(count):
+                ticket = TroubleshootingTicket.objects.create(title=f'Fehler {n}', author=self.user,
+                                                              assigned_to=self.anonymous, last_changed_by=self.user)
+                TroubleshootingComment.objects.create(ticket=ticket, comment='x', created_by=self.user)
+            return ticket
+
+        create(2)
+        few, _ = self._queries('/api/service/troubleshooting/')
+        ticket = create(8)
+        many, data = self._queries('/api/service/troubleshooting/')
+        self.assertEqual(few, many)
+        self.assertEqual(data['results'][0]['author_name'], 'Sina Service')
+
+        detail_queries, detail = self._queries(f'/api/service/troubleshooting/{ticket.pk}/')
+        # Ticket, Kommentare, Anhänge
+        self.assertEqual(detail_queries, 3)
+        self.assertEqual(detail['last_changed_by_name'], 'Sina Service')
+        self.assertEqual(detail['comments'][0]['created_by_name'], 'Sina Service')
+
+
+class BatchTimeEntryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('batch', email='batch@example.org', password='x')
+        self.ticket = ServiceTicket.objects.create(title='Kamera', created_by=self.user)
+        self.entries = [
+            ServiceTicketTimeEntry.objects.create(ticket=self.ticket, date=date.today(), time=time(9 + n),
+                                                  employee=self.user, hours_spent=Decimal('1'), description='x')
+            for n in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/service/tickets/{self.ticket.pk}/batch_time_entries/'
+
+    def _batch(self, count, hours='2.25'):
+        return {
+            'create': [{'hours_spent': '0.5', 'description': f'neu {n}'} for n in range(count)],
+            'update': [{'id': self.entries[0].pk, 'hours_spent': hours}],
+            'delete': [self.entries[1].pk],
+        }
+
+    def test_create_update_delete_in_one_request(self):
+        with CaptureQueriesContext(connection) as few:
+            response = self.client.post(self.url, self._batch(2), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.entries[0].refresh_from_db()
+        self.assertEqual(self.entries[0].hours_spent, Decimal('2.25'))
+        self.assertFalse(ServiceTicketTimeEntry.objects.filter(pk=self.entries[1].pk).exists())
+        created = ServiceTicketTimeEntry.objects.filter(description='neu 1').get()
+        self.assertEqual((created.employee, created.created_by, created.date), (self.user, self.user, date.today()))
+
+        # Aufwand unabhängig von der Anzahl der Zeilen
+        self.entries[1] = ServiceTicketTimeEntry.objects.create(
+            ticket=self.ticket, date=date.today(), time=time(12), hours_spent=Decimal('1'), description='x')
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(self.url, self._batch(20, hours='3'), format='json')
+        self.assertEqual(len(few), len(many))
 
-# Create your tests here.
+    def test_invalid_rows_write_nothing(self):
+        other = ServiceTicket.objects.create(title='Anderes', created_by=self.user)
+        foreign = ServiceTicketTimeEntry.objects.create(ticket=other, date=date.today(), time=time(9),
+                                                        hours_spent=Decimal('1'), description='x')
+        batch = self._batch(1)
+        batch['create'].append({'description': 'ohne Zeit'})
+        batch['delete'].append(foreign.pk)
+        response = self.client.post(self.url, batch, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['create'][0], {})
+        self.assertIn('hours_spent', response.data['create'][1])
+        self.assertEqual(response.data['delete'][1], {'id': ['Nicht gefunden.']})
+        self.assertEqual(ServiceTicketTimeEntry.objects.count(), 3)
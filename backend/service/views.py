@@ -5,7 +5,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.http import FileResponse, Http404
+from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from django.http import Http404
 
 from .models import (VSService, VSServicePrice, ServiceTicket, RMACase, TicketComment, 
                      TicketChangeLog, TroubleshootingTicket, TroubleshootingComment,
@@ -22,10 +23,20 @@ from .serializers import (
     TroubleshootingListSerializer, TroubleshootingDetailSerializer, TroubleshootingCreateUpdateSerializer,
     TroubleshootingCommentSerializer, TroubleshootingAttachmentSerializer
 )
-from users.models import Message
+from core.conditional import ConditionalGetMixin
+from core.fanout import fan_out, field_changes, recipient_ids
+from core.item_sync import ItemSync, time_entry_initial, validate_item_batch
+from core.stats import cached_counts
+from core.media_delivery import media_response
+from core.user_names import with_user_names
 
+TIME_ENTRY_FIELDS = ['date', 'time', 'employee', 'hours_spent', 'description']
+# Batch-Endpunkte der Zeiteinträge (batch_time_entries)
+TICKET_TIME_ENTRY_SYNC = ItemSync(ServiceTicketTimeEntry, 'ticket', fields=TIME_ENTRY_FIELDS)
+RMA_TIME_ENTRY_SYNC = ItemSync(RMACaseTimeEntry, 'rma_case', fields=TIME_ENTRY_FIELDS)
 
-class VSServiceViewSet(viewsets.ModelViewSet):
+
+class VSServiceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für VS-Service Produkte
     """
@@ -85,6 +96,13 @@ class VSServicePriceViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
+def hours_spent_total(model, fk):
+    """Summe der Stunden aller Zeiteinträge eines Falls als Unterabfrage (Annotation hours_spent_total)"""
+    hours = model.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk) \
+        .annotate(total=Sum('hours_spent')).values('total')
+    return Subquery(hours)
+
+
 class ServiceTicketViewSet(viewsets.ModelViewSet):
     """
     ViewSet für Service Tickets
@@ -105,7 +123,22 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
         return ServiceTicketDetailSerializer
     
     def get_queryset(self):
-        queryset = ServiceTicket.objects.all()
+        # Kunde und Namen in derselben Abfrage wie die Tickets
+        queryset = with_user_names(ServiceTicket.objects.select_related('customer'), 'assigned_to')
+        if self.action == 'retrieve':
+            queryset = with_user_names(queryset, 'created_by').select_related(
+                'linked_rma', 'linked_system'
+            ).annotate(
+                hours_spent_total=hours_spent_total(ServiceTicketTimeEntry, 'ticket')
+            ).prefetch_related(
+                Prefetch('comments', queryset=with_user_names(TicketComment.objects.all(), 'created_by')),
+                Prefetch('change_logs', queryset=with_user_names(TicketChangeLog.objects.all(), 'changed_by')),
+                Prefetch('ticket_attachments',
+                         queryset=with_user_names(ServiceTicketAttachment.objects.all(), 'uploaded_by')),
+                Prefetch('time_entries',
+                         queryset=with_user_names(ServiceTicketTimeEntry.objects.all(), 'employee', 'created_by')),
+                'watchers',
+            )
         # Filter für offene/geschlossene Tickets
         is_open = self.request.query_params.get('is_open')
         if is_open is not None:
@@ -115,142 +148,76 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
                 queryset = queryset.filter(status__in=['no_solution', 'resolved'])
         return queryset
     
+    # Protokollierte Felder (Änderungsprotokoll und Beobachter-Nachricht)
+    TRACKED_FIELDS = {
+        'title': 'Thema',
+        'status': 'Status',
+        'billing': 'Abrechnung',
+        'assigned_to_id': 'Zugewiesen an',
+        'customer_id': 'Kunde',
+        'contact_email': 'E-Mail',
+        'linked_rma_id': 'Verknüpfte RMA',
+        'linked_visiview_ticket': 'VisiView Ticket',
+    }
+
+    @staticmethod
+    def _assign(fanout, ticket):
+        """Erinnerung und Notification für den zugewiesenen User"""
+        fanout.assign(
+            ticket.assigned_to_id,
+            reminder_title=f"Zugewiesen: Service-Ticket #{ticket.ticket_number}",
+            description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            notification_title=f"Service-Ticket #{ticket.ticket_number} zugewiesen",
+            notification_message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            related_object_type='service_ticket',
+            related_object_id=ticket.id,
+            related_url=f"/service/tickets/{ticket.id}",
+        )
+
     def perform_create(self, serializer):
-        ticket = serializer.save(created_by=self.request.user)
-        # Ersteller und zugewiesener User werden automatisch als Beobachter hinzugefügt
-        if ticket.created_by:
-            ticket.watchers.add(ticket.created_by)
-        if ticket.assigned_to:
-            ticket.watchers.add(ticket.assigned_to)
-            # Erstelle Erinnerung und Notification für zugewiesenen User
-            try:
-                from django.utils import timezone
-                from datetime import timedelta
-                from users.models import Reminder, Notification
-                due = timezone.now().date() + timedelta(days=1)
-                Reminder.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Zugewiesen: Service-Ticket #{ticket.ticket_number}",
-                    description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    due_date=due,
-                    related_object_type='service_ticket',
-                    related_object_id=ticket.id,
-                    related_url=f"/service/tickets/{ticket.id}"
-                )
-                # Benachrichtigung im NotificationCenter
-                Notification.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Service-Ticket #{ticket.ticket_number} zugewiesen",
-                    message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    notification_type='info',
-                    related_url=f'/service/tickets/{ticket.id}'
-                )
-            except Exception:
-                pass
+        with fan_out(actor=self.request.user) as fanout:
+            ticket = serializer.save(created_by=self.request.user)
+            # Ersteller und zugewiesener User werden automatisch als Beobachter hinzugefügt
+            watchers = recipient_ids(ticket.created_by_id, ticket.assigned_to_id)
+            if watchers:
+                ticket.watchers.add(*watchers)
+            self._assign(fanout, ticket)
     
     def perform_update(self, serializer):
-        old_instance = self.get_object()
-        old_data = {
-            'title': old_instance.title,
-            'status': old_instance.status,
-            'billing': old_instance.billing,
-            'assigned_to': old_instance.assigned_to_id,
-            'customer': old_instance.customer_id,
-            'contact_email': old_instance.contact_email,
-            'linked_rma': old_instance.linked_rma_id,
-            'linked_visiview_ticket': old_instance.linked_visiview_ticket,
-        }
-        old_assigned_to = old_instance.assigned_to
-        
-        instance = serializer.save()
-        
-        # Änderungen protokollieren
-        field_labels = {
-            'title': 'Thema',
-            'status': 'Status',
-            'billing': 'Abrechnung',
-            'assigned_to': 'Zugewiesen an',
-            'customer': 'Kunde',
-            'contact_email': 'E-Mail',
-            'linked_rma': 'Verknüpfte RMA',
-            'linked_visiview_ticket': 'VisiView Ticket',
-        }
-        
-        changes = []
-        new_data = {
-            'title': instance.title,
-            'status': instance.status,
-            'billing': instance.billing,
-            'assigned_to': instance.assigned_to_id,
-            'customer': instance.customer_id,
-            'contact_email': instance.contact_email,
-            'linked_rma': instance.linked_rma_id,
-            'linked_visiview_ticket': instance.linked_visiview_ticket,
-        }
-        
-        for field, old_value in old_data.items():
-            new_value = new_data.get(field)
-            if old_value != new_value:
-                TicketChangeLog.objects.create(
-                    ticket=instance,
-                    field_name=field_labels.get(field, field),
-                    old_value=str(old_value or ''),
-                    new_value=str(new_value or ''),
-                    changed_by=self.request.user
-                )
-                changes.append(field_labels.get(field, field))
-        
-        # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
-        if old_assigned_to != instance.assigned_to:
-            if old_assigned_to:
-                instance.watchers.remove(old_assigned_to)
-            if instance.assigned_to:
-                instance.watchers.add(instance.assigned_to)
-                # Erstelle Erinnerung und Notification für neu zugewiesenen User
-                try:
-                    from django.utils import timezone
-                    from datetime import timedelta
-                    from users.models import Reminder, Notification
-                    due = timezone.now().date() + timedelta(days=1)
-                    Reminder.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Zugewiesen: Service-Ticket #{instance.ticket_number}",
-                        description=f"Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        due_date=due,
-                        related_object_type='service_ticket',
-                        related_object_id=instance.id,
-                        related_url=f"/service/tickets/{instance.id}"
-                    )
-                    # Benachrichtigung im NotificationCenter
-                    Notification.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Service-Ticket #{instance.ticket_number} zugewiesen",
-                        message=f"Das Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        notification_type='info',
-                        related_url=f'/service/tickets/{instance.id}'
-                    )
-                except Exception:
-                    pass
-        
-        # Benachrichtigungen an Beobachter senden
-        if changes:
-            self._send_notifications(instance, f"Ticket {instance.ticket_number} wurde aktualisiert", 
-                                    f"Folgende Felder wurden geändert: {', '.join(changes)}")
-    
-    def _send_notifications(self, ticket, title, content):
-        """Sendet Benachrichtigungen an alle Beobachter"""
-        for watcher in ticket.watchers.all():
-            # Nicht an den User senden, der die Änderung gemacht hat
-            if watcher != self.request.user:
-                Message.objects.create(
-                    sender=self.request.user,
-                    user=watcher,
-                    title=title,
-                    content=content,
-                    message_type='ticket',
-                    related_ticket=ticket
+        # serializer.instance enthält bis zum Speichern noch die alten Werte
+        old_data = {field: getattr(serializer.instance, field) for field in self.TRACKED_FIELDS}
+        
+        with fan_out(actor=self.request.user) as fanout:
+            instance = serializer.save()
+            new_data = {field: getattr(instance, field) for field in self.TRACKED_FIELDS}
+            changes = field_changes(old_data, new_data, self.TRACKED_FIELDS)
+            
+            # Änderungen protokollieren
+            fanout.log_changes(TicketChangeLog, changes, ticket=instance)
+            
+            # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
+            old_assigned_to = old_data['assigned_to_id']
+            if old_assigned_to != instance.assigned_to_id:
+                if old_assigned_to:
+                    instance.watchers.remove(old_assigned_to)
+                if instance.assigned_to_id:
+                    instance.watchers.add(instance.assigned_to_id)
+                    self._assign(fanout, instance)
+            
+            # Benachrichtigungen an Beobachter senden
+            if changes:
+                self._send_notifications(
+                    fanout, instance, f"Ticket {instance.ticket_number} wurde aktualisiert",
+                    f"Folgende Felder wurden geändert: {', '.join(label for label, _, _ in changes)}"
                 )
     
+    def _send_notifications(self, fanout, ticket, title, content):
+        """Nachricht an alle Beobachter (außer dem Ändernden)"""
+        fanout.message(
+            recipient_ids(ticket.watchers, exclude=self.request.user),
+            title=title, content=content, message_type='ticket', related_ticket=ticket
+        )
+    
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_attachment(self, request, pk=None):
         """Lädt eine Datei für das Ticket hoch"""
@@ -290,9 +257,7 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
         ticket = self.get_object()
         try:
             attachment = ServiceTicketAttachment.objects.get(id=attachment_id, ticket=ticket)
-            return FileResponse(attachment.file.open('rb'), 
-                              as_attachment=True, 
-                              filename=attachment.filename)
+            return media_response(request, attachment.file, filename=attachment.filename)
         except ServiceTicketAttachment.DoesNotExist:
             raise Http404("Anhang nicht gefunden")
     
@@ -305,27 +270,24 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
         if not comment_text:
             return Response({'error': 'Kommentar darf nicht leer sein'}, status=status.HTTP_400_BAD_REQUEST)
         
-        comment = TicketComment.objects.create(
-            ticket=ticket,
-            comment=comment_text,
-            created_by=request.user
-        )
-        
-        # Änderungsprotokoll für Kommentar
-        TicketChangeLog.objects.create(
-            ticket=ticket,
-            field_name='Kommentar',
-            old_value='',
-            new_value=f"Neuer Kommentar von {request.user.get_full_name() or request.user.username}",
-            changed_by=request.user
-        )
-        
-        # Benachrichtigungen an Beobachter senden
-        self._send_notifications(
-            ticket,
-            f"Neuer Kommentar zu Ticket {ticket.ticket_number}",
-            f"{request.user.get_full_name() or request.user.username}: {comment_text[:100]}..."
-        )
+        author = request.user.get_full_name() or request.user.username
+        with fan_out(actor=request.user) as fanout:
+            comment = TicketComment.objects.create(
+                ticket=ticket,
+                comment=comment_text,
+                created_by=request.user
+            )
+            
+            # Änderungsprotokoll für Kommentar
+            fanout.log_changes(TicketChangeLog, [('Kommentar', '', f"Neuer Kommentar von {author}")], ticket=ticket)
+            
+            # Benachrichtigungen an Beobachter senden
+            self._send_notifications(
+                fanout,
+                ticket,
+                f"Neuer Kommentar zu Ticket {ticket.ticket_number}",
+                f"{author}: {comment_text[:100]}..."
+            )
         
         serializer = TicketCommentSerializer(comment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -334,7 +296,7 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
     def comments(self, request, pk=None):
         """Gibt alle Kommentare zurück"""
         ticket = self.get_object()
-        comments = ticket.comments.all().order_by('-created_at')
+        comments = with_user_names(ticket.comments.all(), 'created_by').order_by('-created_at')
         serializer = TicketCommentSerializer(comments, many=True)
         return Response(serializer.data)
     
@@ -342,7 +304,7 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
     def change_log(self, request, pk=None):
         """Gibt das Änderungsprotokoll zurück"""
         ticket = self.get_object()
-        logs = ticket.change_logs.all().order_by('-changed_at')
+        logs = with_user_names(ticket.change_logs.all(), 'changed_by').order_by('-changed_at')
         serializer = TicketChangeLogSerializer(logs, many=True)
         return Response(serializer.data)
     
@@ -350,7 +312,7 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
     def time_entries(self, request, pk=None):
         """Gibt alle Zeiteinträge zurück"""
         ticket = self.get_object()
-        entries = ticket.time_entries.all().order_by('-date', '-time')
+        entries = with_user_names(ticket.time_entries.all(), 'employee', 'created_by').order_by('-date', '-time')
         serializer = ServiceTicketTimeEntrySerializer(entries, many=True)
         return Response(serializer.data)
     
@@ -423,6 +385,22 @@ class ServiceTicketViewSet(viewsets.ModelViewSet):
         except ServiceTicketTimeEntry.DoesNotExist:
             raise Http404("Zeiteintrag nicht gefunden")
     
+    @action(detail=True, methods=['post'])
+    def batch_time_entries(self, request, pk=None):
+        """
+        Legt Zeiteinträge an, ändert und löscht sie in einer Anfrage
+        ({'create': [...], 'update': [{'id': ...}], 'delete': [ids]}) und gibt alle Zeiteinträge zurück
+        """
+        ticket = self.get_object()
+        batch, errors = validate_item_batch(
+            TICKET_TIME_ENTRY_SYNC, ticket, request.data, ServiceTicketTimeEntrySerializer,
+            initial=time_entry_initial(request.user),
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        TICKET_TIME_ENTRY_SYNC.apply_batch(ticket, batch, defaults={'created_by': request.user})
+        return self.time_entries(request, pk)
+    
     @action(detail=True, methods=['post'])
     def update_watchers(self, request, pk=None):
         """Aktualisiert die Beobachterliste"""
@@ -508,6 +486,17 @@ class RMACaseViewSet(viewsets.ModelViewSet):
             return RMACaseCreateUpdateSerializer
         return RMACaseDetailSerializer
     
+    def get_queryset(self):
+        queryset = RMACase.objects.all()
+        if self.action == 'retrieve':
+            queryset = with_user_names(queryset, 'assigned_to', 'created_by').annotate(
+                hours_spent_total=hours_spent_total(RMACaseTimeEntry, 'rma_case')
+            ).prefetch_related(
+                Prefetch('time_entries',
+                         queryset=with_user_names(RMACaseTimeEntry.objects.all(), 'employee', 'created_by')),
+            )
+        return queryset
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
@@ -515,7 +504,7 @@ class RMACaseViewSet(viewsets.ModelViewSet):
     def time_entries(self, request, pk=None):
         """Gibt alle Zeiteinträge zurück"""
         rma_case = self.get_object()
-        entries = rma_case.time_entries.all().order_by('-date', '-time')
+        entries = with_user_names(rma_case.time_entries.all(), 'employee', 'created_by').order_by('-date', '-time')
         serializer = RMACaseTimeEntrySerializer(entries, many=True)
         return Response(serializer.data)
     
@@ -587,6 +576,19 @@ class RMACaseViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
         except RMACaseTimeEntry.DoesNotExist:
             raise Http404("Zeiteintrag nicht gefunden")
+    
+    @action(detail=True, methods=['post'])
+    def batch_time_entries(self, request, pk=None):
+        """Legt Zeiteinträge an, ändert und löscht sie in einer Anfrage (siehe ServiceTicketViewSet)"""
+        rma_case = self.get_object()
+        batch, errors = validate_item_batch(
+            RMA_TIME_ENTRY_SYNC, rma_case, request.data, RMACaseTimeEntrySerializer,
+            initial=time_entry_initial(request.user),
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        RMA_TIME_ENTRY_SYNC.apply_batch(rma_case, batch, defaults={'created_by': request.user})
+        return self.time_entries(request, pk)
 
 
 class TroubleshootingViewSet(viewsets.ModelViewSet):
@@ -609,7 +611,16 @@ class TroubleshootingViewSet(viewsets.ModelViewSet):
         return TroubleshootingDetailSerializer
     
     def get_queryset(self):
-        queryset = TroubleshootingTicket.objects.all()
+        # Namen und Anhänge (Hauptfoto) ohne Abfragen je Ticket
+        queryset = with_user_names(TroubleshootingTicket.objects.all(), 'assigned_to', 'author')
+        if self.action == 'retrieve':
+            queryset = with_user_names(queryset, 'last_changed_by').prefetch_related(
+                Prefetch('comments', queryset=with_user_names(TroubleshootingComment.objects.all(), 'created_by')),
+                Prefetch('attachments',
+                         queryset=with_user_names(TroubleshootingAttachment.objects.all(), 'uploaded_by')),
+            )
+        elif self.action == 'list':
+            queryset = queryset.prefetch_related('attachments')
         # Filter für offene/geschlossene Tickets
         is_open = self.request.query_params.get('is_open')
         if is_open is not None:
@@ -688,9 +699,7 @@ class TroubleshootingViewSet(viewsets.ModelViewSet):
         ticket = self.get_object()
         try:
             attachment = TroubleshootingAttachment.objects.get(id=attachment_id, ticket=ticket)
-            return FileResponse(attachment.file.open('rb'), 
-                              as_attachment=True, 
-                              filename=attachment.filename)
+            return media_response(request, attachment.file, filename=attachment.filename)
         except TroubleshootingAttachment.DoesNotExist:
             raise Http404("Anhang nicht gefunden")
     
@@ -716,22 +725,11 @@ class TroubleshootingViewSet(viewsets.ModelViewSet):
     def comments(self, request, pk=None):
         """Gibt alle Kommentare zurück"""
         ticket = self.get_object()
-        comments = ticket.comments.all().order_by('-created_at')
+        comments = with_user_names(ticket.comments.all(), 'created_by').order_by('-created_at')
         serializer = TroubleshootingCommentSerializer(comments, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Gibt Statistiken zurück"""
-        total = TroubleshootingTicket.objects.count()
-        by_status = {}
-        for status_code, status_label in TroubleshootingTicket.STATUS_CHOICES:
-            by_status[status_code] = TroubleshootingTicket.objects.filter(status=status_code).count()
-        by_category = {}
-        for cat_code, cat_label in TroubleshootingTicket.CATEGORY_CHOICES:
-            by_category[cat_code] = TroubleshootingTicket.objects.filter(category=cat_code).count()
-        return Response({
-            'total': total,
-            'by_status': by_status,
-            'by_category': by_category
-        })
+        return Response(cached_counts(TroubleshootingTicket.objects.all(), 'status', 'category'))
@@ -667,15 +667,10 @@ class TradingProduct(models.Model):
         # Auf volle Euros aufrunden
         return visitron_price.quantize(Decimal('1'), rounding=ROUND_UP)
     
-    def get_current_price(self):
-        """Gibt den aktuell gültigen Preis-Eintrag zurück"""
-        from django.utils import timezone
-        today = timezone.now().date()
-        return self.price_history.filter(
-            valid_from__lte=today
-        ).filter(
-            models.Q(valid_until__isnull=True) | models.Q(valid_until__gte=today)
-        ).order_by('-valid_from').first()
+    def get_current_price(self, on=None):
+        """Gibt den aktuell (bzw. am Stichtag) gültigen Preis-Eintrag zurück"""
+        from core.product_prices import get_price_entry
+        return get_price_entry(self, on)
 
 
 class TradingProductPrice(models.Model):
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.product_prices import PriceResolvingListSerializer
 from .models import TradingProduct, TradingProductPrice, Supplier
 
 
@@ -76,6 +77,7 @@ class TradingProductListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TradingProduct
+        list_serializer_class = PriceResolvingListSerializer
         fields = [
             'id', 'visitron_part_number', 'supplier_part_number', 'name',
             'supplier', 'supplier_name', 'product_group', 'product_group_name',
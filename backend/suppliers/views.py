@@ -6,7 +6,6 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.http import FileResponse
 import mimetypes
 
 from .models import (
@@ -31,6 +30,8 @@ from .ms_serializers import (
     MaterialSupplyCreateUpdateSerializer
 )
 from .permissions import SupplierPermission
+from core.media_delivery import media_response
+from core.conditional import ConditionalGetMixin
 
 
 class SupplierPagination(PageNumberPagination):
@@ -92,7 +93,7 @@ class SupplierContactViewSet(viewsets.ModelViewSet):
     filterset_fields = ['supplier', 'contact_type']
 
 
-class TradingProductViewSet(viewsets.ModelViewSet):
+class TradingProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für Handelswaren
     """
@@ -156,7 +157,7 @@ class SupplierProductViewSet(viewsets.ModelViewSet):
     filterset_fields = ['supplier', 'product', 'is_preferred_supplier']
 
 
-class ProductGroupViewSet(viewsets.ModelViewSet):
+class ProductGroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für Warengruppen
     """
@@ -170,7 +171,7 @@ class ProductGroupViewSet(viewsets.ModelViewSet):
     ordering = ['supplier', 'name']
 
 
-class PriceListViewSet(viewsets.ModelViewSet):
+class PriceListViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für Preislisten
     """
@@ -211,16 +212,11 @@ class SupplierAttachmentViewSet(viewsets.ModelViewSet):
         """Download eines Attachments"""
         attachment = self.get_object()
         if attachment.file:
-            response = FileResponse(
-                attachment.file.open('rb'),
-                as_attachment=True,
-                filename=attachment.filename
-            )
-            return response
+            return media_response(request, attachment.file, filename=attachment.filename)
         return Response({'error': 'Keine Datei vorhanden'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class MaterialSupplyViewSet(viewsets.ModelViewSet):
+class MaterialSupplyViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet für Material & Supplies (Roh-, Hilfs- und Betriebsstoffe)
     """
@@ -5,3 +5,7 @@ class SystemsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'systems'
     verbose_name = 'Systeme'
+
+    def ready(self):
+        # Signale für den globalen Suchindex registrieren
+        from . import signals  # noqa: F401
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('systems', '0013_add_contact_person'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='system',
+            index=models.Index(fields=['created_at', 'id'], name='systems_sys_created_b955a8_idx'),
+        ),
+    ]
@@ -257,6 +257,10 @@ class System(models.Model):
         verbose_name = 'System'
         verbose_name_plural = 'Systeme'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset-Paginierung (?cursor=)
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.system_number} - {self.system_name}" if self.system_number else self.system_name
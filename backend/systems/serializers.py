@@ -1,5 +1,7 @@
 from datetime import date
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, annotated
+from core.thumbnails import PreviewListSerializer, ThumbnailField
 from .models import System, SystemComponent, SystemPhoto, ModelOrganismOption, ResearchFieldOption
 from customers.models import Customer
 
@@ -7,14 +9,16 @@ from customers.models import Customer
 class SystemPhotoSerializer(serializers.ModelSerializer):
     """Serializer für Systemfotos"""
     image_url = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField(file_field='image')
     
     class Meta:
         model = SystemPhoto
         fields = [
-            'id', 'system', 'image', 'image_url', 'title', 'description',
+            'id', 'system', 'image', 'image_url', 'thumbnails', 'title', 'description',
             'is_primary', 'is_outdated', 'position', 'uploaded_by', 'created_at'
         ]
         read_only_fields = ['id', 'uploaded_by', 'created_at']
+        list_serializer_class = PreviewListSerializer
     
     def get_image_url(self, obj):
         if obj.image:
@@ -60,8 +64,8 @@ class ResearchFieldOptionSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'is_active']
 
 
-class SystemListSerializer(serializers.ModelSerializer):
-    """Kompakter Serializer für Systemliste"""
+class SystemListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Kompakter Serializer für Systemliste (?fields= / ?omit=)"""
     customer_name = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     component_count = serializers.SerializerMethodField()
@@ -118,31 +122,41 @@ class SystemListSerializer(serializers.ModelSerializer):
         return ', '.join(parts) if parts else None
     
     def get_component_count(self, obj):
-        return obj.components.count()
+        return annotated(obj, 'component_count', obj.components.count)
     
     def get_photo_count(self, obj):
-        return obj.photos.count()
+        return annotated(obj, 'photo_count', obj.photos.count)
     
     def get_service_ticket_count(self, obj):
         from service.models import ServiceTicket
         from django.db.models import Q
+        if obj.customer_id and 'service_ticket_count' in obj.__dict__:
+            return obj.service_ticket_count
         return ServiceTicket.objects.filter(
             Q(linked_system=obj) |
-            Q(customer=obj.customer, description__icontains=obj.system_number)
+            Q(customer_id=obj.customer_id, description__icontains=obj.system_number)
         ).distinct().count()
     
     def get_project_count(self, obj):
         from projects.models import Project
         from django.db.models import Q
+        if obj.customer_id and 'project_count' in obj.__dict__:
+            return obj.project_count
         return Project.objects.filter(
             Q(systems=obj) |
-            Q(customer=obj.customer, description__icontains=obj.system_number)
+            Q(customer_id=obj.customer_id, description__icontains=obj.system_number)
         ).distinct().count()
     
     def get_primary_photo_url(self, obj):
-        primary = obj.photos.filter(is_primary=True).first()
-        if not primary:
-            primary = obj.photos.first()
+        if 'photos' in getattr(obj, '_prefetched_objects_cache', {}):
+            photos = obj.photos.all()
+            primary = next((photo for photo in photos if photo.is_primary), None)
+            if not primary and photos:
+                primary = photos[0]
+        else:
+            primary = obj.photos.filter(is_primary=True).first()
+            if not primary:
+                primary = obj.photos.first()
         if primary and primary.image:
             return primary.image.url
         return None
@@ -151,6 +165,11 @@ class SystemListSerializer(serializers.ModelSerializer):
         """Liefert das Datum des letzten Kontakteintrags"""
         from customers.models import ContactHistory, CustomerSystem
         
+        if 'last_system_contact' in obj.__dict__:
+            # annotiert (SystemViewSet.query_plan)
+            dates = [obj.last_system_contact, obj.last_customer_contact]
+            return max((d for d in dates if d), default=None)
+        
         # ContactHistory ist mit CustomerSystem verknüpft, nicht mit systems.System
         # Daher müssen wir über die system_number oder den Kunden suchen
         last_contact = None
@@ -165,9 +184,9 @@ class SystemListSerializer(serializers.ModelSerializer):
             pass
         
         # Auch Kunden-Kontakte ohne System-Verknüpfung berücksichtigen
-        if obj.customer:
+        if obj.customer_id:
             customer_contact = ContactHistory.objects.filter(
-                customer=obj.customer,
+                customer_id=obj.customer_id,
                 system__isnull=True
             ).order_by('-contact_date').first()
             
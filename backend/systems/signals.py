@@ -0,0 +1,21 @@
+from core import search_index, thumbnails
+from .models import System, SystemPhoto
+
+
+# Globaler Suchindex (siehe core.search_index)
+search_index.register(
+    System, 'system', 'System',
+    title=lambda s: s,
+    subtitle=lambda s: s.customer,
+    keywords=lambda s: [
+        s.system_number, s.system_name, s.location_university, s.location_institute, s.location_city,
+        s.customer and s.customer.search_text,
+    ],
+    scope='can_read_sales_systems', main_scope='can_read_sales',
+    url='/sales/systems/{pk}',
+    select_related=['customer'],
+    depends_on={'customers.Customer': 'customer'},
+)
+
+# Vorschaubilder (siehe core.thumbnails)
+thumbnails.register(SystemPhoto, field='image')
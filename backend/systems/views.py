@@ -5,7 +5,9 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery
+from core.fieldsets import SparseQueryMixin, subquery_count
+from core.conditional import ConditionalGetMixin
 
 from .models import System, SystemComponent, SystemPhoto, ModelOrganismOption, ResearchFieldOption
 from .serializers import (
@@ -16,7 +18,47 @@ from .serializers import (
 from .star_names import get_unused_star_name, search_star_names, IAU_STAR_NAMES
 
 
-class SystemViewSet(viewsets.ModelViewSet):
+def _annotate_component_count(queryset):
+    return queryset.annotate(
+        component_count=subquery_count(SystemComponent.objects.filter(system=OuterRef('pk')))
+    )
+
+
+def _annotate_photo_count(queryset):
+    return queryset.annotate(photo_count=subquery_count(SystemPhoto.objects.filter(system=OuterRef('pk'))))
+
+
+def _annotate_service_ticket_count(queryset):
+    # wie SystemListSerializer.get_service_ticket_count (Systeme ohne Kunde zählt der Serializer selbst)
+    from service.models import ServiceTicket
+    tickets = ServiceTicket.objects.filter(
+        Q(linked_system=OuterRef('pk')) |
+        Q(customer=OuterRef('customer'), description__icontains=OuterRef('system_number'))
+    )
+    return queryset.annotate(service_ticket_count=subquery_count(tickets))
+
+
+def _annotate_project_count(queryset):
+    # wie SystemListSerializer.get_project_count
+    from projects.models import Project
+    projects = Project.objects.filter(
+        Q(systems=OuterRef('pk')) |
+        Q(customer=OuterRef('customer'), description__icontains=OuterRef('system_number'))
+    )
+    return queryset.annotate(project_count=subquery_count(projects))
+
+
+def _annotate_last_contacts(queryset):
+    # Bestandteile von SystemListSerializer.get_last_contact_date
+    from customers.models import ContactHistory
+    latest = lambda contacts: Subquery(contacts.order_by('-contact_date').values('contact_date')[:1])  # noqa: E731
+    return queryset.annotate(
+        last_system_contact=latest(ContactHistory.objects.filter(system__system_number=OuterRef('system_number'))),
+        last_customer_contact=latest(ContactHistory.objects.filter(customer=OuterRef('customer'), system__isnull=True)),
+    )
+
+
+class SystemViewSet(SparseQueryMixin, viewsets.ModelViewSet):
     """
     ViewSet für Systeme
     """
@@ -40,6 +82,27 @@ class SystemViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ['system_number', 'system_name', 'created_at', 'customer__last_name', 'location_city', 'status', 'responsible_employee__last_name']
     ordering = ['-created_at']
+    # Liste: Joins, Prefetches und Zählungen nur für angeforderte Felder (?fields= / ?omit=)
+    query_plan = {
+        'customer_name': lambda queryset: queryset.select_related('customer'),
+        'responsible_employee_name': lambda queryset: queryset.select_related('responsible_employee'),
+        'visiview_license_serial': lambda queryset: queryset.select_related('visiview_license'),
+        'model_organisms': lambda queryset: queryset.prefetch_related('model_organisms'),
+        'research_fields': lambda queryset: queryset.prefetch_related('research_fields'),
+        'component_count': _annotate_component_count,
+        'photo_count': _annotate_photo_count,
+        'primary_photo_url': lambda queryset: queryset.prefetch_related('photos'),
+        'service_ticket_count': _annotate_service_ticket_count,
+        'project_count': _annotate_project_count,
+        'last_contact_date': _annotate_last_contacts,
+        'contact_overdue': _annotate_last_contacts,
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = self.plan_queryset(queryset)
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -488,7 +551,7 @@ class SystemViewSet(viewsets.ModelViewSet):
         })
 
 
-class ModelOrganismOptionViewSet(viewsets.ModelViewSet):
+class ModelOrganismOptionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ModelOrganismOption.objects.all()
     serializer_class = ModelOrganismOptionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -498,7 +561,7 @@ class ModelOrganismOptionViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class ResearchFieldOptionViewSet(viewsets.ModelViewSet):
+class ResearchFieldOptionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ResearchFieldOption.objects.all()
     serializer_class = ResearchFieldOptionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
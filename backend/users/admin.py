@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
 
+from .models import WorkCalendarDay
+
 User = get_user_model()
 
 
@@ -35,3 +37,12 @@ class UserAdmin(BaseUserAdmin):
     
     list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff', 'is_active']
     search_fields = ['username', 'email', 'first_name', 'last_name']
+
+
+@admin.register(WorkCalendarDay)
+class WorkCalendarDayAdmin(admin.ModelAdmin):
+    """Arbeitskalender: Feiertage und Betriebsferien (Grundlage der Soll-Stunden)"""
+    list_display = ['date', 'weekday', 'is_holiday', 'holiday_name']
+    list_filter = ['is_holiday']
+    list_editable = ['is_holiday', 'holiday_name']
+    date_hierarchy = 'date'
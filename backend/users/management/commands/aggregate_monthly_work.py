@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from users.models import TimeEntry, MonthlyWorkSummary
+from users.models import TimeEntry
+from users.working_time import month_range, summarize_month
 from datetime import date, timedelta
 
 User = get_user_model()
@@ -25,60 +26,20 @@ class Command(BaseCommand):
             year = prev_month_end.year
             month = prev_month_end.month
 
-        start = date(year, month, 1)
-        # calculate month_end
-        next_month = start.replace(day=28) + timedelta(days=4)
-        end = next_month - timedelta(days=next_month.day)
-
+        start, end = month_range(year, month)
         self.stdout.write(f'Aggregating {year}-{month:02d} ({start}..{end})')
 
+        # Ist-Stunden per SQL-Summe, Soll aus dem Arbeitskalender, ein Upsert für alle Benutzer
         users = User.objects.filter(is_active=True)
-        for user in users:
-            entries = TimeEntry.objects.filter(user=user, date__range=(start, end))
-            total_seconds = 0
-            for e in entries:
-                total_seconds += e.duration.total_seconds()
-            actual_hours = round(total_seconds / 3600, 2)
-
-            employee = getattr(user, 'employee', None)
-            weekly_target = float(employee.weekly_work_hours or 40.0) if employee else 40.0
-            work_days = list(employee.work_days or ['mon','tue','wed','thu','fri']) if employee else ['mon','tue','wed','thu','fri']
-            mapping = {'mon':0,'tue':1,'wed':2,'thu':3,'fri':4,'sat':5,'sun':6}
-
-            # count workdays in whole month
-            cur = start
-            workdays_in_month = 0
-            indices = [mapping[d] for d in work_days if d in mapping]
-            while cur <= end:
-                if cur.weekday() in indices:
-                    workdays_in_month += 1
-                cur += timedelta(days=1)
-
-            daily_target = weekly_target / (len(indices) or 5)
-            expected_hours = round(daily_target * workdays_in_month, 2)
-            difference = round(actual_hours - expected_hours, 2)
-
-            note = ''
-            if difference > 0:
-                note = f'+{difference}h Überschuss'
-            elif difference < 0:
-                note = f'{difference}h Fehlzeit'
-            else:
-                note = 'Ausgeglichen'
-
-            summary, created = MonthlyWorkSummary.objects.update_or_create(
-                user=user, year=year, month=month,
-                defaults={
-                    'actual_hours': actual_hours,
-                    'expected_hours': expected_hours,
-                    'difference': difference,
-                    'note': note
-                }
+        for summary in summarize_month(year, month, users=users):
+            self.stdout.write(
+                f'User {summary.user.username}: actual={summary.actual_hours} '
+                f'expected={summary.expected_hours} diff={summary.difference}'
             )
-            self.stdout.write(f'User {user.username}: actual={actual_hours} expected={expected_hours} diff={difference}')
 
-            if not dry_run:
-                count, _ = entries.delete()
-                self.stdout.write(f'  deleted {count} time entries')
+        if not dry_run:
+            # QuerySet.delete(): archivierte Einträge ändern die Übersichten nicht mehr
+            count, _ = TimeEntry.objects.filter(user__in=users, date__range=(start, end)).delete()
+            self.stdout.write(f'  deleted {count} time entries')
 
         self.stdout.write('Done')
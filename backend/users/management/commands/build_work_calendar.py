@@ -0,0 +1,20 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from users.working_time import ensure_calendar
+
+
+class Command(BaseCommand):
+    help = 'Legt den Arbeitskalender (Wochentage, bundesweite Feiertage) für die angegebenen Jahre an'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from-year', type=int, help='Erstes Jahr (Standard: aktuelles Jahr)')
+        parser.add_argument('--to-year', type=int, help='Letztes Jahr (Standard: nächstes Jahr)')
+
+    def handle(self, *args, **options):
+        this_year = date.today().year
+        from_year = options.get('from_year') or this_year
+        to_year = options.get('to_year') or max(from_year, this_year + 1)
+        created = ensure_calendar(date(from_year, 1, 1), date(to_year, 12, 31))
+        self.stdout.write(self.style.SUCCESS(f'{created} Tage angelegt ({from_year}-{to_year})'))
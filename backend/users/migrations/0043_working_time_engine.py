@@ -0,0 +1,60 @@
+# Generated by Django 5.0 on 2026-10-19 02:05
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+
+
+def populate_duration_seconds(apps, schema_editor):
+    """Berechnet die Dauer bestehender Zeiteinträge (wie TimeEntry.duration)"""
+    TimeEntry = apps.get_model('users', 'TimeEntry')
+    batch = []
+    for entry in TimeEntry.objects.iterator(chunk_size=1000):
+        total = datetime.combine(entry.date, entry.end_time) - datetime.combine(entry.date, entry.start_time)
+        try:
+            h, m, s = map(int, entry.break_time.split(':'))
+            break_duration = timedelta(hours=h, minutes=m, seconds=s)
+        except ValueError:
+            break_duration = timedelta(minutes=30)
+        entry.duration_seconds = int((total - break_duration).total_seconds())
+        batch.append(entry)
+        if len(batch) >= 1000:
+            TimeEntry.objects.bulk_update(batch, ['duration_seconds'])
+            batch = []
+    if batch:
+        TimeEntry.objects.bulk_update(batch, ['duration_seconds'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0042_user_can_read_sales_sql_angebote_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkCalendarDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Datum')),
+                ('weekday', models.PositiveSmallIntegerField(verbose_name='Wochentag')),
+                ('is_holiday', models.BooleanField(default=False, verbose_name='Feiertag / arbeitsfrei')),
+                ('holiday_name', models.CharField(blank=True, max_length=100, verbose_name='Bezeichnung')),
+            ],
+            options={
+                'verbose_name': 'Arbeitskalendertag',
+                'verbose_name_plural': 'Arbeitskalender',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='duration_seconds',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Dauer (Sekunden)'),
+        ),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['date', 'user'], name='users_timee_date_5d9fb5_idx'),
+        ),
+        migrations.RunPython(populate_duration_seconds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0043_working_time_engine'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['created_at', 'id'], name='users_timee_created_f51ad1_idx'),
+        ),
+    ]
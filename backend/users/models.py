@@ -361,6 +361,8 @@ class TimeEntry(models.Model):
     end_time = models.TimeField(verbose_name='Endzeit')
     break_time = models.CharField(max_length=20, default='00:30:00', verbose_name='Pausenzeit')
     description = models.CharField(max_length=255, blank=True, verbose_name='Beschreibung')
+    # Arbeitsdauer abzüglich Pause, beim Speichern berechnet (für SQL-Summen, siehe working_time.py)
+    duration_seconds = models.IntegerField(default=0, editable=False, verbose_name='Dauer (Sekunden)')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -369,10 +371,40 @@ class TimeEntry(models.Model):
         verbose_name_plural = 'Zeiteinträge'
         ordering = ['-date', '-start_time']
         unique_together = ['user', 'date', 'start_time']  # Verhindert doppelte Einträge
+        indexes = [
+            models.Index(fields=['date', 'user']),
+            # Keyset-Paginierung (?cursor=)
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.date} {self.start_time}-{self.end_time}"
 
+    def _accounting_values(self):
+        return {'user_id': self.user_id, 'date': self.date, 'duration_seconds': self.duration_seconds}
+
+    def save(self, *args, **kwargs):
+        from .working_time import apply_entry_change
+
+        self.duration_seconds = int(self.duration.total_seconds())
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'duration_seconds'}
+        previous = None
+        if self.pk:
+            previous = TimeEntry.objects.filter(pk=self.pk).values('user_id', 'date', 'duration_seconds').first()
+        super().save(*args, **kwargs)
+        # Bestehende Monatsübersichten um die Differenz anpassen
+        apply_entry_change(previous, self._accounting_values())
+
+    def delete(self, *args, **kwargs):
+        # QuerySet.delete() (Archivierung in aggregate_monthly_work) läuft hier nicht durch
+        from .working_time import apply_entry_change
+
+        previous = self._accounting_values()
+        result = super().delete(*args, **kwargs)
+        apply_entry_change(previous, None)
+        return result
+
     @property
     def duration(self):
         """Berechnet die Arbeitsdauer abzüglich Pause"""
@@ -663,6 +695,30 @@ class Message(models.Model):
 # Reminder model consolidated further down in this file (avoid duplicate model registration)
 
 
+class WorkCalendarDay(models.Model):
+    """
+    Arbeitskalender: ein Eintrag je Tag mit Wochentag und Feiertag.
+    Grundlage der Soll-Stunden (siehe working_time.py); fehlende Tage werden
+    mit den bundesweiten Feiertagen automatisch angelegt.
+    """
+    date = models.DateField(unique=True, verbose_name='Datum')
+    weekday = models.PositiveSmallIntegerField(verbose_name='Wochentag')  # 0 = Montag
+    is_holiday = models.BooleanField(default=False, verbose_name='Feiertag / arbeitsfrei')
+    holiday_name = models.CharField(max_length=100, blank=True, verbose_name='Bezeichnung')
+
+    class Meta:
+        verbose_name = 'Arbeitskalendertag'
+        verbose_name_plural = 'Arbeitskalender'
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} ({self.holiday_name})" if self.is_holiday else str(self.date)
+
+    def save(self, *args, **kwargs):
+        self.weekday = self.date.weekday()
+        super().save(*args, **kwargs)
+
+
 class MonthlyWorkSummary(models.Model):
     """
     Aggregierte Monatsübersicht für einen Mitarbeiter / Nutzer
@@ -1,3 +1,5 @@
+from datetime import date
+
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -69,3 +71,42 @@ class CancelVacationTest(TestCase):
         resp2 = self.client.delete(f'/users/vacation-requests/{rejected.id}/')
         self.assertIn(resp2.status_code, [200, 204])
         self.assertFalse(VacationRequest.objects.filter(id=rejected.id).exists())
+
+
+class WorkingTimeTests(TestCase):
+    def setUp(self):
+        from datetime import time
+        from .models import TimeEntry
+        self.employee = Employee.objects.create(
+            first_name='Zeit', last_name='Konto', date_of_birth='1990-01-01', employment_start_date='2020-01-01',
+            contract_type='vollzeit', job_title='Technik', employment_status='aktiv', weekly_work_hours=40,
+        )
+        self.user = User.objects.create_user(username='zeit', email='zeit@example.org', password='x', employee=self.employee)
+        self.other = User.objects.create_user(username='teilzeit', email='teilzeit@example.org', password='x')
+        # Mai 2026: 21 Werktage, davon 3 Feiertage (1.5., 14.5., 25.5.)
+        for day in (4, 5, 6):
+            TimeEntry.objects.create(user=self.user, date=date(2026, 5, day), start_time=time(8), end_time=time(17), break_time='01:00:00')
+        TimeEntry.objects.create(user=self.other, date=date(2026, 5, 4), start_time=time(8), end_time=time(12, 30))
+
+    def test_summarize_month_and_incremental_refresh(self):
+        from datetime import time
+        from decimal import Decimal
+        from .models import MonthlyWorkSummary, TimeEntry
+        from .working_time import summarize_month
+
+        with self.assertNumQueries(6):
+            # Benutzer, Ist-Summen, Kalender prüfen + anlegen, Arbeitstage, Upsert
+            summarize_month(2026, 5, users=User.objects.filter(pk__in=[self.user.pk, self.other.pk]))
+        summary = MonthlyWorkSummary.objects.get(user=self.user, month=date(2026, 5, 1))
+        self.assertEqual((summary.actual_hours, summary.expected_hours), (Decimal('24.00'), Decimal('144.00')))
+        self.assertEqual(MonthlyWorkSummary.objects.get(user=self.other).actual_hours, Decimal('4.00'))
+
+        # Archivierte Einträge ändern die Übersicht nicht, einzelne Änderungen nur um ihre Differenz
+        TimeEntry.objects.filter(user=self.user, date=date(2026, 5, 4)).delete()
+        entry = TimeEntry.objects.get(user=self.user, date=date(2026, 5, 5))
+        entry.end_time = time(18)
+        entry.save()
+        TimeEntry.objects.get(user=self.user, date=date(2026, 5, 6)).delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.actual_hours, Decimal('17.00'))
+        self.assertEqual(summary.difference, Decimal('-127.00'))
@@ -15,6 +15,7 @@ from .serializers import MessageSerializer, MessageCreateSerializer, ReminderSer
 from .models import Employee
 from .models import TimeEntry, VacationRequest, Message, Reminder, Notification
 from .serializers import TimeEntrySerializer
+from .working_time import period_report
 
 User = get_user_model()
 
@@ -265,42 +266,13 @@ class TimeEntryViewSet(viewsets.ModelViewSet):
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
 
-        entries = TimeEntry.objects.filter(user=user, date__range=(week_start, week_end), date__lte=today)
-        actual_seconds = 0
-        for e in entries:
-            dur = e.duration
-            actual_seconds += dur.total_seconds()
-        actual_hours = round(actual_seconds / 3600, 2)
-
-        # employee work settings
-        employee = getattr(user, 'employee', None)
-        if employee:
-            weekly_target = float(employee.weekly_work_hours or 40.0)
-            work_days = list(employee.work_days or ['mon','tue','wed','thu','fri'])
-        else:
-            weekly_target = 40.0
-            work_days = ['mon','tue','wed','thu','fri']
-
-        # map weekday codes to indices: mon=0..sun=6
-        mapping = {'mon':0,'tue':1,'wed':2,'thu':3,'fri':4,'sat':5,'sun':6}
-        indices = [mapping.get(d, None) for d in work_days]
-        indices = [i for i in indices if i is not None]
-        total_work_days = len(indices) if indices else 5
-
-        # count workdays in this week up to today
-        workdays_up_to_today = sum(1 for i in indices if i <= today.weekday())
-
-        daily_target = weekly_target / total_work_days if total_work_days else 0
-        expected_hours_to_date = round(daily_target * workdays_up_to_today, 2)
-
+        # Ist/Soll per SQL-Aggregation, Soll ohne Feiertage (users.working_time)
+        report = period_report(user, week_start, today)
+        report.pop('workdays_count_to_date')
         return Response({
             'week_start': week_start.isoformat(),
             'week_end': week_end.isoformat(),
-            'actual_hours': actual_hours,
-            'expected_hours_to_date': expected_hours_to_date,
-            'weekly_target': weekly_target,
-            'work_days': work_days,
-            'difference': round(actual_hours - expected_hours_to_date, 2)
+            **report,
         })
 
     @action(detail=False, methods=['get'])
@@ -343,51 +315,15 @@ class TimeEntryViewSet(viewsets.ModelViewSet):
                         'difference': 0.0,
                         'workdays_count_to_date': 0
                     })
-        from datetime import date, timedelta
-        import calendar
+        from datetime import date
         today = date.today()
         month_start = date(today.year, today.month, 1)
 
-        entries = TimeEntry.objects.filter(user=user, date__range=(month_start, today))
-        actual_seconds = 0
-        for e in entries:
-            dur = e.duration
-            actual_seconds += dur.total_seconds()
-        actual_hours = round(actual_seconds / 3600, 2)
-
-        employee = getattr(user, 'employee', None)
-        if employee:
-            weekly_target = float(employee.weekly_work_hours or 40.0)
-            work_days = list(employee.work_days or ['mon','tue','wed','thu','fri'])
-        else:
-            weekly_target = 40.0
-            work_days = ['mon','tue','wed','thu','fri']
-
-        mapping = {'mon':0,'tue':1,'wed':2,'thu':3,'fri':4,'sat':5,'sun':6}
-        indices = [mapping.get(d, None) for d in work_days]
-        indices = [i for i in indices if i is not None]
-        total_work_days = len(indices) if indices else 5
-        daily_target = weekly_target / total_work_days if total_work_days else 0
-
-        # count workdays in month from month_start up to today
-        workdays_in_month_to_date = 0
-        cur = month_start
-        while cur <= today:
-            if cur.weekday() in indices:
-                workdays_in_month_to_date += 1
-            cur += timedelta(days=1)
-
-        expected_month_to_date = round(daily_target * workdays_in_month_to_date, 2)
-
+        # Ist/Soll per SQL-Aggregation, Soll ohne Feiertage (users.working_time)
         return Response({
             'month_start': month_start.isoformat(),
             'month_end': today.isoformat(),
-            'actual_hours': actual_hours,
-            'expected_hours_to_date': expected_month_to_date,
-            'weekly_target': weekly_target,
-            'work_days': work_days,
-            'difference': round(actual_hours - expected_month_to_date, 2),
-            'workdays_count_to_date': workdays_in_month_to_date
+            **period_report(user, month_start, today),
         })
 
 
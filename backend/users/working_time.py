@@ -0,0 +1,206 @@
+"""
+Arbeitszeitkonten: Ist-/Soll-Stunden per SQL-Aggregation.
+
+- Ist-Stunden: TimeEntry.duration_seconds wird beim Speichern berechnet,
+  summiert wird in der Datenbank (eine Abfrage für beliebig viele Benutzer).
+- Soll-Stunden: WorkCalendarDay enthält je Tag Wochentag und Feiertag. Pro
+  Zeitraum werden die Arbeitstage je Wochentag einmal gezählt; die Soll-
+  Stunden eines Mitarbeiters ergeben sich aus seinen Arbeitstagen
+  (Employee.work_days) und der Wochenarbeitszeit.
+- Monatsübersichten (MonthlyWorkSummary) werden für alle Benutzer eines
+  Monats gesammelt geschrieben (summarize_month) und bei Änderung eines
+  einzelnen Zeiteintrags nur um dessen Differenz angepasst (apply_entry_change).
+
+Bundesweite Feiertage werden automatisch eingetragen; regionale Feiertage
+bzw. Betriebsferien lassen sich im Admin als WorkCalendarDay pflegen.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from dateutil.easter import easter
+from django.db import transaction
+from django.db.models import Count, Sum
+
+WEEKDAYS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+DEFAULT_WORK_DAYS = ['mon', 'tue', 'wed', 'thu', 'fri']
+DEFAULT_WEEKLY_HOURS = 40.0
+HOURS = Decimal('0.01')
+
+
+def german_holidays(year):
+    """Bundesweite gesetzliche Feiertage {datum: name}"""
+    easter_sunday = easter(year)
+    return {
+        date(year, 1, 1): 'Neujahr',
+        easter_sunday - timedelta(days=2): 'Karfreitag',
+        easter_sunday + timedelta(days=1): 'Ostermontag',
+        date(year, 5, 1): 'Tag der Arbeit',
+        easter_sunday + timedelta(days=39): 'Christi Himmelfahrt',
+        easter_sunday + timedelta(days=50): 'Pfingstmontag',
+        date(year, 10, 3): 'Tag der Deutschen Einheit',
+        date(year, 12, 25): '1. Weihnachtstag',
+        date(year, 12, 26): '2. Weihnachtstag',
+    }
+
+
+def ensure_calendar(start, end):
+    """
+    Legt fehlende Tage im Arbeitskalender an (bestehende, ggf. im Admin
+    angepasste Einträge bleiben unverändert).
+
+    Returns:
+        Anzahl neu angelegter Tage
+    """
+    from .models import WorkCalendarDay
+
+    days = (end - start).days + 1
+    existing = WorkCalendarDay.objects.filter(date__range=(start, end)).count() if days > 0 else 0
+    if days <= 0 or existing == days:
+        return 0
+    holidays = {}
+    for year in range(start.year, end.year + 1):
+        holidays.update(german_holidays(year))
+    entries = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        entries.append(WorkCalendarDay(
+            date=day, weekday=day.weekday(), is_holiday=day in holidays, holiday_name=holidays.get(day, '')
+        ))
+    WorkCalendarDay.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    return days - existing
+
+
+def workday_counts(start, end):
+    """Anzahl der Nicht-Feiertage je Wochentag (0=Mo) im Zeitraum"""
+    from .models import WorkCalendarDay
+
+    ensure_calendar(start, end)
+    rows = WorkCalendarDay.objects.filter(date__range=(start, end), is_holiday=False) \
+        .values('weekday').annotate(count=Count('pk')).order_by()
+    return {row['weekday']: row['count'] for row in rows}
+
+
+def work_settings(employee):
+    """(Wochenarbeitszeit, Arbeitstage als Kürzel, Arbeitstage als Wochentag-Indizes)"""
+    if employee:
+        weekly_target = float(employee.weekly_work_hours or DEFAULT_WEEKLY_HOURS)
+        work_days = list(employee.work_days or DEFAULT_WORK_DAYS)
+    else:
+        weekly_target = DEFAULT_WEEKLY_HOURS
+        work_days = list(DEFAULT_WORK_DAYS)
+    indices = [WEEKDAYS[d] for d in work_days if d in WEEKDAYS]
+    return weekly_target, work_days, indices
+
+
+def expected_hours(employee, counts):
+    """(Soll-Stunden, Anzahl Arbeitstage) für die Zählung aus workday_counts()"""
+    weekly_target, _, indices = work_settings(employee)
+    daily_target = weekly_target / (len(indices) or 5)
+    workdays = sum(counts.get(i, 0) for i in indices)
+    return round(daily_target * workdays, 2), workdays
+
+
+def actual_seconds(start, end, users=None):
+    """Gearbeitete Sekunden je Benutzer-ID im Zeitraum (eine Abfrage)"""
+    from .models import TimeEntry
+
+    entries = TimeEntry.objects.filter(date__range=(start, end))
+    if users is not None:
+        entries = entries.filter(user__in=users)
+    rows = entries.values('user_id').annotate(total=Sum('duration_seconds')).order_by()
+    return {row['user_id']: row['total'] or 0 for row in rows}
+
+
+def period_report(user, start, end):
+    """Ist/Soll für einen Benutzer (oder None) im Zeitraum (jeweils inklusive)"""
+    seconds = actual_seconds(start, end, users=[user]).get(user.pk, 0) if user else 0
+    actual_hours = round(seconds / 3600, 2)
+    employee = getattr(user, 'employee', None)
+    weekly_target, work_days, _ = work_settings(employee)
+    expected, workdays = expected_hours(employee, workday_counts(start, end))
+    return {
+        'actual_hours': actual_hours,
+        'expected_hours_to_date': expected,
+        'weekly_target': weekly_target,
+        'work_days': work_days,
+        'difference': round(actual_hours - expected, 2),
+        'workdays_count_to_date': workdays,
+    }
+
+
+def month_range(year, month):
+    start = date(year, month, 1)
+    next_month = start.replace(day=28) + timedelta(days=4)
+    return start, next_month - timedelta(days=next_month.day)
+
+
+def summary_note(difference):
+    if difference > 0:
+        return f'+{difference}h Überschuss'
+    if difference < 0:
+        return f'{difference}h Fehlzeit'
+    return 'Ausgeglichen'
+
+
+def summarize_month(year, month, users=None):
+    """
+    Schreibt die Monatsübersichten aller (aktiven) Benutzer gesammelt:
+    eine Abfrage für die Ist-Stunden, eine für die Arbeitstage, ein Upsert.
+
+    Returns:
+        Liste der geschriebenen MonthlyWorkSummary-Objekte
+    """
+    from django.contrib.auth import get_user_model
+    from .models import MonthlyWorkSummary
+
+    start, end = month_range(year, month)
+    if users is None:
+        users = get_user_model().objects.filter(is_active=True)
+    users = list(users.select_related('employee'))
+    seconds = actual_seconds(start, end, users=users)
+    counts = workday_counts(start, end)
+
+    summaries = []
+    for user in users:
+        actual = (Decimal(seconds.get(user.pk, 0)) / 3600).quantize(HOURS)
+        expected = Decimal(str(expected_hours(user.employee, counts)[0])).quantize(HOURS)
+        difference = actual - expected
+        summaries.append(MonthlyWorkSummary(
+            user=user, employee=user.employee, month=start, actual_hours=actual,
+            expected_hours=expected, difference=difference, note=summary_note(difference),
+        ))
+    MonthlyWorkSummary.objects.bulk_create(
+        summaries, batch_size=500, update_conflicts=True, unique_fields=['user', 'month'],
+        update_fields=['employee', 'actual_hours', 'expected_hours', 'difference', 'note'],
+    )
+    return summaries
+
+
+def apply_entry_change(previous, current):
+    """
+    Passt bestehende Monatsübersichten an die Änderung eines Zeiteintrags an
+    (vorher/nachher als dict mit user_id, date, duration_seconds oder None).
+
+    Es wird nur die Differenz übernommen - die Übersicht bleibt auch dann
+    richtig, wenn die übrigen Einträge des Monats bereits archiviert
+    (gelöscht) wurden.
+    """
+    from .models import MonthlyWorkSummary
+
+    deltas = {}
+    for values, sign in ((previous, -1), (current, 1)):
+        if values:
+            key = (values['user_id'], values['date'].replace(day=1))
+            deltas[key] = deltas.get(key, 0) + sign * values['duration_seconds']
+
+    for (user_id, month), delta in deltas.items():
+        if not delta:
+            continue
+        with transaction.atomic():
+            summary = MonthlyWorkSummary.objects.select_for_update().filter(user_id=user_id, month=month).first()
+            if summary is None:
+                continue
+            summary.actual_hours = (summary.actual_hours + Decimal(delta) / 3600).quantize(HOURS)
+            summary.difference = summary.actual_hours - summary.expected_hours
+            summary.note = summary_note(summary.difference)
+            summary.save(update_fields=['actual_hours', 'difference', 'note'])
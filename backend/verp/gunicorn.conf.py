@@ -0,0 +1,50 @@
+"""
+Gunicorn-Konfiguration für den Produktionsbetrieb (Linux/Docker).
+
+    gunicorn -c verp/gunicorn.conf.py verp.wsgi:application
+
+Mehrere Worker-Prozesse mit je einigen Threads: eine langsame Anfrage (PDF,
+VSDB-Abfrage) blockiert nur ihren Thread. Worker werden nach
+GUNICORN_MAX_REQUESTS Anfragen (plus Zufallsanteil) neu gestartet, damit
+Speicher nicht über Tage wächst; hängt eine Anfrage länger als
+GUNICORN_TIMEOUT, wird der Worker ersetzt. Statische Dateien und Medien
+liefert nginx bzw. IIS aus, nicht Django.
+
+Alle Werte lassen sich über Umgebungsvariablen überschreiben. Unter Windows
+(ohne fork) übernimmt waitress diese Rolle, siehe docs/WINDOWS_SERVER_INSTALLATION.md.
+"""
+import multiprocessing
+import os
+
+
+def _int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Prozesse x Threads = gleichzeitig bearbeitete Anfragen
+workers = _int('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 9))
+worker_class = 'gthread'
+threads = _int('GUNICORN_THREADS', 4)
+
+# Worker-Recycling
+max_requests = _int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# PDF-Erzeugung und Exporte dürfen dauern, hängende Worker werden dennoch ersetzt
+timeout = _int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _int('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat im RAM statt auf (evtl. langsamem) Container-Dateisystem
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+# Antwortzeit in Mikrosekunden (%(D)s) fürs Access-Log
+access_log_format = '%(h)s "%(r)s" %(s)s %(b)s %(D)sus'
+
+# hinter nginx: X-Forwarded-* nur vom Proxy akzeptieren
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '127.0.0.1')
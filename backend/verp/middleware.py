@@ -1,7 +1,25 @@
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # optional - without it, responses are gzip-compressed
+    brotli = None
+
+_ACCEPTS_BR = _lazy_re_compile(r'\bbr\b')
+_ACCEPTS_GZIP = _lazy_re_compile(r'\bgzip\b')
+
+
 class NoCacheAPIMiddleware:
     """
     Middleware that adds Cache-Control headers to API responses
     to prevent IIS/ARR/browser caching of API data.
+
+    With API_CACHE_MODE = 'validate', responses that carry validators
+    (ETag/Last-Modified, see core.conditional) may be kept by the browser,
+    but must be revalidated on every use and never by shared caches.
     """
 
     def __init__(self, get_response):
@@ -10,10 +28,60 @@ class NoCacheAPIMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
-        # Add no-cache headers to all API responses
-        if request.path.startswith('/api/'):
+        if not request.path.startswith('/api/'):
+            return response
+
+        validate = getattr(settings, 'API_CACHE_MODE', 'no-store') == 'validate'
+        if validate and (response.has_header('ETag') or response.has_header('Last-Modified')):
+            response['Cache-Control'] = 'private, no-cache'
+        else:
+            # Add no-cache headers to all other API responses
             response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
             response['Pragma'] = 'no-cache'
             response['Expires'] = '0'
 
         return response
+
+
+class APICompressionMiddleware:
+    """
+    Compresses large JSON API responses (brotli if installed and accepted,
+    otherwise gzip). Bodies below API_COMPRESS_MIN_BYTES, streaming responses
+    and responses that are already encoded are passed through unchanged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (not request.path.startswith('/api/')
+                or response.streaming
+                or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith('application/json')):
+            return response
+
+        min_bytes = getattr(settings, 'API_COMPRESS_MIN_BYTES', 1024)
+        if min_bytes <= 0 or len(response.content) < min_bytes:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and _ACCEPTS_BR.search(accept):
+            encoding, compressed = 'br', brotli.compress(response.content, quality=5)
+        elif _ACCEPTS_GZIP.search(accept):
+            encoding, compressed = 'gzip', compress_string(response.content)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # the compressed body is no longer byte-identical to the strong ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
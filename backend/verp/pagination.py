@@ -1,4 +1,135 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _cursor_value(value):
+    # vollständige Genauigkeit (DjangoJSONEncoder kürzt Zeitstempel auf Millisekunden)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def estimated_count(queryset):
+    """
+    Geschätzte Anzahl aus der Planer-Statistik (PostgreSQL: EXPLAIN, ohne die
+    Zeilen zu zählen); andere Datenbanken zählen exakt.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetCursorMixin:
+    """
+    Keyset-Paginierung als Alternative zur Seitennummer (opt-in über ?cursor=).
+
+    Die erste Seite wird mit leerem Cursor (?cursor=) abgerufen, jede weitere
+    über den Link in 'next'. Sortiert wird fest nach cursor_ordering (View-
+    Attribut oder Standard der Paginierung, z.B. ('created_at', 'id'); alle
+    Felder in derselben Richtung, '-' für absteigend); ?ordering wird ignoriert.
+    Statt OFFSET und COUNT(*) liest jede Seite nur die Zeilen nach dem letzten
+    Eintrag der vorigen Seite - der Aufwand hängt nicht von der Seitentiefe ab.
+
+    ?count=estimate liefert eine geschätzte Gesamtzahl (Planer-Statistik),
+    ?count=exact die exakte; ohne Angabe wird nicht gezählt.
+    """
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('created_at', 'id')
+    cursor_max_page_size = 500
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        ordering = tuple(getattr(view, 'cursor_ordering', self.cursor_ordering))
+        descending = ordering[0].startswith('-')
+        fields = [name.lstrip('-') for name in ordering]
+        try:
+            model_fields = [queryset.model._meta.get_field(name) for name in fields]
+        except FieldDoesNotExist:
+            raise ValidationError({self.cursor_query_param: 'Cursor-Paginierung ist hier nicht verfügbar.'})
+
+        self.count, self.count_estimated = self._count(queryset, request)
+        position = self._decode(request.query_params[self.cursor_query_param], model_fields)
+        if position is not None:
+            queryset = queryset.filter(self._after(fields, position, descending))
+
+        page_size = min(self.get_page_size(request) or self.page_size, self.cursor_max_page_size)
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = [getattr(rows[-1], field.attname) for field in model_fields]
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self._next_link(),
+            'count': self.count,
+            'count_estimated': self.count_estimated,
+            'results': data,
+        })
+
+    def _count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'estimate':
+            return estimated_count(queryset), connections[queryset.db].vendor == 'postgresql'
+        if mode == 'exact':
+            return queryset.count(), False
+        return None, False
+
+    @staticmethod
+    def _after(fields, position, descending):
+        """Zeilen nach `position`: (a > x) oder (a = x und b > y) ..."""
+        lookup = 'lt' if descending else 'gt'
+        condition = Q()
+        for index, field in enumerate(fields):
+            step = Q(**{f'{field}__{lookup}': position[index]})
+            for previous, value in zip(fields[:index], position[:index]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _decode(self, cursor, model_fields):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if len(values) != len(model_fields) or None in values:
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(model_fields, values)]
+        except (ValueError, TypeError, UnicodeError, DjangoValidationError):
+            raise NotFound('Ungültiger Cursor.')
+
+    def _next_link(self):
+        if self.next_position is None:
+            return None
+        cursor = base64.urlsafe_b64encode(
+            json.dumps(self.next_position, default=_cursor_value).encode('utf-8')
+        ).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
 
 class InfinitePagination(PageNumberPagination):
     page_size = 50
@@ -6,10 +137,11 @@ class InfinitePagination(PageNumberPagination):
     # Increase default max page size so dropdowns can request larger result sets
     max_page_size = 2000
 
-class CustomPageNumberPagination(PageNumberPagination):
+class CustomPageNumberPagination(KeysetCursorMixin, PageNumberPagination):
     """
     Custom pagination that allows larger page sizes for map views and large datasets.
     Clients can request up to 10000 items per page using ?page_size=10000
+    Scrolling and sync clients can use keyset pages instead (?cursor=, see KeysetCursorMixin).
     """
     page_size = 10000
     page_size_query_param = 'page_size'
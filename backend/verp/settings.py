@@ -67,6 +67,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.RequestMetricsMiddleware',
+    'verp.middleware.APICompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -109,6 +111,9 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='verp_password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Verbindungen je Worker-Thread offen halten (Sekunden, 0 = je Anfrage neu)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -151,6 +156,26 @@ else:
 # Falls nicht gesetzt, wird request.build_absolute_uri verwendet
 MEDIA_BASE_URL = config('MEDIA_BASE_URL', default=None)
 
+# Optional: Downloads per X-Accel-Redirect an nginx übergeben (z.B. /protected-media/)
+# Erfordert eine passende interne Location in nginx.conf (siehe core.media_delivery)
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='')
+
+# Vorschaubilder im Hintergrund erzeugen (siehe core.thumbnails)
+THUMBNAIL_ASYNC = config('THUMBNAIL_ASYNC', default=True, cast=bool)
+THUMBNAIL_WORKERS = config('THUMBNAIL_WORKERS', default=2, cast=int)
+
+# Papierkorb-Aufbewahrung für `manage.py purge_trash` (0 = keine Grenze)
+MEDIA_TRASH_RETENTION_DAYS = config('MEDIA_TRASH_RETENTION_DAYS', default=90, cast=int)
+MEDIA_TRASH_MAX_SIZE_GB = config('MEDIA_TRASH_MAX_SIZE_GB', default=0, cast=float)
+
+# Admin-Löschmodul (siehe core.deletion): bis DELETION_SYNC_LIMIT betroffene Einträge
+# wird direkt gelöscht, darüber als Löschauftrag im Hintergrund in Blöcken
+DELETION_SYNC_LIMIT = config('DELETION_SYNC_LIMIT', default=200, cast=int)
+DELETION_BATCH_SIZE = config('DELETION_BATCH_SIZE', default=500, cast=int)
+DELETION_ASYNC = config('DELETION_ASYNC', default=True, cast=bool)
+# laufende Aufträge ohne Fortschritt seit so vielen Minuten setzt resume_deletion_jobs fort
+DELETION_STALE_MINUTES = config('DELETION_STALE_MINUTES', default=15, cast=int)
+
 # Ensure MEDIA_ROOT directory exists
 if not MEDIA_ROOT.exists():
     try:
@@ -242,6 +267,31 @@ CSRF_TRUSTED_ORIGINS = [
 # Optionally set `TRANSLATION_API_KEY` if your provider requires authentication.
 TRANSLATION_API_URL = config('TRANSLATION_API_URL', default=None)
 TRANSLATION_API_KEY = config('TRANSLATION_API_KEY', default=None)
+# Übersetzungsdienst hinter dem Übersetzungsspeicher (core.translation);
+# 'core.translation.StubBackend' übersetzt offline (Tests/Entwicklung)
+TRANSLATION_BACKEND = config('TRANSLATION_BACKEND', default='core.translation.LibreTranslateBackend')
+
+# Laufzeit-Messung je API-Endpunkt (core.metrics, Auswertung unter /api/core/metrics/requests/)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+# Server-Timing-Header (Browser-Entwicklertools) - verrät Abfragezahlen, daher standardmäßig nur bei DEBUG
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=DEBUG, cast=bool)
+# Ab dieser Dauer (ms) wird eine Anfrage mit ihren SQL-Anweisungen protokolliert
+REQUEST_METRICS_SLOW_MS = config('REQUEST_METRICS_SLOW_MS', default=1000, cast=int)
+# Anzahl der Messwerte je Route für die Perzentile
+REQUEST_METRICS_SAMPLES = config('REQUEST_METRICS_SAMPLES', default=500, cast=int)
+
+# Zwischenspeicher für Zählstatistiken (core.stats), 0 schaltet ihn ab
+STATS_CACHE_SECONDS = config('STATS_CACHE_SECONDS', default=30, cast=int)
+
+# Browser-Caching der API: 'no-store' (Standard, immer vollständig) oder
+# 'validate' (ETag/Last-Modified und 304 für Views mit core.conditional.ConditionalGetMixin,
+# Cache-Control: private, no-cache). API_ETAG_SECONDS begrenzt, wie lange ein ETag
+# ohne Schreibzugriff über das ORM gültig bleibt.
+API_CACHE_MODE = config('API_CACHE_MODE', default='no-store')
+API_ETAG_SECONDS = config('API_ETAG_SECONDS', default=300, cast=int)
+
+# JSON-Antworten der API ab dieser Größe komprimieren (brotli, falls installiert, sonst gzip); 0 = aus
+API_COMPRESS_MIN_BYTES = config('API_COMPRESS_MIN_BYTES', default=1024, cast=int)
 
 # Security-related settings (sane defaults; override via environment variables)
 if DEBUG:
@@ -6,8 +6,9 @@ import json
 import tempfile
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.management import call_command
 from django.apps import apps
 from django.db import transaction, models, connection
@@ -18,6 +19,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
 from io import StringIO
 
+from core.exports import EXPORT_CHUNK_SIZE
+
 
 def convert_field_value(field, value):
     """
@@ -68,6 +71,65 @@ def convert_field_value(field, value):
     return value
 
 
+def backup_chunks(meta, querysets, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Backup-JSON blockweise: je Model die Datensätze im Format von
+    serializers.serialize('json') (model, pk, fields), danach die Metadaten.
+
+    Die Metadaten stehen am Ende, damit model_counts/total_records genau die
+    geschriebenen Datensätze zählen. Ein Model, das sich nicht serialisieren
+    lässt, wird wie bisher übersprungen (skipped_models); scheitert es erst
+    nach den ersten Blöcken, bleibt die Datei gültig und das Model wird unter
+    incomplete_models mit der Anzahl geschriebener Datensätze vermerkt.
+    """
+    def dumps(value):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+    def records(batch):
+        return ',\n'.join(dumps(record) for record in serializers.serialize('python', batch))
+
+    def batches(queryset):
+        batch = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            batch.append(obj)
+            if len(batch) == chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    model_counts, skipped, incomplete = {}, {}, {}
+    yield '{\n"data": {'
+    for model_name, queryset in querysets.items():
+        written = 0
+        try:
+            for batch in batches(queryset):
+                chunk = records(batch)
+                if written:
+                    yield ',\n' + chunk
+                else:
+                    # Kopf erst mit dem ersten fertigen Block: ein Fehler davor lässt das Model ganz weg
+                    yield (',' if model_counts else '') + f'\n{dumps(model_name)}: [' + chunk
+                written += len(batch)
+                model_counts[model_name] = written
+        except Exception as e:
+            # Einige Modelle könnten Probleme verursachen
+            print(f"Fehler bei {model_name}: {e}")
+            if written:
+                incomplete[model_name] = {'error': str(e), 'written': written}
+            else:
+                skipped[model_name] = str(e)
+        if written:
+            yield ']'
+
+    meta = dict(meta, model_counts=model_counts, total_records=sum(model_counts.values()))
+    if skipped:
+        meta['skipped_models'] = skipped
+    if incomplete:
+        meta['incomplete_models'] = incomplete
+    yield '\n},\n"meta": ' + json.dumps(meta, indent=2, ensure_ascii=False) + '\n}\n'
+
+
 class DatabaseBackupView(APIView):
     """
     Exportiert die gesamte Datenbank als JSON-Datei
@@ -104,50 +166,30 @@ class DatabaseBackupView(APIView):
                 'visiview',
             ]
             
-            # Daten sammeln
-            all_data = {}
-            model_counts = {}
+            # Modelle der Apps (die Daten werden beim Download gestreamt; Modelle ohne
+            # Datensätze und solche, die sich nicht lesen lassen, lässt backup_chunks weg)
+            querysets = {}
             
             for app_label in our_apps:
                 try:
                     app_config = apps.get_app_config(app_label)
-                    models = app_config.get_models()
-                    
-                    for model in models:
-                        model_name = f"{app_label}.{model.__name__}"
-                        try:
-                            queryset = model.objects.all()
-                            count = queryset.count()
-                            
-                            if count > 0:
-                                # Serialisiere die Daten
-                                data = serializers.serialize('json', queryset)
-                                all_data[model_name] = json.loads(data)
-                                model_counts[model_name] = count
-                        except Exception as e:
-                            # Einige Modelle könnten Probleme verursachen
-                            print(f"Fehler bei {model_name}: {e}")
-                            continue
-                            
                 except LookupError:
                     # App nicht gefunden
                     continue
+                for model in app_config.get_models():
+                    querysets[f"{app_label}.{model.__name__}"] = model.objects.all()
             
-            # Export-Datei erstellen
-            export_data = {
-                'meta': {
-                    'exported_at': datetime.now().isoformat(),
-                    'exported_by': request.user.username,
-                    'version': '1.0',
-                    'model_counts': model_counts,
-                    'total_records': sum(model_counts.values())
-                },
-                'data': all_data
+            # model_counts/total_records ergänzt backup_chunks aus den geschriebenen Datensätzen
+            meta = {
+                'exported_at': datetime.now().isoformat(),
+                'exported_by': request.user.username,
+                'version': '1.0',
             }
             
-            # Als JSON-Datei zurückgeben
-            response = HttpResponse(
-                json.dumps(export_data, indent=2, ensure_ascii=False),
+            # Als JSON-Datei zurückgeben - Format wie bisher ({'data': {model: [...]}, 'meta': ...}),
+            # aber blockweise aus serverseitigem Cursor statt komplett im Speicher
+            response = StreamingHttpResponse(
+                backup_chunks(meta, querysets),
                 content_type='application/json'
             )
             filename = f"verp_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -20,6 +20,7 @@ import logging
 import re
 import pyodbc
 from django.db import connection, transaction
+from core.metrics import timed_connection
 from customers.models import Customer, CustomerAddress, CustomerPhone, CustomerEmail, CustomerLegacyMapping
 
 logger = logging.getLogger(__name__)
@@ -194,7 +195,7 @@ def get_mssql_connection(server, database='VSDB', use_dsn=False, dsn_name=None,
             )
 
         connection = pyodbc.connect(conn_str, timeout=10)
-        return connection
+        return timed_connection(connection)
     except pyodbc.Error as e:
         logger.error(f"MSSQL Verbindungsfehler: {e}")
         raise
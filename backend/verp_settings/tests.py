@@ -0,0 +1,49 @@
+import json
+
+from django.db.models.expressions import RawSQL
+from django.test import TestCase
+
+from customers.models import Customer
+from .backup_views import backup_chunks
+
+
+class FailingAfterFirstRow:
+    """Queryset-Ersatz, dessen Cursor nach dem ersten Datensatz abbricht"""
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def iterator(self, chunk_size):
+        yield self.obj
+        raise RuntimeError('Verbindung verloren')
+
+
+class BackupChunksTests(TestCase):
+    def setUp(self):
+        self.customers = [Customer.objects.create(first_name='Kim', last_name=f'Kunde {n}') for n in range(3)]
+
+    def backup(self, querysets, chunk_size=2):
+        return json.loads(''.join(backup_chunks({'version': '1.0'}, querysets, chunk_size=chunk_size)))
+
+    def test_counts_match_written_rows(self):
+        backup = self.backup({
+            'customers.Customer': Customer.objects.all(),
+            'customers.CustomerEmail': Customer.objects.none(),
+        })
+        self.assertEqual(list(backup['data']), ['customers.Customer'])
+        self.assertEqual(len(backup['data']['customers.Customer']), 3)
+        self.assertEqual(backup['meta']['model_counts'], {'customers.Customer': 3})
+        self.assertEqual((backup['meta']['total_records'], backup['meta']['version']), (3, '1.0'))
+
+    def test_failing_models_are_skipped_and_file_stays_valid(self):
+        backup = self.backup({
+            'customers.Broken': Customer.objects.annotate(broken=RawSQL('no_such_column', [])),
+            'customers.Customer': Customer.objects.all(),
+            'customers.Partial': FailingAfterFirstRow(self.customers[0]),
+        }, chunk_size=1)
+        self.assertEqual(len(backup['data']['customers.Customer']), 3)
+        self.assertNotIn('customers.Broken', backup['data'])
+        self.assertIn('customers.Broken', backup['meta']['skipped_models'])
+        self.assertEqual(len(backup['data']['customers.Partial']), 1)
+        self.assertEqual(backup['meta']['incomplete_models']['customers.Partial']['written'], 1)
+        self.assertEqual(backup['meta']['total_records'], 4)
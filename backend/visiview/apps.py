@@ -5,3 +5,7 @@ class VisiviewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'visiview'
     verbose_name = 'VisiView'
+
+    def ready(self):
+        # Signale für den globalen Suchindex registrieren
+        from . import signals  # noqa: F401
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.db.models import Sum
 from datetime import date
 from decimal import Decimal
+from core.product_prices import PriceResolvingListSerializer
+from core.thumbnails import PreviewListSerializer, ThumbnailField
 from .models import (
     VisiViewProduct, VisiViewProductPrice, VisiViewLicense, VisiViewOption,
     VisiViewTicket, VisiViewTicketComment, VisiViewTicketChangeLog, VisiViewTicketAttachment,
@@ -88,6 +90,7 @@ class VisiViewProductListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = VisiViewProduct
+        list_serializer_class = PriceResolvingListSerializer
         fields = [
             'id', 'article_number', 'name', 'description', 'description_en',
             'product_category', 'product_category_name',
@@ -372,12 +375,14 @@ class VisiViewTicketAttachmentSerializer(serializers.ModelSerializer):
     """Serializer für VisiView-Ticket Anhänge"""
     uploaded_by_name = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()
+    thumbnails = ThumbnailField()
     
     class Meta:
         model = VisiViewTicketAttachment
         fields = ['id', 'file', 'file_url', 'filename', 'file_size', 'content_type', 
-                  'is_image', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
+                  'is_image', 'thumbnails', 'uploaded_by', 'uploaded_by_name', 'uploaded_at']
         read_only_fields = ['id', 'uploaded_at', 'file_size', 'content_type', 'is_image']
+        list_serializer_class = PreviewListSerializer
     
     def get_uploaded_by_name(self, obj):
         if obj.uploaded_by:
@@ -608,11 +613,13 @@ from .models import VisiViewMacro, VisiViewMacroExampleImage, VisiViewMacroChang
 
 class VisiViewMacroExampleImageSerializer(serializers.ModelSerializer):
     """Serializer für Macro Beispielbilder"""
+    thumbnails = ThumbnailField(file_field='image')
     
     class Meta:
         model = VisiViewMacroExampleImage
-        fields = ['id', 'macro', 'image', 'description', 'uploaded_at']
+        fields = ['id', 'macro', 'image', 'thumbnails', 'description', 'uploaded_at']
         read_only_fields = ['uploaded_at']
+        list_serializer_class = PreviewListSerializer
 
 
 class VisiViewMacroChangeLogSerializer(serializers.ModelSerializer):
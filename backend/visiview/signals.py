@@ -0,0 +1,31 @@
+from core import search_index, thumbnails
+from .models import VisiViewLicense, VisiViewMacroExampleImage, VisiViewTicket, VisiViewTicketAttachment
+
+
+# Globaler Suchindex (siehe core.search_index)
+search_index.register(
+    VisiViewLicense, 'license', 'VisiView-Lizenz',
+    title=lambda l: f"{l.license_number} - {l.serial_number}" if l.serial_number else l.license_number,
+    subtitle=lambda l: l.customer or l.customer_name_legacy,
+    keywords=lambda l: [
+        l.license_number, l.serial_number, l.internal_serial, l.customer_name_legacy, l.purchase_order,
+        l.customer and l.customer.search_text,
+    ],
+    scope='can_read_visiview_licenses', main_scope='can_read_visiview',
+    url='/visiview/licenses/{pk}',
+    select_related=['customer'],
+    depends_on={'customers.Customer': 'customer'},
+)
+
+search_index.register(
+    VisiViewTicket, 'visiview_ticket', 'VisiView-Ticket',
+    title=lambda t: t,
+    subtitle=lambda t: t.get_status_display(),
+    keywords=lambda t: [t.ticket_number, t.title, t.customers],
+    scope='can_read_visiview_tickets', main_scope='can_read_visiview',
+    url='/visiview/tickets/{pk}',
+)
+
+# Vorschaubilder (siehe core.thumbnails)
+thumbnails.register(VisiViewTicketAttachment)
+thumbnails.register(VisiViewMacroExampleImage, field='image')
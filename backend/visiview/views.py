@@ -5,7 +5,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import FileResponse, Http404
+from django.http import Http404
+from django.db.models import Q
 from django.utils import timezone
 from datetime import date
 from decimal import Decimal
@@ -53,9 +54,13 @@ from .serializers import (
     process_expenditure_deduction,
     apply_new_credit_to_debt
 )
+from core.conditional import ConditionalGetMixin
+from core.fanout import fan_out, field_changes, recipient_ids
+from core.media_delivery import media_response
+from core.stats import cached_counts
 
 
-class VisiViewProductViewSet(viewsets.ModelViewSet):
+class VisiViewProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet für VisiView Produkte"""
     # Pagination für infinite scroll
     from verp.pagination import InfinitePagination
@@ -92,7 +97,7 @@ class VisiViewProductPriceViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class VisiViewOptionViewSet(viewsets.ModelViewSet):
+class VisiViewOptionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet für VisiView Optionen"""
     queryset = VisiViewOption.objects.all()
     serializer_class = VisiViewOptionSerializer
@@ -616,173 +621,77 @@ class VisiViewTicketViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    # Protokollierte Felder (Änderungsprotokoll und Beobachter-Benachrichtigung)
+    TRACKED_FIELDS = {
+        'title': 'Thema',
+        'tracker': 'Tracker',
+        'status': 'Status',
+        'priority': 'Priorität',
+        'category': 'Kategorie',
+        'assigned_to_id': 'Zugewiesen an',
+        'target_version': 'Zielversion',
+        'percent_done': '% erledigt',
+    }
+
+    @staticmethod
+    def _assign(fanout, ticket):
+        """Erinnerungsaufgabe (Fällig: morgen) und Notification für den zugewiesenen Mitarbeiter"""
+        fanout.assign(
+            ticket.assigned_to_id,
+            reminder_title=f"Zugewiesen: Ticket #{ticket.ticket_number}",
+            description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            notification_title=f"Ticket #{ticket.ticket_number} zugewiesen",
+            notification_message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
+            related_object_type='visiview_ticket',
+            related_object_id=ticket.id,
+            related_url=f"/visiview/tickets/{ticket.id}",
+        )
+
     def perform_create(self, serializer):
-        ticket = serializer.save(created_by=self.request.user)
-        # Ersteller automatisch als Beobachter hinzufügen
-        if ticket.created_by:
-            ticket.watchers.add(ticket.created_by)
-        # Zugewiesener User als Beobachter
-        if ticket.assigned_to:
-            ticket.watchers.add(ticket.assigned_to)
-            # Erstelle eine Erinnerungsaufgabe für den zugewiesenen Mitarbeiter (Fällig: morgen)
-            try:
-                from django.utils import timezone
-                from datetime import timedelta
-                from users.models import Reminder, Notification
-                due = timezone.now().date() + timedelta(days=1)
-                Reminder.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Zugewiesen: Ticket #{ticket.ticket_number}",
-                    description=f"Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    due_date=due,
-                    related_object_type='visiview_ticket',
-                    related_object_id=ticket.id,
-                    related_url=f"/visiview/tickets/{ticket.id}"
-                )
-                # Benachrichtigung im NotificationCenter
-                Notification.objects.create(
-                    user=ticket.assigned_to,
-                    title=f"Ticket #{ticket.ticket_number} zugewiesen",
-                    message=f"Das Ticket '{ticket.title}' wurde Ihnen zugewiesen.",
-                    notification_type='info',
-                    related_url=f'/visiview/tickets/{ticket.id}'
-                )
-            except Exception:
-                # Nicht fatal für Ticket-Erstellung
-                pass
+        with fan_out(actor=self.request.user) as fanout:
+            ticket = serializer.save(created_by=self.request.user)
+            # Ersteller und zugewiesener User automatisch als Beobachter hinzufügen
+            watchers = recipient_ids(ticket.created_by_id, ticket.assigned_to_id)
+            if watchers:
+                ticket.watchers.add(*watchers)
+            self._assign(fanout, ticket)
     
     def perform_update(self, serializer):
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.warning(f"=== perform_update aufgerufen für Ticket ===")
-        
-        old_instance = self.get_object()
-        old_data = {
-            'title': old_instance.title,
-            'tracker': old_instance.tracker,
-            'status': old_instance.status,
-            'priority': old_instance.priority,
-            'category': old_instance.category,
-            'assigned_to': old_instance.assigned_to_id,
-            'target_version': old_instance.target_version,
-            'percent_done': old_instance.percent_done,
-        }
-        old_assigned_to = old_instance.assigned_to
-        
-        instance = serializer.save()
-        logger.warning(f"Ticket gespeichert: #{instance.ticket_number}, Watchers: {list(instance.watchers.values_list('username', flat=True))}")
-        
-        # Änderungen protokollieren
-        field_labels = {
-            'title': 'Thema',
-            'tracker': 'Tracker',
-            'status': 'Status',
-            'priority': 'Priorität',
-            'category': 'Kategorie',
-            'assigned_to': 'Zugewiesen an',
-            'target_version': 'Zielversion',
-            'percent_done': '% erledigt',
-        }
-        
-        new_data = {
-            'title': instance.title,
-            'tracker': instance.tracker,
-            'status': instance.status,
-            'priority': instance.priority,
-            'category': instance.category,
-            'assigned_to': instance.assigned_to_id,
-            'target_version': instance.target_version,
-            'percent_done': instance.percent_done,
-        }
-        
-        changes = []
-        for field, old_value in old_data.items():
-            new_value = new_data.get(field)
-            if old_value != new_value:
-                VisiViewTicketChangeLog.objects.create(
-                    ticket=instance,
-                    field_name=field_labels.get(field, field),
-                    old_value=str(old_value or ''),
-                    new_value=str(new_value or ''),
-                    changed_by=self.request.user
-                )
-                changes.append((field_labels.get(field, field), str(old_value or ''), str(new_value or '')))
+        # serializer.instance enthält bis zum Speichern noch die alten Werte
+        old_data = {field: getattr(serializer.instance, field) for field in self.TRACKED_FIELDS}
         
-        logger.warning(f"Änderungen gefunden: {len(changes)} - {[c[0] for c in changes]}")
-        
-        # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
-        if old_assigned_to != instance.assigned_to:
-            if old_assigned_to:
-                instance.watchers.remove(old_assigned_to)
-            if instance.assigned_to:
-                instance.watchers.add(instance.assigned_to)
-                # Erstelle eine Erinnerungsaufgabe für den neuen zugewiesenen Mitarbeiter (Fällig: morgen)
-                try:
-                    from django.utils import timezone
-                    from datetime import timedelta
-                    from users.models import Reminder, Notification
-                    due = timezone.now().date() + timedelta(days=1)
-                    Reminder.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Zugewiesen: Ticket #{instance.ticket_number}",
-                        description=f"Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        due_date=due,
-                        related_object_type='visiview_ticket',
-                        related_object_id=instance.id,
-                        related_url=f"/visiview/tickets/{instance.id}"
-                    )
-                    # Benachrichtigung im NotificationCenter
-                    Notification.objects.create(
-                        user=instance.assigned_to,
-                        title=f"Ticket #{instance.ticket_number} zugewiesen",
-                        message=f"Das Ticket '{instance.title}' wurde Ihnen zugewiesen.",
-                        notification_type='info',
-                        related_url=f'/visiview/tickets/{instance.id}'
-                    )
-                except Exception:
-                    pass
-
-        # Benachrichtige Beobachter über die Änderungen (als Nachricht in der Inbox)
-        if changes:
-            from users.models import Message
-            import logging
-            logger = logging.getLogger(__name__)
+        with fan_out(actor=self.request.user) as fanout:
+            instance = serializer.save()
+            new_data = {field: getattr(instance, field) for field in self.TRACKED_FIELDS}
+            changes = field_changes(old_data, new_data, self.TRACKED_FIELDS)
             
-            try:
+            # Änderungen protokollieren
+            fanout.log_changes(VisiViewTicketChangeLog, changes, ticket=instance)
+            
+            # Wenn "Zugewiesen an" geändert wurde, Beobachter aktualisieren
+            old_assigned_to = old_data['assigned_to_id']
+            if old_assigned_to != instance.assigned_to_id:
+                if old_assigned_to:
+                    instance.watchers.remove(old_assigned_to)
+                if instance.assigned_to_id:
+                    instance.watchers.add(instance.assigned_to_id)
+                    self._assign(fanout, instance)
+
+            # Benachrichtige Beobachter und zugewiesenen Mitarbeiter über die Änderungen
+            if changes:
                 message_lines = [f"Änderungen an VisiView Ticket #{instance.ticket_number} - {instance.title}"]
                 message_lines.append("")  # Leerzeile
                 for label, oldv, newv in changes:
                     message_lines.append(f"• {label}: {oldv or '(leer)'} → {newv or '(leer)'}")
                 message_lines.append("")  # Leerzeile
                 message_lines.append(f"Link zum Ticket: /visiview/tickets/{instance.id}")
-                message_text = "\n".join(message_lines)
-
-                # Sammle alle zu benachrichtigenden User (Beobachter + zugewiesener Mitarbeiter)
-                recipients = set(instance.watchers.all())
-                if instance.assigned_to:
-                    recipients.add(instance.assigned_to)
-
-                logger.warning(f"Sende Ticket-Benachrichtigungen an {len(recipients)} Empfänger")
-                
-                for recipient in recipients:
-                    # Sende nicht an den Ändernden selbst
-                    if recipient == self.request.user:
-                        continue
-                    try:
-                        notification = Notification.objects.create(
-                            user=recipient,
-                            title=f"Änderung des Tickets #{instance.ticket_number}",
-                            message=message_text,
-                            notification_type='info',
-                            related_url=f'/visiview/tickets/{instance.id}'
-                        )
-                        logger.warning(f"Benachrichtigung erstellt für {recipient.username}: ID {notification.id}")
-                    except Exception as e:
-                        logger.error(f"Fehler beim Erstellen der Benachrichtigung für {recipient.username}: {e}")
-                        
-            except Exception as e:
-                # Nicht fatal - loggen für Debugging
-                logger.error(f"Fehler beim Senden von Ticket-Benachrichtigungen: {e}")
+                fanout.notify(
+                    recipient_ids(instance.watchers, instance.assigned_to_id, exclude=self.request.user),
+                    title=f"Änderung des Tickets #{instance.ticket_number}",
+                    message="\n".join(message_lines),
+                    notification_type='info',
+                    related_url=f'/visiview/tickets/{instance.id}'
+                )
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def upload_attachment(self, request, pk=None):
@@ -823,9 +732,7 @@ class VisiViewTicketViewSet(viewsets.ModelViewSet):
         ticket = self.get_object()
         try:
             attachment = VisiViewTicketAttachment.objects.get(id=attachment_id, ticket=ticket)
-            return FileResponse(attachment.file.open('rb'), 
-                              as_attachment=True, 
-                              filename=attachment.filename)
+            return media_response(request, attachment.file, filename=attachment.filename)
         except VisiViewTicketAttachment.DoesNotExist:
             raise Http404("Anhang nicht gefunden")
     
@@ -928,31 +835,21 @@ class VisiViewTicketViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Gibt Statistiken zu den Tickets zurück"""
-        queryset = self.get_queryset()
-        
-        # Status-Verteilung
-        status_counts = {}
-        for status_choice in VisiViewTicket.STATUS_CHOICES:
-            status_counts[status_choice[0]] = queryset.filter(status=status_choice[0]).count()
-        
-        # Tracker-Verteilung
-        tracker_counts = {
-            'bug': queryset.filter(tracker='bug').count(),
-            'feature': queryset.filter(tracker='feature').count(),
-        }
-        
-        # Prioritäts-Verteilung
-        priority_counts = {}
-        for priority_choice in VisiViewTicket.PRIORITY_CHOICES:
-            priority_counts[priority_choice[0]] = queryset.filter(priority=priority_choice[0]).count()
+        closed = Q(status__in=['resolved', 'closed', 'rejected'])
+        counts = cached_counts(
+            self.get_queryset(), 'status', 'priority',
+            open=~closed,
+            closed=closed,
+            by_tracker={'bug': Q(tracker='bug'), 'feature': Q(tracker='feature')},
+        )
         
         return Response({
-            'total': queryset.count(),
-            'open': queryset.exclude(status__in=['resolved', 'closed', 'rejected']).count(),
-            'closed': queryset.filter(status__in=['resolved', 'closed', 'rejected']).count(),
-            'by_status': status_counts,
-            'by_tracker': tracker_counts,
-            'by_priority': priority_counts,
+            'total': counts['total'],
+            'open': counts['open'],
+            'closed': counts['closed'],
+            'by_status': counts['by_status'],
+            'by_tracker': counts['by_tracker'],
+            'by_priority': counts['by_priority'],
         })
     
     @action(detail=True, methods=['get'])
@@ -1164,17 +1061,7 @@ class VisiViewMacroViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Gibt Statistiken zu den Macros zurück"""
-        queryset = self.get_queryset()
-        
-        # Status-Verteilung
-        status_counts = {}
-        for status_choice in VisiViewMacro.STATUS_CHOICES:
-            status_counts[status_choice[0]] = queryset.filter(status=status_choice[0]).count()
-        
-        return Response({
-            'total': queryset.count(),
-            'by_status': status_counts,
-        })
+        return Response(cached_counts(self.get_queryset(), 'status'))
 
 
 class VisiViewMacroExampleImageViewSet(viewsets.ModelViewSet):
@@ -1254,23 +1141,7 @@ class SupportedHardwareViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Gibt Statistiken zur unterstützten Hardware zurück"""
-        queryset = self.get_queryset()
-        
-        # Anzahl pro Kategorie
-        category_counts = {}
-        for category_choice in SupportedHardware.CATEGORY_CHOICES:
-            category_counts[category_choice[0]] = queryset.filter(category=category_choice[0]).count()
-        
-        # Anzahl pro Support-Level
-        support_level_counts = {}
-        for level_choice in SupportedHardware.SUPPORT_LEVEL_CHOICES:
-            support_level_counts[level_choice[0]] = queryset.filter(support_level=level_choice[0]).count()
-        
-        return Response({
-            'total': queryset.count(),
-            'by_category': category_counts,
-            'by_support_level': support_level_counts,
-        })
+        return Response(cached_counts(self.get_queryset(), 'category', 'support_level'))
 
 
 class SupportedHardwareUseCaseViewSet(viewsets.ModelViewSet):
@@ -940,9 +940,12 @@ const CompanyCalendar = () => {
     try {
       if (selectedEvent?.id && typeof selectedEvent.id === 'number') {
         // Bei Update: Prüfe ob update_series Flag gesetzt ist
-        const url = eventData.update_series 
-          ? `/calendar/events/${selectedEvent.id}/?update_series=true`
-          : `/calendar/events/${selectedEvent.id}/`;
+        // occurrence_date: der angeklickte Termin einer (berechneten) Serie
+        const params = new URLSearchParams();
+        if (eventData.update_series) params.append('update_series', 'true');
+        if (selectedEvent.occurrence_date) params.append('occurrence_date', selectedEvent.occurrence_date);
+        const query = params.toString();
+        const url = `/calendar/events/${selectedEvent.id}/${query ? `?${query}` : ''}`;
         
         // Entferne update_series aus den Daten
         const { update_series, ...dataToSend } = eventData;
@@ -984,9 +987,12 @@ const CompanyCalendar = () => {
     }
     
     try {
-      const url = deleteSeries 
-        ? `/calendar/events/${eventId}/?delete_series=true`
-        : `/calendar/events/${eventId}/`;
+      let url = `/calendar/events/${eventId}/`;
+      if (deleteSeries) {
+        url += '?delete_series=true';
+      } else if (event?.occurrence_date) {
+        url += `?occurrence_date=${event.occurrence_date}`;
+      }
       await api.delete(url);
       fetchEvents();
       if (showStatistics) fetchStatistics();
@@ -19,11 +19,31 @@ const AdminDelete = () => {
   const [success, setSuccess] = useState(null);
   const [confirmText, setConfirmText] = useState('');
   const [isDeleting, setIsDeleting] = useState(false);
+  const [job, setJob] = useState(null);
 
   useEffect(() => {
     fetchTypes();
   }, []);
 
+  // Fortschritt eines Löschauftrags im Hintergrund abfragen
+  useEffect(() => {
+    if (!job || job.status === 'done' || job.status === 'failed') return undefined;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await api.get(`/core/admin-delete/jobs/${job.id}/`);
+        setJob(response.data);
+        if (response.data.status === 'done') {
+          setSuccess(`${response.data.description} wurde gelöscht (${response.data.deleted_rows} Einträge, ${response.data.media_count} Dateien im Papierkorb).`);
+        } else if (response.data.status === 'failed') {
+          setError('Fehler beim Löschen: ' + response.data.error);
+        }
+      } catch (err) {
+        setError('Fehler beim Abfragen des Löschauftrags: ' + (err.response?.data?.error || err.message));
+      }
+    }, 1000);
+    return () => clearTimeout(timer);
+  }, [job]);
+
   const fetchTypes = async () => {
     try {
       const response = await api.get('/core/admin-delete/types/');
@@ -77,6 +97,7 @@ const AdminDelete = () => {
         confirm: true
       });
       setSuccess(response.data.message);
+      setJob(response.status === 202 ? response.data.job : null);
       setPreview(null);
       setSearchId('');
       setConfirmText('');
@@ -199,6 +220,19 @@ const AdminDelete = () => {
         </div>
       )}
 
+      {/* Deletion Job Progress */}
+      {job && job.status !== 'done' && job.status !== 'failed' && (
+        <div className="bg-blue-50 border border-blue-200 rounded-lg p-4 mb-6">
+          <div className="flex justify-between text-sm text-blue-800 mb-2">
+            <span>Löschauftrag #{job.id}: {job.status_display}</span>
+            <span>{job.deleted_rows} / {job.total_rows} Einträge ({job.progress}%)</span>
+          </div>
+          <div className="w-full bg-blue-100 rounded-full h-2">
+            <div className="bg-blue-600 h-2 rounded-full" style={{ width: `${job.progress}%` }}></div>
+          </div>
+        </div>
+      )}
+
       {/* Loading */}
       {loading && (
         <div className="flex justify-center py-8">
@@ -259,11 +293,27 @@ const AdminDelete = () => {
                       <li key={idx}>{rel.name}: {rel.count} Einträge</li>
                     ))}
                   </ul>
+                  <p className="text-yellow-700 text-sm mt-2">
+                    Insgesamt werden {preview.total_rows} Einträge gelöscht
+                    {preview.runs_in_background && ' (als Löschauftrag im Hintergrund)'}.
+                  </p>
                 </div>
               </div>
             </div>
           )}
 
+          {/* Blocking Objects */}
+          {preview.blocked_rows > 0 && (
+            <div className="bg-red-50 border-l-4 border-red-500 p-4 mb-6">
+              <h3 className="text-red-800 font-medium">Löschen nicht möglich</h3>
+              <ul className="list-disc list-inside text-red-700 text-sm mt-1">
+                {preview.impact.filter(entry => entry.action === 'blocked').map((entry, idx) => (
+                  <li key={idx}>{entry.name}: {entry.count} Einträge verhindern das Löschen</li>
+                ))}
+              </ul>
+            </div>
+          )}
+
           {/* Delete Confirmation */}
           <div className="border-t pt-6">
             <h3 className="text-lg font-medium text-red-600 mb-4">